@@ -1,15 +1,31 @@
 """Tests for core modules."""
+import os
+import stat
 import sys
+import threading
 import time
 import pytest
-from unittest.mock import patch
+from unittest.mock import MagicMock, patch
 import platform
 import codecs
 from pathlib import Path
+from tik_manager4.core import archive
+from tik_manager4.core import content_store
+from tik_manager4.core import delta
+from tik_manager4.core import disk_usage
 from tik_manager4.core import filelog
 from tik_manager4.core import io
+from tik_manager4.core import local_cache
 from tik_manager4.core import settings
+from tik_manager4.core import sync
+from tik_manager4.core import timing
+from tik_manager4.core import transfer
 from tik_manager4.core import utils
+from tik_manager4.core import warm_cache
+from tik_manager4.core.constants import ObjectType
+from tik_manager4.objects.preview import ConversionQueue, Preview, PreviewContext
+from tik_manager4.objects.preview import get_smallest_preview
+from tik_manager4.objects.version import WorkVersion
 from tik_manager4.ui.Qt import QtWidgets
 from tik_manager4.external.filelock import FileLock, Timeout
 
@@ -212,6 +228,60 @@ def test_settings_fallback_function(tmp_path):
     # read the data back
     assert _settings.get_property("test_string") == "fallback_test"
 
+def test_settings_merge_on_write(tmp_path):
+    """Merge the changes into the latest file instead of replacing it."""
+    original = {
+        "name": "a",
+        "removed": 1,
+        "versions": [
+            {"version_number": 1, "notes": "", "previews": {}},
+            {"version_number": 2, "notes": ""},
+        ],
+    }
+    current = {
+        "name": "b",
+        "versions": [
+            {"version_number": 1, "notes": "first", "previews": {}},
+            {"version_number": 3, "notes": "new"},
+        ],
+    }
+    latest = {
+        "name": "a",
+        "removed": 1,
+        "others": True,
+        "versions": [
+            {"version_number": 1, "notes": "", "previews": {"persp": "persp.mp4"}},
+            {"version_number": 2, "notes": ""},
+            {"version_number": 4, "notes": "theirs"},
+        ],
+    }
+    assert settings.merge_changes(original, current, latest) == {
+        "name": "b",
+        "others": True,
+        "versions": [
+            {"version_number": 1, "notes": "first", "previews": {"persp": "persp.mp4"}},
+            {"version_number": 4, "notes": "theirs"},
+            {"version_number": 3, "notes": "new"},
+        ],
+    }
+
+    file_path = tmp_path / "merged.json"
+    owner = settings.Settings(str(file_path))
+    owner.merge_on_write = True
+    owner.add_property("notes", "first")
+    assert owner.apply_settings()
+    other = settings.Settings(str(file_path))
+    other.add_property("previews", {"persp": "persp.mp4"})
+    other.apply_settings()
+    owner.edit_property("notes", "second")
+    assert owner.apply_settings()
+    assert io.IO(str(file_path)).read() == {
+        "notes": "second", "previews": {"persp": "persp.mp4"}
+    }
+    assert owner.get_property("previews") == {"persp": "persp.mp4"}
+    assert not owner.is_settings_changed()
+
+
 def test_io(tmp_path):
     """Test io module"""
     # create a io module without any arguments
@@ -304,3 +374,586 @@ def test_execute(tmp_path):
         with patch("subprocess.Popen") as mock_popen:
             utils.execute(str(_file))
             mock_popen.assert_called_once_with(["open", str(_file)])
+
+
+def test_publish_timings_and_report(tmp_path):
+    """Test the timing records and the aggregated reports."""
+    timings = timing.Timings()
+    with timings.measure("save"):
+        time.sleep(0.01)
+    timings.add("extract:alembic", 1.0, 100)
+    timings.add("extract:alembic", 0.5, 50)
+    record = timings.to_dict()
+    assert record["save"][0] >= 0.01
+    assert record["extract:alembic"] == [1.5, 150]
+
+    assert timing.percentile([], 50) == 0.0
+    assert timing.percentile([1, 2, 3, 4], 50) == 2.5
+    assert timing.percentile([1, 2, 3, 4], 100) == 4
+
+    database = tmp_path / "tikDatabase"
+    for nmb, seconds in enumerate([1.0, 2.0, 3.0]):
+        _io = io.IO(str(database / "sub" / f"model_v{nmb:03d}.tpub"))
+        _io.write({"category": "Model",
+                   "timings": {"extract:fbx": [seconds, 10], "publish": [seconds, 0]}})
+    io.IO(str(database / "sub" / "no_record.tpub")).write({"category": "Rig"})
+
+    report = timing.build_report(str(database), percentiles=(50, 100))
+    assert list(report["categories"].keys()) == ["Model"]
+    assert report["categories"]["Model"]["publish"]["count"] == 3
+    assert report["categories"]["Model"]["publish"]["p50"] == 2.0
+    assert report["extractors"]["fbx"]["p100"] == 3.0
+    assert report["extractors"]["fbx"]["total_bytes"] == 30
+    assert "[Extractors]" in timing.format_report(report)
+
+def test_write_protect_and_unprotect(tmp_path):
+    """Test recursive write protection utilities."""
+    bundle = tmp_path / "bundle"
+    for folder_nmb in range(3):
+        folder = bundle / f"folder_{folder_nmb}"
+        folder.mkdir(parents=True)
+        for file_nmb in range(utils.PARALLEL_THRESHOLD):
+            (folder / f"texture_{file_nmb}.exr").write_text("data")
+    all_files = [p for p in bundle.rglob("*") if p.is_file()]
+
+    assert utils.write_protect(str(bundle)) == (True, "Write protection applied.")
+    assert all(stat.S_IMODE(p.stat().st_mode) == 0o444 for p in all_files)
+    # folders should stay accessible
+    assert stat.S_IMODE((bundle / "folder_0").stat().st_mode) != 0o444
+
+    # already protected files are skipped
+    changed, failures = utils.apply_permissions(str(bundle), 0o444)
+    assert changed == 0 and failures == []
+
+    single_file = all_files[0]
+    state, _msg = utils.write_unprotect(str(single_file))
+    assert state
+    assert stat.S_IMODE(single_file.stat().st_mode) == 0o777
+
+    state, _msg = utils.write_unprotect(str(bundle))
+    assert state
+    assert all(stat.S_IMODE(p.stat().st_mode) == 0o777 for p in all_files)
+
+    # failures are reported in aggregate
+    with patch("os.chmod", side_effect=PermissionError("denied")):
+        state, msg = utils.write_protect(str(bundle))
+    assert not state
+    assert f"{len(all_files)} file(s)" in msg
+
+    utils.write_protect(str(bundle))
+    assert utils.delete(str(bundle))[0]
+    assert not bundle.exists()
+
+def test_preview_conversion_queue(tmp_path):
+    """Test the background preview conversion queue."""
+    completed = []
+
+    def _convert(path):
+        time.sleep(0.1)
+        return path.replace(".avi", ".mp4")
+
+    def _fail(path):
+        raise RuntimeError("ffmpeg crashed")
+
+    start = time.monotonic()
+    jobs = [ConversionQueue.submit(_convert, f"preview_{nmb}.avi",
+                                   on_complete=completed.append) for nmb in range(4)]
+    ConversionQueue.submit(_fail, "broken.avi", on_complete=completed.append)
+    # submitting should not wait for the conversions
+    assert time.monotonic() - start < 0.1
+    assert ConversionQueue.wait(timeout=10)
+    assert ConversionQueue.pending_count() == 0
+    assert sorted(completed) == [f"preview_{nmb}.mp4" for nmb in range(4)]
+    assert jobs[0].result() == "preview_0.mp4"
+
+    # ffmpeg detection is cached
+    assert ConversionQueue.get_ffmpeg() is ConversionQueue.get_ffmpeg()
+
+    # intermediate image sequences
+    for frame in range(1001, 1011):
+        (tmp_path / f"test_v001.{frame}.jpg").write_text("frame")
+    (tmp_path / "test_v002.1001.jpg").write_text("frame")
+    pattern = str(tmp_path / "test_v001.%04d.jpg")
+    assert len(Preview._get_sequence_files(pattern)) == 10
+    assert Preview._get_sequence_files(str(tmp_path / "test_v001.jpg")) == []
+    assert Preview._resolve_converted_path(pattern) == str(tmp_path / "test_v001.mp4")
+    assert Preview._resolve_converted_path(str(tmp_path / "test_v001.avi")) == str(
+        tmp_path / "test_v001.mp4")
+
+
+def test_preview_proxies_and_sprite_sheets(tmp_path):
+    """Test the proxies and sprite sheets are queued and registered."""
+    work_version = WorkVersion("work_path", {"version_number": 1, "previews": {}})
+    work = MagicMock()
+    work.object_type = ObjectType.WORK
+    work.get_abs_project_path.return_value = str(tmp_path)
+    work.get_version.return_value = work_version
+
+    context = PreviewContext(camera="persp", frame_range=(1001, 1100), version_number=1)
+    settings = {"GenerateProxy": True, "GenerateSpriteSheet": True, "SpriteSheetFrames": 10}
+    preview = Preview(context, work, settings=settings)
+    preview_path = tmp_path / "persp_test_v001.mp4"
+
+    commands = []
+    with patch.object(ConversionQueue, "get_ffmpeg", return_value="ffmpeg"), \
+            patch.object(Preview, "_run_ffmpeg", side_effect=commands.append):
+        preview._finalize("persp", str(preview_path), show_after=False)
+        assert ConversionQueue.wait(timeout=10)
+
+    assert len(commands) == 2
+    assert work_version.previews == {"persp": "previews/persp_test_v001.mp4"}
+    # the background registrations are written to the file only
+    assert work.update_file.call_count == 3
+    assert work_version.preview_proxies == {}
+    assert work_version.preview_sprites == {}
+    proxies, sprites = {}, {}
+    for update in work.update_file.call_args_list:
+        data = {"versions": [{"version_number": 1}]}
+        update.args[0](data)
+        proxies.update(data["versions"][0].get("preview_proxies", {}))
+        sprites.update(data["versions"][0].get("preview_sprites", {}))
+    assert proxies == {"persp": "previews/persp_test_v001_proxy.mp4"}
+    work_version.preview_proxies.update(proxies)
+    sprite = sprites["persp"]
+    assert sprite["path"] == "previews/persp_test_v001_sprite.jpg"
+    # the configured frame count is kept and the last row is left partial
+    assert (sprite["frames"], sprite["columns"], sprite["rows"], sprite["step"]) == (10, 4, 3, 10)
+    assert "tile=4x3:nb_frames=10" in commands[1][commands[1].index("-vf") + 1]
+    assert "preview_proxies" in work_version.to_dict()
+    assert get_smallest_preview(work_version, "persp").endswith("_proxy.mp4")
+
+
+def test_background_preview_registration_keeps_other_changes(tmp_path):
+    """Merge the background registrations with the writes of the owner."""
+    publish_version = settings.Settings(str(tmp_path / "test_v001.tpub"))
+    publish_version.merge_on_write = True
+    publish_version.object_type = ObjectType.PUBLISH_VERSION
+    publish_version.version = 1
+    publish_version.get_abs_project_path = lambda *args: str(tmp_path)
+    publish_version.add_property("notes", "first")
+    publish_version.apply_settings()
+
+    context = PreviewContext(camera="persp", frame_range=(1, 3))
+    preview = Preview(context, publish_version)
+    assert preview._verify_context()
+    job = ConversionQueue.submit(
+        lambda: "previews/persp_test_v001.mp4",
+        on_complete=lambda path: preview.register_data({"persp": path}),
+    )
+    job.result()
+    assert ConversionQueue.wait(timeout=10)
+    assert publish_version.get_property("previews") is None
+    assert publish_version.reload()["previews"] == {"persp": "previews/persp_test_v001.mp4"}
+
+    # the owner writes its stale data without losing the registration
+    publish_version.edit_property("notes", "second")
+    publish_version.apply_settings(force=True)
+    data = io.IO(str(tmp_path / "test_v001.tpub")).read()
+    assert data["notes"] == "second"
+    assert data["previews"] == {"persp": "previews/persp_test_v001.mp4"}
+    # and takes the registration
+    assert publish_version.get_property("previews") == data["previews"]
+    assert not list(tmp_path.glob("*.tmp"))
+
+
+def test_local_cache_lru_and_prefetch(tmp_path):
+    """Test the local read cache quota, eviction, verification and prefetching."""
+    origin = tmp_path / "origin"
+    origin.mkdir()
+    for nmb in range(4):
+        (origin / f"element_{nmb}.abc").write_bytes(b"x" * 100)
+    bundle = origin / "bundle"
+    bundle.mkdir()
+    (bundle / "texture.exr").write_bytes(b"x" * 50)
+
+    cache = local_cache.LocalCache(str(tmp_path / "cache"), quota_bytes=300)
+    source = str(origin / "element_0.abc")
+    assert cache.get(source, "proj/element_0.abc") is None
+    local_path = cache.fetch(source, "proj/element_0.abc")
+    assert Path(local_path).read_bytes() == b"x" * 100
+    assert cache.get(source, "proj/element_0.abc") == local_path
+
+    # folders are cached as a whole
+    assert Path(cache.fetch(str(bundle), "proj/bundle"), "texture.exr").exists()
+
+    # least recently used copies are evicted to stay under the quota
+    cache.get(source, "proj/element_0.abc")
+    cache.fetch(str(origin / "element_1.abc"), "proj/element_1.abc")
+    cache.fetch(str(origin / "element_2.abc"), "proj/element_2.abc")
+    assert cache.total_size <= 300
+    assert cache.get(str(bundle), "proj/bundle") is None
+    assert cache.get(source, "proj/element_0.abc")
+
+    # changed origins are not served
+    time.sleep(0.01)
+    Path(source).write_bytes(b"y" * 80)
+    assert cache.get(source, "proj/element_0.abc") is None
+    stats = cache.stats()
+    assert stats["hits"] == 3 and stats["evictions"] == 1 and stats["quota"] == 300
+
+    # the index survives a new session
+    cache = local_cache.LocalCache(str(tmp_path / "cache"), quota_bytes=300)
+    assert cache.get(str(origin / "element_2.abc"), "proj/element_2.abc")
+
+    prefetcher = local_cache.Prefetcher(cache)
+    items = [(str(origin / f"element_{nmb}.abc"), f"proj/element_{nmb}.abc") for nmb in (0, 3)]
+    items.append((str(origin / "missing.abc"), "proj/missing.abc"))
+    assert prefetcher.prefetch(items) == 3
+    prefetcher.wait()
+    assert cache.get(str(origin / "element_3.abc"), "proj/element_3.abc")
+    assert cache.get(str(origin / "missing.abc"), "proj/missing.abc") is None
+
+    # the workers never block exiting and the queued copies can be cancelled
+    running, release = threading.Event(), threading.Event()
+
+    def _slow_collector():
+        running.set()
+        release.wait(5)
+        return []
+
+    prefetcher = local_cache.Prefetcher(cache, max_workers=1)
+    collection = prefetcher.prefetch_from(_slow_collector)
+    assert running.wait(5)
+    assert prefetcher.prefetch(items[:2]) == 2
+    assert all(worker.daemon for worker in prefetcher._workers)
+    assert prefetcher.cancel() == 2
+    release.set()
+    assert collection.result(timeout=5) == 0
+    cache.clear()
+    assert cache.stats()["entries"] == 0
+
+
+def test_sync_job_resume_and_verify(tmp_path):
+    """Test the chunked, verified and resumable sync engine."""
+    local = tmp_path / "local"
+    origin = tmp_path / "origin"
+    (local / "bundle").mkdir(parents=True)
+    for nmb in range(6):
+        (local / "bundle" / f"piece_{nmb}.usd").write_bytes(bytes([nmb]) * 3000)
+    (local / "scene.abc").write_bytes(b"a" * 5000)
+    pairs = [(local / "bundle", origin / "bundle"), (local / "scene.abc", origin / "scene.abc")]
+    checkpoint = tmp_path / "local" / f".test{sync.CHECKPOINT_SUFFIX}"
+
+    # interrupt the first run on one of the files
+    original_copy = sync.copy_file
+
+    def _flaky_copy(source, target, *args, **kwargs):
+        if Path(source).name == "piece_3.usd":
+            raise IOError("Network dropped")
+        return original_copy(source, target, *args, **kwargs)
+
+    job = sync.SyncJob(pairs, str(checkpoint), chunk_size=1024)
+    with patch.object(sync, "copy_file", side_effect=_flaky_copy):
+        state, errors = job.run()
+    assert not state
+    assert len(errors) == 1 and "piece_3.usd" in errors[0]
+    assert not (origin / "bundle" / "piece_3.usd").exists()
+    assert not list(origin.rglob(f"*{sync.PARTIAL_SUFFIX}"))
+
+    # second run resumes only the missing file
+    progress = []
+    job = sync.SyncJob(pairs, str(checkpoint), chunk_size=1024,
+                       progress_callback=lambda done, total: progress.append((done, total)))
+    assert job.is_resuming
+    assert job.has_progress(origin / "bundle")
+    assert not job.has_progress(origin / "bund")
+    assert job.run() == (True, [])
+    assert progress[-1] == (3000, 3000)
+    for source_file, target_file in job.collect_files():
+        assert target_file.read_bytes() == source_file.read_bytes()
+
+    job.cleanup()
+    assert not (local / "bundle").exists() and not checkpoint.exists()
+
+    # bandwidth limiter paces the transfers
+    limiter = sync.BandwidthLimiter.for_host("test_host", 100000)
+    assert sync.BandwidthLimiter.for_host("test_host", 100000) is limiter
+    start = time.monotonic()
+    for _ in range(3):
+        limiter.consume(10000)
+    assert time.monotonic() - start >= 0.15
+    assert sync.get_host("//server/share/project") == "server"
+
+
+def test_transfer_copy(tmp_path):
+    """Test the parallel file transfer engine and its fallbacks."""
+    source = tmp_path / "plates"
+    for folder_nmb in range(3):
+        folder = source / f"shot_{folder_nmb}" / "exr"
+        folder.mkdir(parents=True)
+        for frame in range(20):
+            (folder / f"plate.{frame:04d}.exr").write_bytes(bytes([frame]) * 1000)
+    (source / "empty").mkdir()
+
+    progress = []
+    target = tmp_path / "copied"
+    transfer.copy(str(source), str(target),
+                  callback=lambda copied, total: progress.append((copied, total)))
+    assert (target / "empty").is_dir()
+    source_files = sorted(p.relative_to(source) for p in source.rglob("*") if p.is_file())
+    assert source_files == sorted(p.relative_to(target) for p in target.rglob("*") if p.is_file())
+    assert all((target / p).read_bytes() == (source / p).read_bytes() for p in source_files)
+    assert max(progress) == (60000, 60000)
+
+    with pytest.raises(FileExistsError):
+        transfer.copy(str(source), str(target))
+
+    # falls back to python copies when the kernel copies are not supported
+    single = source / "shot_0" / "exr" / "plate.0005.exr"
+    error = OSError(18, "Invalid cross-device link")
+    with patch.object(transfer, "_reflink", return_value=False), \
+            patch("os.copy_file_range", side_effect=error, create=True):
+        transfer.copy(str(single), str(tmp_path / "single" / "plate.exr"))
+    assert (tmp_path / "single" / "plate.exr").read_bytes() == single.read_bytes()
+
+    # permission bits of the write protected sources are not copied
+    single.chmod(0o444)
+    transfer.copy(str(single), str(tmp_path / "writable.exr"))
+    assert (tmp_path / "writable.exr").stat().st_mode & stat.S_IWUSR
+    single.chmod(0o644)
+
+    # links to folders are copied as links without following the cycles
+    (source / "shot_0" / "loop").symlink_to(source)
+    transfer.copy(str(source / "shot_0"), str(tmp_path / "linked"))
+    assert (tmp_path / "linked" / "loop").is_symlink()
+    (source / "shot_0" / "loop").unlink()
+
+    # moves across volumes copy with the engine and remove the source
+    protected = next(source.rglob("*.exr"))
+    protected_path = protected.relative_to(source)
+    protected.chmod(0o444)
+    with patch.object(utils, "is_same_volume", return_value=False):
+        state, _msg = utils.move(str(source), str(tmp_path / "moved"))
+    assert state
+    assert not source.exists()
+    assert len(list((tmp_path / "moved").rglob("*.exr"))) == 60
+    # the write protection of the moved files is kept
+    assert stat.S_IMODE((tmp_path / "moved" / protected_path).stat().st_mode) == 0o444
+    utils.write_unprotect(str(tmp_path / "moved"))
+
+
+def test_content_store(tmp_path):
+    """Test the content addressed store and its garbage collection."""
+    store = content_store.ContentStore(str(tmp_path / content_store.STORE_FOLDER_NAME))
+    bundle = tmp_path / "publish" / "TEXTURES_v001"
+    bundle.mkdir(parents=True)
+    (bundle / "albedo.exr").write_bytes(b"albedo" * 100)
+    (bundle / "roughness.exr").write_bytes(b"rough" * 100)
+    second = tmp_path / "publish" / "TEXTURES_v002" / "albedo.exr"
+    second.parent.mkdir()
+    second.write_bytes(b"albedo" * 100)
+
+    # editable files never share the inode with the store
+    work_file = tmp_path / "work" / "scene_v001.ma"
+    work_file.parent.mkdir()
+    work_file.write_bytes(b"scene" * 100)
+    store.ingest(str(work_file))
+    for _digest, object_path in store.iter_objects():
+        assert not object_path.samefile(work_file)
+    assert work_file.stat().st_nlink == 1
+    utils.delete(str(store.root))
+
+    digests = store.ingest(str(bundle), read_only=True)
+    assert len(digests) == 2
+    assert store.ingest(str(second), read_only=True) == [
+        content_store.hash_file(bundle / "albedo.exr")]
+    assert store.stats() == {"objects": 2, "size": 1100}
+    assert second.read_bytes() == b"albedo" * 100
+    # the visible file is a link to the stored object
+    object_path = store.get_object_path(digests[0])
+    assert object_path.samefile(bundle / "albedo.exr") or (
+        object_path.read_bytes() == second.read_bytes())
+    assert store.ingest(str(tmp_path / "missing")) == []
+
+    assert store.collect_garbage({digests[0]}) == (1, 500)
+    assert store.stats()["objects"] == 1
+    assert (bundle / "roughness.exr").read_bytes() == b"rough" * 100
+
+
+def test_delta_compression(tmp_path):
+    """Test the delta chains of text files."""
+    lines = [f"line {i}\n".encode() for i in range(1000)]
+    files = []
+    for index in range(3):
+        lines[index] = f"changed {index}\n".encode()
+        files.append(tmp_path / f"scene_v{index + 1:03d}.ma")
+        files[-1].write_bytes(b"".join(lines))
+    contents = [file_path.read_bytes() for file_path in files]
+
+    assert delta.apply_delta(contents[1], delta.create_delta(contents[1], contents[0])) == contents[0]
+
+    # compress the chain from the oldest, each against its successor
+    assert delta.compress_file(files[0], files[1]) > 0
+    assert delta.compress_file(files[1], files[2]) > 0
+    assert delta.is_delta(files[0]) and not files[0].exists()
+    assert delta.get_base_name(files[0]) == files[1].name
+    assert delta.read_bytes(files[0]) == contents[0]
+
+    # unrelated content is not worth a delta
+    other = tmp_path / "other.ma"
+    other.write_bytes(os.urandom(8000))
+    assert delta.compress_file(other, files[2]) is None
+    assert other.exists()
+
+    assert delta.expand_file(files[1]) == str(files[1])
+    assert files[1].read_bytes() == contents[1] and not delta.is_delta(files[1])
+    assert delta.read_bytes(files[0]) == contents[0]
+
+    # long chains are read without recursion
+    chain = []
+    for index in range(sys.getrecursionlimit() + 100):
+        chain.append(tmp_path / "chain" / f"scene_v{index:04d}.ma")
+        chain[-1].parent.mkdir(exist_ok=True)
+        chain[-1].write_bytes(b"".join(lines[:200]) + f"version {index}\n".encode())
+    first_content = chain[0].read_bytes()
+    for file_path, base_path in zip(chain, chain[1:]):
+        delta.compress_file(file_path, base_path)
+    assert delta.get_chain_length(chain[0]) == len(chain) - 1
+    assert delta.read_bytes(chain[0]) == first_content
+
+
+def test_archive_and_extract(tmp_path):
+    """Test the compressed cold storage archives."""
+    bundle = tmp_path / "project" / "char_v001"
+    (bundle / "textures").mkdir(parents=True)
+    (bundle / "char.ma").write_bytes(b"createNode mesh;\n" * 1000)
+    (bundle / "textures" / "albedo.exr").write_bytes(os.urandom(4096))
+
+    archive_path = archive.get_archive_path(tmp_path / "cold", "project", "char_v001")
+    assert archive_path.endswith("project/char_v001.tar.gz")
+    progress = []
+    size = archive.create_archive(bundle, archive_path, lambda *args: progress.append(args))
+    assert size < utils.get_size(str(bundle))
+    assert progress[-1] == (utils.get_size(str(bundle)),) * 2
+
+    restore_folder = tmp_path / "restored"
+    progress.clear()
+    extracted = archive.extract_archive(
+        archive_path, restore_folder, lambda *args: progress.append(args)
+    )
+    assert extracted == [(restore_folder / "char_v001").resolve().as_posix()]
+    assert (restore_folder / "char_v001" / "char.ma").read_bytes() == (bundle / "char.ma").read_bytes()
+    assert progress[-1][0] == progress[-1][1] == utils.get_size(str(bundle))
+    assert not list(tmp_path.rglob(f"*{archive.PARTIAL_SUFFIX}"))
+
+
+def test_deferred_delete(tmp_path):
+    """Test renaming folders into the trash and deleting them in the background."""
+    folder = tmp_path / "sub" / "heavy"
+    for index in range(100):
+        nested = folder / f"shot_{index % 5}"
+        nested.mkdir(parents=True, exist_ok=True)
+        (nested / f"frame_{index}.exr").write_bytes(b"frame")
+    protected = folder / "protected.exr"
+    protected.write_bytes(b"protected")
+    utils.write_protect(str(protected))
+
+    results = []
+    ret, msg = utils.delete(str(folder), defer=True, callback=lambda *args: results.append(args))
+    assert ret and "trash" in msg
+    # the caller does not wait for the deletion
+    assert not folder.exists()
+    utils.wait_for_deletions()
+    assert results == [(True, results[0][1])]
+    assert utils.pending_deletions() == 0
+    assert list((tmp_path / "sub").iterdir()) == []
+
+    # leftovers of the interrupted sessions are swept by the next deletion
+    leftover = tmp_path / "sub" / utils.TRASH_FOLDER_NAME / "old.1234abcd"
+    (leftover / "nested").mkdir(parents=True)
+    (leftover / "nested" / "frame.exr").write_bytes(b"frame")
+    second = tmp_path / "sub" / "second"
+    second.mkdir()
+    (second / "frame.exr").write_bytes(b"frame")
+    with patch.object(utils, "STALE_TRASH_SECONDS", -1):
+        assert utils.delete(str(second), defer=True)[0]
+    assert len(utils.wait_for_deletions()) == 2
+    assert list((tmp_path / "sub").iterdir()) == []
+    assert utils.cancel_deletions() == 0
+
+    # files are deleted inline
+    single = tmp_path / "single.txt"
+    single.write_text("single")
+    assert utils.delete(str(single), defer=True)[0] and not single.exists()
+
+
+def test_disk_usage_scan_and_cache(tmp_path):
+    """Test the parallel disk usage scan and its incremental cache."""
+    root = tmp_path / "project"
+    for shot in range(4):
+        folder = root / f"shot_{shot}" / "cache"
+        folder.mkdir(parents=True)
+        (folder / "sim.abc").write_bytes(b"x" * 1000)
+        (folder.parent / "scene.ma").write_bytes(b"y" * 100)
+
+    cache_file = tmp_path / "cache" / disk_usage.CACHE_FILE_NAME
+    cache = disk_usage.ScanCache(str(cache_file))
+    usage = disk_usage.DiskUsage(disk_usage.scan([str(root)], cache=cache, max_workers=4))
+    assert usage.total == 4400
+    assert usage.get_size(root / "shot_0") == (1100, True)
+    assert usage.get_size(root / "shot_1" / "scene.ma") == (100, True)
+    assert cache.misses == 9
+
+    # unchanged folders are not listed again
+    (root / "shot_3" / "new.ma").write_bytes(b"z" * 50)
+    cache = disk_usage.ScanCache(str(cache_file))
+    usage = disk_usage.DiskUsage(disk_usage.scan([str(root)], cache=cache))
+    assert usage.total == 4450
+    assert (cache.hits, cache.misses) == (8, 1)
+
+    report = {"works": [{"path": "shot_0", "total": 1100}], "scanned": usage.total}
+    csv_file = disk_usage.export_report(report, tmp_path / "report.csv")
+    assert Path(csv_file).read_text().splitlines() == ["path,total", "shot_0,1100"]
+    json_file = disk_usage.export_report(report, tmp_path / "report.json")
+    assert io.IO().read(json_file) == report
+
+
+def test_warm_cache(tmp_path):
+    """Test serving the settings files from the warm start cache."""
+    database = tmp_path / "tikDatabase"
+    database.mkdir()
+    task_file = database / "shot.ttask"
+    io.IO().write({"name": "shot", "categories": {}}, str(task_file))
+    cache_file = tmp_path / "user" / "warm_cache" / "project.json"
+
+    cache = warm_cache.WarmCache(str(cache_file), str(database))
+    settings.Settings.set_warm_cache(cache)
+    try:
+        task = settings.Settings(str(task_file))
+        assert task.get_property("name") == "shot"
+        assert cache.save()
+
+        # the next session serves the file from the cache without reading it
+        cache = warm_cache.WarmCache(str(cache_file), str(database))
+        assert cache.load() == 1
+        settings.Settings.set_warm_cache(cache)
+        with patch.object(io.IO, "read", side_effect=AssertionError):
+            task = settings.Settings(str(task_file))
+        assert task.get_property("name") == "shot"
+        assert cache.hits == 1
+        assert not task.is_modified()
+
+        # files outside of the root are never cached
+        outside_file = tmp_path / "outside.json"
+        io.IO().write({"name": "outside"}, str(outside_file))
+        settings.Settings(str(outside_file))
+        assert cache.get(str(outside_file)) is None
+
+        # modified files are detected and dropped by the validation
+        time.sleep(0.05)
+        io.IO().write({"name": "renamed", "categories": {}}, str(task_file))
+        assert task.is_modified()
+        stale = []
+        assert cache.validate(callback=stale.extend).result() == [os.path.normpath(task_file)]
+        assert stale == [os.path.normpath(task_file)]
+        assert cache.get(str(task_file)) is None
+        assert task.reload()["name"] == "renamed"
+        assert cache.get(str(task_file))[1]["name"] == "renamed"
+
+        # stale entries are never served, even before the validation
+        time.sleep(0.05)
+        io.IO().write({"name": "final", "categories": {}}, str(task_file))
+        assert settings.Settings(str(task_file)).get_property("name") == "final"
+        assert cache.get(str(task_file))[1]["name"] == "final"
+    finally:
+        settings.Settings.set_warm_cache(None)
@@ -8,7 +8,10 @@ from unittest.mock import patch
 import pytest
 
 import tik_manager4
+from tik_manager4.core import delta
+from tik_manager4.core import io
 from tik_manager4.core import settings
+from tik_manager4.core import transfer
 from tik_manager4.core import utils
 
 
@@ -796,8 +799,471 @@ class TestProject:
         # validate that there are two versions of this work
         assert work.version_count == 2
 
+        # the previews registered in the background survive the writes
+        def _register(data):
+            data["versions"][0]["previews"] = {"persp": "previews/persp_v001.mp4"}
+
+        work.update_file(_register)
+        assert work.get_version(1).previews == {}
+        work.get_version(2).notes = "edited"
+        work.omit()
+        data = work._io.read()
+        assert data["versions"][0]["previews"] == {"persp": "previews/persp_v001.mp4"}
+        assert data["versions"][1]["notes"] == "edited"
+        assert data["state"] == "omitted"
+        assert work.get_version(1).previews == {"persp": "previews/persp_v001.mp4"}
+
+        monkeypatch.undo()
+
+    def test_content_store_deduplication(
+        self, project_manual_path, tik, monkeypatch, tmp_path
+    ):
+        self.test_creating_and_adding_new_tasks(project_manual_path, tik)
+        tik.user.set("Admin", 1234)
+        tik.project.settings.edit_property("content_store", True)
+
+        model_category = (
+            tik.project.subs["Assets"]
+            .subs["Characters"]
+            .subs["Soldier"]
+            .tasks["superman"]
+            .categories["Model"]
+        )
+        test_file = tmp_path / "texture.exr"
+        test_file.write_bytes(b"texture" * 1000)
+
+        def mock_text_to_image(*args, **kwargs):
+            return Path(args[1]).with_suffix(".png")
+
+        from tik_manager4.dcc.standalone.main import Dcc
+
+        monkeypatch.setattr(Dcc, "text_to_image", mock_text_to_image)
+
+        model_category.create_work_from_path("texture", str(test_file))
+        work = model_category.create_work_from_path("texture", str(test_file))
+        first, second = work.versions
+        assert first.content_hashes and first.content_hashes == second.content_hashes
+        first_path = Path(work.get_abs_project_path(first.scene_path))
+        second_path = Path(work.get_abs_project_path(second.scene_path))
+        # editable work files are never hard links of the stored objects
+        assert first_path.stat().st_nlink == second_path.stat().st_nlink == 1
+
+        # they are only deduplicated where the reflinks are supported
+        probe = Path(project_manual_path, "reflink_probe")
+        probe.write_bytes(b"probe")
+        reflinks = transfer.reflink(str(probe), str(probe.with_suffix(".clone")))
+        utils.delete(str(probe))
+        utils.delete(str(probe.with_suffix(".clone")))
+        store = tik.project.guard.get_content_store()
+        assert store.stats()["objects"] == int(reflinks)
+        assert tik.project.collect_content_garbage() == (0, 0)
+
+        # objects without any references are collected
+        for version in work.versions:
+            version.content_hashes.clear()
+        work.apply_settings(force=True)
+        assert tik.project.collect_content_garbage() == (
+            (1, 7000) if reflinks else (0, 0))
+        assert first_path.read_bytes() == second_path.read_bytes() == b"texture" * 1000
+
+        tik.project.settings.edit_property("content_store", False)
+        monkeypatch.undo()
+
+    def test_delta_compression_of_scene_versions(
+        self, project_manual_path, tik, monkeypatch, tmp_path
+    ):
+        self.test_creating_and_adding_new_tasks(project_manual_path, tik)
+        tik.user.set("Admin", 1234)
+        tik.project.settings.edit_property("delta_compression", True)
+
+        model_category = (
+            tik.project.subs["Assets"]
+            .subs["Characters"]
+            .subs["Soldier"]
+            .tasks["superman"]
+            .categories["Model"]
+        )
+
+        def mock_text_to_image(*args, **kwargs):
+            return Path(args[1]).with_suffix(".png")
+
+        from tik_manager4.dcc.standalone.main import Dcc
+
+        monkeypatch.setattr(Dcc, "text_to_image", mock_text_to_image)
+
+        lines = [f"createNode transform -n node{i};\n" for i in range(2000)]
+        contents = []
+        for index in range(5):
+            lines[index * 10] = f"setAttr .tx {index};\n"
+            contents.append("".join(lines).encode())
+            scene_file = tmp_path / "scene.ma"
+            scene_file.write_bytes(contents[-1])
+            work = model_category.create_work_from_path("scene", str(scene_file))
+
+        saved = tik.project.compact_scene_versions()
+        assert saved[work.settings_file.as_posix()] > 0.9 * sum(map(len, contents[:2]))
+        work.reload()
+        assert [v.delta_compressed for v in work.versions] == [True, True, False, False, False]
+
+        # deleting a delta base expands the dependent version first
+        work.delete_version(2)
+        assert not work.get_version(1).delta_compressed
+
+        # loading expands the scene file, resolving the path does not
+        assert tik.project.compact_scene_versions(background=True).result()
+        work.reload()
+        first = work.get_version(1)
+        assert first.delta_compressed
+        first.get_resolved_path()
+        assert first.delta_compressed
+        monkeypatch.setattr(Dcc, "open", lambda *args, **kwargs: None)
+        work.load_version(1)
+        assert Path(first.get_abs_project_path()).read_bytes() == contents[0]
+        assert not first.delta_compressed
+
+        # a full file is kept every few versions to keep the chains short
+        work.compact_versions(keep_full=1, keyframe_interval=2)
+        assert [v.delta_compressed for v in work.versions] == [True, False, True, False]
+        assert delta.read_bytes(work.get_version(1).get_abs_project_path()) == contents[0]
+
+        tik.project.settings.edit_property("delta_compression", False)
+        monkeypatch.undo()
+
+    def test_archiving_work_versions_to_cold_storage(
+        self, project_manual_path, tik, monkeypatch, tmp_path
+    ):
+        self.test_creating_and_adding_new_tasks(project_manual_path, tik)
+        tik.user.set("Admin", 1234)
+        archive_root = tmp_path / "cold_storage"
+        tik.project.settings.edit_property("archive_root", archive_root.as_posix())
+        tik.project.settings.edit_property("archive_keep_versions", 2)
+        tik.project.settings.edit_property("archive_older_than_days", 0)
+
+        model_category = (
+            tik.project.subs["Assets"]
+            .subs["Characters"]
+            .subs["Soldier"]
+            .tasks["superman"]
+            .categories["Model"]
+        )
+
+        def mock_text_to_image(*args, **kwargs):
+            return Path(args[1]).with_suffix(".png")
+
+        from tik_manager4.dcc.standalone.main import Dcc
+
+        monkeypatch.setattr(Dcc, "text_to_image", mock_text_to_image)
+
+        for index in range(4):
+            scene_file = tmp_path / "archived.ma"
+            scene_file.write_bytes(f"version {index}\n".encode() * 500)
+            work = model_category.create_work_from_path("archived", str(scene_file))
+
+        results = tik.project.archive_work_versions(background=True).result()
+        assert results[work.settings_file.as_posix()] == [1, 2]
+        work.reload()
+        first = work.get_version(1)
+        assert first.archived and not Path(first.get_abs_project_path()).exists()
+        assert Path(first.archive_path).is_file()
+        assert not work.get_version(3).archived
+
+        # resolving the path does not restore the version
+        first.get_resolved_path()
+        assert first.archived and not Path(first.get_abs_project_path()).exists()
+
+        # loading restores the version on demand
+        progress = []
+        monkeypatch.setattr(Dcc, "open", lambda *args, **kwargs: None)
+        work.load_version(1, progress_callback=lambda *args: progress.append(args))
+        assert progress[-1] == (len(b"version 0\n") * 500,) * 2
+        assert Path(first.get_abs_project_path()).read_bytes() == b"version 0\n" * 500
+        work.reload()
+        assert not work.get_version(1).archived
+
+        tik.project.settings.edit_property("archive_root", "")
+        monkeypatch.undo()
+
+    def test_purgatory_index_resurrect_and_retention(
+        self, project_manual_path, tik, monkeypatch, tmp_path
+    ):
+        self.test_creating_and_adding_new_tasks(project_manual_path, tik)
+        tik.user.set("Admin", 1234)
+        model_category = (
+            tik.project.subs["Assets"]
+            .subs["Characters"]
+            .subs["Soldier"]
+            .tasks["superman"]
+            .categories["Model"]
+        )
+
+        def mock_text_to_image(*args, **kwargs):
+            return Path(args[1]).with_suffix(".png")
+
+        from tik_manager4.core import utils
+        from tik_manager4.dcc.standalone.main import Dcc
+
+        monkeypatch.setattr(Dcc, "text_to_image", mock_text_to_image)
+
+        scene_file = tmp_path / "purged.ma"
+        scene_file.write_bytes(b"purged" * 100)
+        work = model_category.create_work_from_path("purged", str(scene_file))
+        work_file = work.settings_file
+        scene_path = Path(work.get_version(1).get_abs_project_path())
+
+        purgatory = tik.project.purgatory
+        assert work.destroy() == (1, "success")
+        assert not work_file.exists() and not scene_path.exists()
+        (entry_id, entry), = [
+            item for item in purgatory.entries().items() if item[1]["name"] == work.name
+        ]
+        assert entry["size"] >= 600 and entry["state"] == "stored"
+
+        assert purgatory.resurrect(entry_id)[0]
+        assert work_file.exists() and scene_path.read_bytes() == b"purged" * 100
+        assert entry_id not in purgatory.entries()
+
+        # items on other volumes are staged and copied in the background
+        monkeypatch.setattr(utils, "is_same_volume", lambda *args: False)
+        assert work.destroy() == (1, "success")
+        purgatory.wait()
+        (entry_id, entry), = [
+            item for item in purgatory.entries().items() if item[1]["name"] == work.name
+        ]
+        assert entry["state"] == "stored"
+        assert not list(scene_path.parent.glob("*.tikpurge"))
+        assert all(Path(record["target"]).exists() for record in entry["items"])
+
+        # the retention policy removes the old entries permanently
+        assert tik.project.purge_purgatory() == (0, 0)
+        assert purgatory.purge(quota_gb=entry["size"] / (2 * 1024 ** 3))[0] >= 1
+        assert entry_id not in purgatory.entries()
+        assert not any(Path(record["target"]).exists() for record in entry["items"])
+
+        # corrupted indexes are moved aside instead of being overwritten
+        index_path = purgatory.root / "purgatory_index.json"
+        index_path.write_text("{corrupted")
+        assert purgatory.entries() == {}
+        index_path.write_text("{corrupted")
+        note = tmp_path / "note.txt"
+        note.write_text("note")
+        entry_id, _msg = purgatory.send("note", [(str(note), str(purgatory.root / "note.txt"))])
+        assert list(purgatory.entries()) == [entry_id]
+        assert len(list(purgatory.root.glob("purgatory_index.json.*.corrupted"))) == 2
+        monkeypatch.undo()
+
+    def test_storage_report(self, project_manual_path, tik, monkeypatch, tmp_path):
+        self.test_creating_and_adding_new_tasks(project_manual_path, tik)
+        tik.user.set("Admin", 1234)
+        task = (
+            tik.project.subs["Assets"]
+            .subs["Characters"]
+            .subs["Soldier"]
+            .tasks["superman"]
+        )
+
+        def mock_text_to_image(*args, **kwargs):
+            return Path(args[1]).with_suffix(".png")
+
+        from tik_manager4.dcc.standalone.main import Dcc
+
+        monkeypatch.setattr(Dcc, "text_to_image", mock_text_to_image)
+
+        scene_file = tmp_path / "heavy.ma"
+        scene_file.write_bytes(b"heavy" * 2000)
+        task.categories["Model"].create_work_from_path("heavy", str(scene_file))
+        work = task.categories["Model"].create_work_from_path("heavy", str(scene_file))
+
+        report = tik.project.get_storage_report()
+        row, = [row for row in report["works"] if row["name"] == work.name]
+        assert row["versions"] == 20000 and row["version_count"] == 2
+        assert report["attributed"]["versions"] >= 20000
+        assert report["scanned"] >= report["unattributed"] + 20000
+        assert report["tasks"][Path(work.path).parent.as_posix()] >= row["total"]
+
+        task_report = task.get_storage_report()
+        assert [r["total"] for r in task_report["works"] if r["name"] == work.name] == [row["total"]]
+        assert work.get_storage_report()["works"][0]["versions"] == 20000
+        # folders of the second run come from the cache
+        assert tik.project.get_storage_report()["cache"]["hits"]
+
+        csv_path = tik.project.export_storage_report(str(tmp_path / "storage.csv"))
+        assert work.name in Path(csv_path).read_text()
         monkeypatch.undo()
 
+    def test_resolve_prefetch_task_files(self, project_manual_path, tik):
+        self.test_creating_and_adding_new_tasks(project_manual_path, tik)
+        task = (
+            tik.project.subs["Assets"].subs["Characters"].subs["Soldier"]
+            .scan_tasks()["superman"]
+        )
+        assert tik.resolve_task_files([task.id, -1]) == [str(task.settings_file)]
+
+        # the tasks which are not loaded are looked up in the catalog
+        tik.project.reconcile_catalog()
+        tik.set_project(project_manual_path)
+        task_files = tik.resolve_task_files([task.id])
+        assert [Path(task_file) for task_file in task_files] == [Path(task.settings_file)]
+
+    def test_sync_localized_versions_skips_unreadable_publishes(self, project_manual_path, tik):
+        self.test_creating_and_adding_new_tasks(project_manual_path, tik)
+        corrupted = Path(tik.project.database_path) / "corrupted" / "publish" / "broken_v001.tpub"
+        corrupted.parent.mkdir(parents=True, exist_ok=True)
+        corrupted.write_text("{not json")
+        state, results = tik.project.sync_localized_versions()
+        assert not state
+        assert results["broken_v001"].startswith("Cannot read")
+        shutil.rmtree(corrupted.parent.parent)
+
+    def test_warm_start_cache(self, project_manual_path, tik):
+        self.test_creating_and_adding_new_tasks(project_manual_path, tik)
+        tik.user.settings.edit_property("warm_start_cache", True)
+        tik.user.settings.apply_settings()
+        try:
+            tik.set_project(project_manual_path)
+            cache = tik.warm_cache
+            cache.validation.result()
+            structure = tik.project.get_sub_tree()
+            assert cache.save()
+
+            # second start serves the database files from the cache
+            tik.set_project(project_manual_path)
+            assert tik.warm_cache is not cache
+            assert tik.warm_cache.hits > 0
+            assert tik.project.get_sub_tree() == structure
+        finally:
+            tik.user.settings.edit_property("warm_start_cache", False)
+            tik.user.settings.apply_settings()
+            tik.set_project(project_manual_path)
+        assert tik.warm_cache is None
+
+    def test_project_catalog(self, project_manual_path, tik, monkeypatch, tmp_path):
+        self.test_creating_and_adding_new_tasks(project_manual_path, tik)
+        tik.user.set("Admin", 1234)
+        task = (
+            tik.project.subs["Assets"]
+            .subs["Characters"]
+            .subs["Soldier"]
+            .tasks["superman"]
+        )
+
+        def mock_text_to_image(*args, **kwargs):
+            return Path(args[1]).with_suffix(".png")
+
+        from tik_manager4.dcc.standalone.main import Dcc
+
+        monkeypatch.setattr(Dcc, "text_to_image", mock_text_to_image)
+
+        # tasks inherit the metadata of the subprojects
+        tasks = tik.project.query_catalog("tasks", metadata={"fps": 60})
+        assert {"superman", "batman"} <= {row["name"] for row in tasks}
+        assert not tik.project.query_catalog("tasks", metadata={"fps": 61})
+        props = tik.project.query_catalog("subprojects", name="Props")
+        assert props[0]["metadata"]["metatest"] == "uberMetaTestingen"
+
+        # writes of the session update the catalog incrementally
+        scene_file = tmp_path / "catalog.ma"
+        scene_file.write_text("catalog")
+        task.categories["Rig"].create_work_from_path("catalog", str(scene_file))
+        work = task.categories["Rig"].create_work_from_path(
+            "catalog", str(scene_file), notes="second"
+        )
+        rows = tik.project.query_catalog("works", creator="Admin", category="Rig")
+        assert [(row["id"], row["version_count"]) for row in rows] == [(work.id, 2)]
+        versions = tik.project.query_catalog("versions", work_id=work.id)
+        assert sorted(row["notes"] for row in versions) == ["", "second"]
+        assert tik.project.query_catalog("works", metadata={"fps": 60}, name=work.name)
+
+        # files written by other sessions are picked up by the reconciliation
+        publish_file = Path(work.publish.get_publish_data_folder(), "catalog_v001.tpub")
+        publish_file.parent.mkdir(parents=True)
+        io.IO().write(
+            {"name": work.name, "publish_id": work.id, "version_number": 1,
+             "category": "Rig", "creator": "Admin", "task_id": task.id,
+             "path": work.publish.path, "elements": []},
+            str(publish_file),
+        )
+        since = publish_file.stat().st_mtime - 1
+        assert not tik.project.query_catalog("publishes", category="Rig")
+        assert tik.project.reconcile_catalog() == (1, 0)
+        rows = tik.project.query_catalog("publishes", category="Rig", since=since)
+        assert [row["version_number"] for row in rows] == [1]
+        assert not tik.project.query_catalog("publishes", since=since + 3600)
+
+        # destroyed works are removed from the catalog
+        work.destroy()
+        assert not tik.project.query_catalog("works", name=work.name)
+        assert not tik.project.query_catalog("publishes", category="Rig")
+        assert tik.project.reconcile_catalog() == (0, 0)
+
+        # settings writes do not wait for the catalog
+        catalog = tik.project.catalog
+        with patch.object(type(catalog), "update_file", side_effect=lambda *args: time.sleep(1)):
+            start = time.time()
+            task.apply_settings(force=True)
+            assert time.time() - start < 0.5
+            assert not catalog.flush(timeout=0)
+            assert catalog.flush()
+
+        with pytest.raises(ValueError):
+            tik.project.query_catalog("works", password="1234")
+
+    def test_project_search(self, project_manual_path, tik, monkeypatch, tmp_path):
+        self.test_creating_and_adding_new_tasks(project_manual_path, tik)
+        tik.user.set("Admin", 1234)
+        task = (
+            tik.project.subs["Assets"]
+            .subs["Props"]
+            .add_task("sword", categories=["Model", "Rig"])
+        )
+
+        def mock_text_to_image(*args, **kwargs):
+            return Path(args[1]).with_suffix(".png")
+
+        from tik_manager4.dcc.standalone.main import Dcc
+
+        monkeypatch.setattr(Dcc, "text_to_image", mock_text_to_image)
+
+        scene_file = tmp_path / "search.ma"
+        scene_file.write_text("search")
+        work = task.categories["Rig"].create_work_from_path(
+            "blade", str(scene_file), notes="Fixed the flipping wrist controls"
+        )
+
+        # the running reconciliation is shared and the searches do not wait for it
+        catalog = tik.project.catalog
+        catalog.reconciled = False
+        with patch.object(type(catalog), "reconcile",
+                          side_effect=lambda: time.sleep(0.5) or (0, 0)):
+            future = tik.project.reconcile_catalog(background=True)
+            start = time.time()
+            tik.project.search("wrist")
+            assert tik.project.reconcile_catalog(background=True) is future
+            assert time.time() - start < 0.4
+            assert future.result() == (0, 0)
+        assert tik.project.reconcile_catalog()
+
+        # works are found by their version notes
+        results = tik.project.search("wrist flip")
+        assert [(row["kind"], row["entity_id"]) for row in results] == [("work", work.id)]
+        assert results[0]["task_id"] == task.id
+        assert results[0]["category"] == "Rig"
+        assert results[0]["subproject_id"] == tik.project.subs["Assets"].subs["Props"].id
+
+        # tasks by inherited metadata values and names rank above the notes
+        assert task.id in [
+            row["entity_id"] for row in tik.project.search("uberMetaTest")
+            if row["kind"] == "task"
+        ]
+        results = tik.project.search("sword")
+        assert (results[0]["kind"], results[0]["entity_id"]) == ("task", task.id)
+        assert tik.project.search("Soldier")[0]["kind"] == "subproject"
+
+        # new versions update the index incrementally
+        task.categories["Rig"].create_work_from_path("blade", str(scene_file), notes="gimbal")
+        assert [row["entity_id"] for row in tik.project.search("gimbal")] == [work.id]
+        assert not tik.project.search("nonexistingword")
+        assert not tik.project.search("  ")
+
     def test_getting_templates_and_creating_works_from_templates(
         self, project_path, tik, monkeypatch
     ):
@@ -1278,3 +1744,18 @@ class TestProject:
             .delete_task("superboy")[0]
             == 1
         )
+
+    def test_failed_purgatory_keeps_database_entries(self, project_manual_path, tik):
+        self.test_adding_categories(project_manual_path, tik)
+        task = tik.project.subs["Assets"].subs["Characters"].subs["Soldier"].tasks["batman"]
+        task.categories["Temp"].create_work("test_work")
+        tik.user.set("Admin", password="1234")
+        failure = (False, "Target is locked")
+        with patch(
+            "tik_manager4.objects.entity.Entity.send_to_purgatory", return_value=failure
+        ):
+            assert task.delete_category("Temp") == -1
+            assert "Temp" in task.categories
+            sub = tik.project.subs["Assets"].subs["Characters"].subs["Soldier"]
+            assert sub.delete_task("batman") == (-1, "Target is locked")
+            assert "batman" in sub.tasks
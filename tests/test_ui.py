@@ -1,17 +1,33 @@
 """Tests for the UI elements."""
 import os
+import random
+import time
+from difflib import SequenceMatcher
 import pytest
 
 IN_GITHUB_ACTIONS = os.getenv("GITHUB_ACTIONS") == "true"
 if IN_GITHUB_ACTIONS:
     pytest.skip("Skipping UI tests in GitHub Actions", allow_module_level=True)
 
+# the benchmarks are slow, they run only if requested
+RUN_BENCHMARKS = os.getenv("TIK_RUN_BENCHMARKS") == "1"
+benchmark = pytest.mark.skipif(
+    not RUN_BENCHMARKS, reason="Set TIK_RUN_BENCHMARKS=1 to run the benchmarks"
+)
+
 from pathlib import Path
+from types import SimpleNamespace
 import sys
 from tik_manager4.core import utils
 
 from tik_manager4.ui import main
-from tik_manager4.ui.Qt import QtWidgets
+from tik_manager4.ui.Qt import QtWidgets, QtCore, QtGui
+from tik_manager4.ui.mcv.filter import FilterModel, FuzzyIndex
+from tik_manager4.ui.mcv.subproject_mcv import TikSubView
+from tik_manager4.ui.mcv.task_mcv import TikTaskView
+from tik_manager4.ui.mcv.category_mcv import TikCategoryLayout
+from tik_manager4.ui.watcher import DatabaseWatcher
+from tik_manager4.ui import thumbnails
 from tik_manager4.ui import pick
 from tik_manager4.ui.dialog.work_dialog import NewVersionDialog
 from tik_manager4.ui.dialog.preview_dialog import PreviewDialog
@@ -44,6 +60,366 @@ class TestUI:
         for x in kill_list:
             sys.modules.pop(x)
 
+    def test_lazy_subproject_model(self, qtbot, qtmodeltester, main_object):
+        """Create the subproject rows on demand and refresh in place."""
+        project = main_object.project
+        for seq in range(50):
+            sequence = project.add_sub_project(f"seq{seq:03d}", parent_sub=project)
+            for shot in range(20):
+                sequence.add_sub_project(f"shot{shot:03d}", parent_sub=sequence)
+        project.save_structure()
+
+        view = TikSubView(project)
+        qtbot.addWidget(view)
+        model = view.model
+        # only the project root row exists until it is expanded
+        assert view.get_items_count() == 1
+        view.expand_first_item()
+        assert view.get_items_count() == 51
+        assert model.canFetchMore(model.indexFromItem(model.root_item.children[0]))
+
+        # selecting a deep subproject creates the rows on its path only
+        deep_sub = project.find_sub_by_path("seq042/shot007")
+        assert view.select_by_id(deep_sub.id)
+        assert view.get_selected_items()[0].subproject is deep_sub
+        assert view.get_items_count() == 71
+
+        # expansion is restored from the ids
+        sequence_id = project.find_sub_by_path("seq042").id
+        view.set_expanded_state([sequence_id, deep_sub.id])
+        assert sorted(view.get_expanded_state()) == sorted([project.id, sequence_id])
+
+        # refresh updates the changed branches without resetting the model
+        resets = []
+        model.modelReset.connect(lambda: resets.append(True))
+        project.add_sub_project("seq_new", parent_sub=project)
+        project.delete_sub_project(path="seq001")
+        project.save_structure()
+        project._set(project.absolute_path)
+        view.refresh()
+        assert not resets
+        top_names = [item.subproject.name for item in model.root_item.children]
+        assert "seq_new" in top_names
+        assert "seq001" not in top_names
+        assert sequence_id in view.get_expanded_state()
+        assert view.select_by_id(deep_sub.id)
+        assert view.get_selected_items()[0].subproject is not deep_sub
+
+        # filtering reaches the rows which are not created yet
+        view.proxy_model.set_filter_text("shot019")
+        view.proxy_model.apply_filter()
+        assert view.get_items_count() == 1 + 50 + 49 * 20
+        match = model.find_item_by_id_column(
+            project.find_sub_by_path("seq042/shot019").id
+        )
+        assert view.proxy_model.mapFromSource(model.indexFromItem(match)).isValid()
+        qtmodeltester.check(model)
+
+    def test_background_task_scan(self, qtbot, monkeypatch, main_object):
+        """Collect the tasks in a worker and cancel the stale scans."""
+        project = main_object.project
+        for seq in ("seqA", "seqB"):
+            project.create_sub_project(seq, parent_uid=project.id)
+            for shot in range(5):
+                project.create_task(
+                    f"{seq}_task{shot}", categories=["Model"], parent_path=seq
+                )
+
+        # simulate a slow file server
+        subproject_class = type(project.find_sub_by_path("seqA"))
+        read_tasks = subproject_class.read_tasks
+
+        def slow_read_tasks(sub):
+            time.sleep(0.3)
+            return read_tasks(sub)
+
+        monkeypatch.setattr(subproject_class, "read_tasks", slow_read_tasks)
+
+        sub_view = TikSubView(project)
+        task_view = TikTaskView()
+        qtbot.addWidget(sub_view)
+        qtbot.addWidget(task_view)
+        sub_view.task_scan_started.connect(task_view.clear_tasks)
+        sub_view.tasks_added.connect(task_view.add_tasks)
+        busy_states = []
+        sub_view.busy_changed.connect(busy_states.append)
+        sub_view.expand_first_item()
+
+        start = time.perf_counter()
+        sub_view.select_by_id(project.find_sub_by_path("seqA").id)
+        # the selection does not wait for the scan
+        assert time.perf_counter() - start < 0.3
+        sub_view.select_by_id(project.find_sub_by_path("seqB").id)
+        with qtbot.waitSignal(sub_view.busy_changed, timeout=5000) as blocker:
+            pass
+        assert blocker.args == [False]
+        # only the tasks of the last selection are delivered
+        names = sorted(
+            task_view.model.item(row).task.name
+            for row in range(task_view.model.rowCount())
+        )
+        assert names == [f"seqB_task{shot}" for shot in range(5)]
+        assert busy_states[-1] is False
+
+        # the tasks can be waited for synchronously
+        sub_view.select_by_id(project.find_sub_by_path("seqA").id)
+        assert sub_view.wait_for_tasks()
+        assert task_view.select_by_id(project.find_task_by_id(
+            task_view.model.item(0).task.id
+        ).id)
+        assert task_view.model.item(0).task.name.startswith("seqA")
+
+        # the worker only reads, the tasks are committed in the UI thread
+        seq_a = project.find_sub_by_path("seqA")
+        task = seq_a.tasks["seqA_task0"]
+        type(task)(absolute_path=task.settings_file, parent_sub=seq_a).omit()
+        modified_time = os.stat(task.settings_file).st_mtime + 5
+        os.utime(task.settings_file, (modified_time, modified_time))
+        read = seq_a.read_tasks()
+        assert read["seqA_task0"] is not task
+        assert task.state == "active"
+        assert seq_a.commit_tasks(read)["seqA_task0"] is task
+        assert task.state == "omitted"
+        assert task.categories["Model"].parent_task is task
+
+        # the failures are reported
+        def failing_read_tasks(sub):
+            raise OSError("server is down")
+
+        monkeypatch.setattr(subproject_class, "read_tasks", failing_read_tasks)
+        with qtbot.waitSignal(sub_view.scan_failed, timeout=5000) as blocker:
+            sub_view.select_by_id(project.find_sub_by_path("seqB").id)
+        assert "server is down" in blocker.args[0]
+
+    def test_background_category_population(
+        self, qtbot, monkeypatch, main_object, tmp_path
+    ):
+        """Show the category tabs at once and load the works in workers."""
+        from tik_manager4.dcc.standalone.main import Dcc
+
+        monkeypatch.setattr(
+            Dcc, "text_to_image", lambda *args, **kwargs: Path(args[1]).with_suffix(".png")
+        )
+        project = main_object.project
+        project.create_sub_project("seqA", parent_uid=project.id)
+        project.create_task(
+            "shot", categories=["Model", "Rig", "LookDev"], parent_path="seqA"
+        )
+        task = project.find_sub_by_path("seqA").scan_tasks()["shot"]
+        test_file = tmp_path / "test_file.txt"
+        test_file.touch()
+        for category in task.categories.values():
+            for index in range(5):
+                category.create_work_from_path(f"{category.name}{index}", str(test_file))
+
+        # simulate a slow file server
+        category_class = type(task.categories["Model"])
+        iter_works = category_class.iter_works
+
+        def slow_iter_works(category):
+            for work in iter_works(category):
+                time.sleep(0.05)
+                yield work
+
+        monkeypatch.setattr(category_class, "iter_works", slow_iter_works)
+
+        layout = TikCategoryLayout()
+        widget = QtWidgets.QWidget()
+        widget.setLayout(layout)
+        qtbot.addWidget(widget)
+
+        start = time.perf_counter()
+        layout.set_task(task)
+        # the tabs are there before any work is loaded
+        assert time.perf_counter() - start < 0.25
+        assert layout.category_tab_widget.count() == 3
+
+        # the works of the active tab arrive incrementally
+        model = layout.work_tree_view.model
+        qtbot.waitUntil(lambda: model.rowCount() > 0, timeout=5000)
+        assert layout.wait_for_works()
+        assert sorted(
+            model.item(row).tik_obj.name for row in range(model.rowCount())
+        ) == [f"shot_Model_Model{index}" for index in range(5)]
+
+        # the other tabs are prefetched
+        qtbot.waitUntil(
+            lambda: all(scan.done.is_set() for scan in layout._work_scans.values()),
+            timeout=5000,
+        )
+        layout.set_category_by_index(1)
+        assert layout.wait_for_works()
+        assert model.rowCount() == 5
+        assert model.item(0).tik_obj.category == "Rig"
+
+        # the scans only read, the works are committed in the UI thread
+        category = task.categories["Rig"]
+        work = model.item(0).tik_obj
+        type(work)(absolute_path=work.settings_file).omit()
+        modified_time = os.stat(work.settings_file).st_mtime + 5
+        os.utime(work.settings_file, (modified_time, modified_time))
+        read = list(iter_works(category))
+        assert not any(read_work is work for read_work in read)
+        assert work.state != "omitted"
+        assert any(
+            committed is work for committed in category.commit_works(read, prune=True)
+        )
+        assert work.state == "omitted"
+        # the works which are not read are removed
+        category.commit_works(read[1:], prune=True)
+        assert len(category._works) == 4
+
+        # switching the task cancels the scans of the previous one
+        layout.set_task(task)
+        layout.clear()
+        assert not layout._work_scans
+        qtbot.waitUntil(lambda: layout._work_pool.activeThreadCount() == 0, timeout=1000)
+
+    def test_database_watcher(self, qtbot, tmp_path):
+        """Coalesce the changes of the watched paths and poll the missing ones."""
+        watcher = DatabaseWatcher(debounce=50, poll_interval=0)
+        changes = []
+        watcher.changed.connect(changes.append)
+        task_folder = tmp_path / "tasks"
+        task_folder.mkdir()
+        work_folder = tmp_path / "works"
+        watcher.watch("tasks", [task_folder])
+        watcher.watch("works", [work_folder])
+
+        for index in range(5):
+            (task_folder / f"task{index}.ttask").write_text("{}")
+        qtbot.waitUntil(lambda: bool(changes), timeout=3000)
+        qtbot.wait(200)
+        assert changes == ["tasks"]
+
+        # polling reports nothing if nothing is changed
+        watcher.poll()
+        assert watcher.wait(timeout=5)
+        assert changes == ["tasks"]
+
+        # folders created later are noticed by polling
+        work_folder.mkdir()
+        watcher.poll()
+        # the comparison does not block
+        assert changes == ["tasks"]
+        qtbot.waitUntil(lambda: changes == ["tasks", "works"], timeout=3000)
+
+        # modified files are reported with their folders
+        task_file = task_folder / "task0.ttask"
+        watcher.watch("versions", [task_file])
+        time.sleep(0.01)
+        task_file.write_text('{"state": "omitted"}')
+        qtbot.waitUntil(lambda: len(changes) == 4, timeout=3000)
+        assert sorted(changes[2:]) == ["tasks", "versions"]
+
+        watcher.clear()
+        assert not watcher.paths("tasks")
+        task_file.write_text("{}")
+        watcher.poll()
+        assert watcher.wait(timeout=5)
+        assert len(changes) == 4
+
+    def test_watcher_updates_main_ui(self, qtbot, main_object, tmp_path, monkeypatch):
+        """Show the tasks and works created elsewhere without refreshing."""
+        from tik_manager4.dcc.standalone.main import Dcc
+
+        monkeypatch.setattr(
+            Dcc, "text_to_image", lambda *args, **kwargs: Path(args[1]).with_suffix(".png")
+        )
+        project = main_object.project
+        project.create_sub_project("seqA", parent_uid=project.id)
+        project.create_task("shot1", categories=["Model"], parent_path="seqA")
+        sub = project.find_sub_by_path("seqA")
+
+        main_ui = main.MainUI(main_object)
+        qtbot.addWidget(main_ui)
+        sub_view = main_ui.subprojects_mcv.sub_view
+        task_view = main_ui.tasks_mcv.task_view
+        assert sub_view.select_by_id(sub.id)
+        assert sub_view.wait_for_tasks()
+        qtbot.waitUntil(lambda: task_view.model.rowCount() == 1, timeout=3000)
+        assert main_ui.watcher.paths("tasks") == [sub.get_abs_database_path()]
+
+        project.create_task("shot2", categories=["Model"], parent_path="seqA")
+        qtbot.waitUntil(lambda: task_view.model.rowCount() == 2, timeout=3000)
+
+        task = sub.scan_tasks()["shot1"]
+        assert task_view.select_by_id(task.id)
+        assert main_ui.categories_mcv.wait_for_works()
+        work_model = main_ui.categories_mcv.work_tree_view.model
+        assert work_model.rowCount() == 0
+
+        # the category folder is created with the first work
+        test_file = tmp_path / "test_file.txt"
+        test_file.touch()
+        task.categories["Model"].create_work_from_path("Model0", str(test_file))
+        qtbot.waitUntil(lambda: work_model.rowCount() == 1, timeout=3000)
+        assert work_model.item(0).tik_obj.name == "shot1_Model_Model0"
+
+        # the rescans do not block the UI thread
+        subproject_class = type(sub)
+        read_tasks = subproject_class.read_tasks
+
+        def slow_read_tasks(sub):
+            time.sleep(0.5)
+            return read_tasks(sub)
+
+        monkeypatch.setattr(subproject_class, "read_tasks", slow_read_tasks)
+        project.create_task("shot3", categories=["Model"], parent_path="seqA")
+        start = time.perf_counter()
+        sub_view.update_tasks()
+        assert time.perf_counter() - start < 0.3
+        qtbot.waitUntil(lambda: task_view.model.rowCount() == 3, timeout=5000)
+
+    def test_thumbnail_service(self, qtbot, tmp_path):
+        """Load the thumbnails in the background and cache them on disk."""
+        sources = []
+        for index in range(5):
+            image = QtGui.QImage(1920, 1080, QtGui.QImage.Format_RGB32)
+            image.fill(QtGui.QColor(index * 50, 0, 0))
+            source = tmp_path / f"thumbnail_{index}.jpg"
+            assert image.save(str(source))
+            sources.append(str(source))
+        missing = str(tmp_path / "missing.jpg")
+        cache_folder = tmp_path / "cache"
+
+        service = thumbnails.ThumbnailService(cache_folder=cache_folder)
+        ready = {}
+        service.thumbnail_ready.connect(lambda path, pixmap: ready.update({path: pixmap}))
+        service.request(sources + [missing])
+        qtbot.waitUntil(lambda: len(ready) == 6, timeout=5000)
+        assert ready[missing] is None
+        for source in sources:
+            pixmap = service.get(source)
+            assert pixmap is ready[source]
+            assert pixmap.width() <= thumbnails.THUMBNAIL_SIZE.width()
+            assert pixmap.height() == thumbnails.THUMBNAIL_SIZE.height()
+        assert len(list(cache_folder.rglob("*.png"))) == 5
+
+        # the pixmaps in memory are not loaded again
+        ready.clear()
+        service.request(sources)
+        qtbot.wait(100)
+        assert not ready
+
+        # replaced images are cached again and the stale copies are removed
+        stat = os.stat(sources[0])
+        os.utime(sources[0], ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        service.discard(sources[0])
+        service.request(sources[:1])
+        qtbot.waitUntil(lambda: sources[0] in ready, timeout=5000)
+        cached = list(cache_folder.rglob("*.png"))
+        assert len(cached) == 5
+        assert thumbnails.cache_file(
+            cache_folder, sources[0], stat.st_mtime_ns + 10**9
+        ) in cached
+
+        # the memory cache is limited
+        small = thumbnails.ThumbnailService(cache_folder=cache_folder, memory_size=2)
+        small.request(sources)
+        qtbot.waitUntil(lambda: small.get(sources[-1]) is not None, timeout=5000)
+        assert small.get(sources[0]) is None
+
     def test_launch_main_ui(self, qtbot):
         m = main.launch(dcc="Standalone")
         qtbot.addWidget(m)
@@ -216,6 +592,130 @@ class TestUI:
         assert utils.apply_stylesheet(str(_stylesheet), _widget) == True
         assert utils.apply_stylesheet(str(tmp_path / "test_stylesheet.NA"), _widget) == False
 
+    @benchmark
+    def test_filter_model_benchmark(self, qtbot):
+        """Filter 50k rows with the precomputed fuzzy index."""
+        random.seed(4)
+        words = ["hero", "villain", "sword", "shield", "tree", "rock", "shot", "rig"]
+        names = [
+            f"{random.choice(words)}_{random.choice(words)}_{row:05d}"
+            for row in range(50000)
+        ]
+        model = QtGui.QStandardItemModel()
+        for name in names:
+            model.appendRow(QtGui.QStandardItem(name))
+        proxy = FilterModel()
+        proxy.setSourceModel(model)
+
+        timings = {}
+        for query in ["s", "sw", "swo", "sword", "sword_tre"]:
+            start = time.perf_counter()
+            proxy.set_filter_text(query)
+            proxy.apply_filter()
+            row_count = proxy.rowCount()
+            timings[query] = time.perf_counter() - start
+
+            expected = [
+                name for name in names
+                if query in name
+                or SequenceMatcher(None, query, name).quick_ratio() >= 0.6
+            ]
+            assert row_count == len(expected)
+            # best matches first
+            ratios = [
+                proxy.get_score(proxy.index(row, 0).data()) for row in range(row_count)
+            ]
+            assert ratios == sorted(ratios, reverse=True)
+        assert max(timings.values()) < 10
+
+        # the index scores exactly the quick_ratio of difflib
+        index = FuzzyIndex(names)
+        start = time.perf_counter()
+        scores = index.score("sword_tre")
+        assert time.perf_counter() - start < 1
+        for name in names[:1000]:
+            assert scores[name] == SequenceMatcher(None, "sword_tre", name).quick_ratio()
+
+        # rows added after the indexing are scored on demand
+        model.appendRow(QtGui.QStandardItem("sword_tree_new"))
+        assert proxy.rowCount() == row_count + 1
+        assert proxy.get_score("sword_tree_new") == SequenceMatcher(
+            None, "sword_tre", "sword_tree_new"
+        ).quick_ratio()
+
+    @benchmark
+    def test_task_model_benchmark(self, qtbot, qtmodeltester):
+        """Stream 20k tasks into the task view and find them by id."""
+        random.seed(6)
+        words = ["hero", "villain", "sword", "shield", "tree", "rock", "shot", "rig"]
+        tasks = [
+            SimpleNamespace(
+                name=f"{random.choice(words)}_{random.choice(words).upper()}_{row:05d}",
+                id=row,
+                path=f"seq{row // 100:03d}/sh{row:05d}",
+                type=random.choice(["asset", "shot", "global", "other"]),
+                state="omitted" if row % 10 == 0 else "active",
+            )
+            for row in range(20000)
+        ]
+        random.shuffle(tasks)
+
+        task_view = TikTaskView()
+        qtbot.addWidget(task_view)
+        task_view.show()
+        model = task_view.model
+        small_model = type(model)()
+        qtmodeltester.check(small_model)
+        for batch_start in range(0, 300, 100):
+            small_model.add_tasks(tasks[batch_start:batch_start + 100])
+        assert small_model.rowCount() == 300
+
+        start = time.perf_counter()
+        for batch_start in range(0, len(tasks), 100):
+            task_view.add_tasks(tasks[batch_start:batch_start + 100])
+        # duplicates are skipped
+        task_view.add_tasks(tasks[:100])
+        add_time = time.perf_counter() - start
+        assert model.rowCount() == task_view.get_items_count() == 20000
+
+        # the rows are sorted by name without sorting the proxy
+        proxy = task_view.proxy_model
+        names = [proxy.index(row, 0).data() for row in range(proxy.rowCount())]
+        assert names == sorted(names, key=str.casefold)
+
+        start = time.perf_counter()
+        for task in tasks[::20]:
+            assert task_view.select_by_id(task.id)
+            assert task_view.get_selected_item().task is task
+        select_time = time.perf_counter() - start
+        assert add_time < 10
+        assert select_time < 5
+
+        # the values are rendered on demand
+        task = tasks[0]
+        index = model.find_item_by_id_column(task.id).index()
+        assert index.sibling(index.row(), 2).data() == task.path
+        assert index.data(QtCore.Qt.FontRole).strikeOut() == (task.state == "omitted")
+        task.state = "omitted"
+        model.find_item_by_id_column(task.id).refresh()
+        assert index.data(QtCore.Qt.FontRole).strikeOut()
+
+        # filtered rows are sorted by their scores
+        proxy.set_filter_text("sword_tre")
+        proxy.apply_filter()
+        ratios = [
+            proxy.get_score(proxy.index(row, 0).data().lower())
+            for row in range(proxy.rowCount())
+        ]
+        assert ratios and ratios == sorted(ratios, reverse=True)
+        proxy.set_filter_text("")
+        proxy.apply_filter()
+        assert proxy.index(0, 0).data() == names[0]
+
+        assert model.remove_task(task)
+        assert model.find_item_by_id_column(task.id) is None
+        assert task_view.select_by_id(tasks[1].id)
+
     # def test_standard_item_model(self, qtmodeltester):
     #     model = QtGui.QStandardItemModel()
     #     items = [QtGui.QStandardItem(str(i)) for i in range(4)]
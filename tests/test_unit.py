@@ -3,6 +3,7 @@ from pathlib import Path
 import platform
 import os
 import subprocess
+import sys
 import http.client
 import json
 from collections.abc import Mapping
@@ -376,4 +377,53 @@ def test_metadata_overrides():
 
     # override it
     metadata.override({"key1": "new_value1"})
-    assert metadata.is_overridden("key1") == True
\ No newline at end of file
+    assert metadata.is_overridden("key1") == True
+
+def test_headless_import_budget():
+    """Import the core objects without Qt and the management platforms."""
+    # generous, only a heavy module pulled into the import chain exceeds it
+    budget_us = 5000000
+    code = "import sys, tik_manager4.objects.main; print(' '.join(sys.modules))"
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        env=dict(os.environ, TIK_DCC="standalone"),
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    heavy_modules = [
+        name for name in result.stdout.split()
+        if name.startswith(
+            ("tik_manager4.ui", "tik_manager4.management", "PySide", "PyQt", "tank")
+        )
+    ]
+    assert heavy_modules == []
+
+    # the lines are "import time: self [us] | cumulative | package"
+    cumulative = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        _self, total, name = line.split("|")
+        if total.strip().isdigit():
+            cumulative[name.strip()] = int(total)
+    assert cumulative["tik_manager4.objects.main"] < budget_us
+
+def test_lazy_management_platforms():
+    """Import the management platforms only when they are accessed."""
+    code = (
+        "import sys\n"
+        "from tik_manager4 import management\n"
+        "assert list(management.platforms) == ['shotgrid']\n"
+        "assert 'tank' not in sys.modules\n"
+        "assert not management.platforms.is_loaded('shotgrid')\n"
+        "platform = management.platforms['shotgrid']\n"
+        "assert platform.nice_name == management.REGISTRY['shotgrid']['nice_name']\n"
+        "assert 'tank' in sys.modules\n"
+        "assert management.platforms['shotgrid'] is platform\n"
+    )
+    subprocess.run(
+        [sys.executable, "-c", code],
+        env=dict(os.environ, TIK_DCC="standalone"),
+        check=True,
+    )
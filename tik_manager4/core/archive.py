@@ -0,0 +1,111 @@
+"""Compressed archives for moving files to cold storage.
+
+Files and folders are stored in gzip compressed tar files. Archives are
+written under a temporary name and renamed when complete, so an interrupted
+archival never leaves a half written archive behind.
+"""
+
+import os
+import tarfile
+from pathlib import Path
+
+from tik_manager4.core import utils
+
+ARCHIVE_SUFFIX = ".tar.gz"
+PARTIAL_SUFFIX = ".partial"
+CHUNK_SIZE = 8 * 1024 * 1024
+
+
+def get_archive_path(archive_root, *args):
+    """Return the archive path for the given relative path.
+
+    Args:
+        archive_root (str): The root folder of the archives.
+        *args (str): The relative path arguments.
+
+    Returns:
+        str: The archive path.
+    """
+    relative = Path(*args)
+    return Path(archive_root, relative.parent, f"{relative.name}{ARCHIVE_SUFFIX}").as_posix()
+
+
+def create_archive(source, archive_path, progress_callback=None):
+    """Compress the file or folder into the archive.
+
+    Args:
+        source (str): The file or folder to archive.
+        archive_path (str): The archive file path.
+        progress_callback (function, optional): Called with the processed
+            and total bytes.
+
+    Returns:
+        int: Size of the archive in bytes.
+    """
+    source = Path(source)
+    archive_path = Path(archive_path)
+    archive_path.parent.mkdir(parents=True, exist_ok=True)
+    partial_path = archive_path.with_name(f"{archive_path.name}{PARTIAL_SUFFIX}")
+    total = utils.get_size(str(source))
+    processed = 0
+
+    def _filter(tar_info):
+        nonlocal processed
+        processed += tar_info.size
+        if progress_callback:
+            progress_callback(processed, total)
+        return tar_info
+
+    with tarfile.open(partial_path, "w:gz") as archive:
+        archive.add(str(source), arcname=source.name, filter=_filter)
+    with tarfile.open(partial_path, "r:gz") as archive:
+        # reading the members verifies the whole compressed stream
+        archived_size = sum(member.size for member in archive.getmembers())
+    if archived_size != total:
+        utils.delete(str(partial_path))
+        raise IOError(f"Archive verification failed for {source}")
+    os.replace(partial_path, archive_path)
+    return archive_path.stat().st_size
+
+
+def extract_archive(archive_path, target_folder, progress_callback=None):
+    """Extract the archive into the target folder.
+
+    Args:
+        archive_path (str): The archive file path.
+        target_folder (str): The folder to extract into.
+        progress_callback (function, optional): Called with the extracted
+            and total bytes.
+
+    Returns:
+        list: Paths of the extracted top level files or folders.
+    """
+    target_folder = Path(target_folder).resolve()
+    extracted = set()
+    with tarfile.open(archive_path, "r:gz") as archive:
+        members = archive.getmembers()
+        total = sum(member.size for member in members if member.isfile())
+        processed = 0
+        for member in members:
+            target = (target_folder / member.name).resolve()
+            if target_folder not in target.parents:
+                raise IOError(f"Unsafe path in the archive: {member.name}")
+            extracted.add((target_folder / Path(member.name).parts[0]).as_posix())
+            if member.isdir():
+                target.mkdir(parents=True, exist_ok=True)
+                continue
+            if not member.isfile():
+                continue
+            target.parent.mkdir(parents=True, exist_ok=True)
+            partial_path = target.with_name(f"{target.name}{PARTIAL_SUFFIX}")
+            source_file = archive.extractfile(member)
+            with open(partial_path, "wb") as target_file:
+                for chunk in iter(lambda: source_file.read(CHUNK_SIZE), b""):
+                    target_file.write(chunk)
+                    processed += len(chunk)
+                    if progress_callback:
+                        progress_callback(processed, total)
+            os.chmod(partial_path, member.mode)
+            os.utime(partial_path, (member.mtime, member.mtime))
+            os.replace(partial_path, target)
+    return sorted(extracted)
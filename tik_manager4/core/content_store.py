@@ -0,0 +1,189 @@
+"""Content addressed storage for deduplicating project files.
+
+Files are hashed and kept once under the store. The visible files in the
+project become reflinks (copy-on-write clones) of the stored objects. Hard
+links share the file with the store, so they are only used for read-only
+files where reflinks are not supported. Objects which are not referenced by any database record anymore
+can be removed with the garbage collection.
+"""
+
+import hashlib
+import os
+from pathlib import Path
+
+from tik_manager4.core import filelog
+from tik_manager4.core import io
+from tik_manager4.core import transfer
+from tik_manager4.core import utils
+
+LOG = filelog.Filelog(logname=__name__, filename="tik_manager4")
+
+STORE_FOLDER_NAME = ".tik_store"
+CHUNK_SIZE = 8 * 1024 * 1024
+
+
+def hash_file(file_path):
+    """Return the sha256 digest of the file.
+
+    Args:
+        file_path (str): The file path.
+
+    Returns:
+        str: The hex digest.
+    """
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as _file:
+        for chunk in iter(lambda: _file.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _link(source, target, read_only):
+    """Create the target as a reflink or a hard link of the source.
+
+    Returns:
+        bool: False if the target cannot be created without sharing an
+            editable file.
+    """
+    if transfer.reflink(source, target):
+        return True
+    if not read_only:
+        return False
+    os.link(source, target)
+    return True
+
+
+class ContentStore:
+    """Stores the files once by their content hash."""
+
+    def __init__(self, root):
+        """Initialize the ContentStore object.
+
+        Args:
+            root (str): The store root folder.
+        """
+        self._root = Path(root)
+
+    @property
+    def root(self):
+        """The store root folder."""
+        return self._root
+
+    def get_object_path(self, digest):
+        """Return the path of the stored object.
+
+        Args:
+            digest (str): The content hash.
+
+        Returns:
+            Path: The object path.
+        """
+        return self._root / "objects" / digest[:2] / digest
+
+    def ingest(self, file_or_folder, read_only=False):
+        """Store the file or the files under the folder and link them back.
+
+        Files with a content which is already in the store are replaced with
+        links to the stored object. New contents are added to the store.
+        Editable files are only deduplicated with reflinks.
+
+        Args:
+            file_or_folder (str): The file or folder path.
+            read_only (bool): If True, the files are write protected after
+                the ingest and they can be hard links of the stored objects.
+
+        Returns:
+            list: Content hashes of the stored files.
+        """
+        path = Path(file_or_folder)
+        if path.is_dir():
+            files = sorted(p for p in path.rglob("*") if p.is_file() and not p.is_symlink())
+        elif path.is_file():
+            files = [path]
+        else:
+            return []
+
+        digests = []
+        for file_path in files:
+            try:
+                digests.append(self._ingest_file(file_path, read_only))
+            except OSError as exc:
+                # e.g. the project is on a filesystem without link support
+                LOG.warning(f"Cannot deduplicate {file_path}: {exc}")
+        return digests
+
+    def _ingest_file(self, file_path, read_only):
+        """Store a single file and return its content hash."""
+        digest = hash_file(file_path)
+        object_path = self.get_object_path(digest)
+        if object_path.exists():
+            if not os.path.samefile(object_path, file_path):
+                temp_path = file_path.with_name(f".{file_path.name}.tiklink")
+                utils.delete(str(temp_path))
+                if _link(object_path, temp_path, read_only):
+                    os.replace(temp_path, file_path)
+        else:
+            object_path.parent.mkdir(parents=True, exist_ok=True)
+            temp_path = object_path.with_name(f"{digest}.tmp")
+            utils.delete(str(temp_path))
+            if _link(file_path, temp_path, read_only):
+                os.replace(temp_path, object_path)
+        return digest
+
+    def iter_objects(self):
+        """Yield the (digest, path) of all stored objects."""
+        objects_folder = self._root / "objects"
+        if not objects_folder.exists():
+            return
+        for object_path in objects_folder.glob("*/*"):
+            if object_path.is_file() and not object_path.name.endswith(".tmp"):
+                yield object_path.name, object_path
+
+    def collect_garbage(self, referenced_digests):
+        """Remove the stored objects which are not referenced anymore.
+
+        Args:
+            referenced_digests (set): Content hashes referenced by the database.
+
+        Returns:
+            tuple: (number of removed objects, freed bytes)
+        """
+        removed = 0
+        freed = 0
+        for digest, object_path in list(self.iter_objects()):
+            if digest in referenced_digests:
+                continue
+            freed += object_path.stat().st_size
+            utils.delete(str(object_path))
+            removed += 1
+        return removed, freed
+
+    def stats(self):
+        """Return the object count and stored bytes."""
+        sizes = [path.stat().st_size for _digest, path in self.iter_objects()]
+        return {"objects": len(sizes), "size": sum(sizes)}
+
+
+def collect_references(*database_roots):
+    """Collect the content hashes referenced by the work and publish files.
+
+    Args:
+        *database_roots (str): Database folders to scan.
+
+    Returns:
+        set: The referenced content hashes.
+    """
+    reader = io.IO()
+    references = set()
+    for database_root in database_roots:
+        root = Path(database_root)
+        if not root.exists():
+            continue
+        for record_file in list(root.rglob("*.twork")) + list(root.rglob("*.tpub")):
+            try:
+                data = reader.read(str(record_file))
+            except Exception:  # pylint: disable=broad-except
+                continue
+            for item in data.get("versions", []) + data.get("elements", []):
+                references.update(item.get("content_hashes", []))
+    return references
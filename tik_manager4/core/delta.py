@@ -0,0 +1,260 @@
+"""Delta compression for text based scene files.
+
+Older versions are stored as a list of line copy and insert operations
+against the next version, compressed with zlib. Deltas can be chained, a
+base can be a delta file itself. The chains are kept short by leaving a full
+file (keyframe) every few versions.
+"""
+
+import hashlib
+import json
+import os
+import struct
+import zlib
+from pathlib import Path
+
+from tik_manager4.core import filelog
+from tik_manager4.core import utils
+
+LOG = filelog.Filelog(logname=__name__, filename="tik_manager4")
+
+DELTA_SUFFIX = ".tikdelta"
+MAGIC = b"TIKDELTA1\n"
+DEFAULT_EXTENSIONS = (".ma", ".nk", ".hip", ".hipnc", ".gfr", ".usda")
+# deltas bigger than this ratio of the original file are not worth keeping.
+MAX_RATIO = 0.5
+# a full file is kept at least once in this many versions
+KEYFRAME_INTERVAL = 10
+# number of lines indexed together to find the matching regions of the base
+BLOCK_LINES = 4
+
+_COPY = b"C"
+_INSERT = b"I"
+
+
+def create_delta(base, target):
+    """Return the compressed operations rebuilding the target from the base.
+
+    The blocks of lines of the base are indexed and the target is matched
+    against them in a single pass. The time grows linearly with the sizes of
+    the files, even if they are full of repeated lines.
+
+    Args:
+        base (bytes): The base data.
+        target (bytes): The target data.
+
+    Returns:
+        bytes: The delta.
+    """
+    base_lines = base.splitlines(keepends=True)
+    target_lines = target.splitlines(keepends=True)
+    index = {}
+    for start in range(len(base_lines) - BLOCK_LINES + 1):
+        index.setdefault(b"".join(base_lines[start:start + BLOCK_LINES]), start)
+
+    operations = []
+    inserted = []
+    # the copies continue from the end of the previous one if possible
+    expected = 0
+    position = 0
+    while position < len(target_lines):
+        start = None
+        if expected < len(base_lines) and base_lines[expected] == target_lines[position]:
+            start = expected
+        else:
+            block = target_lines[position:position + BLOCK_LINES]
+            candidate = index.get(b"".join(block))
+            if candidate is not None and base_lines[candidate:candidate + BLOCK_LINES] == block:
+                start = candidate
+        if start is None:
+            inserted.append(target_lines[position])
+            position += 1
+            continue
+        count = 0
+        while (
+            position + count < len(target_lines)
+            and start + count < len(base_lines)
+            and base_lines[start + count] == target_lines[position + count]
+        ):
+            count += 1
+        if inserted:
+            data = b"".join(inserted)
+            operations.append(_INSERT + struct.pack(">I", len(data)) + data)
+            inserted = []
+        operations.append(_COPY + struct.pack(">II", start, count))
+        position += count
+        expected = start + count
+    if inserted:
+        data = b"".join(inserted)
+        operations.append(_INSERT + struct.pack(">I", len(data)) + data)
+    return zlib.compress(b"".join(operations), 9)
+
+
+def apply_delta(base, delta):
+    """Rebuild the target data from the base and the delta.
+
+    Args:
+        base (bytes): The base data.
+        delta (bytes): The delta created with create_delta.
+
+    Returns:
+        bytes: The target data.
+    """
+    base_lines = base.splitlines(keepends=True)
+    operations = zlib.decompress(delta)
+    output = []
+    position = 0
+    while position < len(operations):
+        code = operations[position:position + 1]
+        if code == _COPY:
+            start, count = struct.unpack_from(">II", operations, position + 1)
+            output.extend(base_lines[start:start + count])
+            position += 9
+        elif code == _INSERT:
+            (size,) = struct.unpack_from(">I", operations, position + 1)
+            output.append(operations[position + 5:position + 5 + size])
+            position += 5 + size
+        else:
+            raise ValueError("Corrupted delta data.")
+    return b"".join(output)
+
+
+def get_delta_path(file_path):
+    """Return the delta path of the file."""
+    return Path(f"{file_path}{DELTA_SUFFIX}")
+
+
+def is_delta(file_path):
+    """Check if the file is stored as a delta."""
+    return not Path(file_path).exists() and get_delta_path(file_path).is_file()
+
+
+def _read_delta(file_path):
+    """Return the header and the delta data of the delta compressed file."""
+    with open(get_delta_path(file_path), "rb") as delta_file:
+        if delta_file.readline() != MAGIC:
+            raise ValueError(f"Not a delta file: {file_path}")
+        header = json.loads(delta_file.readline())
+        return header, delta_file.read()
+
+
+def get_base_name(file_path):
+    """Return the file name of the base if the file is stored as a delta.
+
+    Args:
+        file_path (str): The path of the original file.
+
+    Returns:
+        str: The base file name or None.
+    """
+    if not is_delta(file_path):
+        return None
+    return _read_delta(file_path)[0]["base"]
+
+
+def _walk_chain(file_path):
+    """Return the deltas from the file to its full base and the base path.
+
+    Returns:
+        tuple: (list of (path, header, delta data), path of the full file)
+    """
+    file_path = Path(file_path)
+    chain = []
+    visited = set()
+    while not file_path.is_file():
+        if file_path in visited:
+            raise ValueError(f"Circular delta chain: {file_path}")
+        visited.add(file_path)
+        header, delta = _read_delta(file_path)
+        chain.append((file_path, header, delta))
+        file_path = file_path.parent / header["base"]
+    return chain, file_path
+
+
+def get_chain_length(file_path):
+    """Return the number of deltas to apply for reading the file.
+
+    Args:
+        file_path (str): The path of the original file.
+
+    Returns:
+        int: 0 for full files.
+    """
+    return len(_walk_chain(file_path)[0])
+
+
+def read_bytes(file_path):
+    """Return the content of the file, expanding it if it is a delta.
+
+    Args:
+        file_path (str): The path of the original file.
+
+    Returns:
+        bytes: The content.
+    """
+    chain, base_path = _walk_chain(file_path)
+    data = base_path.read_bytes()
+    # apply from the full file back to the requested one
+    for delta_path, header, delta in reversed(chain):
+        data = apply_delta(data, delta)
+        if hashlib.sha256(data).hexdigest() != header["sha256"]:
+            raise ValueError(f"Expanded data does not match the original: {delta_path}")
+    return data
+
+
+def compress_file(file_path, base_path):
+    """Replace the file with a delta against the base file.
+
+    Args:
+        file_path (str): The file to compress.
+        base_path (str): The base file. Needs to be in the same folder.
+
+    Returns:
+        int: Saved bytes or None if the file is not compressed.
+    """
+    file_path = Path(file_path)
+    target = file_path.read_bytes()
+    base = read_bytes(base_path)
+    delta = create_delta(base, target)
+    header = {
+        "base": Path(base_path).name,
+        "sha256": hashlib.sha256(target).hexdigest(),
+        "size": len(target),
+    }
+    content = MAGIC + json.dumps(header).encode() + b"\n" + delta
+    if len(content) > len(target) * MAX_RATIO:
+        return None
+    # verify before removing the original
+    if apply_delta(base, delta) != target:
+        LOG.warning(f"Delta verification failed. Keeping {file_path}")
+        return None
+    get_delta_path(file_path).write_bytes(content)
+    ret, msg = utils.delete(str(file_path))
+    if not ret:
+        utils.delete(str(get_delta_path(file_path)))
+        LOG.warning(msg)
+        return None
+    return len(target) - len(content)
+
+
+def expand_file(file_path, output_path=None):
+    """Write the full content of the delta compressed file.
+
+    Args:
+        file_path (str): The path of the original file.
+        output_path (str, optional): Where to write. If not given, the
+            original file is restored and the delta is removed.
+
+    Returns:
+        str: The path of the expanded file.
+    """
+    data = read_bytes(file_path)
+    target = Path(output_path or file_path)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    # write to a temporary name first, others may read the file meanwhile
+    temp_path = target.with_name(f".{target.name}.tikexpand")
+    temp_path.write_bytes(data)
+    os.replace(temp_path, target)
+    if not output_path:
+        utils.delete(str(get_delta_path(file_path)))
+    return str(target)
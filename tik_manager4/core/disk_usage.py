@@ -0,0 +1,222 @@
+"""Parallel disk usage scanning with an incremental cache.
+
+Folders are listed with os.scandir on a thread pool. The listing of each
+folder is cached with the modification time of the folder, so unchanged
+folders are not listed again on the next scan.
+
+The folder modification time changes when files are added, removed or
+renamed. Files rewritten in place are picked up with a scan without cache.
+"""
+
+import csv
+import json
+import os
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
+
+from tik_manager4.core import filelog
+from tik_manager4.core import io
+
+LOG = filelog.Filelog(logname=__name__, filename="tik_manager4")
+
+CACHE_FILE_NAME = "disk_usage_cache.json"
+MAX_WORKERS = 8
+
+
+class ScanCache:
+    """Folder listings keyed by the folder modification times."""
+
+    def __init__(self, cache_file=None):
+        """Initialize the ScanCache object.
+
+        Args:
+            cache_file (str, optional): The json file to persist the cache.
+                If not given, the cache lives only in memory.
+        """
+        self._io = io.IO(file_path=cache_file) if cache_file else None
+        self._lock = threading.Lock()
+        self._folders = {}
+        self.hits = 0
+        self.misses = 0
+        if self._io and self._io.file_exists(self._io.file_path):
+            try:
+                self._folders = self._io.read().get("folders", {})
+            except Exception:  # pylint: disable=broad-except
+                LOG.warning("Disk usage cache is corrupted. Starting a new one.")
+
+    def get(self, folder, mtime):
+        """Return the cached (files, folders) of the folder if it is unchanged.
+
+        Args:
+            folder (str): The folder path.
+            mtime (int): Current modification time of the folder in ns.
+
+        Returns:
+            tuple: ({file name: size}, [sub folder names]) or None.
+        """
+        with self._lock:
+            entry = self._folders.get(folder)
+            if entry and entry["mtime"] == mtime:
+                self.hits += 1
+                return entry["files"], entry["folders"]
+            self.misses += 1
+            return None
+
+    def set(self, folder, mtime, files, folders):
+        """Store the listing of the folder."""
+        with self._lock:
+            self._folders[folder] = {"mtime": mtime, "files": files, "folders": folders}
+
+    def prune(self, scanned_folders, roots):
+        """Drop the cached folders under the roots which do not exist anymore.
+
+        Args:
+            scanned_folders (iterable): The folders found by the last scan.
+            roots (list): The scanned roots.
+        """
+        scanned_folders = set(scanned_folders)
+        prefixes = tuple(os.path.join(root, "") for root in roots)
+        with self._lock:
+            for folder in list(self._folders):
+                if folder in scanned_folders:
+                    continue
+                if folder in roots or folder.startswith(prefixes):
+                    del self._folders[folder]
+
+    def save(self):
+        """Write the cache file."""
+        if self._io:
+            with self._lock:
+                self._io.write({"folders": self._folders})
+
+
+def _list_folder(folder, cache):
+    """Return the file sizes and the sub folders of the folder."""
+    mtime = os.stat(folder).st_mtime_ns
+    cached = cache.get(folder, mtime) if cache else None
+    if cached:
+        return folder, cached[0], cached[1]
+    files = {}
+    folders = []
+    with os.scandir(folder) as entries:
+        for entry in entries:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    folders.append(entry.name)
+                else:
+                    files[entry.name] = entry.stat(follow_symlinks=False).st_size
+            except OSError:
+                continue
+    if cache:
+        cache.set(folder, mtime, files, folders)
+    return folder, files, folders
+
+
+def scan(roots, cache=None, max_workers=MAX_WORKERS):
+    """List all the folders under the roots in parallel.
+
+    Args:
+        roots (list): Root folders to scan. Missing ones are skipped.
+        cache (ScanCache, optional): Cache of the folder listings.
+        max_workers (int): Number of folders listed in parallel.
+
+    Returns:
+        dict: {folder path: {file name: size}} for every scanned folder.
+    """
+    roots = [os.path.normpath(root) for root in roots if os.path.isdir(root)]
+    results = {}
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        pending = {executor.submit(_list_folder, root, cache) for root in set(roots)}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    folder, files, folders = future.result()
+                except OSError as exc:
+                    LOG.warning(f"Cannot scan folder: {exc}")
+                    continue
+                results[folder] = files
+                pending.update(
+                    executor.submit(_list_folder, os.path.join(folder, name), cache)
+                    for name in folders
+                    if os.path.join(folder, name) not in results
+                )
+    if cache:
+        cache.prune(results, roots)
+        cache.save()
+    return results
+
+
+class DiskUsage:
+    """Size lookups over the results of a scan."""
+
+    def __init__(self, listings):
+        """Initialize the DiskUsage object.
+
+        Args:
+            listings (dict): The results of the scan function.
+        """
+        self.listings = listings
+        self.totals = {}
+        # deepest first, so the sub folders are summed before their parents
+        for folder in sorted(listings, key=len, reverse=True):
+            total = sum(listings[folder].values())
+            self.totals[folder] = self.totals.get(folder, 0) + total
+            parent = os.path.dirname(folder)
+            if parent != folder and parent in listings:
+                self.totals[parent] = self.totals.get(parent, 0) + self.totals[folder]
+
+    @property
+    def total(self):
+        """Total size of all scanned files."""
+        return sum(sum(files.values()) for files in self.listings.values())
+
+    def get_size(self, path):
+        """Return the size of the file or folder.
+
+        Args:
+            path (str): The file or folder path.
+
+        Returns:
+            tuple: (size in bytes, True if the path is in the scanned roots)
+        """
+        path = os.path.normpath(str(path))
+        parent, name = os.path.split(path)
+        files = self.listings.get(parent)
+        if files is not None and name in files:
+            return files[name], True
+        if path in self.totals:
+            return self.totals[path], True
+        if os.path.isfile(path):
+            return os.path.getsize(path), False
+        return 0, False
+
+
+def export_report(report, file_path):
+    """Export the storage report as json or csv depending on the extension.
+
+    The csv file has a row for each work.
+
+    Args:
+        report (dict): The storage report.
+        file_path (str): The output file path ending with .json or .csv.
+
+    Returns:
+        str: The output file path.
+    """
+    file_path = Path(file_path)
+    file_path.parent.mkdir(parents=True, exist_ok=True)
+    if file_path.suffix.lower() == ".json":
+        with open(file_path, "w", encoding="utf-8") as output:
+            json.dump(report, output, indent=4)
+        return str(file_path)
+    if file_path.suffix.lower() != ".csv":
+        raise ValueError(f"Unsupported export format: {file_path.suffix}")
+    rows = report.get("works", [])
+    fields = list(rows[0]) if rows else ["path"]
+    with open(file_path, "w", newline="", encoding="utf-8") as output:
+        writer = csv.DictWriter(output, fieldnames=fields)
+        writer.writeheader()
+        writer.writerows(rows)
+    return str(file_path)
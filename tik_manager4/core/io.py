@@ -1,5 +1,7 @@
 """I/O Module to handle read/write operations."""
 
+import os
+import threading
 from pathlib import Path
 import json
 from json.decoder import JSONDecodeError
@@ -8,6 +10,17 @@ from tik_manager4.external import filelock as fl
 
 LOG = filelog.Filelog(logname=__name__)
 
+# the file locks do not serialize the threads of the same process
+_PATH_LOCKS = {}
+_PATH_LOCKS_GUARD = threading.Lock()
+
+
+def _path_lock(file_path):
+    """Return the lock serializing the writes of the file in this process."""
+    key = os.path.normcase(os.path.abspath(file_path))
+    with _PATH_LOCKS_GUARD:
+        return _PATH_LOCKS.setdefault(key, threading.RLock())
+
 
 class IO:
     """Handler class for read/write operations."""
@@ -84,10 +97,39 @@ class IO:
         _lock_path = f"{str(_path_obj)}.lock"
         lock = fl.FileLock(_lock_path, timeout=3)
         try:
-            lock.acquire()
-            self._dump_json(data, str(_path_obj))
+            with _path_lock(_path_obj), lock:
+                self._dump_json(data, str(_path_obj))
+        except fl.Timeout as exc:
+            raise fl.Timeout("File is locked by another process") from exc
+
+    def update(self, updater, file_path=None):
+        """Apply the updater to the current contents of the file and write it.
+
+        The file is read and written under its lock, so the changes written
+        by the others in the meantime are kept.
+
+        Args:
+            updater (function): Called with the data dictionary to edit it
+                in place.
+            file_path (str): The file path to update.
+
+        Raises:
+            fl.Timeout: If the file is locked by another process.
+
+        Returns:
+            dict: The written data.
+        """
+        _path_obj = Path(file_path) if file_path else self._path_obj
+        _lock_path = f"{str(_path_obj)}.lock"
+        lock = fl.FileLock(_lock_path, timeout=3)
+        try:
+            with _path_lock(_path_obj), lock:
+                data = self._load_json(str(_path_obj)) if _path_obj.is_file() else {}
+                updater(data)
+                self._dump_json(data, str(_path_obj))
         except fl.Timeout as exc:
             raise fl.Timeout("File is locked by another process") from exc
+        return data
 
     @staticmethod
     def _load_json(file_path):
@@ -122,8 +164,15 @@ class IO:
             data (dict): The data to save.
             file_path (str): The file path to save.
         """
-        with open(file_path, "w") as f:
-            json.dump(data, f, indent=4)
+        # readers never see a partially written file
+        temp_path = f"{file_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(temp_path, "w") as f:
+                json.dump(data, f, indent=4)
+            os.replace(temp_path, file_path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
 
     def get_modified_time(self):
         """Get the modified time of the file"""
@@ -0,0 +1,390 @@
+"""Size limited local cache for reading published elements.
+
+Copies of the origin files are kept in a separate folder under the local cache
+folder. Localized (not yet synced) works and publishes are never stored
+here, so they can never be evicted.
+"""
+
+import atexit
+import queue
+import shutil
+import threading
+import time
+import weakref
+from concurrent.futures import Future
+from pathlib import Path
+
+from tik_manager4.core import filelog
+from tik_manager4.core import io
+from tik_manager4.core import utils
+
+LOG = filelog.Filelog(logname=__name__, filename="tik_manager4")
+
+CACHE_FOLDER_NAME = ".read_cache"
+INDEX_FILE_NAME = "cache_index.json"
+GIGABYTE = 1024 ** 3
+# access times of the hits are written at most once in this many seconds
+INDEX_SAVE_INTERVAL = 30.0
+
+# caches with unsaved access times, flushed at exit
+_CACHES = weakref.WeakSet()
+# prefetchers with queued copies, cancelled at exit
+_PREFETCHERS = weakref.WeakSet()
+
+
+def _flush_all():
+    """Write the pending access times of all the caches."""
+    for cache in list(_CACHES):
+        cache.flush()
+
+
+def _cancel_all():
+    """Cancel the queued copies of all the prefetchers."""
+    for prefetcher in list(_PREFETCHERS):
+        prefetcher.cancel()
+
+
+atexit.register(_flush_all)
+atexit.register(_cancel_all)
+
+
+class LocalCache:
+    """Local copies of origin files with a size quota and LRU eviction."""
+
+    def __init__(self, root, quota_bytes=50 * GIGABYTE):
+        """Initialize the LocalCache object.
+
+        Args:
+            root (str): The cache root folder.
+            quota_bytes (int): Maximum total size of the cached copies.
+        """
+        self._root = Path(root)
+        self.quota = quota_bytes
+        self._lock = threading.RLock()
+        self._io = io.IO(file_path=str(self._root / INDEX_FILE_NAME))
+        self._entries = {}
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._dirty = False
+        self._saved_at = 0.0
+        self._load_index()
+        _CACHES.add(self)
+
+    @property
+    def root(self):
+        """The cache root folder."""
+        return self._root
+
+    @property
+    def total_size(self):
+        """Total size of the cached copies in bytes."""
+        return sum(entry["size"] for entry in self._entries.values())
+
+    def get_local_path(self, key):
+        """Return the path of the cached copy for the key.
+
+        Args:
+            key (str): Relative path identifying the cached copy.
+
+        Returns:
+            Path: The cache path. It may not exist.
+        """
+        return self._root / key
+
+    def get(self, source, key):
+        """Return the verified local copy of the source if it is cached.
+
+        The copy is only served if the source has not changed since the copy
+        was made.
+
+        Args:
+            source (str): The origin path.
+            key (str): Relative path identifying the cached copy.
+
+        Returns:
+            str: The local path or None if there is no valid copy.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            local_path = self.get_local_path(key)
+            if entry and local_path.exists():
+                if entry["signature"] == self._signature(source):
+                    entry["last_access"] = time.time()
+                    self._hits += 1
+                    # only the access time changed, it can wait
+                    self._dirty = True
+                    if time.monotonic() - self._saved_at > INDEX_SAVE_INTERVAL:
+                        self._save_index()
+                    return str(local_path)
+                self._remove(key)
+            self._misses += 1
+            return None
+
+    def fetch(self, source, key):
+        """Return the local copy of the source. Copy it if necessary.
+
+        Args:
+            source (str): The origin path.
+            key (str): Relative path identifying the cached copy.
+
+        Returns:
+            str: The local path or None if the source cannot be cached.
+        """
+        cached = self.get(source, key)
+        if cached:
+            return cached
+        if not Path(source).exists():
+            return None
+        size = utils.get_size(source)
+        if size > self.quota:
+            LOG.warning(f"{source} is larger than the local cache quota.")
+            return None
+
+        local_path = self.get_local_path(key)
+        partial_path = local_path.with_name(f"{local_path.name}.partial")
+        utils.delete(str(partial_path))
+        partial_path.parent.mkdir(parents=True, exist_ok=True)
+        # copy to a temporary name first so interrupted copies are not served
+        if Path(source).is_dir():
+            shutil.copytree(source, partial_path)
+        else:
+            shutil.copy2(source, partial_path)
+
+        with self._lock:
+            self._remove(key)
+            self.evict(required_bytes=size)
+            partial_path.replace(local_path)
+            self._entries[key] = {
+                "source": str(source),
+                "size": size,
+                "signature": self._signature(source),
+                "last_access": time.time(),
+            }
+            self._save_index()
+        return str(local_path)
+
+    def flush(self):
+        """Write the index if there are unsaved access times."""
+        with self._lock:
+            if self._dirty:
+                self._save_index()
+
+    def evict(self, required_bytes=0):
+        """Remove the least recently used copies until the required space is free.
+
+        Args:
+            required_bytes (int): Bytes that need to fit into the quota.
+
+        Returns:
+            int: Number of evicted copies.
+        """
+        evicted = 0
+        with self._lock:
+            ordered = sorted(
+                self._entries, key=lambda key: self._entries[key]["last_access"]
+            )
+            for key in ordered:
+                if self.total_size + required_bytes <= self.quota:
+                    break
+                self._remove(key)
+                evicted += 1
+            self._evictions += evicted
+            if evicted:
+                self._save_index()
+        return evicted
+
+    def clear(self):
+        """Remove all the cached copies."""
+        with self._lock:
+            for key in list(self._entries):
+                self._remove(key)
+            self._save_index()
+
+    def stats(self):
+        """Return the usage statistics of the cache.
+
+        Returns:
+            dict: Entry count, used and quota bytes, hits, misses and evictions.
+        """
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "size": self.total_size,
+                "quota": self.quota,
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+            }
+
+    def _remove(self, key):
+        """Delete the cached copy and its index entry."""
+        self._entries.pop(key, None)
+        local_path = self.get_local_path(key)
+        if local_path.exists():
+            utils.delete(str(local_path), defer=True)
+
+    @staticmethod
+    def _signature(source):
+        """Return the size and modified time of the source for verification.
+
+        A single stat of the source is used. For folders, it tells the
+        entries which are added, removed or renamed at the top level.
+        """
+        try:
+            stat = Path(source).stat()
+            return [stat.st_size, stat.st_mtime]
+        except OSError:
+            return None
+
+    def _load_index(self):
+        """Load the index and drop the entries without a local copy."""
+        if not self._io.file_exists(self._io.file_path):
+            return
+        try:
+            entries = self._io.read().get("entries", {})
+        except Exception:  # pylint: disable=broad-except
+            LOG.warning("Local cache index is corrupted. Starting a new one.")
+            entries = {}
+        self._entries = {
+            key: entry
+            for key, entry in entries.items()
+            if self.get_local_path(key).exists()
+        }
+
+    def _save_index(self):
+        """Write the index file."""
+        self._io.write({"entries": self._entries})
+        self._dirty = False
+        self._saved_at = time.monotonic()
+
+
+class Prefetcher:
+    """Warms the local cache in the background.
+
+    The workers are daemon threads, so exiting never waits for the copies.
+    Interrupted copies are left with their temporary names, which are never
+    served.
+    """
+
+    def __init__(self, cache, max_workers=2):
+        """Initialize the Prefetcher object.
+
+        Args:
+            cache (LocalCache): The cache to warm.
+            max_workers (int): Number of parallel copies.
+        """
+        self.cache = cache
+        self.max_workers = max_workers
+        self._queue = queue.Queue()
+        self._workers = []
+        self._futures = {}
+        self._collectors = []
+        self._lock = threading.RLock()
+        _PREFETCHERS.add(self)
+
+    def prefetch_from(self, collector, *args):
+        """Collect the items in the background and queue them.
+
+        Args:
+            collector (callable): Returns the list of (source, key) tuples.
+                It must not touch the objects used by the other threads.
+            *args: Arguments passed to the collector.
+
+        Returns:
+            Future: Resolves to the number of queued items.
+        """
+        with self._lock:
+            future = self._submit(self._collect, collector, *args)
+            self._collectors.append(future)
+        return future
+
+    def prefetch(self, items):
+        """Queue the items for copying into the cache.
+
+        Items which are already queued are skipped.
+
+        Args:
+            items (list): List of (source, key) tuples.
+
+        Returns:
+            int: Number of queued items.
+        """
+        queued = 0
+        with self._lock:
+            for source, key in items:
+                future = self._futures.get(key)
+                if future and not future.done():
+                    continue
+                self._futures[key] = self._submit(self._fetch, source, key)
+                queued += 1
+        return queued
+
+    def wait(self, timeout=None):
+        """Wait for the queued items.
+
+        Args:
+            timeout (float, optional): Maximum seconds to wait for each item.
+        """
+        with self._lock:
+            collectors, self._collectors = self._collectors, []
+        # the collectors queue more items
+        for future in collectors:
+            future.result(timeout=timeout)
+        with self._lock:
+            futures = list(self._futures.values())
+        for future in futures:
+            future.result(timeout=timeout)
+
+    def cancel(self):
+        """Cancel the queued collections and copies which are not started yet.
+
+        Returns:
+            int: Number of cancelled items.
+        """
+        with self._lock:
+            futures = self._collectors + list(self._futures.values())
+        return sum(future.cancel() for future in futures)
+
+    def _submit(self, function, *args):
+        """Queue the function call for the workers and return its future."""
+        future = Future()
+        with self._lock:
+            if len(self._workers) < self.max_workers:
+                worker = threading.Thread(
+                    target=self._work,
+                    name=f"tik_prefetch_{len(self._workers)}",
+                    daemon=True,
+                )
+                self._workers.append(worker)
+                worker.start()
+        self._queue.put((future, function, args))
+        return future
+
+    def _work(self):
+        """Run the queued calls one by one."""
+        while True:
+            future, function, args = self._queue.get()
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(function(*args))
+            except Exception as exc:  # pylint: disable=broad-except
+                future.set_exception(exc)
+
+    def _collect(self, collector, *args):
+        """Run the collector and queue its items."""
+        try:
+            items = collector(*args)
+        except Exception as exc:  # pylint: disable=broad-except
+            LOG.warning(f"Collecting the items to prefetch failed: {exc}")
+            return 0
+        return self.prefetch(items)
+
+    def _fetch(self, source, key):
+        """Copy a single item, logging the errors instead of raising."""
+        try:
+            return self.cache.fetch(source, key)
+        except Exception as exc:  # pylint: disable=broad-except
+            LOG.warning(f"Prefetching {source} failed: {exc}")
+            return None
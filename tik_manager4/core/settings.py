@@ -2,10 +2,87 @@
 from copy import deepcopy
 from tik_manager4.core import io
 
+# marks the keys which are missing in the compared data
+_MISSING = object()
+
+
+def _is_records(value, record_key):
+    """Return True if the value is a list of records with the record key."""
+    return isinstance(value, list) and all(
+        isinstance(item, dict) and record_key in item for item in value
+    )
+
+
+def merge_changes(original, current, latest, record_key="version_number"):
+    """Merge the changes made from the original to the current data into the latest.
+
+    Dictionaries are merged key by key and the lists of records are merged
+    by their record keys, so the changes written by the others in the
+    meantime are kept. The other values take the current value if it is
+    changed.
+
+    Args:
+        original (any): The data as it was read.
+        current (any): The data with the changes to write.
+        latest (any): The latest data of the file.
+        record_key (str): The key identifying the records in the lists.
+
+    Returns:
+        any: The merged data.
+    """
+    if current == original:
+        return latest
+    if isinstance(current, dict) and isinstance(latest, dict):
+        original = original if isinstance(original, dict) else {}
+        merged = dict(latest)
+        for key in original.keys() | current.keys():
+            if key not in current:
+                merged.pop(key, None)
+            elif key in latest:
+                merged[key] = merge_changes(
+                    original.get(key, _MISSING), current[key], latest[key], record_key
+                )
+            elif current[key] != original.get(key, _MISSING):
+                merged[key] = current[key]
+        return merged
+    if _is_records(current, record_key) and _is_records(latest, record_key):
+        originals = {}
+        if _is_records(original, record_key):
+            originals = {record[record_key]: record for record in original}
+        currents = {record[record_key]: record for record in current}
+        merged = []
+        for record in latest:
+            record_id = record[record_key]
+            if record_id in currents:
+                merged.append(merge_changes(
+                    originals.get(record_id, _MISSING),
+                    currents.pop(record_id),
+                    record,
+                    record_key,
+                ))
+            elif record_id not in originals:
+                # added by the others
+                merged.append(record)
+        # the records added by this side or deleted by the others
+        merged.extend(
+            record for record_id, record in currents.items()
+            if record != originals.get(record_id, _MISSING)
+        )
+        return merged
+    return current
+
 
 class Settings:
     """Generic Settings class to hold read and compare dictionary data."""
 
+    # optional warm start cache shared by all settings objects
+    _warm_cache = None
+    # optional function called with the file path and data after each write
+    _write_callback = None
+    # merge the changes into the latest file contents instead of replacing
+    # them, for the files also written by the others
+    merge_on_write = False
+
     def __init__(self, file_path=None):
         """Initializes the Settings class."""
         super().__init__()
@@ -34,13 +111,60 @@ class Settings:
         """Set the settings file path."""
         self._filepath = file_path
         self._io.file_path = file_path
-        if self._io.file_exists(file_path):
+        self._load(use_cache=True)
+
+    @classmethod
+    def set_warm_cache(cls, warm_cache):
+        """Serve the settings files from the given warm start cache.
+
+        Args:
+            warm_cache (WarmCache): The cache object. None disables caching.
+        """
+        cls._warm_cache = warm_cache
+
+    @classmethod
+    def get_warm_cache(cls):
+        """Return the warm start cache or None if it is disabled."""
+        return cls._warm_cache
+
+    @classmethod
+    def set_write_callback(cls, callback):
+        """Call the given function after each settings file is written.
+
+        Args:
+            callback (function): Called with the file path and the written
+                data. None disables it.
+        """
+        cls._write_callback = callback
+
+    def _load(self, use_cache=True):
+        """Read the settings file or its cached contents.
+
+        Args:
+            use_cache (bool): If True, the cached contents are used when the
+                modified time of the file matches. This costs a single stat
+                instead of reading the file.
+        """
+        warm_cache = Settings._warm_cache
+        if warm_cache and use_cache and self._filepath:
+            try:
+                mtime = self._io.get_modified_time()
+            except OSError:
+                mtime = None
+            cached = warm_cache.get(self._filepath, mtime) if mtime is not None else None
+            if cached:
+                self._time_stamp, data = cached
+                self.initialize(data)
+                return
+        if self._io.file_exists(self._filepath):
             self._time_stamp = self._io.get_modified_time()
             self.initialize(self._io.read())
+            if warm_cache:
+                warm_cache.put(self._filepath, self._time_stamp, self._original_value)
 
     def reload(self):
         """Reload the settings from file."""
-        self.settings_file = self._filepath
+        self._load(use_cache=False)
         return self._current_value
 
     @property
@@ -111,11 +235,43 @@ class Settings:
         """
         if not self.is_settings_changed() and not force:
             return False
-        self._original_value = deepcopy(self._current_value)
-        self._io.write(self._original_value)
+        if self.merge_on_write:
+            original = self._original_value
+            current = deepcopy(self._current_value)
+
+            def _merge(data):
+                merged = merge_changes(original, current, data) if data else current
+                if merged is not data:
+                    data.clear()
+                    data.update(merged)
+
+            self.initialize(self._io.update(_merge))
+        else:
+            self._original_value = deepcopy(self._current_value)
+            self._io.write(self._original_value)
         self._time_stamp = self._io.get_modified_time()
+        if Settings._warm_cache:
+            Settings._warm_cache.put(self._filepath, self._time_stamp, self._original_value)
+        if Settings._write_callback:
+            Settings._write_callback(self._filepath, self._original_value)
         return True
 
+    def update_file(self, updater):
+        """Apply the updater to the latest contents of the settings file.
+
+        Only the file is updated, the data of this object is left as it is.
+        This makes it safe to call from the other threads.
+
+        Args:
+            updater (function): Called with the data dictionary of the file
+                to edit it in place.
+        """
+        data = self._io.update(updater)
+        if Settings._warm_cache:
+            Settings._warm_cache.discard(self._filepath)
+        if Settings._write_callback:
+            Settings._write_callback(self._filepath, data)
+
     def reset_settings(self):
         """Revert back the unsaved changes to the original state."""
         self._current_value = deepcopy(self._original_value)
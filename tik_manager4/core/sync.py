@@ -0,0 +1,278 @@
+"""Resumable transfer of localized files back to the origin.
+
+Files are copied in chunks on a worker pool, verified after the copy and
+committed with an atomic rename. Progress is written to a checkpoint file so
+an interrupted sync resumes from the last committed file.
+"""
+
+import hashlib
+import os
+import re
+import shutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+
+from tik_manager4.core import filelog
+from tik_manager4.core import io
+from tik_manager4.core import utils
+
+LOG = filelog.Filelog(logname=__name__, filename="tik_manager4")
+
+CHUNK_SIZE = 8 * 1024 * 1024
+PARTIAL_SUFFIX = ".tiksync.partial"
+CHECKPOINT_SUFFIX = ".tiksync.json"
+MEGABYTE = 1024 ** 2
+
+
+def get_host(path):
+    """Return the host key of the path which bandwidth limits are shared by.
+
+    UNC paths resolve to the server name, other paths to their mount point.
+
+    Args:
+        path (str): The path.
+
+    Returns:
+        str: The host key.
+    """
+    path_str = str(path)
+    if path_str.startswith(("\\\\", "//")):
+        return re.split(r"[\\/]+", path_str.lstrip("\\/"))[0].lower()
+    current = Path(path).absolute()
+    while current.parent != current and not os.path.ismount(current):
+        current = current.parent
+    return str(current)
+
+
+class BandwidthLimiter:
+    """Paces the transfers so they do not exceed the given rate."""
+
+    _hosts = {}
+    _hosts_lock = threading.Lock()
+
+    def __init__(self, bytes_per_second=0):
+        """Initialize the BandwidthLimiter object.
+
+        Args:
+            bytes_per_second (float): The rate. 0 means unlimited.
+        """
+        self.rate = bytes_per_second
+        self._lock = threading.Lock()
+        self._next_time = time.monotonic()
+
+    @classmethod
+    def for_host(cls, host, bytes_per_second):
+        """Return the limiter shared by all the transfers to the host.
+
+        Args:
+            host (str): The host key.
+            bytes_per_second (float): The rate. 0 means unlimited.
+
+        Returns:
+            BandwidthLimiter: The shared limiter.
+        """
+        with cls._hosts_lock:
+            limiter = cls._hosts.setdefault(host, cls(bytes_per_second))
+            limiter.rate = bytes_per_second
+            return limiter
+
+    def consume(self, nbytes):
+        """Block until the given amount of bytes can be transferred.
+
+        Args:
+            nbytes (int): Number of bytes.
+        """
+        if not self.rate:
+            return
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_time)
+            self._next_time = start + nbytes / self.rate
+            delay = start - now
+        if delay > 0:
+            time.sleep(delay)
+
+
+def copy_file(source, target, chunk_size=CHUNK_SIZE, limiter=None, callback=None):
+    """Copy the file in chunks and return the checksum of the data.
+
+    Args:
+        source (str): The source file.
+        target (str): The target file.
+        chunk_size (int): Size of the chunks in bytes.
+        limiter (BandwidthLimiter, optional): Limiter to pace the copy.
+        callback (function, optional): Called with the size of every chunk.
+
+    Returns:
+        str: The sha1 checksum of the copied data.
+    """
+    digest = hashlib.sha1()
+    with open(source, "rb") as source_file, open(target, "wb") as target_file:
+        while True:
+            chunk = source_file.read(chunk_size)
+            if not chunk:
+                break
+            if limiter:
+                limiter.consume(len(chunk))
+            target_file.write(chunk)
+            digest.update(chunk)
+            if callback:
+                callback(len(chunk))
+        target_file.flush()
+        os.fsync(target_file.fileno())
+    return digest.hexdigest()
+
+
+def get_checksum(file_path, chunk_size=CHUNK_SIZE):
+    """Return the sha1 checksum of the file.
+
+    Args:
+        file_path (str): The file path.
+        chunk_size (int): Size of the chunks in bytes.
+
+    Returns:
+        str: The checksum.
+    """
+    digest = hashlib.sha1()
+    with open(file_path, "rb") as _file:
+        for chunk in iter(lambda: _file.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class SyncJob:
+    """Copies the source files or folders to the targets and commits them."""
+
+    def __init__(self, pairs, checkpoint_file, max_workers=4, bandwidth=0,
+                 chunk_size=CHUNK_SIZE, progress_callback=None):
+        """Initialize the SyncJob object.
+
+        Args:
+            pairs (list): List of (source, target) paths. Sources can be
+                files or folders.
+            checkpoint_file (str): Path of the checkpoint json file.
+            max_workers (int): Number of parallel copies.
+            bandwidth (float): Maximum bytes per second for each target host.
+                0 means unlimited.
+            chunk_size (int): Size of the copy chunks in bytes.
+            progress_callback (function, optional): Called with the transferred
+                and total bytes. It is called from the worker threads.
+        """
+        self.pairs = [(Path(source), Path(target)) for source, target in pairs]
+        self.max_workers = max_workers
+        self.bandwidth = bandwidth
+        self.chunk_size = chunk_size
+        self.progress_callback = progress_callback
+        self._io = io.IO(file_path=str(checkpoint_file))
+        self._lock = threading.Lock()
+        self._transferred = 0
+        self._total = 0
+        self._committed = {}
+        if self._io.file_exists(self._io.file_path):
+            self._committed = self._io.read().get("committed", {})
+
+    @property
+    def checkpoint_file(self):
+        """Path of the checkpoint file."""
+        return self._io.file_path
+
+    @property
+    def is_resuming(self):
+        """True if there are committed files from a previous run."""
+        return bool(self._committed)
+
+    def has_progress(self, target):
+        """Check if any files are committed under the target from a previous run.
+
+        Args:
+            target (str): The target file or folder.
+
+        Returns:
+            bool: True if the target is partially or fully committed.
+        """
+        target = Path(target).as_posix()
+        return any(
+            key == target or key.startswith(f"{target}/") for key in self._committed
+        )
+
+    def collect_files(self):
+        """Return the (source, target) pairs of the individual files.
+
+        Returns:
+            list: List of (Path, Path) tuples.
+        """
+        files = []
+        for source, target in self.pairs:
+            if source.is_dir():
+                for source_file in source.rglob("*"):
+                    if source_file.is_file():
+                        files.append(
+                            (source_file, target / source_file.relative_to(source))
+                        )
+            else:
+                files.append((source, target))
+        return files
+
+    def run(self):
+        """Transfer the files which are not committed yet.
+
+        Returns:
+            tuple: (bool, list of error messages)
+        """
+        pending = []
+        for source, target in self.collect_files():
+            committed = self._committed.get(target.as_posix())
+            if committed and target.exists() and target.stat().st_size == committed[0]:
+                continue
+            pending.append((source, target))
+        self._total = sum(source.stat().st_size for source, _ in pending)
+        self._transferred = 0
+
+        errors = []
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {
+                executor.submit(self._transfer, source, target): target
+                for source, target in pending
+            }
+            for future in as_completed(futures):
+                try:
+                    future.result()
+                except Exception as exc:  # pylint: disable=broad-except
+                    msg = f"Failed to sync {futures[future].as_posix()}: {exc}"
+                    LOG.error(msg)
+                    errors.append(msg)
+        return not errors, errors
+
+    def cleanup(self):
+        """Delete the sources and the checkpoint after a successful sync."""
+        for source, _target in self.pairs:
+            utils.delete(str(source))
+        utils.delete(self.checkpoint_file)
+        utils.delete(f"{self.checkpoint_file}.lock")
+
+    def _transfer(self, source, target):
+        """Copy, verify and commit a single file."""
+        target.parent.mkdir(parents=True, exist_ok=True)
+        partial = target.with_name(f"{target.name}{PARTIAL_SUFFIX}")
+        limiter = BandwidthLimiter.for_host(get_host(target), self.bandwidth)
+        checksum = copy_file(
+            source, partial, self.chunk_size, limiter=limiter, callback=self._progress
+        )
+        if get_checksum(partial, self.chunk_size) != checksum:
+            utils.delete(str(partial))
+            raise IOError("Checksum mismatch after copy.")
+        shutil.copystat(source, partial)
+        os.replace(partial, target)
+        with self._lock:
+            self._committed[target.as_posix()] = [target.stat().st_size, checksum]
+            self._io.write({"committed": self._committed})
+
+    def _progress(self, nbytes):
+        """Forward the progress to the callback."""
+        with self._lock:
+            self._transferred += nbytes
+            transferred = self._transferred
+        if self.progress_callback:
+            self.progress_callback(transferred, self._total)
@@ -0,0 +1,250 @@
+"""Timers and byte counters for instrumenting the publish pipeline.
+
+Publisher steps are measured with monotonic timers and stored as a compact
+record in the publish (.tpub) files. This module also aggregates those
+records across a project into percentile reports.
+
+Can be used from the command line:
+    python -m tik_manager4.core.timing <project_path> [-p 50 90 99] [--json]
+"""
+
+import argparse
+import functools
+import json
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+from tik_manager4.core import io
+
+EXTRACT_PREFIX = "extract:"
+DEFAULT_PERCENTILES = (50, 90, 99)
+
+
+class Timings:
+    """Collects durations and byte counts per named step."""
+
+    def __init__(self):
+        """Initialize the Timings object."""
+        self._records = {}
+
+    @property
+    def records(self):
+        """Recorded steps as {step: [seconds, bytes]}."""
+        return self._records
+
+    def reset(self):
+        """Clear all the recorded steps."""
+        self._records = {}
+
+    def add(self, step, seconds=0.0, nbytes=0):
+        """Accumulate the duration and byte count for the given step.
+
+        Args:
+            step (str): Name of the step.
+            seconds (float): Duration in seconds.
+            nbytes (int): Number of bytes processed in the step.
+        """
+        record = self._records.setdefault(step, [0.0, 0])
+        record[0] += seconds
+        record[1] += nbytes or 0
+
+    def add_bytes(self, step, nbytes):
+        """Accumulate only the byte count for the given step.
+
+        Args:
+            step (str): Name of the step.
+            nbytes (int): Number of bytes processed in the step.
+        """
+        self.add(step, 0.0, nbytes)
+
+    @contextmanager
+    def measure(self, step):
+        """Context manager measuring the duration of the enclosed block.
+
+        Args:
+            step (str): Name of the step.
+        """
+        start = time.monotonic()
+        try:
+            yield self
+        finally:
+            self.add(step, time.monotonic() - start)
+
+    def to_dict(self):
+        """Return the compact record which is written into the publish file.
+
+        Returns:
+            dict: {step: [seconds, bytes]} with seconds rounded to ms.
+        """
+        return {
+            step: [round(seconds, 3), int(nbytes)]
+            for step, (seconds, nbytes) in self._records.items()
+        }
+
+
+def timed(step):
+    """Decorator to measure the duration of a method.
+
+    The decorated method's instance needs to have a 'timings' attribute
+    holding a Timings object.
+
+    Args:
+        step (str): Name of the step.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(self, *args, **kwargs):
+            start = time.monotonic()
+            try:
+                return func(self, *args, **kwargs)
+            finally:
+                self.timings.add(step, time.monotonic() - start)
+        return wrapper
+    return decorator
+
+
+def percentile(values, pct):
+    """Return the percentile of the given values using linear interpolation.
+
+    Args:
+        values (list): List of numbers.
+        pct (float): Percentile between 0 and 100.
+
+    Returns:
+        float: The percentile value. 0.0 if the list is empty.
+    """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * (pct / 100.0)
+    lower = int(rank)
+    upper = min(lower + 1, len(ordered) - 1)
+    fraction = rank - lower
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * fraction
+
+
+def summarize(samples, percentiles=DEFAULT_PERCENTILES):
+    """Summarize a list of [seconds, bytes] samples.
+
+    Args:
+        samples (list): List of [seconds, bytes] pairs.
+        percentiles (tuple): Percentiles to calculate.
+
+    Returns:
+        dict: Count, percentiles of the duration, total and mean bytes.
+    """
+    seconds = [sample[0] for sample in samples]
+    nbytes = [sample[1] for sample in samples]
+    summary = {"count": len(samples)}
+    for pct in percentiles:
+        summary[f"p{pct:g}"] = round(percentile(seconds, pct), 3)
+    summary["total_bytes"] = sum(nbytes)
+    summary["mean_bytes"] = int(sum(nbytes) / len(nbytes)) if nbytes else 0
+    return summary
+
+
+def collect_publish_records(database_root):
+    """Collect the timing records from all publish files under the database.
+
+    Args:
+        database_root (str): Path to the tikDatabase folder of the project.
+
+    Yields:
+        tuple: (category, timing record) for each publish with a record.
+    """
+    reader = io.IO()
+    for publish_file in Path(database_root).rglob("*.tpub"):
+        try:
+            data = reader.read(str(publish_file))
+        except Exception:  # pylint: disable=broad-except
+            continue
+        record = data.get("timings")
+        if record:
+            yield data.get("category", "Unknown"), record
+
+
+def build_report(database_root, percentiles=DEFAULT_PERCENTILES):
+    """Aggregate the publish timing records into percentile reports.
+
+    Args:
+        database_root (str): Path to the tikDatabase folder of the project.
+        percentiles (tuple): Percentiles to calculate.
+
+    Returns:
+        dict: {"categories": {category: {step: summary}},
+               "extractors": {extractor: summary}}
+    """
+    per_category = {}
+    per_extractor = {}
+    for category, record in collect_publish_records(database_root):
+        steps = per_category.setdefault(category, {})
+        for step, sample in record.items():
+            steps.setdefault(step, []).append(sample)
+            if step.startswith(EXTRACT_PREFIX):
+                extractor = step[len(EXTRACT_PREFIX):]
+                per_extractor.setdefault(extractor, []).append(sample)
+
+    return {
+        "categories": {
+            category: {
+                step: summarize(samples, percentiles)
+                for step, samples in sorted(steps.items())
+            }
+            for category, steps in sorted(per_category.items())
+        },
+        "extractors": {
+            extractor: summarize(samples, percentiles)
+            for extractor, samples in sorted(per_extractor.items())
+        },
+    }
+
+
+def format_report(report):
+    """Format the report as a human readable table.
+
+    Args:
+        report (dict): The report returned by build_report.
+
+    Returns:
+        str: The formatted report.
+    """
+    lines = []
+
+    def _add_rows(title, rows):
+        lines.append(title)
+        for name, summary in rows.items():
+            values = "  ".join(f"{key}={value}" for key, value in summary.items())
+            lines.append(f"    {name:<24} {values}")
+
+    for category, steps in report["categories"].items():
+        _add_rows(f"[{category}]", steps)
+    _add_rows("[Extractors]", report["extractors"])
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    """Command line entry point for the publish timing reports."""
+    parser = argparse.ArgumentParser(
+        description="Aggregate publish timings of a Tik Manager project."
+    )
+    parser.add_argument("project", help="Absolute path of the project.")
+    parser.add_argument(
+        "-p", "--percentiles", nargs="+", type=float,
+        default=list(DEFAULT_PERCENTILES), help="Percentiles to report."
+    )
+    parser.add_argument("--json", action="store_true", help="Output as json.")
+    args = parser.parse_args(argv)
+
+    report = build_report(
+        Path(args.project, "tikDatabase"), percentiles=args.percentiles
+    )
+    if args.json:
+        print(json.dumps(report, indent=4))
+    else:
+        print(format_report(report))
+    return report
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+"""Fast file and folder copies.
+
+Files are cloned with reflinks on copy-on-write filesystems, otherwise they
+are copied in the kernel with os.copy_file_range or os.sendfile where
+available. Python level copying is the last fallback. Folders are copied with
+many files in parallel.
+"""
+
+import errno
+import os
+import platform
+import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+CHUNK_SIZE = 8 * 1024 * 1024
+MAX_WORKERS = 8
+FICLONE = 0x40049409  # linux ioctl request code for reflinks
+
+# errors meaning the fast path is not supported between these files.
+_UNSUPPORTED_ERRORS = {
+    errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP,
+    errno.ENOTSUP, errno.EBADF, errno.EPERM, errno.ENOTTY,
+}
+
+try:
+    import fcntl
+except ImportError:  # windows
+    fcntl = None
+
+
+def _reflink(source_fd, target_fd):
+    """Clone the file with a reflink. Return True if successful."""
+    if not fcntl or platform.system() != "Linux":
+        return False
+    try:
+        fcntl.ioctl(target_fd, FICLONE, source_fd)
+        return True
+    except OSError:
+        return False
+
+
+def reflink(source, target):
+    """Create the target as a copy-on-write clone of the source.
+
+    Args:
+        source (str): The source file.
+        target (str): The target file. It must not exist.
+
+    Returns:
+        bool: True if the clone is created. False if not supported.
+    """
+    with open(source, "rb") as source_file, open(target, "xb") as target_file:
+        if _reflink(source_file.fileno(), target_file.fileno()):
+            return True
+    Path(target).unlink()
+    return False
+
+
+def _copy_in_kernel(source_fd, target_fd, size, callback):
+    """Copy with os.copy_file_range or os.sendfile.
+
+    Returns:
+        bool: False if none of them are supported for these files.
+    """
+    copied = 0
+    if hasattr(os, "copy_file_range"):
+        copy_function = os.copy_file_range
+    elif hasattr(os, "sendfile") and platform.system() == "Linux":
+        def copy_function(src, dst, count):
+            return os.sendfile(dst, src, None, count)
+    else:
+        return False
+    while copied < size:
+        try:
+            sent = copy_function(source_fd, target_fd, min(CHUNK_SIZE, size - copied))
+        except OSError as exc:
+            if copied == 0 and exc.errno in _UNSUPPORTED_ERRORS:
+                return False
+            raise
+        if sent == 0:
+            break
+        copied += sent
+        callback(sent)
+    return True
+
+
+def copy_file(source, target, callback=None, preserve_stat=False):
+    """Copy a single file using the fastest available method.
+
+    Args:
+        source (str): The source file.
+        target (str): The target file. It is overwritten if exists.
+        callback (function, optional): Called with the number of bytes
+            copied by each step.
+        preserve_stat (bool): Copy the permission bits and times as well.
+            Copies of the write protected publishes would be read-only,
+            so they are not copied by default.
+
+    Returns:
+        str: The target path.
+    """
+    callback = callback or (lambda nbytes: None)
+    if platform.system() == "Darwin":
+        # clones on apfs and copies in the kernel otherwise
+        shutil.copyfile(source, target)
+        callback(os.stat(target).st_size)
+        if preserve_stat:
+            shutil.copystat(source, target)
+        return str(target)
+    with open(source, "rb") as source_file, open(target, "wb") as target_file:
+        size = os.fstat(source_file.fileno()).st_size
+        if _reflink(source_file.fileno(), target_file.fileno()):
+            callback(size)
+        elif not _copy_in_kernel(
+            source_file.fileno(), target_file.fileno(), size, callback
+        ):
+            for chunk in iter(lambda: source_file.read(CHUNK_SIZE), b""):
+                target_file.write(chunk)
+                callback(len(chunk))
+    if preserve_stat:
+        shutil.copystat(source, target)
+    return str(target)
+
+
+def copy(source, target, callback=None, max_workers=MAX_WORKERS, dirs_exist_ok=False,
+         preserve_stat=False):
+    """Copy the file or the folder to the target.
+
+    Symbolic links to folders are copied as links, so the cycles are not
+    followed.
+
+    Args:
+        source (str): The source file or folder.
+        target (str): The target file or folder.
+        callback (function, optional): Called with the copied and total
+            bytes. It may be called from the worker threads.
+        max_workers (int): Number of files copied in parallel.
+        dirs_exist_ok (bool): If False, raise if the target folder exists.
+        preserve_stat (bool): Copy the permission bits and times of the
+            files and folders as well.
+
+    Returns:
+        str: The target path.
+    """
+    source = Path(source)
+    target = Path(target)
+    progress = _Progress(callback)
+
+    if source.is_file():
+        progress.total = source.stat().st_size
+        target.parent.mkdir(parents=True, exist_ok=True)
+        return copy_file(
+            source, target, callback=progress.add, preserve_stat=preserve_stat
+        )
+
+    if target.exists() and not dirs_exist_ok:
+        raise FileExistsError(f"Target folder already exists: {target}")
+
+    folders = []
+    files = []
+    for root, dir_names, file_names in os.walk(source, followlinks=False):
+        relative_root = Path(root).relative_to(source)
+        folders.append(relative_root)
+        (target / relative_root).mkdir(parents=True, exist_ok=True)
+        for dir_name in dir_names:
+            link = Path(root, dir_name)
+            if link.is_symlink() and not (target / relative_root / dir_name).is_symlink():
+                os.symlink(os.readlink(link), target / relative_root / dir_name)
+        for file_name in file_names:
+            files.append(relative_root / file_name)
+    progress.total = sum((source / relative).stat().st_size for relative in files)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        # result() raises the first error of the workers.
+        for future in [
+            executor.submit(
+                copy_file, source / relative, target / relative, progress.add,
+                preserve_stat
+            )
+            for relative in files
+        ]:
+            future.result()
+
+    if not preserve_stat:
+        return str(target)
+    # deepest first, copying the stat of a read-only folder prevents writing.
+    for relative in reversed(folders):
+        shutil.copystat(source / relative, target / relative)
+    return str(target)
+
+
+class _Progress:
+    """Thread safe progress counter forwarding to the callback."""
+
+    def __init__(self, callback):
+        self.callback = callback
+        self.total = 0
+        self.copied = 0
+        self._lock = threading.Lock()
+
+    def add(self, nbytes):
+        """Add the copied bytes and notify the callback."""
+        if not self.callback:
+            return
+        with self._lock:
+            self.copied += nbytes
+            copied = self.copied
+        self.callback(copied, self.total)
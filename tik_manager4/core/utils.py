@@ -1,16 +1,40 @@
 """Cross-platform utility functions."""
 
+import atexit
 import os
 import logging
 from pathlib import Path
 import shutil
+import stat
 import platform
 import subprocess
 import re
+import queue
+import threading
+import time
 import unicodedata
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from tik_manager4.core import transfer
 
 CURRENT_PLATFORM = platform.system()
 
+# below this number of files, thread pool overhead is not worth it.
+PARALLEL_THRESHOLD = 64
+TRASH_FOLDER_NAME = ".tik_trash"
+# trashed folders older than this are left over from interrupted sessions
+STALE_TRASH_SECONDS = 3600
+TRASH_WORKERS = 2
+
+# the workers are daemon threads, so they never block exiting. Anything left
+# in the trash is swept by a later deletion in the same folder.
+_trash_queue = queue.Queue()
+_trash_workers = []
+_trash_futures = set()
+_trash_paths = set()
+_trash_lock = threading.Lock()
+
 LOG = logging.getLogger(__name__)
 
 def get_home_dir():
@@ -84,6 +108,50 @@ def sanitize_text(text, allow_spaces=False):
 
     return sanitized_text
 
+def get_size(file_or_folder):
+    """Return the size of the file or the total size of the folder in bytes.
+
+    Folders are walked recursively with os.scandir. Symlinks are not followed.
+
+    Args:
+        file_or_folder (str): The file or folder path.
+
+    Returns:
+        int: Size in bytes. 0 if the path does not exist.
+    """
+    path = str(file_or_folder)
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    total = 0
+    stack = [path]
+    while stack:
+        current = stack.pop()
+        try:
+            with os.scandir(current) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    elif entry.is_file(follow_symlinks=False):
+                        total += entry.stat(follow_symlinks=False).st_size
+        except OSError:
+            continue
+    return total
+
+def is_same_volume(path_a, path_b):
+    """Check if the two existing paths are on the same volume.
+
+    Args:
+        path_a (str): The first path.
+        path_b (str): The second path.
+
+    Returns:
+        bool: True if both paths are on the same device.
+    """
+    try:
+        return os.stat(path_a).st_dev == os.stat(path_b).st_dev
+    except OSError:
+        return False
+
 # def move(source, target, force=True):
 #     """Move the source file or folder to the target location."""
 #     if Path(source).is_file():
@@ -117,53 +185,355 @@ def move(source, target, force=True, raise_error=False):
     target.parent.mkdir(parents=True, exist_ok=True)
 
     # Perform the move operation
-    shutil.move(str(source), str(target))
+    if is_same_volume(source, target.parent):
+        shutil.move(str(source), str(target))
+        return True, f"{source} moved to {target}."
+
+    # Moving across volumes copies the data and deletes the source, which
+    # fails on write protected files. The modes are restored on the copy.
+    modes = _read_modes(source)
+    write_unprotect(source)
+    transfer.copy(str(source), str(target), preserve_stat=True)
+    _restore_modes(target, modes)
+    ret, msg = delete(source)
+    if not ret:
+        return False, f"{source} copied to {target} but cannot be removed: {msg}"
     return True, f"{source} moved to {target}."
 
-def delete(file_or_folder):
-    """Delete the file or folder."""
+def _read_modes(file_or_folder):
+    """Return the permission modes of the file or everything under the folder.
+
+    Args:
+        file_or_folder (Path): The file or folder path.
+
+    Returns:
+        dict: Permission modes by the paths relative to the file or folder.
+    """
+    modes = {".": stat.S_IMODE(file_or_folder.stat().st_mode)}
+    if file_or_folder.is_dir():
+        for path in file_or_folder.rglob("*"):
+            relative_path = path.relative_to(file_or_folder).as_posix()
+            modes[relative_path] = stat.S_IMODE(path.lstat().st_mode)
+    return modes
+
+def _restore_modes(file_or_folder, modes):
+    """Apply the permission modes collected by _read_modes to the copy.
+
+    Args:
+        file_or_folder (Path): The copied file or folder path.
+        modes (dict): Permission modes by the relative paths.
+    """
+    # the contents first, in case the folders are not writable any more
+    for relative_path in sorted(modes, key=len, reverse=True):
+        path = file_or_folder / relative_path
+        if path.is_symlink():
+            continue
+        try:
+            os.chmod(path, modes[relative_path])
+        except OSError as exc:
+            LOG.error(f"Cannot restore the permissions of {path}: {exc}")
+
+def delete(file_or_folder, defer=False, callback=None):
+    """Delete the file or folder.
+
+    Args:
+        file_or_folder (str): The file or folder path.
+        defer (bool): Rename the folder into a hidden trash folder next to it
+            and delete it on a background worker. Returns as soon as the
+            rename succeeds. Falls back to deleting inline if the folder
+            cannot be renamed.
+        callback (function, optional): Called with the (state, message) when
+            the deferred deletion completes.
+
+    Returns:
+        tuple: (bool, message)
+    """
+    path = Path(file_or_folder)
+    if defer and path.is_dir() and not path.is_symlink():
+        trashed = _move_to_trash(path)
+        if trashed:
+            _submit_trash(trashed, callback)
+            return True, f"{file_or_folder} moved to trash for deletion."
     try:
         if Path(file_or_folder).is_file() or Path(file_or_folder).is_symlink():
             Path(file_or_folder).unlink()
         elif Path(file_or_folder).is_dir():
             shutil.rmtree(file_or_folder)
-    except PermissionError as e:
+    except PermissionError:
         ret, msg = write_unprotect(file_or_folder)
         if not ret:
             return False, f"Error removing write protection: {file_or_folder}"
-        delete(file_or_folder)
+        try:
+            if Path(file_or_folder).is_dir():
+                shutil.rmtree(file_or_folder)
+            else:
+                Path(file_or_folder).unlink()
+        except OSError as exc:
+            return False, f"Error deleting {file_or_folder}: {exc}"
     return True, f"{file_or_folder} deleted."
 
-def write_protect(file_or_folder):
-    """Write protect the file or folder."""
-    path = Path(file_or_folder)
-    file_list = []
-    if path.is_file():
-        file_list.append(path)
-    elif path.is_dir():
-        for _file in path.rglob("*"):
-            file_list.append(_file)
-    for _file in file_list:
+def _move_to_trash(path):
+    """Rename the path into the trash folder on the same volume.
+
+    The stale leftovers of the interrupted sessions in the trash folder are
+    queued for deletion as well.
+
+    Returns:
+        Path: The trashed path or None if the rename is not possible.
+    """
+    trash_folder = path.parent / TRASH_FOLDER_NAME
+    trashed = trash_folder / f"{path.name}.{uuid.uuid4().hex[:8]}"
+    try:
+        trash_folder.mkdir(exist_ok=True)
+        _sweep_trash(trash_folder)
+        os.replace(path, trashed)
+    except OSError:
+        return None
+    return trashed
+
+def _sweep_trash(trash_folder):
+    """Queue the stale leftovers in the trash folder for deletion."""
+    cutoff = time.time() - STALE_TRASH_SECONDS
+    with os.scandir(trash_folder) as entries:
+        for entry in entries:
+            leftover = Path(entry.path)
+            with _trash_lock:
+                if leftover in _trash_paths:
+                    continue
+            try:
+                entry_stat = entry.stat(follow_symlinks=False)
+            except OSError:
+                continue
+            # renaming updates the change time, so the ones being emptied
+            # by the other sessions are skipped
+            if max(entry_stat.st_mtime, entry_stat.st_ctime) < cutoff:
+                _submit_trash(leftover, None)
+
+def _submit_trash(trashed, callback):
+    """Queue the trashed path for deletion on the background workers."""
+    future = Future()
+    with _trash_lock:
+        _trash_futures.add(future)
+        _trash_paths.add(trashed)
+        if len(_trash_workers) < TRASH_WORKERS:
+            worker = threading.Thread(
+                target=_trash_worker,
+                name=f"tik_trash_{len(_trash_workers)}",
+                daemon=True,
+            )
+            _trash_workers.append(worker)
+            worker.start()
+    _trash_queue.put((future, trashed, callback))
+
+def _trash_worker():
+    """Empty the queued trashed paths one by one."""
+    while True:
+        future, trashed, callback = _trash_queue.get()
         try:
-            _file.chmod(0o444)
-            return True, "Write protection applied."
-        except Exception as e:  # pylint: disable=broad-except
-            LOG.error(f"Error applying write protection: {e}")
-            return False, f"Error applying write protection: {e}"
+            if future.set_running_or_notify_cancel():
+                try:
+                    future.set_result(_empty_trash(trashed, callback))
+                except Exception as exc:  # pylint: disable=broad-except
+                    # e.g. the callback failed
+                    future.set_exception(exc)
+        finally:
+            with _trash_lock:
+                _trash_futures.discard(future)
+                _trash_paths.discard(trashed)
 
-def write_unprotect(file_or_folder):
-    """Write unprotect the file or folder."""
-    path = Path(file_or_folder)
-    file_list = []
-    if path.is_file():
-        file_list.append(path)
-    elif path.is_dir():
-        for _file in path.rglob("*"):
-            file_list.append(_file)
-    for _file in file_list:
+def cancel_deletions():
+    """Cancel the deferred deletions which are not started yet.
+
+    Their folders stay in the trash until a later deletion sweeps them.
+
+    Returns:
+        int: Number of cancelled deletions.
+    """
+    with _trash_lock:
+        futures = list(_trash_futures)
+    return sum(future.cancel() for future in futures)
+
+atexit.register(cancel_deletions)
+
+def _empty_trash(trashed, callback):
+    """Delete the trashed folder with parallel unlinks and report the result."""
+    try:
+        if not trashed.exists():
+            # swept by another session
+            ret, msg = True, f"{trashed} deleted."
+        elif _delete_tree(str(trashed)):
+            # write protected or in use files, take the slow path
+            ret, msg = delete(trashed)
+        else:
+            ret, msg = True, f"{trashed} deleted."
+        try:
+            trashed.parent.rmdir()
+        except OSError:
+            # other deletions are still using the trash folder
+            pass
+    except Exception as exc:  # pylint: disable=broad-except
+        ret, msg = False, f"Error deleting {trashed}: {exc}"
+    if not ret:
+        LOG.error(msg)
+    if callback:
+        callback(ret, msg)
+    return ret, msg
+
+def _delete_tree(folder, max_workers=None):
+    """Unlink the files in parallel and remove the folders deepest first.
+
+    Returns:
+        list: Paths which cannot be deleted.
+    """
+    files = []
+    folders = [folder]
+    stack = [folder]
+    while stack:
+        current = stack.pop()
+        with os.scandir(current) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    folders.append(entry.path)
+                    stack.append(entry.path)
+                else:
+                    files.append(entry.path)
+
+    def _unlink(file_path):
+        try:
+            os.unlink(file_path)
+            return None
+        except OSError:
+            return file_path
+
+    if len(files) < PARALLEL_THRESHOLD:
+        failures = [_unlink(file_path) for file_path in files]
+    else:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            failures = list(executor.map(_unlink, files))
+    failures = [failure for failure in failures if failure]
+    if failures:
+        return failures
+    # children are always listed after their parents
+    for folder_path in reversed(folders):
+        try:
+            os.rmdir(folder_path)
+        except OSError:
+            failures.append(folder_path)
+    return failures
+
+def pending_deletions():
+    """Return the number of deferred deletions which are not completed."""
+    with _trash_lock:
+        return len(_trash_futures)
+
+def wait_for_deletions(timeout=None):
+    """Wait for the deferred deletions to complete.
+
+    Args:
+        timeout (float, optional): Maximum seconds to wait for each deletion.
+
+    Returns:
+        list: (state, message) results of the waited deletions.
+    """
+    with _trash_lock:
+        futures = list(_trash_futures)
+    return [future.result(timeout=timeout) for future in futures]
+
+def _collect_permission_targets(path, mode, include_folders):
+    """Walk the path with os.scandir and collect entries needing a mode change.
+
+    Args:
+        path (str): The file or folder path.
+        mode (int): The target permission mode.
+        include_folders (bool): If True, folders are collected as well.
+
+    Returns:
+        list: Paths of the entries which are not already at the target mode.
+    """
+    targets = []
+    if os.path.isfile(path):
+        if stat.S_IMODE(os.stat(path).st_mode) != mode:
+            targets.append(path)
+        return targets
+    if not os.path.isdir(path):
+        return targets
+    if include_folders and stat.S_IMODE(os.stat(path).st_mode) != mode:
+        targets.append(path)
+    stack = [path]
+    while stack:
+        current = stack.pop()
+        with os.scandir(current) as entries:
+            for entry in entries:
+                if entry.is_symlink():
+                    continue
+                is_dir = entry.is_dir()
+                if is_dir:
+                    stack.append(entry.path)
+                    if not include_folders:
+                        continue
+                if stat.S_IMODE(entry.stat().st_mode) != mode:
+                    targets.append(entry.path)
+    return targets
+
+def apply_permissions(file_or_folder, mode, include_folders=False, max_workers=None):
+    """Apply the permission mode to the file or recursively to the folder.
+
+    Entries already at the target mode are skipped. The remaining ones are
+    processed on a thread pool, which pays off on network storage where each
+    chmod is a round trip.
+
+    Args:
+        file_or_folder (str): The file or folder path.
+        mode (int): The target permission mode. e.g. 0o444
+        include_folders (bool): If True, folders get the mode as well.
+        max_workers (int, optional): Maximum number of threads.
+
+    Returns:
+        tuple: (changed(int), failures(list)) where failures is a list of
+            (path, error message) tuples.
+    """
+    try:
+        targets = _collect_permission_targets(
+            str(file_or_folder), mode, include_folders
+        )
+    except OSError as exc:
+        return 0, [(str(file_or_folder), str(exc))]
+
+    def _chmod(target):
         try:
-            _file.chmod(0o777)
-            return True, "Write protection removed."
-        except Exception as e:  # pylint: disable=broad-except
-            LOG.error(f"Error removing write protection: {e}")
-            return False, f"Error removing write protection: {e}"
\ No newline at end of file
+            os.chmod(target, mode)
+            return None
+        except OSError as exc:
+            return target, str(exc)
+
+    if len(targets) < PARALLEL_THRESHOLD:
+        results = [_chmod(target) for target in targets]
+    else:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            results = list(executor.map(_chmod, targets))
+    failures = [result for result in results if result]
+    return len(targets) - len(failures), failures
+
+def _permission_result(failures, success_msg, failure_msg):
+    """Convert the failures of apply_permissions into a state and message."""
+    if not failures:
+        return True, success_msg
+    for path, error in failures:
+        LOG.error(f"{failure_msg}: {path} ({error})")
+    return False, f"{failure_msg} for {len(failures)} file(s). First error: {failures[0][1]}"
+
+def write_protect(file_or_folder):
+    """Write protect the file or all files under the folder."""
+    _changed, failures = apply_permissions(file_or_folder, 0o444)
+    return _permission_result(
+        failures, "Write protection applied.", "Error applying write protection"
+    )
+
+def write_unprotect(file_or_folder):
+    """Write unprotect the file or folder and everything under it."""
+    _changed, failures = apply_permissions(
+        file_or_folder, 0o777, include_folders=True
+    )
+    return _permission_result(
+        failures, "Write protection removed.", "Error removing write protection"
+    )
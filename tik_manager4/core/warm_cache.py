@@ -0,0 +1,182 @@
+"""Persistent cache of the database files for warm starts.
+
+The contents of the database files read in a session are stored in a single
+json file with their modification times. On the next start, the whole cache
+is loaded with one read and the settings objects are initialized from it
+with a single stat of each database file instead of reading and parsing it.
+The entries are also validated against the files in the background and the
+stale ones are dropped.
+"""
+
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from copy import deepcopy
+
+from tik_manager4.core import filelog
+from tik_manager4.core import io
+
+LOG = filelog.Filelog(logname=__name__, filename="tik_manager4")
+
+CACHE_FOLDER_NAME = "warm_cache"
+
+
+class WarmCache:
+    """Database file contents keyed by the file paths and modification times."""
+
+    def __init__(self, cache_file, root):
+        """Initialize the WarmCache object.
+
+        Args:
+            cache_file (str): The json file to persist the cache.
+            root (str): Only the files under this folder are cached.
+        """
+        self._io = io.IO(file_path=cache_file)
+        self._root = os.path.join(os.path.normpath(root), "")
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._dirty = False
+        self._executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="tik_warm_cache"
+        )
+        self.validation = None
+        self.hits = 0
+
+    @property
+    def cache_file(self):
+        """The json file of the cache."""
+        return self._io.file_path
+
+    def load(self):
+        """Load the cache file.
+
+        Returns:
+            int: Number of loaded entries.
+        """
+        if not self._io.file_exists(self._io.file_path):
+            return 0
+        try:
+            entries = self._io.read().get("entries", {})
+        except Exception:  # pylint: disable=broad-except
+            LOG.warning("Warm start cache is corrupted. Starting a new one.")
+            entries = {}
+        with self._lock:
+            self._entries = entries
+        return len(entries)
+
+    def _key(self, file_path):
+        """Return the cache key of the file or None if it is not cached."""
+        if not file_path:
+            return None
+        key = os.path.normpath(str(file_path))
+        return key if key.startswith(self._root) else None
+
+    def get(self, file_path, mtime=None):
+        """Return the cached (modified time, data) of the file.
+
+        Args:
+            file_path (str): The file path.
+            mtime (float, optional): The current modified time of the file.
+                If given, stale entries are dropped instead of returned.
+
+        Returns:
+            tuple: (float, dict) or None if the file is not cached.
+        """
+        key = self._key(file_path)
+        with self._lock:
+            entry = self._entries.get(key) if key else None
+            if not entry:
+                return None
+            if mtime is not None and entry["mtime"] != mtime:
+                del self._entries[key]
+                self._dirty = True
+                return None
+            self.hits += 1
+            return entry["mtime"], deepcopy(entry["data"])
+
+    def put(self, file_path, mtime, data):
+        """Store the contents of the file.
+
+        Args:
+            file_path (str): The file path.
+            mtime (float): The modified time of the file.
+            data (dict): The contents of the file.
+        """
+        key = self._key(file_path)
+        if not key:
+            return
+        with self._lock:
+            self._entries[key] = {"mtime": mtime, "data": deepcopy(data)}
+            self._dirty = True
+
+    def discard(self, file_path):
+        """Remove the file from the cache."""
+        key = self._key(file_path)
+        with self._lock:
+            if self._entries.pop(key, None):
+                self._dirty = True
+
+    def validate(self, callback=None, save=True):
+        """Compare the entries with the files in the background.
+
+        Stale and deleted files are dropped from the cache.
+
+        Args:
+            callback (function, optional): Called with the list of stale
+                file paths from the background thread.
+            save (bool): Write the cache file after the validation.
+
+        Returns:
+            Future: The future returning the stale file paths.
+        """
+        self.validation = self._executor.submit(self._validate, callback, save)
+        return self.validation
+
+    def _validate(self, callback, save):
+        """Drop the entries which do not match the files."""
+        with self._lock:
+            entries = {key: entry["mtime"] for key, entry in self._entries.items()}
+        stale = []
+        for key, mtime in entries.items():
+            try:
+                if os.lstat(key).st_mtime == mtime:
+                    continue
+            except OSError:
+                pass
+            stale.append(key)
+        with self._lock:
+            for key in stale:
+                # the entry may be updated while validating
+                entry = self._entries.get(key)
+                if entry and entry["mtime"] == entries[key]:
+                    del self._entries[key]
+                    self._dirty = True
+        if save:
+            self.save()
+        if callback:
+            callback(stale)
+        return stale
+
+    def save(self):
+        """Write the cache file if there are any changes.
+
+        Returns:
+            bool: True if the file is written.
+        """
+        with self._lock:
+            if not self._dirty:
+                return False
+            entries = dict(self._entries)
+            self._dirty = False
+        try:
+            self._io.write({"entries": entries})
+        except Exception as exc:  # pylint: disable=broad-except
+            LOG.warning(f"Cannot write the warm start cache: {exc}")
+            return False
+        return True
+
+    def clear(self):
+        """Remove all the entries."""
+        with self._lock:
+            self._entries = {}
+            self._dirty = True
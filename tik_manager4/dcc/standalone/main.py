@@ -1,11 +1,10 @@
 import sys
 from pathlib import Path
 import subprocess
-import shutil
 
 import logging
+from tik_manager4.core import transfer
 from tik_manager4.dcc.main_core import MainCore
-from tik_manager4.ui.Qt import QtWidgets, QtGui, QtCore
 from tik_manager4.dcc.standalone import extract
 
 LOG = logging.getLogger(__name__)
@@ -24,7 +23,8 @@ class Dcc(MainCore):
         Args:
             file_path: (String) File path that will be written
             source_path: (String) Source file or folder path
-            **extra_arguments: Compatibility arguments
+            **extra_arguments: Compatibility arguments. 'progress_callback'
+                is called with the copied and total bytes.
 
         Returns:
             (String) File path of the saved file
@@ -41,12 +41,12 @@ class Dcc(MainCore):
             LOG.warning(f"Source path does not exist: {source_path}")
             return None
 
-        if Path(source_path).is_file():
-            # if it is a file, copy it to the destination
-            shutil.copyfile(source_path, file_path)
-        else:
-            # if it is a folder, copy it to the destination
-            shutil.copytree(source_path, file_path)
+        # copy the file or the folder to the destination
+        transfer.copy(
+            source_path,
+            file_path,
+            callback=extra_arguments.get("progress_callback"),
+        )
 
         return file_path
 
@@ -74,6 +74,9 @@ class Dcc(MainCore):
         Returns: (String) File path of the generated thumbnail
 
         """
+        # Qt is not needed by the headless scripts until they draw thumbnails
+        from tik_manager4.ui.Qt import QtWidgets, QtCore
+
         # find the main window
         app = QtWidgets.QApplication.instance()
         if app:
@@ -115,6 +118,7 @@ class Dcc(MainCore):
     @staticmethod
     def text_to_image(text, save_path, width, height, color="orange", scale=0.5):
         """Convert text to an image."""
+        from tik_manager4.ui.Qt import QtWidgets, QtGui, QtCore
 
         # app = QtWidgets.QApplication(sys.argv)
         app = QtWidgets.QApplication.instance()
@@ -1,41 +1,65 @@
-import sys
+"""Management platform integrations.
+
+The platforms are listed in a lightweight registry. Their modules import the
+api packages of the platforms, so they are imported only when a platform
+class is accessed for the first time.
+"""
+
 import importlib
-from pathlib import Path
+from collections.abc import Mapping
+
 from .management_core import ManagementCore
 
-# Dictionary to store platform classes
-platforms = {}
-ui_extensions = {}
-
-# # Path to the directory containing platform folders
-# _FROZEN = getattr(sys, "frozen", False)
-# if _FROZEN:
-#     platform_folder = Path(sys.executable).parents[2] / "management"
-# else:
-#     platform_folder = Path(__file__).parent
-#
-# # Iterate over each directory in the platform folder
-# for folder in platform_folder.iterdir():
-#     # Check if it's a directory and contains a main.py file
-#     main_file = folder / "main.py"
-#     if folder.is_dir() and main_file.exists():
-#         # Import the main module dynamically
-#         module_name = f".{folder.name}.main"
-#         module = importlib.import_module(module_name, package=__package__)
-#
-#         # Get the ProductionPlatform class if it exists
-#         platform_class = getattr(module, "ProductionPlatform", None)
-#
-#         # Add to dictionary if class is found and inherits from ManagementCore
-#         if platform_class and issubclass(platform_class, ManagementCore):
-#             platforms[folder.name] = platform_class
-#
-
-# test
-from tik_manager4.management.shotgrid.main import ProductionPlatform
-from tik_manager4.management.shotgrid.ui_extension import UiExtensions
-platforms["shotgrid"] = ProductionPlatform
-ui_extensions["shotgrid"] = UiExtensions
+# platforms by their names
+REGISTRY = {
+    "shotgrid": {
+        "nice_name": "Autodesk Flow Production",
+        "module": "tik_manager4.management.shotgrid.main",
+        "ui_extension_module": "tik_manager4.management.shotgrid.ui_extension",
+    },
+}
+
+
+class LazyPlatforms(Mapping):
+    """Classes of the registered platforms imported on the first access."""
+
+    def __init__(self, module_key, class_name):
+        """Initialize the mapping.
+
+        Args:
+            module_key (str): The registry key of the module path.
+            class_name (str): Name of the class in the module.
+        """
+        self._module_key = module_key
+        self._class_name = class_name
+        self._classes = {}
+
+    def __getitem__(self, platform_name):
+        """Import and return the class of the platform."""
+        platform_class = self._classes.get(platform_name)
+        if platform_class is None:
+            module = importlib.import_module(
+                REGISTRY[platform_name][self._module_key]
+            )
+            platform_class = getattr(module, self._class_name)
+            self._classes[platform_name] = platform_class
+        return platform_class
+
+    def __iter__(self):
+        return iter(REGISTRY)
+
+    def __len__(self):
+        return len(REGISTRY)
+
+    def is_loaded(self, platform_name):
+        """Return True if the class of the platform is imported."""
+        return platform_name in self._classes
+
+
+# Dictionaries of the platform and ui extension classes
+platforms = LazyPlatforms("module", "ProductionPlatform")
+ui_extensions = LazyPlatforms("ui_extension_module", "UiExtensions")
+
 
 # Optional: Explicitly make platforms accessible from the management package
-__all__ = ["platforms"]
+__all__ = ["platforms", "ui_extensions", "REGISTRY"]
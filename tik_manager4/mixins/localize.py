@@ -2,7 +2,7 @@
 
 from pathlib import Path
 
-from tik_manager4.core import utils
+from tik_manager4.core.sync import CHECKPOINT_SUFFIX, MEGABYTE, SyncJob
 from tik_manager4.core.constants import ObjectType
 from tik_manager4.objects.entity import Entity
 
@@ -79,14 +79,48 @@ class LocalizeMixin(Entity):
         }
         return pairing.get(self.object_type)
 
-    def get_resolved_path(self, *args):
+    def get_resolved_path(self, *args, origin=False):
         """Return the path to the entity.
 
-        If the entity is localized, return the localized path.
+        If the entity is localized, return the localized path. If the read
+        through cache is enabled, publish elements are served from the
+        verified local copies when present.
+
+        Args:
+            args (str): The path arguments.
+            origin (bool): Always return the origin path, skipping the
+                read through cache. Use this for modifying the files.
         """
         if self.localized:
             return self.localized_path
-        return self.get_abs_project_path(*args)
+        abs_path = self.get_abs_project_path(*args)
+        if origin or not args or self.object_type != ObjectType.PUBLISH_VERSION:
+            return abs_path
+        localize_settings = self.guard.localize_settings
+        if not localize_settings or not localize_settings.get("read_through", False):
+            return abs_path
+        local_cache = self.guard.get_local_cache()
+        if not local_cache:
+            return abs_path
+        return local_cache.get(abs_path, self.get_cache_key(*args)) or abs_path
+
+    def get_cache_key(self, *args):
+        """Return the key of the entity in the local read cache.
+
+        Args:
+            args (str): The path arguments.
+        """
+        project_name = Path(self.guard.project_root).name
+        return Path(project_name, self.path, *args).as_posix()
+
+    def get_prefetch_items(self):
+        """Return the (origin path, cache key) pairs of the elements."""
+        if self.localized:
+            return []
+        return [
+            (self.get_abs_project_path(element["path"]), self.get_cache_key(element["path"]))
+            for element in self._elements
+        ]
 
     def get_resolved_purgatory_path(self, *args):
         """Return the path to the purgatory entity.
@@ -119,56 +153,86 @@ class LocalizeMixin(Entity):
         else:
             super().show_database_folder()
 
-    def sync(self):
+    def get_sync_checkpoint_path(self):
+        """Return the path of the sync checkpoint file of the entity."""
+        if self.object_type == ObjectType.PUBLISH_VERSION:
+            # publish versions of the same work share the localized folder.
+            file_name = f".{Path(self.settings_file).stem}{CHECKPOINT_SUFFIX}"
+            return Path(self.localized_path, file_name).as_posix()
+        return f"{self.localized_path}{CHECKPOINT_SUFFIX}"
+
+    def sync(self, progress_callback=None):
         """Sync the entity to the origin.
 
         This will copy the entity to the origin path. Sync is single direction.
+        Files are verified and committed one by one. If the sync gets
+        interrupted, running it again resumes from the last committed file.
+        The entity is marked as synced only after all files are committed.
+
+        Args:
+            progress_callback (function, optional): Called with the
+                transferred and total bytes from the worker threads.
         """
         if not self.localized:
             LOG.error("Entity is not localized.")
             return False
         LOG.info("Syncing...")
         if self.object_type == ObjectType.WORK_VERSION:
-            ret, msg = utils.move(self.localized_path,  self.get_abs_project_path(), force=False)
-            if not ret:
-                return False, msg
-            self._localized = False
-            self._localized_path = ""
+            sources = [Path(self.localized_path)]
+            targets = [Path(self.get_abs_project_path())]
         elif self.object_type == ObjectType.PUBLISH_VERSION:
-            # before moving, validate all paths
             publish_base = Path(self.localized_path)
             sources = [publish_base / el["path"] for el in
                        self._elements]
             targets = [Path(self.get_abs_project_path(el["path"])) for el in
                        self._elements]
-            list_of_errors = list(self.validate_paths(sources, targets))
-            if list_of_errors:
-                return False, list_of_errors
-
-            for source, target in zip(sources, targets):
-                ret, msg = utils.move(source.as_posix(), target.as_posix(), force=False)
-                if not ret:
-                    return False, msg
-            self._localized = False
-            self.edit_property("localized", False)
-            self._localized_path = ""
-            self.edit_property("localized_path", "")
-            self.apply_settings(force=True)
         else:
             msg = f"Syncing is not supported for {self.object_type.value}."
             LOG.error(msg)
             return False, msg
+
+        bandwidth = self.guard.localize_settings.get("sync_bandwidth_mb", 0)
+        job = SyncJob(
+            zip(sources, targets),
+            self.get_sync_checkpoint_path(),
+            max_workers=self.guard.localize_settings.get("sync_workers", 4),
+            bandwidth=bandwidth * MEGABYTE,
+            progress_callback=progress_callback,
+        )
+        # before copying, validate all paths
+        list_of_errors = list(self.validate_paths(sources, targets, resumable=job))
+        if list_of_errors:
+            return False, list_of_errors
+
+        ret, list_of_errors = job.run()
+        if not ret:
+            return False, list_of_errors
+
+        self._localized = False
+        self._localized_path = ""
+        if self.object_type == ObjectType.PUBLISH_VERSION:
+            self.edit_property("localized", False)
+            self.edit_property("localized_path", "")
+            self.apply_settings(force=True)
+        job.cleanup()
         return True, "Sync successful."
 
     # A helper function to validate paths before attempting the actual move
-    def validate_paths(self, sources, targets):
-        """Validate that all source files exist and can be moved to target locations."""
+    def validate_paths(self, sources, targets, resumable=None):
+        """Validate that all source files exist and can be moved to target locations.
+
+        Args:
+            sources (list): List of source Path objects.
+            targets (list): List of target Path objects.
+            resumable (SyncJob, optional): Targets committed by a previous
+                run of this sync job are not reported.
+        """
         for src, tgt in zip(sources, targets):
             if not src.exists():
                 msg = f"Source path does not exist: {src.as_posix()}"
                 LOG.error(msg)
                 yield msg
-            if tgt.exists():
+            if tgt.exists() and not (resumable and resumable.has_progress(tgt)):
                 msg = f"Target path already exists: {tgt.as_posix()}. Origin cannot be overwritten."
                 LOG.warning(msg)
                 yield msg
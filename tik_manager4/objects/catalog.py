@@ -0,0 +1,709 @@
+"""Queryable SQLite catalog of the project database.
+
+The catalog mirrors the subprojects, tasks, works, work versions and
+publishes of the json database into indexed tables, so questions like all
+works of a user or all publishes of a category since a date can be answered
+without walking the database. The json files stay the source of truth. The
+catalog is updated by the write paths of the object model through a queue
+drained by a background writer, and reconciled with the database files by
+comparing their modification times. Updates still queued at exit are picked
+up by the next reconciliation.
+
+Names, notes, creators and metadata values are also kept in a full text
+search table. SQLite builds without FTS5 fall back to substring matching.
+"""
+
+import json
+import os
+import re
+import sqlite3
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import closing
+from pathlib import Path
+
+from tik_manager4.core import filelog
+from tik_manager4.core import io
+
+LOG = filelog.Filelog(logname=__name__, filename="tik_manager4")
+
+CATALOG_FILE_NAME = "catalog.db"
+STRUCTURE_FILE_NAME = "project_structure.json"
+SCHEMA_VERSION = 2
+
+COLUMNS = {
+    "subprojects": ("id", "name", "path", "parent_id", "metadata", "file", "modified"),
+    "tasks": (
+        "id", "name", "path", "subproject_id", "creator", "categories", "state",
+        "metadata_overrides", "file", "modified",
+    ),
+    "works": (
+        "id", "name", "path", "task_id", "task_name", "category", "dcc",
+        "creator", "state", "version_count", "file", "modified",
+    ),
+    "versions": (
+        "work_id", "name", "task_id", "category", "version_number", "user",
+        "notes", "workstation", "file_format", "archived", "file", "modified",
+    ),
+    "publishes": (
+        "id", "name", "path", "version_number", "work_version", "task_id",
+        "task_name", "category", "dcc", "creator", "notes", "file", "modified",
+    ),
+}
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS files (path TEXT PRIMARY KEY, modified REAL);
+CREATE TABLE IF NOT EXISTS subprojects ({", ".join(COLUMNS["subprojects"])});
+CREATE TABLE IF NOT EXISTS tasks ({", ".join(COLUMNS["tasks"])});
+CREATE TABLE IF NOT EXISTS works ({", ".join(COLUMNS["works"])});
+CREATE TABLE IF NOT EXISTS versions ({", ".join(COLUMNS["versions"])});
+CREATE TABLE IF NOT EXISTS publishes ({", ".join(COLUMNS["publishes"])});
+CREATE TABLE IF NOT EXISTS metadata (entity_type, entity_id, key, value, file);
+CREATE INDEX IF NOT EXISTS tasks_file ON tasks (file);
+CREATE INDEX IF NOT EXISTS works_file ON works (file);
+CREATE INDEX IF NOT EXISTS works_creator ON works (creator);
+CREATE INDEX IF NOT EXISTS works_task ON works (task_id, category);
+CREATE INDEX IF NOT EXISTS versions_file ON versions (file);
+CREATE INDEX IF NOT EXISTS versions_user ON versions (user);
+CREATE INDEX IF NOT EXISTS publishes_file ON publishes (file);
+CREATE INDEX IF NOT EXISTS publishes_category ON publishes (category, modified);
+CREATE INDEX IF NOT EXISTS publishes_creator ON publishes (creator);
+CREATE INDEX IF NOT EXISTS metadata_key ON metadata (key, value);
+CREATE INDEX IF NOT EXISTS metadata_file ON metadata (file);
+"""
+
+SEARCH_COLUMNS = (
+    "name", "text", "kind", "entity_id", "path", "subproject_id", "task_id",
+    "category", "work_id", "file",
+)
+SEARCH_TABLE_FTS = (
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS search USING fts5("
+    f"name, text, {', '.join(f'{column} UNINDEXED' for column in SEARCH_COLUMNS[2:])})"
+)
+SEARCH_TABLE_FALLBACK = (
+    f"CREATE TABLE IF NOT EXISTS search ({', '.join(SEARCH_COLUMNS)})"
+)
+# names weigh more than the notes and metadata in the ranking
+NAME_WEIGHT = 10.0
+
+
+def get_kind(relative_path):
+    """Return the catalog kind of the database file or None.
+
+    Args:
+        relative_path (str): The posix path relative to the database root.
+    """
+    if relative_path == STRUCTURE_FILE_NAME:
+        return "structure"
+    return {
+        ".ttask": "task",
+        ".twork": "work",
+        ".tpub": "publish",
+    }.get(os.path.splitext(relative_path)[1])
+
+
+def _to_sql(value):
+    """Convert the json value to a comparable sql value."""
+    if isinstance(value, (list, dict)):
+        return json.dumps(value, sort_keys=True)
+    return value
+
+
+class Catalog:
+    """SQLite mirror of the project database."""
+
+    def __init__(self, catalog_file, database_root):
+        """Initialize the Catalog object.
+
+        Args:
+            catalog_file (str): The SQLite file.
+            database_root (str): The database root of the project.
+        """
+        self._file_path = Path(catalog_file)
+        self._root = Path(database_root)
+        self._lock = threading.RLock()
+        # updates waiting for the background writer by their file paths
+        self._pending = {}
+        self._writing = False
+        self._pending_changed = threading.Condition()
+        self._writer = None
+        self._reconciling = None
+        self.reconciled = False
+        with self._connect() as connection:
+            version = connection.execute("PRAGMA user_version").fetchone()[0]
+            if version != SCHEMA_VERSION:
+                # the catalog is disposable, rebuild it from the database
+                for table in list(COLUMNS) + ["files", "metadata", "search"]:
+                    connection.execute(f"DROP TABLE IF EXISTS {table}")
+                connection.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+            connection.executescript(SCHEMA)
+            try:
+                connection.execute(SEARCH_TABLE_FTS)
+            except sqlite3.OperationalError:
+                connection.execute(SEARCH_TABLE_FALLBACK)
+            self.full_text = bool(connection.execute(
+                "SELECT 1 FROM sqlite_master WHERE name = 'search' AND sql LIKE '%fts5%'"
+            ).fetchone())
+
+    @property
+    def file_path(self):
+        """The SQLite file of the catalog."""
+        return self._file_path
+
+    @property
+    def root(self):
+        """The database root of the project."""
+        return self._root
+
+    def _connect(self):
+        """Return a new connection to the catalog."""
+        connection = sqlite3.connect(str(self._file_path), timeout=30)
+        connection.row_factory = sqlite3.Row
+        return closing(connection)
+
+    def _relative(self, file_path):
+        """Return the posix path relative to the root or None if outside."""
+        try:
+            return Path(file_path).relative_to(self._root).as_posix()
+        except ValueError:
+            return None
+
+    def update_file(self, file_path, data=None):
+        """Update the records of the database file.
+
+        This is called by the write paths of the object model. Files which
+        do not belong to the catalog are ignored and missing files are
+        removed from the catalog.
+
+        Args:
+            file_path (str): The absolute path of the database file.
+            data (dict, optional): The contents of the file. Read from the
+                disk if not given.
+
+        Returns:
+            bool: True if the catalog is updated.
+        """
+        relative_path = self._relative(file_path)
+        if not relative_path or not get_kind(relative_path):
+            return False
+        try:
+            modified = os.stat(file_path).st_mtime
+            if data is None:
+                data = io.IO().read(str(file_path))
+        except (OSError, ValueError):
+            return self.remove_path(file_path)
+        try:
+            with self._lock, self._connect() as connection, connection:
+                self._index(connection, relative_path, modified, data)
+        except sqlite3.Error as exc:
+            LOG.warning(f"Cannot update the catalog for {relative_path}: {exc}")
+            return False
+        return True
+
+    def queue_update(self, file_path, data=None):
+        """Queue the update of the database file for the background writer.
+
+        This is called after each settings write, so the writes never wait
+        for the catalog. Only the latest contents of a file are indexed if it
+        is written again before the writer gets to it.
+
+        Args:
+            file_path (str): The absolute path of the database file.
+            data (dict, optional): The contents of the file.
+        """
+        relative_path = self._relative(file_path)
+        if not relative_path or not get_kind(relative_path):
+            return
+        with self._pending_changed:
+            self._pending.pop(str(file_path), None)
+            self._pending[str(file_path)] = data
+            if not self._writer:
+                self._writer = threading.Thread(
+                    target=self._write_pending, name="tik_catalog_writer", daemon=True
+                )
+                self._writer.start()
+            self._pending_changed.notify_all()
+
+    def flush(self, timeout=None):
+        """Wait for the queued updates to be written.
+
+        Args:
+            timeout (float, optional): Maximum seconds to wait.
+
+        Returns:
+            bool: True if there are no updates left.
+        """
+        with self._pending_changed:
+            return self._pending_changed.wait_for(
+                lambda: not self._pending and not self._writing, timeout=timeout
+            )
+
+    def _write_pending(self):
+        """Write the queued updates. Runs on the background writer."""
+        while True:
+            with self._pending_changed:
+                self._pending_changed.wait_for(lambda: self._pending)
+                batch, self._pending = self._pending, {}
+                self._writing = True
+            try:
+                for file_path, data in batch.items():
+                    self.update_file(file_path, data)
+            except Exception as exc:  # pylint: disable=broad-except
+                LOG.warning(f"Cannot update the catalog: {exc}")
+            finally:
+                with self._pending_changed:
+                    self._writing = False
+                    self._pending_changed.notify_all()
+
+    def remove_path(self, path):
+        """Remove the records of the file or all the files under the folder.
+
+        Args:
+            path (str): The absolute path of the file or folder.
+
+        Returns:
+            bool: True if the catalog is updated.
+        """
+        relative_path = self._relative(path)
+        if not relative_path or relative_path == ".":
+            return False
+        prefix = f"{relative_path}/%"
+        try:
+            with self._lock, self._connect() as connection, connection:
+                connection.execute(
+                    "DELETE FROM files WHERE path = ? OR path LIKE ?",
+                    (relative_path, prefix),
+                )
+                for table in list(COLUMNS) + ["metadata", "search"]:
+                    connection.execute(
+                        f"DELETE FROM {table} WHERE file = ? OR file LIKE ?",
+                        (relative_path, prefix),
+                    )
+        except sqlite3.Error as exc:
+            LOG.warning(f"Cannot remove {relative_path} from the catalog: {exc}")
+            return False
+        return True
+
+    def reconcile(self, max_workers=8):
+        """Bring the catalog up to date with the database files.
+
+        Files are re-read only if their modification time differs from the
+        catalog. Records of deleted files are removed.
+
+        Args:
+            max_workers (int): Number of files read in parallel.
+
+        Returns:
+            tuple: (number of updated files, number of removed files)
+        """
+        current = {}
+        for folder, sub_folders, files in os.walk(self._root):
+            # skip the purgatory, trash and other hidden folders
+            sub_folders[:] = [name for name in sub_folders if not name.startswith(".")]
+            for name in files:
+                file_path = os.path.join(folder, name)
+                relative_path = self._relative(file_path)
+                if not get_kind(relative_path):
+                    continue
+                try:
+                    current[relative_path] = os.stat(file_path).st_mtime
+                except OSError:
+                    continue
+
+        with self._connect() as connection:
+            known = dict(connection.execute("SELECT path, modified FROM files"))
+        changed = sorted(
+            (path for path, modified in current.items() if known.get(path) != modified),
+            # the structure goes first, the tasks inherit its metadata
+            key=lambda path: path != STRUCTURE_FILE_NAME,
+        )
+        removed = [path for path in known if path not in current]
+
+        reader = io.IO()
+
+        def _read(relative_path):
+            try:
+                return reader.read(str(self._root / relative_path))
+            except (OSError, ValueError) as exc:
+                LOG.warning(f"Cannot read {relative_path}: {exc}")
+                return None
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            contents = list(executor.map(_read, changed))
+
+        with self._lock, self._connect() as connection, connection:
+            for relative_path in removed:
+                connection.execute("DELETE FROM files WHERE path = ?", (relative_path,))
+                for table in list(COLUMNS) + ["metadata", "search"]:
+                    connection.execute(
+                        f"DELETE FROM {table} WHERE file = ?", (relative_path,)
+                    )
+            for relative_path, data in zip(changed, contents):
+                if data is not None:
+                    self._index(connection, relative_path, current[relative_path], data)
+        self.reconciled = True
+        return len(changed), len(removed)
+
+    def start_reconcile(self):
+        """Reconcile the catalog on a background thread.
+
+        If a reconciliation is already running, its future is returned
+        instead of starting another one.
+
+        Returns:
+            Future: Resolves to (number of updated files, number of removed
+                files).
+        """
+        with self._pending_changed:
+            if self._reconciling and not self._reconciling.done():
+                return self._reconciling
+            future = Future()
+            future.set_running_or_notify_cancel()
+            self._reconciling = future
+
+        def _run():
+            try:
+                future.set_result(self.reconcile())
+            except Exception as exc:  # pylint: disable=broad-except
+                LOG.warning(f"Cannot reconcile the catalog: {exc}")
+                future.set_exception(exc)
+
+        # a daemon thread, exiting never waits for the reconciliation
+        threading.Thread(target=_run, name="tik_catalog_reconcile", daemon=True).start()
+        return future
+
+    def _index(self, connection, relative_path, modified, data):
+        """Replace the records of the file within the transaction."""
+        kind = get_kind(relative_path)
+        connection.execute(
+            "INSERT OR REPLACE INTO files VALUES (?, ?)", (relative_path, modified)
+        )
+        tables = {
+            "structure": ("subprojects",),
+            "task": ("tasks",),
+            "work": ("works", "versions"),
+            "publish": ("publishes",),
+        }[kind]
+        for table in tables + ("metadata", "search"):
+            connection.execute(f"DELETE FROM {table} WHERE file = ?", (relative_path,))
+
+        if kind == "structure":
+            self._index_structure(connection, relative_path, modified, data)
+        elif kind == "task":
+            self._index_task(connection, relative_path, modified, data)
+        elif kind == "work":
+            self._index_work(connection, relative_path, modified, data)
+        else:
+            self._insert(connection, "publishes", {
+                "id": data.get("publish_id"),
+                "name": data.get("name"),
+                "path": data.get("path"),
+                "version_number": data.get("version_number"),
+                "work_version": data.get("work_version"),
+                "task_id": data.get("task_id"),
+                "task_name": data.get("task_name"),
+                "category": data.get("category"),
+                "dcc": data.get("dcc"),
+                "creator": data.get("creator"),
+                "notes": data.get("notes"),
+                "file": relative_path,
+                "modified": modified,
+            })
+            self._insert_search(connection, {
+                "name": data.get("name"),
+                "text": [data.get("creator"), data.get("category"),
+                         data.get("task_name"), data.get("notes")],
+                "kind": "publish",
+                "entity_id": data.get("publish_id"),
+                "path": data.get("path"),
+                "task_id": data.get("task_id"),
+                "category": data.get("category"),
+                "work_id": data.get("publish_id"),
+                "file": relative_path,
+            })
+
+    @staticmethod
+    def _insert(connection, table, row):
+        """Insert the row dictionary into the table."""
+        columns = COLUMNS[table]
+        connection.execute(
+            f"INSERT INTO {table} VALUES ({', '.join('?' * len(columns))})",
+            [_to_sql(row.get(column)) for column in columns],
+        )
+
+    def _index_structure(self, connection, relative_path, modified, data):
+        """Index the subproject tree and refresh the metadata of the tasks."""
+        persistent_keys = ("id", "name", "path", "subs")
+        queue = [(data, None, {})]
+        while queue:
+            sub, parent_id, inherited = queue.pop(0)
+            metadata = dict(inherited)
+            metadata.update(
+                (key, value) for key, value in sub.items() if key not in persistent_keys
+            )
+            self._insert(connection, "subprojects", {
+                "id": sub.get("id"),
+                "name": sub.get("name"),
+                "path": sub.get("path"),
+                "parent_id": parent_id,
+                "metadata": metadata,
+                "file": relative_path,
+                "modified": modified,
+            })
+            self._insert_metadata(
+                connection, "subproject", sub.get("id"), metadata, relative_path
+            )
+            if parent_id is not None:
+                self._insert_search(connection, {
+                    "name": sub.get("name"),
+                    "text": [sub.get("path")] + list(metadata.values()),
+                    "kind": "subproject",
+                    "entity_id": sub.get("id"),
+                    "path": sub.get("path"),
+                    "subproject_id": sub.get("id"),
+                    "file": relative_path,
+                })
+            queue.extend((child, sub.get("id"), metadata) for child in sub.get("subs", []))
+
+        # tasks inherit the metadata of their subprojects
+        connection.execute("DELETE FROM metadata WHERE entity_type = 'task'")
+        connection.execute("DELETE FROM search WHERE kind = 'task'")
+        rows = connection.execute("SELECT * FROM tasks").fetchall()
+        for row in rows:
+            self._insert_task_metadata(connection, self._to_record("tasks", row))
+
+    def _index_task(self, connection, relative_path, modified, data):
+        """Index the task and its effective metadata."""
+        task = {
+            "id": data.get("task_id"),
+            "name": data.get("name"),
+            "path": data.get("path"),
+            "subproject_id": data.get("subproject_id"),
+            "creator": data.get("creator"),
+            "categories": data.get("categories"),
+            "state": data.get("state", "active"),
+            "metadata_overrides": data.get("metadata_overrides", {}) or {},
+            "file": relative_path,
+            "modified": modified,
+        }
+        self._insert(connection, "tasks", dict(
+            task, metadata_overrides=json.dumps(task["metadata_overrides"])
+        ))
+        self._insert_task_metadata(connection, task)
+
+    def _insert_task_metadata(self, connection, task):
+        """Insert the subproject metadata overridden by the task.
+
+        The search record of the task is inserted with the metadata values.
+        """
+        row = connection.execute(
+            "SELECT metadata FROM subprojects WHERE id = ?", (task["subproject_id"],)
+        ).fetchone()
+        metadata = json.loads(row["metadata"]) if row else {}
+        metadata.update(task["metadata_overrides"])
+        self._insert_metadata(connection, "task", task["id"], metadata, task["file"])
+        self._insert_search(connection, {
+            "name": task["name"],
+            "text": [task["creator"], task["path"]] + list(metadata.values()),
+            "kind": "task",
+            "entity_id": task["id"],
+            "path": task["path"],
+            "subproject_id": task["subproject_id"],
+            "task_id": task["id"],
+            "file": task["file"],
+        })
+
+    @staticmethod
+    def _insert_search(connection, record):
+        """Insert the search record. Text values are joined into words."""
+        words = []
+        for value in record.get("text", []):
+            if isinstance(value, (list, dict)):
+                value = json.dumps(value)
+            if value not in (None, ""):
+                words.append(str(value))
+        record = dict(record, text=" ".join(words))
+        connection.execute(
+            f"INSERT INTO search ({', '.join(SEARCH_COLUMNS)}) "
+            f"VALUES ({', '.join('?' * len(SEARCH_COLUMNS))})",
+            [record.get(column) for column in SEARCH_COLUMNS],
+        )
+
+    @staticmethod
+    def _insert_metadata(connection, entity_type, entity_id, metadata, relative_path):
+        """Insert the metadata rows of the entity."""
+        connection.executemany(
+            "INSERT INTO metadata VALUES (?, ?, ?, ?, ?)",
+            [
+                (entity_type, entity_id, key, _to_sql(value), relative_path)
+                for key, value in metadata.items()
+            ],
+        )
+
+    def _index_work(self, connection, relative_path, modified, data):
+        """Index the work and its versions."""
+        versions = data.get("versions", [])
+        self._insert(connection, "works", {
+            "id": data.get("work_id"),
+            "name": data.get("name"),
+            "path": data.get("path"),
+            "task_id": data.get("task_id"),
+            "task_name": data.get("task_name"),
+            "category": data.get("category"),
+            "dcc": data.get("dcc"),
+            "creator": data.get("creator"),
+            "state": data.get("state", "active"),
+            "version_count": len(versions),
+            "file": relative_path,
+            "modified": modified,
+        })
+        for version in versions:
+            self._insert(connection, "versions", {
+                "work_id": data.get("work_id"),
+                "name": data.get("name"),
+                "task_id": data.get("task_id"),
+                "category": data.get("category"),
+                "version_number": version.get("version_number"),
+                "user": version.get("user"),
+                "notes": version.get("notes"),
+                "workstation": version.get("workstation"),
+                "file_format": version.get("file_format"),
+                "archived": bool(version.get("archived", False)),
+                "file": relative_path,
+                "modified": modified,
+            })
+        self._insert_search(connection, {
+            "name": data.get("name"),
+            "text": [data.get("creator"), data.get("category"), data.get("task_name"),
+                     data.get("dcc")]
+                    + [version.get("user") for version in versions]
+                    + [version.get("notes") for version in versions],
+            "kind": "work",
+            "entity_id": data.get("work_id"),
+            "path": data.get("path"),
+            "task_id": data.get("task_id"),
+            "category": data.get("category"),
+            "work_id": data.get("work_id"),
+            "file": relative_path,
+        })
+
+    def query(self, table, since=None, metadata=None, limit=None, **filters):
+        """Query the records of the catalog.
+
+        Args:
+            table (str): One of subprojects, tasks, works, versions or
+                publishes.
+            since (float, optional): Only the records of the files modified
+                after this timestamp.
+            metadata (dict, optional): Metadata values to match. Works,
+                versions and publishes are matched with the metadata of
+                their tasks.
+            limit (int, optional): Maximum number of records.
+            **filters: Column values to match.
+
+        Returns:
+            list: Records as dictionaries, most recently modified first.
+        """
+        if table not in COLUMNS:
+            raise ValueError(f"Unknown catalog table: {table}")
+        unknown = set(filters) - set(COLUMNS[table])
+        if unknown:
+            raise ValueError(f"Unknown {table} columns: {', '.join(sorted(unknown))}")
+
+        conditions = [f"{column} = ?" for column in filters]
+        parameters = [_to_sql(value) for value in filters.values()]
+        if since is not None:
+            conditions.append("modified >= ?")
+            parameters.append(since)
+        if metadata:
+            entity_type, column = {
+                "subprojects": ("subproject", "id"),
+                "tasks": ("task", "id"),
+            }.get(table, ("task", "task_id"))
+            for key, value in metadata.items():
+                conditions.append(
+                    f"{column} IN (SELECT entity_id FROM metadata WHERE "
+                    f"entity_type = ? AND key = ? AND value = ?)"
+                )
+                parameters.extend((entity_type, key, _to_sql(value)))
+
+        statement = f"SELECT * FROM {table}"
+        if conditions:
+            statement += f" WHERE {' AND '.join(conditions)}"
+        statement += " ORDER BY modified DESC"
+        if limit:
+            statement += " LIMIT ?"
+            parameters.append(limit)
+        with self._connect() as connection:
+            rows = connection.execute(statement, parameters).fetchall()
+        return [self._to_record(table, row) for row in rows]
+
+    @staticmethod
+    def _to_record(table, row):
+        """Convert the sql row to a record dictionary."""
+        record = dict(row)
+        for key in ("metadata", "categories", "metadata_overrides"):
+            if isinstance(record.get(key), str):
+                record[key] = json.loads(record[key])
+        if table == "versions":
+            record["archived"] = bool(record["archived"])
+        return record
+
+    def search(self, query, limit=50):
+        """Search the names, notes, creators and metadata values.
+
+        Every word of the query needs to match the beginning of a word in
+        the record.
+
+        Args:
+            query (str): The search words.
+            limit (int): Maximum number of results.
+
+        Returns:
+            list: Results as dictionaries with kind (subproject, task, work
+                or publish), entity_id, name, path, subproject_id, task_id,
+                category, work_id and score keys. Best matches first.
+        """
+        words = re.findall(r"\w+", query.lower())
+        if not words:
+            return []
+        columns = ", ".join(
+            f"search.{column}" for column in SEARCH_COLUMNS[1:] if column != "subproject_id"
+        )
+        statement = (
+            f"SELECT search.name, {columns}, "
+            f"COALESCE(search.subproject_id, tasks.subproject_id) AS subproject_id, "
+            f"{{score}} AS score FROM search "
+            f"LEFT JOIN tasks ON tasks.id = search.task_id WHERE {{condition}} "
+            f"ORDER BY score DESC LIMIT ?"
+        )
+        if self.full_text:
+            statement = statement.format(
+                score=f"-bm25(search, {NAME_WEIGHT}, 1.0)", condition="search MATCH ?"
+            )
+            parameters = [" ".join(f'"{word}"*' for word in words), limit]
+        else:
+            # plain substring matching, names matching the first word go first
+            statement = statement.format(
+                score="(search.name LIKE ?) - length(search.name) / 1000.0",
+                condition=" AND ".join(
+                    "(search.name LIKE ? OR search.text LIKE ?)" for _word in words
+                ),
+            )
+            parameters = [f"%{words[0]}%"]
+            for word in words:
+                parameters.extend((f"%{word}%", f"%{word}%"))
+            parameters.append(limit)
+        try:
+            with self._connect() as connection:
+                rows = connection.execute(statement, parameters).fetchall()
+        except sqlite3.OperationalError as exc:
+            LOG.warning(f"Cannot search the catalog: {exc}")
+            return []
+        results = []
+        for row in rows:
+            result = dict(row)
+            result.pop("text")
+            result.pop("file")
+            results.append(result)
+        return results
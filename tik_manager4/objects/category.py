@@ -59,24 +59,61 @@ class Category(Entity):
         Returns:
             dict: Dictionary of works under the category.
         """
+        self.commit_works(list(self.iter_works()), prune=True)
+        return self._works
+
+    def iter_works(self):
+        """Read the works of the category folder one by one.
+
+        This can run in a worker thread, the category is not changed. The
+        unchanged works are yielded as they are, the new and modified ones
+        as new work objects. They are applied with commit_works().
+
+        Yields:
+            Work: The work objects under the category.
+        """
         # get all files recursively, regardless of the dcc
         search_dir = self.get_abs_database_path()
-        _work_paths = list(Path(search_dir).rglob("**/*.twork"))
-
-        # add the file if it is new. if it is not new,
-        # check the modified time and update if necessary
-        for w_path, _w_data in dict(self._works).items():
-            if w_path not in _work_paths:
-                self._works.pop(w_path)
-        for _work_path in _work_paths:
+        for _work_path in Path(search_dir).rglob("**/*.twork"):
             existing_work = self._works.get(_work_path, None)
+            try:
+                if not existing_work or existing_work.is_modified():
+                    existing_work = Work(
+                        absolute_path=_work_path, parent_task=self.parent_task
+                    )
+            except OSError:
+                # deleted while scanning
+                continue
+            yield existing_work
+
+    def commit_works(self, works, prune=False):
+        """Apply the works read with iter_works().
+
+        The existing work objects take the data of the modified ones, so the
+        references to them stay valid.
+
+        Args:
+            works (list): Work objects read with iter_works().
+            prune (bool): If True, the works which are not given are removed
+                as deleted.
+
+        Returns:
+            list: The committed work objects in the given order.
+        """
+        committed = []
+        for _work in works:
+            work_path = Path(_work.settings_file)
+            existing_work = self._works.get(work_path, None)
             if not existing_work:
-                work = Work(absolute_path=_work_path, parent_task=self.parent_task)
-                self._works[_work_path] = work
-            else:
-                if existing_work.is_modified():
-                    existing_work.reload()
-        return self._works
+                self._works[work_path] = existing_work = _work
+            elif existing_work is not _work:
+                existing_work.adopt(_work)
+            committed.append(existing_work)
+        if prune:
+            _existing_paths = {Path(_work.settings_file) for _work in works}
+            for w_path in [path for path in self._works if path not in _existing_paths]:
+                self._works.pop(w_path)
+        return committed
 
     def is_empty(self):
         """Check if the category is empty.
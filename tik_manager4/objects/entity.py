@@ -132,6 +132,27 @@ class Entity:
         """
         return Path(self.guard.project_root, ".purgatory", "tikDatabase",  self.path, *args).as_posix()
 
+    def send_to_purgatory(self, items, name=None):
+        """Send the files and folders of the entity to the purgatory.
+
+        Args:
+            items (list): List of (source, target) paths.
+            name (str, optional): Name of the purgatory entry. Defaults to
+                the entity name.
+
+        Returns:
+            tuple: (bool, message)
+        """
+        purgatory = self.guard.get_purgatory()
+        entry_id, msg = purgatory.send(
+            name or self.name, items, object_type=self.object_type, user=self.guard.user
+        )
+        catalog = self.guard.get_catalog(create=False)
+        if entry_id is not None and catalog:
+            for source, _target in items:
+                catalog.remove_path(source)
+        return entry_id is not None, msg
+
     @staticmethod
     def _open_folder(target):
         """Open the path in Windows Explorer(Windows) or Nautilus(Linux).
@@ -1,5 +1,15 @@
 """Module to communicate with other modules regarding the application state."""
 
+from pathlib import Path
+
+from tik_manager4.core.content_store import STORE_FOLDER_NAME, ContentStore
+from tik_manager4.core.local_cache import (
+    CACHE_FOLDER_NAME, GIGABYTE, LocalCache, Prefetcher
+)
+from tik_manager4.core.settings import Settings
+from tik_manager4.objects.catalog import CATALOG_FILE_NAME, Catalog
+from tik_manager4.objects.purgatory import Purgatory
+
 class Guard:
     """Global object that holds the state of the application."""
     _user = None
@@ -19,6 +29,11 @@ class Guard:
     project_settings = None
     preview_settings = None
     localize_settings = None
+    local_cache = None
+    prefetcher = None
+    content_store = None
+    purgatory = None
+    catalog = None
     commons = None
     _dcc_handler = None
     _management_handler = None
@@ -59,6 +74,95 @@ class Guard:
         """
         cls.localize_settings = localize_settings
 
+    @classmethod
+    def set_local_cache(cls, local_cache, prefetcher=None):
+        """Set the local read cache and its prefetcher.
+
+        Args:
+            local_cache (LocalCache): The local cache object.
+            prefetcher (Prefetcher, optional): The prefetcher of the cache.
+        """
+        cls.local_cache = local_cache
+        cls.prefetcher = prefetcher
+
+    @classmethod
+    def get_local_cache(cls):
+        """Return the local read cache. Creates it on first use.
+
+        Returns:
+            LocalCache: The cache object or None if the local cache folder
+                is not set.
+        """
+        if not cls.localize_settings:
+            return None
+        local_folder = cls.localize_settings.get("local_cache_folder")
+        if not local_folder:
+            return None
+        quota = int(cls.localize_settings.get("cache_quota_gb", 50) * GIGABYTE)
+        cache_root = Path(local_folder, CACHE_FOLDER_NAME)
+        if not cls.local_cache or cls.local_cache.root != cache_root:
+            local_cache = LocalCache(str(cache_root), quota_bytes=quota)
+            cls.set_local_cache(local_cache, Prefetcher(local_cache))
+        cls.local_cache.quota = quota
+        return cls.local_cache
+
+    @classmethod
+    def get_content_store(cls):
+        """Return the content store of the project.
+
+        Returns:
+            ContentStore: The store object or None if it is not enabled in
+                the project settings.
+        """
+        if not cls.project_settings or not cls._project_root:
+            return None
+        if not cls.project_settings.get("content_store", False):
+            return None
+        store_root = Path(cls._project_root, STORE_FOLDER_NAME)
+        if not cls.content_store or cls.content_store.root != store_root:
+            cls.content_store = ContentStore(str(store_root))
+        return cls.content_store
+
+    @classmethod
+    def get_purgatory(cls):
+        """Return the purgatory of the project. Creates it on first use.
+
+        Returns:
+            Purgatory: The purgatory object or None if there is no project.
+        """
+        if not cls._project_root:
+            return None
+        purgatory_root = Path(cls._project_root, ".purgatory")
+        if not cls.purgatory or cls.purgatory.root != purgatory_root:
+            cls.purgatory = Purgatory(cls._project_root)
+        return cls.purgatory
+
+    @classmethod
+    def get_catalog(cls, create=True):
+        """Return the catalog of the project database.
+
+        The catalog is kept up to date by the settings writes once it is
+        opened. The updates are written in the background.
+
+        Args:
+            create (bool): Create the catalog file if it does not exist.
+
+        Returns:
+            Catalog: The catalog object or None if there is no project or
+                the catalog does not exist and create is False.
+        """
+        if not cls._database_root:
+            return None
+        catalog_file = Path(cls._database_root, CATALOG_FILE_NAME)
+        if not cls.catalog or cls.catalog.file_path != catalog_file:
+            cls.catalog = None
+            Settings.set_write_callback(None)
+            if not create and not catalog_file.exists():
+                return None
+            cls.catalog = Catalog(str(catalog_file), cls._database_root)
+            Settings.set_write_callback(cls.catalog.queue_update)
+        return cls.catalog
+
     @classmethod
     def set_dcc(cls, dcc_name):
         """Set the DCC name.
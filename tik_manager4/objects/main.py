@@ -1,12 +1,13 @@
 """Main Module for the Tik Manager"""
 
+import atexit
+import hashlib
 import http.client
 import json
 from pathlib import Path
-from tik_manager4.core import filelog, settings, utils
+from tik_manager4.core import filelog, settings, utils, warm_cache
 from tik_manager4.objects import user, project
 from tik_manager4 import dcc
-from tik_manager4 import management
 from tik_manager4.external.packaging.version import Version
 import tik_manager4._version as version
 # the reload is necessary to make sure the dcc is reloaded
@@ -16,6 +17,16 @@ from importlib import reload
 reload(dcc)
 
 
+def _save_warm_cache():
+    """Save the warm start cache of the current project."""
+    cache = settings.Settings.get_warm_cache()
+    if cache:
+        cache.save()
+
+
+atexit.register(_save_warm_cache)
+
+
 class Main:
     """Main Tik Manager class. Handles User and Project related functions."""
     # set the dcc to the guard object
@@ -28,6 +39,7 @@ class Main:
         # set either the latest project or the default one
         # always make sure the default project exists, in case of urgent fall back
         self.user = user.User(common_directory=common_folder)
+        self.warm_cache = None
         self.project = project.Project()
         self.project.guard.set_dcc(dcc.NAME)
         self.project.guard.set_dcc_handler(self.dcc)
@@ -58,7 +70,7 @@ class Main:
         management_platform = self.project.settings.get("management_platform", None)
         if management_platform:
             self.project.guard.set_management_handler(
-                management.platforms[management_platform](self))
+                self.get_management_platform(management_platform)(self))
         else:
             self.project.guard.set_management_handler(None)
 
@@ -183,6 +195,7 @@ class Main:
         if not Path(absolute_path).exists():
             self.log.error("Project Path does not exist. Aborting")
             return -1
+        self._set_warm_cache(absolute_path)
         self.project._set(absolute_path) # pylint: disable=protected-access
 
         # add to recent projects
@@ -192,6 +205,116 @@ class Main:
         self._globalize_management_platform()
         return 1
 
+    def _set_warm_cache(self, absolute_path):
+        """Serve the database files of the project from the warm start cache.
+
+        The cache of the previous project is saved. The cache of the new
+        project is loaded with a single read and validated in the background.
+
+        Args:
+            absolute_path (str): The absolute path to the project.
+        """
+        if self.warm_cache:
+            self.warm_cache.save()
+            self.warm_cache = None
+        settings.Settings.set_warm_cache(None)
+        if not self.user.settings.get_property("warm_start_cache", False):
+            return
+
+        database_root = Path(absolute_path, "tikDatabase")
+        cache_name = hashlib.sha1(database_root.as_posix().encode()).hexdigest()[:16]
+        cache_file = Path(
+            self.user.user_directory, warm_cache.CACHE_FOLDER_NAME, f"{cache_name}.json"
+        )
+        self.warm_cache = warm_cache.WarmCache(str(cache_file), str(database_root))
+        self.warm_cache.load()
+        settings.Settings.set_warm_cache(self.warm_cache)
+        self.warm_cache.validate()
+
+    def prefetch_recent_publishes(self, task_ids=None):
+        """Warm the local read cache with the publishes of the recent tasks.
+
+        Latest publish version of each work under the tasks is queued for
+        copying. The works are discovered in the background.
+
+        Args:
+            task_ids (list, optional): Task ids to prefetch. Defaults to the
+                recent tasks of the user.
+
+        Returns:
+            Future: Resolves to the number of queued elements. None if
+                prefetching is disabled.
+        """
+        if not self.user.localization.get_property("prefetch", False):
+            return None
+        if not self.project.guard.get_local_cache():
+            self.log.warning("Local cache folder is not set. Cannot prefetch.")
+            return None
+        task_ids = list(task_ids or self.user.recent_tasks)
+        task_files = self.resolve_task_files(task_ids)
+        return self.project.guard.prefetcher.prefetch_from(
+            self.collect_prefetch_items, task_files
+        )
+
+    def resolve_task_files(self, task_ids):
+        """Return the database files of the tasks.
+
+        The tasks loaded under the subprojects are used first. The others are
+        looked up in the catalog if the project has one. No folder is scanned.
+
+        Args:
+            task_ids (list): Ids of the tasks.
+
+        Returns:
+            list: Absolute paths of the found task files.
+        """
+        remaining = set(task_ids)
+        task_files = []
+        queue = [self.project]
+        while queue and remaining:
+            sub = queue.pop(0)
+            for task in sub.tasks.values():
+                if task.id in remaining:
+                    remaining.discard(task.id)
+                    task_files.append(str(task.settings_file))
+            queue.extend(sub.subs.values())
+
+        catalog = self.project.guard.get_catalog(create=False) if remaining else None
+        if catalog:
+            for task_id in remaining:
+                for record in catalog.query("tasks", id=task_id, limit=1):
+                    task_files.append(str(Path(catalog.root, record["file"])))
+        return task_files
+
+    @staticmethod
+    def collect_prefetch_items(task_files):
+        """Collect the latest publishes of the tasks.
+
+        New task objects are created from the files, so the objects shown in
+        the ui are not touched and this can run in any thread.
+
+        Args:
+            task_files (list): Absolute paths of the task files.
+
+        Returns:
+            list: (origin path, cache key) pairs of the publish elements.
+        """
+        from tik_manager4.objects.task import Task
+
+        items = []
+        for task_file in task_files:
+            if not Path(task_file).is_file():
+                continue
+            task = Task(absolute_path=task_file)
+            for category in task.categories.values():
+                for work in category.works.values():
+                    last_version = work.publish.get_last_version()
+                    if not last_version:
+                        continue
+                    version_obj = work.publish.get_version(last_version)
+                    items.extend(version_obj.get_prefetch_items())
+        return items
+
     def collect_template_paths(self):
         """Collect all template files from common, project and user folders.
 
@@ -284,6 +407,19 @@ class Main:
         finally:
             conn.close()
 
+    @staticmethod
+    def get_management_platform(platform_name):
+        """Return the class of the management platform.
+
+        The module of the platform is imported on the first use, as it
+        pulls in the api packages of the platform.
+
+        Args:
+            platform_name (str): The name of the platform.
+        """
+        from tik_manager4 import management
+        return management.platforms[platform_name]
+
     def get_management_handler(self, platform_name=None):
         """Resolve the management handler.
 
@@ -305,18 +441,18 @@ class Main:
                 return defined_handler, msg
             # if we are requesting a different platform than the defined one
             # Create a new loose handler
-            handler = (management.platforms[platform_name](self))
+            handler = self.get_management_platform(platform_name)(self)
             _sg, msg = handler.authenticate()
             return handler, msg
 
         # if there is no defined handler, create a new one
         project_defined_platform = self.project.settings.get("management_platform")
         if platform_name:
-            handler = management.platforms[platform_name](self)
+            handler = self.get_management_platform(platform_name)(self)
             _sg, msg = handler.authenticate()
             return handler, msg
         if project_defined_platform:
-            handler = management.platforms[project_defined_platform](self)
+            handler = self.get_management_platform(project_defined_platform)(self)
             self.project.guard.set_management_handler(handler)
             _sg, msg = handler.authenticate()
             return handler, msg
@@ -1,7 +1,12 @@
 """Preview Module."""
 
+import math
 import platform
+import re
+import shutil
 import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import List, Tuple
 
@@ -11,6 +16,9 @@ from tik_manager4.core import utils
 
 LOG = filelog.Filelog(logname=__name__, filename="tik_manager4")
 
+COMPATIBLE_VIDEOS = [".avi", ".mov", ".mp4", ".flv", ".webm", ".mkv"]
+COMPATIBLE_IMAGES = [".tga", ".jpg", ".exr", ".png", ".pic"]
+
 class PreviewContext:
     """Data class to hold the preview context."""
     def __init__(self,
@@ -126,6 +134,90 @@ class PreviewContext:
         # Otherwise, return the first camera in the list
         return cameras[0]
 
+class ConversionQueue:
+    """Background queue for the preview conversions.
+
+    Conversions are running as ffmpeg subprocesses on a bounded pool so the
+    publishes and preview creations can return without waiting for them.
+    """
+    max_workers = 2
+    _executor = None
+    _pending = set()
+    _lock = threading.RLock()
+    _condition = threading.Condition(_lock)
+    _ffmpeg = None
+
+    @classmethod
+    def get_ffmpeg(cls) -> str or bool:
+        """Return the ffmpeg executable. The result is cached after first check."""
+        if cls._ffmpeg is None:
+            if platform.system() == "Windows":
+                # get the ffmpeg.exe from the parallel folder 'external'
+                parent_folder = Path(__file__).parent.parent
+                ffmpeg = parent_folder / "external" / "ffmpeg" / "ffmpeg.exe"
+                cls._ffmpeg = str(ffmpeg) if ffmpeg.exists() else False
+            else:
+                cls._ffmpeg = shutil.which("ffmpeg") or False
+        return cls._ffmpeg
+
+    @classmethod
+    def submit(cls, func, *args, on_complete=None, **kwargs):
+        """Queue the function to run in the background.
+
+        Args:
+            func (function): The conversion function.
+            *args: Arguments for the function.
+            on_complete (function, optional): Called with the result of the
+                function when it completes successfully.
+            **kwargs: Keyword arguments for the function.
+
+        Returns:
+            concurrent.futures.Future: The future of the job.
+        """
+        with cls._lock:
+            if cls._executor is None:
+                cls._executor = ThreadPoolExecutor(
+                    max_workers=cls.max_workers,
+                    thread_name_prefix="tik_preview_conversion",
+                )
+            future = cls._executor.submit(func, *args, **kwargs)
+            cls._pending.add(future)
+
+        def _done(job):
+            with cls._condition:
+                try:
+                    if job.exception():
+                        LOG.error(f"Preview conversion failed: {job.exception()}")
+                    elif on_complete:
+                        on_complete(job.result())
+                except Exception as exc:  # pylint: disable=broad-except
+                    LOG.error(f"Registering the preview failed: {exc}")
+                finally:
+                    cls._pending.discard(job)
+                    cls._condition.notify_all()
+
+        future.add_done_callback(_done)
+        return future
+
+    @classmethod
+    def pending_count(cls):
+        """Number of conversions waiting or running."""
+        return len(cls._pending)
+
+    @classmethod
+    def wait(cls, timeout=None):
+        """Block until all queued jobs and their callbacks are completed.
+
+        Args:
+            timeout (float, optional): Maximum seconds to wait.
+
+        Returns:
+            bool: True if the queue is empty, False if timed out.
+        """
+        with cls._condition:
+            return cls._condition.wait_for(lambda: not cls._pending, timeout)
+
+
 class Preview:
     """Preview class."""
     def __init__(self, preview_context, database_object, settings=None, message_callback=None):
@@ -143,6 +235,13 @@ class Preview:
         self._settings = settings or {}
         self._path = None
         self._message_callback = message_callback or LOG.info
+        self.conversion_job = None
+        self.derivatives_job = None
+        # the database object belongs to the thread creating the preview.
+        # The background jobs register to its file only, which is merged
+        # when the object is written.
+        self._owner_thread = threading.current_thread()
+        self._lock = threading.RLock()
 
         self._folder = self.database_obj.get_abs_project_path("previews")
         Path(self._folder).mkdir(parents=True, exist_ok=True)
@@ -197,40 +296,234 @@ class Preview:
 
         suffix = Path(abs_path).suffix
         if self._settings.get("PostConversion", False) and suffix != ".mp4":
-            self._message_callback("Converting the preview to MP4 format.")
             ffmpeg = self._check_ffmpeg()
             if ffmpeg:
-                abs_path = self._convert_preview(abs_path, ffmpeg, overwrite=True)
-            else:
-                self._message_callback("FFMPEG not found. Skipping conversion.")
-                LOG.warning("FFMPEG not found. Skipping conversion.")
+                self._message_callback("Queueing the preview conversion to MP4 format.")
+                # dcc commands are not thread safe. Resolve fps here.
+                fps = self.database_obj.dcc_handler.get_scene_fps()
+                self.conversion_job = ConversionQueue.submit(
+                    self._convert_preview,
+                    abs_path,
+                    ffmpeg,
+                    overwrite=True,
+                    fps=fps,
+                    on_complete=lambda converted_path: self._finalize(
+                        nice_name, converted_path, show_after
+                    ),
+                )
+                # registering is deferred until the conversion completes.
+                return self._resolve_converted_path(abs_path)
+            self._message_callback("FFMPEG not found. Skipping conversion.")
+            LOG.warning("FFMPEG not found. Skipping conversion.")
 
-        relative_path = Path("previews") / Path(abs_path).name
+        self._message_callback("Registering preview data.")
+        self._finalize(nice_name, abs_path, show_after)
+        return abs_path
 
-        preview_data = {nice_name: relative_path.as_posix()}
+    def wait(self, timeout=None):
+        """Wait for the background conversion of this preview if there is any.
 
-        self._message_callback("Registering preview data.")
-        self.register_data(preview_data)
+        Proxies and sprite sheets are not waited for.
+
+        Args:
+            timeout (float, optional): Maximum seconds to wait.
+
+        Returns:
+            str: Absolute path of the converted preview or None.
+        """
+        if not self.conversion_job:
+            return None
+        try:
+            return self.conversion_job.result(timeout=timeout)
+        except Exception:  # pylint: disable=broad-except
+            return None
 
+    def _finalize(self, nice_name, abs_path, show_after):
+        """Register the preview data and show the preview if requested.
+
+        Proxy and sprite sheet generation is queued afterwards if enabled.
+
+        Args:
+            nice_name (str): The nice name of the preview.
+            abs_path (str): Absolute path of the final preview file.
+            show_after (bool): If True, the preview is executed.
+        """
+        relative_path = Path("previews") / Path(abs_path).name
+        self.register_data({nice_name: relative_path.as_posix()})
         if show_after:
             utils.execute(abs_path)
-        return abs_path
+        self._queue_derivatives(nice_name, abs_path)
+
+    def _queue_derivatives(self, nice_name, abs_path):
+        """Queue the proxy and sprite sheet generation for the preview video.
+
+        Args:
+            nice_name (str): The nice name of the preview.
+            abs_path (str): Absolute path of the preview video.
+        """
+        make_proxy = self._settings.get("GenerateProxy", False)
+        make_sprite = self._settings.get("GenerateSpriteSheet", False)
+        if not (make_proxy or make_sprite):
+            return
+        if Path(abs_path).suffix not in COMPATIBLE_VIDEOS:
+            LOG.warning("Proxies can only be generated from video previews.")
+            return
+        ffmpeg = self._check_ffmpeg()
+        if not ffmpeg:
+            LOG.warning("FFMPEG not found. Skipping proxy generation.")
+            return
+        self.derivatives_job = ConversionQueue.submit(
+            self._generate_derivatives,
+            abs_path,
+            ffmpeg,
+            proxy=make_proxy,
+            sprite_sheet=make_sprite,
+            on_complete=lambda result: self._register_derivatives(nice_name, *result),
+        )
+
+    def _generate_derivatives(self, abs_path, ffmpeg, proxy=True, sprite_sheet=True):
+        """Generate the low bitrate proxy and the sprite sheet of the preview.
+
+        Args:
+            abs_path (str): Absolute path of the preview video.
+            ffmpeg (str): Path to the ffmpeg executable.
+            proxy (bool): Generate the proxy video.
+            sprite_sheet (bool): Generate the sprite sheet.
+
+        Returns:
+            tuple: (proxy path or None, sprite sheet data or None)
+        """
+        proxy_path = self._make_proxy(abs_path, ffmpeg) if proxy else None
+        sprite_data = self._make_sprite_sheet(abs_path, ffmpeg) if sprite_sheet else None
+        return proxy_path, sprite_data
+
+    def _make_proxy(self, abs_path, ffmpeg):
+        """Encode a low resolution, low bitrate copy of the preview video.
+
+        Args:
+            abs_path (str): Absolute path of the preview video.
+            ffmpeg (str): Path to the ffmpeg executable.
+
+        Returns:
+            str: Absolute path of the proxy video.
+        """
+        _file_path = Path(abs_path)
+        proxy_path = _file_path.with_name(f"{_file_path.stem}_proxy.mp4")
+        height = self._settings.get("ProxyHeight", 360)
+        crf = self._settings.get("ProxyCrfValue", 32)
+        self._run_ffmpeg([
+            ffmpeg, "-y", "-i", str(_file_path),
+            "-vf", f"scale=-2:{height}",
+            "-c:v", "libx264", "-pix_fmt", "yuv420p", "-crf", str(crf),
+            "-preset", "veryfast", "-c:a", "aac", "-b:a", "64k",
+            str(proxy_path),
+        ])
+        return str(proxy_path)
+
+    def _make_sprite_sheet(self, abs_path, ffmpeg):
+        """Tile evenly spaced frames of the preview video into a single jpg.
 
-    def register_data(self, preview_data):
-        """Register the preview data to the database object."""
+        Args:
+            abs_path (str): Absolute path of the preview video.
+            ffmpeg (str): Path to the ffmpeg executable.
+
+        Returns:
+            dict: Sprite sheet data or None if the frame range is unknown.
+        """
+        if not self.context.frame_range:
+            LOG.warning("Frame range is not defined. Skipping the sprite sheet.")
+            return None
+        frame_count = int(self.context.frame_range[1] - self.context.frame_range[0]) + 1
+        tile_count = max(1, min(self._settings.get("SpriteSheetFrames", 16), frame_count))
+        tile_width = self._settings.get("SpriteSheetTileWidth", 160)
+        columns = math.ceil(math.sqrt(tile_count))
+        rows = math.ceil(tile_count / columns)
+        step = max(1, frame_count // tile_count)
+
+        _file_path = Path(abs_path)
+        sprite_path = _file_path.with_name(f"{_file_path.stem}_sprite.jpg")
+        self._run_ffmpeg([
+            ffmpeg, "-y", "-i", str(_file_path),
+            "-vf", f"select=not(mod(n\\,{step})),scale={tile_width}:-2,"
+            f"tile={columns}x{rows}:nb_frames={tile_count}",
+            "-frames:v", "1", "-vsync", "vfr", "-q:v", "4",
+            str(sprite_path),
+        ])
+        return {
+            "path": str(sprite_path),
+            "frames": tile_count,
+            "step": step,
+            "columns": columns,
+            "rows": rows,
+            "tile_width": tile_width,
+        }
+
+    def _register_derivatives(self, nice_name, proxy_path, sprite_data):
+        """Register the proxy and sprite sheet data next to the previews.
+
+        Args:
+            nice_name (str): The nice name of the preview.
+            proxy_path (str): Absolute path of the proxy video or None.
+            sprite_data (dict): Sprite sheet data or None.
+        """
+        if proxy_path:
+            relative_path = Path("previews") / Path(proxy_path).name
+            self.register_data(
+                {nice_name: relative_path.as_posix()}, key="preview_proxies"
+            )
+        if sprite_data:
+            relative_path = Path("previews") / Path(sprite_data["path"]).name
+            sprite_data = dict(sprite_data, path=relative_path.as_posix())
+            self.register_data({nice_name: sprite_data}, key="preview_sprites")
+
+    def register_data(self, preview_data, key="previews"):
+        """Register the preview data to the database object.
+
+        The data is merged into the database file under its lock, so the
+        other changes of the file are kept. The database object is updated
+        only on its own thread. It merges the registrations of the
+        background jobs from the file when it is written.
+
+        Args:
+            preview_data (dict): Data to register with the nice names as keys.
+            key (str): The preview data key. 'previews', 'preview_proxies'
+                or 'preview_sprites'.
+        """
+        object_type = self.database_obj.object_type
+        if object_type not in (ObjectType.WORK, ObjectType.PUBLISH_VERSION):
+            return
+        version_number = self.context.version_number
+
+        def _merge(data):
+            if object_type == ObjectType.WORK:
+                # work files keep the previews in the version dictionaries
+                for version in data.get("versions", []):
+                    if version.get("version_number") == version_number:
+                        version.setdefault(key, {}).update(preview_data)
+            else:
+                data.setdefault(key, {}).update(preview_data)
+
+        with self._lock:
+            self.database_obj.update_file(_merge)
+            if threading.current_thread() is self._owner_thread:
+                self._apply_to_object(key, preview_data)
+
+    def _apply_to_object(self, key, preview_data):
+        """Update the preview data of the database object.
+
+        Args:
+            key (str): The preview data key.
+            preview_data (dict): Data with the nice names as keys.
+        """
         if self.database_obj.object_type == ObjectType.WORK:
             # if this is a work object, we need to update the specific version dictionary.
             version = self.database_obj.get_version(self.context.version_number)
-            if "previews" in version.keys():
-                version["previews"].update(preview_data)
-            else:
-                version["previews"] = preview_data
-            self.database_obj.apply_settings(force=True)
+            getattr(version, key).update(preview_data)
         elif self.database_obj.object_type == ObjectType.PUBLISH_VERSION:
             # PublishVersion object has no version number, so we update the previews directly
             # Unlike the work objects version, this is a Tik Settings class.
-            self.database_obj.add_property("previews", preview_data)
-            self.database_obj.apply_settings(force=True)
+            data = dict(self.database_obj.get_property(key) or {}, **preview_data)
+            self.database_obj.add_property(key, data)
 
     def _verify_context(self):
         """Verify the preview context."""
@@ -266,46 +559,80 @@ class Preview:
         ])
         return "_".join(nice_name), "_".join(full_name_tags)
 
-    def _check_ffmpeg(self) -> str or bool:
+    @staticmethod
+    def _check_ffmpeg() -> str or bool:
         """Check if the FFMPEG is installed or accessible."""
+        return ConversionQueue.get_ffmpeg()
+
+    @staticmethod
+    def _resolve_converted_path(preview_file_abs_path):
+        """Return the path of the mp4 file which the conversion will create.
+
+        Args:
+            preview_file_abs_path (str): Absolute path of the preview file.
+                Image sequences need to have the frame pattern (e.g. %04d).
+
+        Returns:
+            str: Absolute path of the converted file.
+        """
+        output_file = Path(preview_file_abs_path).with_suffix(".mp4")
+        if Path(preview_file_abs_path).suffix in COMPATIBLE_IMAGES:
+            # remove the digits section from the file name
+            # e.g. test_v001.%04d.jpg -> test_v001.mp4
+            return str(output_file).replace(output_file.suffixes[0], "")
+        return str(output_file)
+
+    @staticmethod
+    def _get_sequence_files(sequence_pattern_path):
+        """Return the frame files of the image sequence.
+
+        Args:
+            sequence_pattern_path (str): Path with the frame pattern e.g.
+                'test_v001.%04d.jpg'
+
+        Returns:
+            list: List of Path objects of the existing frames.
+        """
+        pattern_path = Path(sequence_pattern_path)
+        glob_pattern = re.sub(
+            r"%0?(\d*)d",
+            lambda match: "[0-9]" * int(match.group(1) or 1),
+            pattern_path.name,
+        )
+        if glob_pattern == pattern_path.name:
+            return []
+        return list(pattern_path.parent.glob(glob_pattern))
+
+    @staticmethod
+    def _run_ffmpeg(flag_list):
+        """Run the ffmpeg command and raise if it fails.
+
+        Args:
+            flag_list (list): The ffmpeg command as a list.
+        """
         if platform.system() == "Windows":
-            # get the ffmpeg.exe from the parallel folder 'external'
-            parent_folder = Path(__file__).parent.parent
-            ffmpeg_folder = parent_folder / "external" / "ffmpeg"
-            ffmpeg = ffmpeg_folder / "ffmpeg.exe"
-            if not ffmpeg.exists():
-                return False
-            return str(ffmpeg)
+            subprocess.check_call(flag_list, shell=False)
         else:
-            try:
-                _verify = subprocess.call(
-                    ["ffmpeg", "-version"],
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.PIPE,
-                )
-                return "ffmpeg"
-            except OSError:
-                return False
+            subprocess.check_call(flag_list)
 
-    def _convert_preview(self, preview_file_abs_path, ffmpeg, overwrite=False):
+    def _convert_preview(self, preview_file_abs_path, ffmpeg, overwrite=False, fps=None):
         """Convert the preview file to a compatible format.
 
         Args:
             preview_file_abs_path (str): Absolute path of the preview file.
             ffmpeg (str): Path to the ffmpeg executable.
             overwrite (bool): If True, overwrite the existing file.
+            fps (float, optional): Frame rate of image sequences. If not
+                given, it is resolved from the dcc.
 
         Returns:
             str: Absolute path of the converted file.
         """
 
-        compatible_videos = [".avi", ".mov", ".mp4", ".flv", ".webm", ".mkv"]
-        compatible_images = [".tga", ".jpg", ".exr", ".png", ".pic"]
-
         # get the conversion lut
         preset_lut = {
             "videoCodec": "-c:v libx264 -profile:v baseline -level 3.0 -pix_fmt yuv420p",
-            "compression": "-crf 23",
+            "compression": f"-crf {self._settings.get('CrfValue', 23)}",
             "foolproof": "-vf scale=ceil(iw/2)*2:ceil(ih/2)*2",
             "speed": "-preset ultrafast",
             "resolution": "",
@@ -314,10 +641,9 @@ class Preview:
 
         # set output file
         _file_path = Path(preview_file_abs_path)
-        is_image_seq = _file_path.suffix in compatible_images
-        # change the extension to mp4
-        output_file = _file_path.with_suffix(".mp4")
-        output_file_str = str(output_file)
+        is_image_seq = _file_path.suffix in COMPATIBLE_IMAGES
+        output_file_str = self._resolve_converted_path(preview_file_abs_path)
+        output_file = Path(output_file_str)
 
         # deal with the existing output
         if output_file.exists():
@@ -330,11 +656,9 @@ class Preview:
             flag_start = [ffmpeg, "-i", str(_file_path)]
         else:
             # get the frame rate from dcc
-            fps = self.database_obj.dcc_handler.get_scene_fps()
+            fps = fps or self.database_obj.dcc_handler.get_scene_fps()
             # the incoming _file_path needs to have %04d in it in order to be recognized as a sequence
             flag_start = [ffmpeg, "-r", str(fps), "-start_number", str(self.context.frame_range[0]), "-i", str(_file_path)]
-            # remove the digits section from the file name e.g. test_v001.0001.jpg -> test_v001.jpg
-            output_file_str = str(output_file).replace(output_file.suffixes[0], "")
         full_flag_list = (
             flag_start
             + preset_lut["videoCodec"].split()
@@ -344,11 +668,23 @@ class Preview:
             + preset_lut["foolproof"].split()
             + [output_file_str]
         )
-        if platform.system() == "Windows":
-            subprocess.check_call(full_flag_list, shell=False)
-        else:
-            subprocess.check_call(full_flag_list)
-        if _file_path.suffix in compatible_videos:
+        self._run_ffmpeg(full_flag_list)
+        if _file_path.suffix in COMPATIBLE_VIDEOS:
             _file_path.unlink()
-        # TODO: Delete the file sequences too
+        elif is_image_seq:
+            for frame in self._get_sequence_files(_file_path):
+                frame.unlink()
         return output_file_str
+
+
+def get_smallest_preview(version, nice_name):
+    """Return the smallest usable asset of the preview.
+
+    Args:
+        version (WorkVersion or PublishVersion): The version object.
+        nice_name (str): The nice name of the preview.
+
+    Returns:
+        str: Relative path of the proxy if exists, otherwise the preview.
+    """
+    return version.preview_proxies.get(nice_name) or version.previews.get(nice_name)
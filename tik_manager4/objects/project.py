@@ -3,15 +3,45 @@
 Inherits from Subproject and adds project specific methods and properties.
 """
 
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 from tik_manager4.core.constants import ObjectType
+from tik_manager4.objects.publish import PublishVersion
 from tik_manager4.objects.publisher import Publisher, SnapshotPublisher
+from tik_manager4.core import content_store
 from tik_manager4.core import filelog
+from tik_manager4.core import io
+from tik_manager4.core import timing
 from tik_manager4.core.settings import Settings
 from tik_manager4.objects.subproject import Subproject
 from tik_manager4.objects.work import Work
 
+# seconds to wait for the queued catalog updates of this session
+CATALOG_FLUSH_TIMEOUT = 5
+
+
+def _run_job(job, background, name, *args, **kwargs):
+    """Run the job or start it in a background thread.
+
+    Args:
+        job (function): The job to run.
+        background (bool): Start the job in a background thread and return
+            its future instead of waiting for the results.
+        name (str): Name prefix of the background thread.
+        *args: Positional arguments of the job.
+        **kwargs: Keyword arguments of the job.
+
+    Returns:
+        object or Future: The result of the job or its future.
+    """
+    if not background:
+        return job(*args, **kwargs)
+    executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=name)
+    future = executor.submit(job, *args, **kwargs)
+    executor.shutdown(wait=False)
+    return future
+
 
 class Project(Subproject):
     """Project class to handle project specific data and methods."""
@@ -91,6 +121,8 @@ class Project(Subproject):
         self.set_sub_tree(self.structure.properties)
         self.guard.set_project_root(self.absolute_path)
         self.guard.set_database_root(self.database_path)
+        # keep an existing catalog up to date with the writes of this session
+        self.guard.get_catalog(create=False)
         # get project settings
         self.settings.settings_file = str(_database_path_obj / "project_settings.json")
         self.settings.set_fallback(self.guard.commons.project_settings.settings_file)
@@ -122,6 +154,245 @@ class Project(Subproject):
 
         self.guard.set_metadata_definitions(self.metadata_definitions)
 
+    def get_publish_timings_report(self, percentiles=timing.DEFAULT_PERCENTILES):
+        """Aggregate the recorded publish timings of the project.
+
+        Args:
+            percentiles (tuple): Percentiles to calculate.
+
+        Returns:
+            dict: Percentile reports per category and extractor.
+        """
+        return timing.build_report(self._database_path, percentiles=percentiles)
+
+    def collect_content_garbage(self):
+        """Remove the content store objects not referenced by the database.
+
+        Records in the purgatory are counted as references as well.
+
+        Returns:
+            tuple: (number of removed objects, freed bytes)
+        """
+        store = self.guard.get_content_store()
+        if not store:
+            self.log.warning("Content store is not enabled for the project.")
+            return 0, 0
+        references = content_store.collect_references(
+            self._database_path,
+            Path(self.absolute_path, ".purgatory", "tikDatabase"),
+        )
+        return store.collect_garbage(references)
+
+    def compact_scene_versions(self, background=False):
+        """Delta compress the older scene versions of all works.
+
+        The delta_compression project setting needs to be enabled. The works
+        are compressed one by one, since the diffs are bound to the
+        interpreter lock and do not run faster in parallel threads.
+
+        Args:
+            background (bool): Run the job in a background thread and return
+                a future instead of waiting for the results.
+
+        Returns:
+            dict or Future: Saved bytes per work file.
+        """
+        if not self.guard.project_settings.get("delta_compression", False):
+            self.log.warning("Delta compression is not enabled for the project.")
+            return {}
+
+        def _run():
+            saved = {}
+            for work_file in Path(self._database_path).rglob("*.twork"):
+                saved_bytes = Work(work_file).compact_versions()
+                if saved_bytes:
+                    saved[work_file.as_posix()] = saved_bytes
+            return saved
+
+        return _run_job(_run, background, "tik_compaction")
+
+    def archive_work_versions(self, background=False, max_workers=4,
+                              progress_callback=None):
+        """Move the old work versions of all works to the cold storage.
+
+        The archive policy is defined by the archive_root,
+        archive_keep_versions, archive_older_than_days and archive_omitted
+        project settings.
+
+        Args:
+            background (bool): Run the job in a background thread and return
+                a future instead of waiting for the results.
+            max_workers (int): Number of works archived in parallel.
+            progress_callback (function, optional): Called with the processed
+                and total bytes of each version.
+
+        Returns:
+            dict or Future: Archived version numbers per work file.
+        """
+        if not self.guard.project_settings.get("archive_root"):
+            self.log.warning("Archive root is not defined for the project.")
+            return {}
+
+        def _archive(work_file):
+            return Work(work_file).archive_versions(
+                progress_callback=progress_callback, max_workers=1
+            )
+
+        def _run():
+            work_files = list(Path(self._database_path).rglob("*.twork"))
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                archived = executor.map(_archive, work_files)
+                return {
+                    work_file.as_posix(): versions
+                    for work_file, versions in zip(work_files, archived)
+                    if versions
+                }
+
+        return _run_job(_run, background, "tik_archive")
+
+    @property
+    def purgatory(self):
+        """The purgatory of the project."""
+        return self.guard.get_purgatory()
+
+    def purge_purgatory(self, background=False):
+        """Permanently delete the purged entities out of the retention policy.
+
+        The policy is defined by the purgatory_retention_days and
+        purgatory_quota_gb project settings.
+
+        Args:
+            background (bool): Run the job in a background thread and return
+                a future instead of waiting for the results.
+
+        Returns:
+            tuple or Future: (number of deleted entities, freed bytes)
+        """
+        if self.check_permissions(level=3) == -1:
+            return 0, 0
+        retention_days = self.guard.project_settings.get("purgatory_retention_days", 30)
+        quota_gb = self.guard.project_settings.get("purgatory_quota_gb", 0)
+        return _run_job(
+            self.purgatory.purge, background, "tik_purge",
+            retention_days=retention_days, quota_gb=quota_gb
+        )
+
+    @property
+    def catalog(self):
+        """The catalog of the project database. Created on first use."""
+        return self.guard.get_catalog()
+
+    def reconcile_catalog(self, background=False):
+        """Update the catalog with the database changes of the other sessions.
+
+        The reconciliation which is already running is shared.
+
+        Args:
+            background (bool): Return the future of the background job
+                instead of waiting for the results.
+
+        Returns:
+            tuple or Future: (number of updated files, number of removed files)
+        """
+        future = self.catalog.start_reconcile()
+        if background:
+            return future
+        return future.result()
+
+    def query_catalog(self, table, since=None, metadata=None, limit=None, **filters):
+        """Query the catalog of the project database.
+
+        The catalog is reconciled with the database files on the first query
+        of the session.
+
+        Examples:
+            project.query_catalog("works", creator="Admin")
+            project.query_catalog("publishes", category="Rig", since=timestamp)
+            project.query_catalog("tasks", metadata={"fps": 24})
+
+        Args:
+            table (str): One of subprojects, tasks, works, versions or
+                publishes.
+            since (float, optional): Only the records of the files modified
+                after this timestamp.
+            metadata (dict, optional): Metadata values to match.
+            limit (int, optional): Maximum number of records.
+            **filters: Column values to match.
+
+        Returns:
+            list: Records as dictionaries.
+        """
+        catalog = self.catalog
+        if not catalog.reconciled:
+            catalog.start_reconcile().result()
+        # include the writes of this session which are still queued
+        catalog.flush(timeout=CATALOG_FLUSH_TIMEOUT)
+        return catalog.query(table, since=since, metadata=metadata, limit=limit, **filters)
+
+    def search(self, query, limit=50):
+        """Search the whole project by names, notes, creators and metadata.
+
+        The search index is part of the catalog. The records which are
+        already indexed are searched without waiting for the reconciliation,
+        which is started in the background if the catalog is not reconciled
+        in this session yet.
+
+        Args:
+            query (str): The search words.
+            limit (int): Maximum number of results.
+
+        Returns:
+            list: Ranked results as dictionaries. See Catalog.search.
+        """
+        catalog = self.catalog
+        if not catalog.reconciled:
+            catalog.start_reconcile()
+        catalog.flush(timeout=CATALOG_FLUSH_TIMEOUT)
+        return catalog.search(query, limit=limit)
+
+    def sync_localized_versions(self, user=None, progress_callback=None):
+        """Sync all the localized work and publish versions of the user.
+
+        Args:
+            user (str, optional): The user name. Defaults to the active user.
+            progress_callback (function, optional): Called with the
+                transferred and total bytes of each sync.
+
+        Returns:
+            tuple: (bool, {version name: message})
+        """
+        user = user or self.guard.user
+        state = True
+        results = {}
+        for work_file in Path(self._database_path).rglob("*.twork"):
+            work = Work(work_file)
+            synced = False
+            for version in work.versions:
+                if not version.localized or version.user != user:
+                    continue
+                ret, msg = version.sync(progress_callback=progress_callback)
+                results[f"{work.name}_v{version.version:03d}"] = msg
+                state = state and ret
+                synced = synced or ret
+            if synced:
+                work.apply_settings(force=True)
+
+        reader = io.IO()
+        for publish_file in Path(self._database_path).rglob("*.tpub"):
+            try:
+                data = reader.read(str(publish_file))
+            except Exception as exc:  # pylint: disable=broad-except
+                results[publish_file.stem] = f"Cannot read {publish_file.as_posix()}: {exc}"
+                state = False
+                continue
+            if not data.get("localized") or data.get("creator") != user:
+                continue
+            publish_version = PublishVersion(str(publish_file))
+            ret, msg = publish_version.sync(progress_callback=progress_callback)
+            results[publish_file.stem] = msg
+            state = state and ret
+        return state, results
+
     def delete_sub_project(self, uid=None, path=None):
         """Delete a subproject and all its children.
 
@@ -5,9 +5,12 @@
 This module is responsible for handling the publish process.
 """
 import logging
+import time
 from pathlib import Path
 
 from tik_manager4.core import filelog
+from tik_manager4.core import utils
+from tik_manager4.core.timing import Timings, timed, EXTRACT_PREFIX
 
 from tik_manager4.objects.preview import Preview
 from tik_manager4.dcc.standalone import main as standalone
@@ -41,6 +44,9 @@ class Publisher:
         # class variables
         self._published_object = None
         self.warnings = []
+        self._timings = Timings()
+        self._preview_handler = None
+        self._content_hashes = {}
 
     @property
     def validators(self):
@@ -57,6 +63,11 @@ class Publisher:
         """The Work object that will be published."""
         return self._work_object
 
+    @property
+    def timings(self):
+        """Timing and byte records of the current publish."""
+        return self._timings
+
     @property
     def task_object(self):
         """The Task object that will be published."""
@@ -65,12 +76,16 @@ class Publisher:
         return self._work_object.parent_task or \
         self._project_object.find_task_by_id(self._work_object.task_id)
 
+    @timed("resolve")
     def resolve(self):
         """Resolve the publish data file name.
 
         Returns:
             str: The resolved publish data file name.
         """
+        self._timings.reset()
+        self._content_hashes = {}
+        self._preview_handler = None
         self._work_object, self._work_version = self._project_object.get_current_work()
 
         if not self._work_object:
@@ -132,6 +147,7 @@ class Publisher:
         )
         return self._publish_file_name
 
+    @timed("reserve")
     def reserve(self):
         """Reserve the slot for publish.
 
@@ -154,6 +170,7 @@ class Publisher:
             "publish_id", self._published_object.generate_id()
         )
         self._published_object.add_property("version_number", self._publish_version)
+        self._published_object.add_property("previews", {})
         self._published_object.add_property("work_version", self._work_version)
         self._published_object.add_property("task_name", self._work_object.task_name)
         self._published_object.add_property("task_id", self._work_object.task_id)
@@ -174,10 +191,20 @@ class Publisher:
         self._published_object.init_properties()  # make sure the properties are initialized
         self._published_object._dcc_handler.pre_publish()
 
+    @timed("validate")
     def validate(self):
         """Validate the scene using the resolved validators."""
-        for _val_name, val_object in self._resolved_validators.items():
-            val_object.validate()
+        for val_name, val_object in self._resolved_validators.items():
+            with self._timings.measure(f"validate:{val_name}"):
+                val_object.validate()
+
+    def save_scene(self):
+        """Save the scene before the extractions."""
+        with self._timings.measure("save"):
+            self._dcc_handler.save_scene()
+        scene_file = self._dcc_handler.get_scene_file()
+        if scene_file:
+            self._timings.add_bytes("save", utils.get_size(scene_file))
 
     def write_protect(self, file_or_folder_path):
         """Protect the given file or folder making it read-only.
@@ -185,18 +212,9 @@ class Publisher:
         Args:
             file_or_folder_path (str): The path to the file or folder.
         """
-        path = Path(file_or_folder_path)
-        file_list = []
-        if path.is_file():
-            file_list.append(path)
-        elif path.is_dir():
-            for _file in path.rglob("*"):
-                file_list.append(_file)
-        for _file in file_list:
-            try:
-                _file.chmod(0o444)
-            except Exception as e:  # pylint: disable=broad-except
-                LOG.warning(f"File protection failed: {_file}")
+        state, msg = utils.write_protect(file_or_folder_path)
+        if not state:
+            LOG.warning(f"File protection failed: {msg}")
 
     def extract_single(self, extract_object):
         """Extract only from the given extract object.
@@ -208,8 +226,18 @@ class Publisher:
         extract_object.category = self._work_object.category  # define the category
         extract_object.extract_folder = publish_path.as_posix()  # define the extract folder
         extract_object.extract_name = f"{self._work_object.name}_v{self._publish_version:03d}"  # define the extract name
-        extract_object.extract()
-        self.write_protect(extract_object.resolve_output())
+        step = f"{EXTRACT_PREFIX}{extract_object.name}"
+        with self._timings.measure(step):
+            extract_object.extract()
+        output = extract_object.resolve_output()
+        self._timings.add_bytes(step, utils.get_size(output))
+        content_store = self._published_object.guard.get_content_store()
+        if content_store and not self._published_object.can_localize():
+            with self._timings.measure("content_store"):
+                self._content_hashes[extract_object.name] = content_store.ingest(
+                    output, read_only=True
+                )
+        self.write_protect(output)
 
     def extract(self):
         """Extract the elements.
@@ -217,7 +245,7 @@ class Publisher:
         Uses all resolved extractors to extract the elements.
         """
         # first save the scene
-        self._dcc_handler.save_scene()
+        self.save_scene()
         for _extract_type_name, extract_object in self._resolved_extractors.items():
             self.extract_single(extract_object)
 
@@ -241,6 +269,7 @@ class Publisher:
         Returns:
             PublishVersion: The published object.
         """
+        start = time.monotonic()
         self.warnings = []
         # use either given message callback function or a generic logging function
         message_callback = message_callback or logging.getLogger(__name__).info
@@ -269,6 +298,8 @@ class Publisher:
                 "bundle_info": extract_object.bundle_info,
                 "bundle_match_id": extract_object.bundle_match_id,
             }
+            if extract_object.name in self._content_hashes:
+                element["content_hashes"] = self._content_hashes[extract_object.name]
             self._published_object._elements.append(element)
 
         self._published_object.edit_property(
@@ -290,6 +321,11 @@ class Publisher:
                 self.warnings.append("Preview generation failed. See the log for details.")
                 LOG.error(f"Preview generation failed: {e}")
 
+        if management_task_id and preview_abs_path:
+            # the upload needs the converted preview.
+            with self._timings.measure("preview_conversion"):
+                self._preview_handler.wait()
+
         if management_task_id:
             management_platform = self._project_object.settings.get(
                 "management_platform", "Management Platform")
@@ -308,7 +344,9 @@ class Publisher:
                 self.warnings.append(msg)
                 LOG.error(f"Publish to {management_platform} failed: {e}")
 
-
+        self._timings.add("publish", time.monotonic() - start)
+        self._published_object.add_property("timings", self._timings.to_dict())
+        # the previews registered by the background conversion are merged
         self._published_object.apply_settings(force=True)
 
         # hook for post publish can be defined in per dcc handler.
@@ -316,6 +354,7 @@ class Publisher:
         self._published_object._dcc_handler.post_publish()
         return self._published_object
 
+    @timed("preview")
     def _generate_preview(self, preview_context, message_callback=None):
         """Generate the preview."""
         if not preview_context.enabled:
@@ -323,8 +362,14 @@ class Publisher:
         preview_handler = Preview(preview_context, self._published_object)
         preview_handler.settings = self._published_object.guard.preview_settings.properties
         preview_handler.set_message_callback(message_callback)
-        return preview_handler.generate(show_after=False)
-
+        self._preview_handler = preview_handler
+        # returns immediately if the preview is queued for conversion.
+        abs_path = preview_handler.generate(show_after=False)
+        if abs_path and not preview_handler.conversion_job:
+            self._timings.add_bytes("preview", utils.get_size(abs_path))
+        return abs_path
+
+    @timed("thumbnail")
     def _generate_thumbnail(self):
         """Generate the thumbnail."""
         thumbnail_name = f"{self._work_object.name}_v{self._publish_version:03d}.jpg"
@@ -337,6 +382,7 @@ class Publisher:
         self._published_object.add_property(
             "thumbnail", Path("thumbnails", thumbnail_name).as_posix()
         )
+        self._timings.add_bytes("thumbnail", utils.get_size(thumbnail_path))
         return thumbnail_path # abs path
 
     def discard(self):
@@ -347,9 +393,8 @@ class Publisher:
                 continue
             _extracted_file_path = Path(extract_object.resolve_output())
             if _extracted_file_path.exists():
-                # remove the write protection
-                _extracted_file_path.chmod(0o777)
-                _extracted_file_path.unlink()
+                # delete removes the write protection if necessary
+                utils.delete(_extracted_file_path)
 
         # delete the publish file
         _publish_file_path = (
@@ -407,6 +452,7 @@ class Publisher:
             )
         return None
 
+    @timed("management")
     def publish_to_management(self, management_task_id, status, description="", thumbnail=None, preview=None):
         """Publish the data to the management system."""
         entity_type = self.task_object.type
@@ -424,6 +470,10 @@ class Publisher:
             LOG.warning(f"Preview path does not exist: {preview}")
             preview = None
 
+        self._timings.add_bytes(
+            "management",
+            sum(utils.get_size(path) for path in (thumbnail, preview) if path)
+        )
         user_email = self.guard.email
         management_version = self.guard.management_handler.publish_version(
             entity_type=entity_type,
@@ -505,15 +555,19 @@ class SnapshotPublisher(Publisher):
         """
         self._work_version = value
 
+    @timed("resolve")
     def resolve(self):
         """Resolve the file name for the snapshot.
 
         Returns:
             str: The resolved publish file name.
         """
-
+        self._timings.reset()
+        self._content_hashes = {}
         version_object = self._work_object.get_version(self._work_version)
         relative_path = version_object.scene_path
+        if version_object.delta_compressed:
+            version_object.expand()
         abs_path = self._work_object.get_abs_project_path(relative_path)
 
         # get either the snapshot or snapshot_bundle depending if its a folder or file
@@ -543,6 +597,7 @@ class SnapshotPublisher(Publisher):
         )
         return self._publish_file_name
 
+    @timed("thumbnail")
     def _generate_thumbnail(self):
         """Generate the thumbnail."""
         thumbnail_name = f"{self._work_object.name}_v{self._publish_version:03d}.png"
@@ -558,3 +613,4 @@ class SnapshotPublisher(Publisher):
         self._published_object.add_property(
             "thumbnail", Path("thumbnails", thumbnail_name).as_posix()
         )
+        self._timings.add_bytes("thumbnail", utils.get_size(thumbnail_path))
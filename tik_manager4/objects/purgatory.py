@@ -1,17 +1,406 @@
 """Gate keeper of heavens and earth."""
 
+import os
+import socket
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from tik_manager4.core import filelog
+from tik_manager4.core import io
+from tik_manager4.core import transfer
+from tik_manager4.core import utils
+
+LOG = filelog.Filelog(logname=__name__, filename="tik_manager4")
+
+PURGATORY_FOLDER_NAME = ".purgatory"
+INDEX_FILE_NAME = "purgatory_index.json"
+STAGING_SUFFIX = ".tikpurge"
+GIGABYTE = 1024 ** 3
+
 
 class Purgatory(object):
-    """Purgatory is the place where all entities go to be deleted."""
+    """Purgatory is the place where all entities go to be deleted.
 
-    def __init__(self):
+    Entities are renamed into the purgatory folder when it is on the same
+    volume. Otherwise they are renamed to a hidden staging name next to the
+    source and copied to the purgatory in the background. Every sent entity
+    is recorded in an index, so it can be resurrected to its original paths
+    or terminated permanently.
+    """
+
+    def __init__(self, project_root, max_workers=2):
+        """Initialize the Purgatory object.
+
+        Args:
+            project_root (str): The project root folder.
+            max_workers (int): Number of parallel background copies.
+        """
         super().__init__()
-        pass
+        self._root = Path(project_root, PURGATORY_FOLDER_NAME)
+        self._io = io.IO(file_path=str(self._root / INDEX_FILE_NAME))
+        self._lock = threading.RLock()
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="tik_purgatory"
+        )
+        self._futures = {}
+        self.resume_pending()
+
+    @property
+    def root(self):
+        """The purgatory folder of the project."""
+        return self._root
+
+    def entries(self):
+        """Return the index of the purged entities.
+
+        Returns:
+            dict: Entries by their ids.
+        """
+        with self._lock:
+            return self._read_index()
+
+    def get_entry(self, entry_id):
+        """Return the index entry of the purged entity.
+
+        Args:
+            entry_id (str): The entry id.
+
+        Returns:
+            dict: The entry or None.
+        """
+        return self.entries().get(entry_id)
+
+    def total_size(self):
+        """Total size of the purged entities in bytes."""
+        return sum(entry["size"] for entry in self.entries().values())
+
+    def send(self, name, items, object_type="", user=None):
+        """Send the files and folders of an entity to the purgatory.
+
+        Args:
+            name (str): Name of the entity.
+            items (list): List of (source, target) paths. Missing sources
+                are skipped. Existing targets are replaced.
+            object_type (str, optional): Type of the entity.
+            user (str, optional): The user sending the entity.
+
+        Returns:
+            tuple: (entry id or None, message)
+        """
+        entry_id = uuid.uuid4().hex
+        records = []
+        pending = False
+        for source, target in items:
+            source = Path(source)
+            target = Path(target)
+            if not source.exists():
+                continue
+            if target.exists():
+                ret, msg = utils.delete(str(target), defer=True)
+                if not ret:
+                    self._add_entry(entry_id, name, object_type, user, records, pending)
+                    return None, msg
+            target.parent.mkdir(parents=True, exist_ok=True)
+            record = {
+                "source": source.as_posix(),
+                "target": target.as_posix(),
+                "size": utils.get_size(str(source)),
+                "staging": "",
+            }
+            try:
+                if utils.is_same_volume(source.parent, target.parent):
+                    os.replace(source, target)
+                else:
+                    staging = source.with_name(f".{source.name}.{entry_id}{STAGING_SUFFIX}")
+                    os.replace(source, staging)
+                    record["staging"] = staging.as_posix()
+                    pending = True
+            except OSError:
+                # e.g. files are in use on windows, let the regular move handle it
+                ret, msg = utils.move(str(source), str(target))
+                if not ret:
+                    self._add_entry(entry_id, name, object_type, user, records, pending)
+                    return None, msg
+            records.append(record)
+
+        if not records:
+            return None, "Nothing to send to purgatory."
+        self._add_entry(entry_id, name, object_type, user, records, pending)
+        return entry_id, f"{name} sent to purgatory."
+
+    def wait(self, timeout=None):
+        """Wait for the background copies.
+
+        Args:
+            timeout (float, optional): Maximum seconds to wait for each copy.
+        """
+        for future in list(self._futures.values()):
+            future.result(timeout=timeout)
+
+    def resume_pending(self):
+        """Restart the background copies interrupted in a previous session.
+
+        Only the entries sent from this workstation are resumed.
+
+        Returns:
+            int: Number of resumed entries.
+        """
+        resumed = 0
+        hostname = socket.gethostname()
+        for entry_id, entry in self.entries().items():
+            if entry.get("workstation") != hostname:
+                continue
+            if entry.get("state") == "pending" and entry_id not in self._futures:
+                self._submit(entry_id)
+                resumed += 1
+        return resumed
+
+    def resurrect(self, entry_id):
+        """Brings the entity back to life.
+
+        Files and folders are moved back to their original paths. Parent
+        database records (e.g. category lists of tasks) are not modified.
+
+        Args:
+            entry_id (str): The entry id.
+
+        Returns:
+            tuple: (bool, message)
+        """
+        self._wait_entry(entry_id)
+        entry = self.get_entry(entry_id)
+        if not entry:
+            return False, f"There is no purgatory entry with the id {entry_id}"
+        for record in entry["items"]:
+            if Path(record["source"]).exists():
+                msg = f"{record['source']} already exists. Cannot resurrect {entry['name']}."
+                LOG.warning(msg)
+                return False, msg
+        for record in entry["items"]:
+            current = record["staging"] or record["target"]
+            ret, msg = utils.move(current, record["source"])
+            if not ret:
+                LOG.error(msg)
+                return False, msg
+        self._remove_entry(entry_id)
+        return True, f"{entry['name']} resurrected."
+
+    def terminate(self, entry_id):
+        """Sends the entity to the heaven. There is no turning back.
+
+        Args:
+            entry_id (str): The entry id.
+
+        Returns:
+            tuple: (bool, message)
+        """
+        removed, _freed = self.purge(entry_ids=[entry_id])
+        if not removed:
+            return False, f"Cannot terminate the purgatory entry {entry_id}"
+        return True, "Entity terminated."
+
+    def purge(self, retention_days=None, quota_gb=None, entry_ids=None,
+              max_workers=4):
+        """Permanently delete the entities selected by the retention policy.
+
+        Entities older than the retention days are deleted. If the total
+        size still exceeds the quota, the oldest entities are deleted until
+        it fits.
+
+        Args:
+            retention_days (float, optional): Keep the entities for this many
+                days. None or 0 keeps them regardless of the age.
+            quota_gb (float, optional): Maximum total size of the purgatory.
+                None or 0 means unlimited.
+            entry_ids (list, optional): Delete these entries instead of
+                applying the retention policy.
+            max_workers (int): Number of parallel deletions.
+
+        Returns:
+            tuple: (number of deleted entities, freed bytes)
+        """
+        entries = self.entries()
+        if entry_ids is not None:
+            selected = [entry_id for entry_id in entry_ids if entry_id in entries]
+        else:
+            selected = self._select_by_policy(entries, retention_days, quota_gb)
+        for entry_id in selected:
+            self._wait_entry(entry_id)
+
+        paths = []
+        for entry_id in selected:
+            for record in entries[entry_id]["items"]:
+                paths.extend(path for path in (record["target"], record["staging"]) if path)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            results = dict(zip(paths, executor.map(utils.delete, paths)))
+
+        removed = 0
+        freed = 0
+        for entry_id in selected:
+            entry = entries[entry_id]
+            records = entry["items"]
+            if all(results[record["target"]][0] for record in records):
+                self._remove_entry(entry_id)
+                removed += 1
+                freed += entry["size"]
+            else:
+                LOG.warning(f"Some files of {entry['name']} cannot be deleted.")
+        return removed, freed
+
+    @staticmethod
+    def _select_by_policy(entries, retention_days, quota_gb):
+        """Return the ids of the entries which are out of the retention policy."""
+        ordered = sorted(entries, key=lambda entry_id: entries[entry_id]["time"])
+        selected = []
+        if retention_days:
+            cutoff = time.time() - retention_days * 86400
+            selected = [
+                entry_id for entry_id in ordered if entries[entry_id]["time"] < cutoff
+            ]
+        if quota_gb:
+            remaining = [entry_id for entry_id in ordered if entry_id not in selected]
+            total = sum(entries[entry_id]["size"] for entry_id in remaining)
+            for entry_id in remaining:
+                if total <= quota_gb * GIGABYTE:
+                    break
+                selected.append(entry_id)
+                total -= entries[entry_id]["size"]
+        return selected
+
+    def _submit(self, entry_id):
+        """Start the background copy of the staged items."""
+        self._futures[entry_id] = self._executor.submit(self._copy_staged, entry_id)
+
+    def _wait_entry(self, entry_id):
+        """Wait for the background copy of the entry if there is any."""
+        future = self._futures.get(entry_id)
+        if future:
+            future.result()
+
+    def _copy_staged(self, entry_id):
+        """Copy the staged items to the purgatory and remove the staging."""
+        entry = self.get_entry(entry_id)
+        if not entry:
+            return
+        for record in entry["items"]:
+            staging = record["staging"]
+            if not staging:
+                continue
+            if Path(staging).exists():
+                try:
+                    utils.delete(record["target"])
+                    transfer.copy(staging, record["target"])
+                except OSError as exc:
+                    LOG.error(f"Cannot copy {record['source']} to purgatory: {exc}")
+                    return
+                utils.write_unprotect(staging)
+                utils.delete(staging)
+            record["staging"] = ""
+            self._update_entry(entry_id, entry)
+        entry["state"] = "stored"
+        self._update_entry(entry_id, entry)
+
+    def _add_entry(self, entry_id, name, object_type, user, records, pending):
+        """Record the sent items in the index."""
+        if not records:
+            return
+        entry = {
+            "name": name,
+            "type": str(getattr(object_type, "value", object_type)),
+            "user": user or "",
+            "time": time.time(),
+            "size": sum(record["size"] for record in records),
+            "items": records,
+            "state": "pending" if pending else "stored",
+            "workstation": socket.gethostname(),
+        }
+
+        def _add(index):
+            index[entry_id] = entry
+
+        self._update_index(_add)
+        # items staged on another volume are copied in the background
+        if pending:
+            self._submit(entry_id)
+
+    def _update_entry(self, entry_id, entry):
+        """Write the modified entry to the index."""
+
+        def _replace(index):
+            if entry_id in index:
+                index[entry_id] = entry
+
+        self._update_index(_replace)
+
+    def _remove_entry(self, entry_id):
+        """Remove the entry from the index."""
+
+        def _remove(index):
+            index.pop(entry_id, None)
+
+        self._update_index(_remove)
+        with self._lock:
+            self._futures.pop(entry_id, None)
+
+    def _update_index(self, updater):
+        """Apply the updater to the latest index under its file lock.
+
+        The entries written by the other sessions in the meantime are kept.
+
+        Args:
+            updater (function): Called with the entries dictionary to edit
+                it in place.
+        """
+
+        def _update(data):
+            updater(data.setdefault("entries", {}))
+
+        with self._lock:
+            try:
+                self._io.update(_update)
+            except Exception:  # pylint: disable=broad-except
+                if not self._backup_corrupted_index():
+                    raise
+                self._io.update(_update)
+
+    def _read_index(self):
+        """Read the index from the disk. Other sessions may have modified it."""
+        if not self._io.file_exists(self._io.file_path):
+            return {}
+        try:
+            return self._io.read().get("entries", {})
+        except Exception:  # pylint: disable=broad-except
+            if not self._backup_corrupted_index():
+                raise
+            return {}
 
-    def terminate(self, entity):
-        """Sends the entity to the heaven. There is no turning back"""
-        pass
+    def _backup_corrupted_index(self):
+        """Move the corrupted index aside, so it can be recovered by hand.
 
-    def resurrect(self, entity):
-        """Brings the entity back to life"""
-        pass
+        Returns:
+            bool: True if the index is corrupted and moved.
+        """
+        index_path = Path(self._io.file_path)
+        try:
+            self._io.read()
+            return False
+        except FileNotFoundError:
+            return False
+        except Exception:  # pylint: disable=broad-except
+            pass
+        backup_path = index_path.with_name(
+            f"{index_path.name}.{int(time.time() * 1000)}.corrupted"
+        )
+        try:
+            os.replace(index_path, backup_path)
+        except FileNotFoundError:
+            # moved by another session
+            return True
+        LOG.error(
+            f"Purgatory index is corrupted. It is moved to {backup_path} "
+            f"and a new one is started. The entries in it are not listed."
+        )
+        return True
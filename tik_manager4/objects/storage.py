@@ -0,0 +1,194 @@
+"""Storage reports attributing the disk usage to the database entities."""
+
+from pathlib import Path
+
+from tik_manager4.core import delta
+from tik_manager4.core import disk_usage
+from tik_manager4.core import filelog
+
+LOG = filelog.Filelog(logname=__name__, filename="tik_manager4")
+
+SIZE_KEYS = ("versions", "publishes", "previews", "thumbnails")
+
+
+def get_localized_root(guard, *args):
+    """Return the localized folder of the relative path or None.
+
+    Args:
+        guard (Guard): The guard object.
+        *args (str): Relative path arguments.
+    """
+    if not guard.localize_settings:
+        return None
+    local_folder = guard.localize_settings.get("local_cache_folder")
+    if not local_folder:
+        return None
+    return Path(local_folder, Path(guard.project_root).name, *args).as_posix()
+
+
+def get_roots(entity, *args):
+    """Return the project, database and localized folders of the entity.
+
+    Args:
+        entity (Entity): The entity.
+        *args (str): Relative path arguments under the entity.
+    """
+    roots = [entity.get_abs_project_path(*args), entity.get_abs_database_path(*args)]
+    localized_root = get_localized_root(entity.guard, entity.path, *args)
+    if localized_root:
+        roots.append(localized_root)
+    return roots
+
+
+def collect_work_files(database_folder):
+    """Return the work database files under the folder.
+
+    Hidden folders like the purgatory and the trash are skipped.
+
+    Args:
+        database_folder (str): The database folder.
+    """
+    folder = Path(database_folder)
+    return [
+        work_file for work_file in folder.rglob("*.twork")
+        if not any(part.startswith(".") for part in work_file.relative_to(folder).parts)
+    ]
+
+
+def get_entity_report(entity, roots, works, cache_file=None,
+                      max_workers=disk_usage.MAX_WORKERS):
+    """Build the storage report of the entity.
+
+    Args:
+        entity (Entity): The entity.
+        roots (list): Folders to scan.
+        works (list): Work objects to attribute.
+        cache_file (str, optional): Cache file of the folder listings.
+            Defaults to the cache file in the project database.
+        max_workers (int): Number of folders listed in parallel.
+
+    Returns:
+        dict: The storage report.
+    """
+    cache_file = cache_file or Path(
+        entity.guard.database_root, disk_usage.CACHE_FILE_NAME
+    ).as_posix()
+    report = build_report(works, roots, cache_file=cache_file, max_workers=max_workers)
+    report["entity"] = entity.path
+    return report
+
+
+def _get_work_paths(work):
+    """Return the (key, path) pairs of all the files of the work.
+
+    Archived versions are returned with the 'archived' key.
+    """
+    paths = []
+    for version in work.versions:
+        if version.archived:
+            paths.append(("archived", version.archive_path))
+        else:
+            scene_path = version.get_resolved_path(origin=True)
+            if version.delta_compressed:
+                scene_path = delta.get_delta_path(scene_path).as_posix()
+            paths.append(("versions", scene_path))
+        if version.thumbnail:
+            paths.append(("thumbnails", work.get_abs_database_path(version.thumbnail)))
+        for previews in (version.previews, version.preview_proxies):
+            paths.extend(
+                ("previews", work.get_abs_project_path(preview))
+                for preview in previews.values()
+            )
+        for sprite in version.preview_sprites.values():
+            paths.append(("previews", work.get_abs_project_path(sprite["path"])))
+
+    for publish_version in work.publish.versions:
+        paths.append(("publishes", publish_version.settings_file))
+        for element in publish_version.elements:
+            paths.append((
+                "publishes",
+                publish_version.get_resolved_path(element["path"], origin=True),
+            ))
+        thumbnail = publish_version.thumbnail
+        if thumbnail:
+            paths.append(("thumbnails", publish_version.get_abs_database_path(thumbnail)))
+        for previews in (publish_version.previews, publish_version.preview_proxies):
+            paths.extend(
+                ("previews", publish_version.get_abs_project_path(preview))
+                for preview in previews.values()
+            )
+        for sprite in publish_version.preview_sprites.values():
+            paths.append(
+                ("previews", publish_version.get_abs_project_path(sprite["path"]))
+            )
+    return paths
+
+
+def build_report(works, roots, cache_file=None, max_workers=disk_usage.MAX_WORKERS):
+    """Scan the roots and attribute the disk usage to the works.
+
+    Args:
+        works (list): Work objects to attribute.
+        roots (list): The project, database and localized folders to scan.
+        cache_file (str, optional): Cache file of the folder listings.
+        max_workers (int): Number of folders listed in parallel.
+
+    Returns:
+        dict: The storage report. 'works' holds a row for each work,
+            'tasks' and 'categories' the totals of their works. Bytes under
+            the roots which do not belong to any work are 'unattributed'.
+    """
+    cache = disk_usage.ScanCache(cache_file)
+    usage = disk_usage.DiskUsage(
+        disk_usage.scan(roots, cache=cache, max_workers=max_workers)
+    )
+
+    rows = []
+    tasks = {}
+    categories = {}
+    sizes = dict.fromkeys(SIZE_KEYS + ("archived",), 0)
+    attributed_in_roots = 0
+    for work in works:
+        try:
+            work_paths = _get_work_paths(work)
+        except Exception as exc:  # pylint: disable=broad-except
+            LOG.warning(f"Cannot read the files of {work.name}: {exc}")
+            continue
+        row = dict.fromkeys(SIZE_KEYS + ("archived",), 0)
+        for key, path in set(work_paths):
+            size, in_roots = usage.get_size(path)
+            row[key] += size
+            if in_roots:
+                attributed_in_roots += size
+        total = sum(row[key] for key in SIZE_KEYS)
+        for key, value in row.items():
+            sizes[key] += value
+
+        category_path = Path(work.path).as_posix()
+        task_path = Path(work.path).parent.as_posix()
+        tasks[task_path] = tasks.get(task_path, 0) + total
+        categories[category_path] = categories.get(category_path, 0) + total
+        rows.append(dict(
+            {
+                "path": Path(work.path, work.name).as_posix(),
+                "name": work.name,
+                "task": work.task_name,
+                "category": work.category,
+                "creator": work.creator,
+                "version_count": work.version_count,
+            },
+            total=total,
+            **row,
+        ))
+
+    rows.sort(key=lambda row: row["total"], reverse=True)
+    return {
+        "roots": [Path(root).as_posix() for root in roots],
+        "scanned": usage.total,
+        "attributed": sizes,
+        "unattributed": max(usage.total - attributed_in_roots, 0),
+        "tasks": tasks,
+        "categories": categories,
+        "works": rows,
+        "cache": {"hits": cache.hits, "misses": cache.misses},
+    }
@@ -2,16 +2,19 @@
 """Module for Subproject object."""
 
 from pathlib import Path
-import shutil
 
 from fnmatch import fnmatch
 
 from tik_manager4.core.constants import ObjectType
 import tik_manager4.objects.task
 from tik_manager4.core import filelog
+from tik_manager4.core import disk_usage
+from tik_manager4.core import utils
+from tik_manager4.objects import storage
 from tik_manager4.objects.metadata import Metadata
 from tik_manager4.objects.entity import Entity
 from tik_manager4.objects.task import Task
+from tik_manager4.objects.work import Work
 
 LOG = filelog.Filelog(logname=__name__, filename="tik_manager4")
 
@@ -237,36 +240,53 @@ class Subproject(Entity):
         Returns:
             dict: The tasks under the subproject.
         """
+        return self.commit_tasks(self.read_tasks())
 
-        _tasks_search_dir = Path(self.get_abs_database_path())
-        _task_paths = list(_tasks_search_dir.glob("*.ttask"))
+    def read_tasks(self):
+        """Read the task files without changing the subproject.
+
+        This can run in a worker thread. The unchanged tasks are returned
+        as they are, the new and modified ones as new task objects. The
+        result is applied with commit_tasks().
 
-        # add the file if it is new. if it is not new,
-        # check the modified time and update if necessary
-        for _task_path in _task_paths:
+        Returns:
+            dict: The current tasks by their names.
+        """
+        _tasks_search_dir = Path(self.get_abs_database_path())
+        tasks = {}
+        for _task_path in _tasks_search_dir.glob("*.ttask"):
             _task_name = _task_path.stem
+            existing_task = self._tasks.get(_task_name, None)
+            try:
+                if existing_task and not existing_task.is_modified():
+                    tasks[_task_name] = existing_task
+                else:
+                    tasks[_task_name] = Task(absolute_path=_task_path, parent_sub=self)
+            except OSError:
+                # deleted while scanning
+                continue
+        return tasks
+
+    def commit_tasks(self, tasks):
+        """Apply the tasks read with read_tasks().
+
+        The deleted tasks are removed and the existing task objects take
+        the data of the modified ones, so the references to them stay valid.
+
+        Args:
+            tasks (dict): The current tasks by their names.
+
+        Returns:
+            dict: The tasks under the subproject.
+        """
+        for _deleted_task_name in [name for name in self._tasks if name not in tasks]:
+            del self._tasks[_deleted_task_name]
+        for _task_name, _task in tasks.items():
             existing_task = self._tasks.get(_task_name, None)
             if not existing_task:
-                _task = Task(absolute_path=_task_path, parent_sub=self)
                 self._tasks[_task_name] = _task
-            else:
-                if existing_task.is_modified():
-                    existing_task.refresh()
-
-        # if the lengths are not matching that means some tasks are deleted
-        if len(_task_paths) != len(self._tasks):
-            # get the task names
-            _task_names = [_task_path.stem for _task_path in _task_paths]
-            # get the task names that are not in the _task_names
-            _deleted_task_names = [
-                task_name
-                for task_name in self._tasks.keys()
-                if task_name not in _task_names
-            ]
-            # delete the tasks
-            for _deleted_task_name in _deleted_task_names:
-                del self._tasks[_deleted_task_name]
-
+            elif existing_task is not _task:
+                existing_task.adopt(_task)
         return self._tasks
 
     def add_task(self,
@@ -385,9 +405,8 @@ class Subproject(Entity):
                 target_purgatory_project_folder,
             ]:
                 if purgatory_folder.exists():
-                    try:
-                        shutil.rmtree(purgatory_folder)
-                    except PermissionError:
+                    ret, _msg = utils.delete(purgatory_folder)
+                    if not ret:
                         msg = (
                             f"{purgatory_folder.as_posix()} folder already "
                             f"exists in purgatory and its read only."
@@ -397,10 +416,8 @@ class Subproject(Entity):
                         return -1, msg
 
             if target_purgatory_task_path.exists():
-                try:
-                    # remove the file
-                    target_purgatory_task_path.unlink()
-                except PermissionError:
+                ret, _msg = utils.delete(target_purgatory_task_path)
+                if not ret:
                     msg = (
                         f"{target_purgatory_task_path.as_posix()} "
                         f"folder already exists in purgatory and its read only."
@@ -408,23 +425,22 @@ class Subproject(Entity):
                     )
                     LOG.error(msg)
                     return -1, msg
-            target_purgatory_database_folder.parent.mkdir(parents=True, exist_ok=True)
-            target_purgatory_project_folder.parent.mkdir(parents=True, exist_ok=True)
-
-
-            shutil.move(
-                task.get_abs_database_path(task.name),
-                target_purgatory_database_folder.parent.as_posix(),
-                copy_function=shutil.copytree,
-            )
-            shutil.move(
-                task.get_abs_project_path(task.name),
-                target_purgatory_project_folder.parent.as_posix(),
-                copy_function=shutil.copytree,
-            )
-            shutil.move(
-                task.settings_file, target_purgatory_task_path.as_posix()
+            ret, msg = task.send_to_purgatory(
+                [
+                    (
+                        task.get_abs_database_path(task.name),
+                        target_purgatory_database_folder.as_posix(),
+                    ),
+                    (
+                        task.get_abs_project_path(task.name),
+                        target_purgatory_project_folder.as_posix(),
+                    ),
+                    (task.settings_file, target_purgatory_task_path.as_posix()),
+                ]
             )
+            if not ret:
+                LOG.error(msg)
+                return -1, msg
         else:  # if the task is empty, just delete the database file
             Path(task.settings_file).unlink()
 
@@ -651,6 +667,41 @@ class Subproject(Entity):
 
         return 1
 
+    def get_storage_report(self, cache_file=None, max_workers=disk_usage.MAX_WORKERS):
+        """Return the disk usage of the subproject attributed to its works.
+
+        The project, database and localized folders of the subproject are
+        scanned in parallel. Unchanged folders are served from the cache.
+
+        Args:
+            cache_file (str, optional): Cache file of the folder listings.
+                Defaults to the cache file in the project database.
+            max_workers (int): Number of folders listed in parallel.
+
+        Returns:
+            dict: The storage report.
+        """
+        works = [
+            Work(work_file)
+            for work_file in storage.collect_work_files(self.get_abs_database_path())
+        ]
+        return storage.get_entity_report(
+            self, storage.get_roots(self), works,
+            cache_file=cache_file, max_workers=max_workers
+        )
+
+    def export_storage_report(self, file_path, **kwargs):
+        """Export the storage report of the subproject as json or csv.
+
+        Args:
+            file_path (str): The output file path ending with .json or .csv.
+            **kwargs: Arguments of the get_storage_report method.
+
+        Returns:
+            str: The output file path.
+        """
+        return disk_usage.export_report(self.get_storage_report(**kwargs), file_path)
+
     def _delete_folders(self, root, sub=None):
         """Delete the folders of the subproject starting from the given root.
 
@@ -662,7 +713,13 @@ class Subproject(Entity):
         sub = sub or self
         folder = Path(root, sub.path)
         if folder.exists():
-            shutil.rmtree(str(folder))
+            # the folder is renamed away and deleted in the background
+            ret, msg = utils.delete(str(folder), defer=True)
+            if not ret:
+                LOG.error(msg)
+            catalog = self.guard.get_catalog(create=False)
+            if ret and catalog:
+                catalog.remove_path(str(folder))
 
     def create_folders(self, root, sub=None):
         """Create folders for subprojects and categories below given root path.
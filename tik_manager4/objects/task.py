@@ -2,9 +2,9 @@
 # pylint: disable=super-with-arguments
 """Module for Task object."""
 
-from pathlib import Path
-import shutil
+from tik_manager4.core import disk_usage
 from tik_manager4.core.constants import ObjectType
+from tik_manager4.objects import storage
 from tik_manager4.objects.metadata import Metadata
 from tik_manager4.core.settings import Settings
 from tik_manager4.objects.category import Category
@@ -73,6 +73,19 @@ class Task(Settings, Entity):
         self.reload()
         self.__init__(self.settings_file, parent_sub=self._parent_sub)
 
+    def adopt(self, task):
+        """Take the data of another object of the same task file.
+
+        Used to apply a task read in a worker thread without reading the
+        file again.
+
+        Args:
+            task (Task): The newly read task object.
+        """
+        self.__dict__.update(task.__dict__)
+        for category in self._categories.values():
+            category.parent_task = self
+
     @property
     def file_name(self):
         """File Name of the task settings file."""
@@ -254,30 +267,57 @@ class Task(Settings, Entity):
         if state != 1:
             return -1
 
-        # delete category from database
-        self._categories.pop(category)
-        self._current_value["categories"] = list(self._categories.keys())
-        self.apply_settings()
-
         if not _is_empty:
             LOG.warning(
                 "Sending category '{0}' from task '{1}' to purgatory.".format(
                     category, self.name
                 )
             )
-            Path(self.get_purgatory_database_path(category)).mkdir(parents=True, exist_ok=True)
-            Path(self.get_purgatory_project_path(category)).mkdir(parents=True, exist_ok=True)
-            shutil.move(
-                self.get_abs_database_path(self.name, category),
-                self.get_purgatory_database_path(self.name, category),
-            )
-            shutil.move(
-                self.get_abs_project_path(self.name, category),
-                self.get_purgatory_project_path(self.name, category),
+            ret, msg = self.send_to_purgatory(
+                [
+                    (
+                        self.get_abs_database_path(self.name, category),
+                        self.get_purgatory_database_path(self.name, category),
+                    ),
+                    (
+                        self.get_abs_project_path(self.name, category),
+                        self.get_purgatory_project_path(self.name, category),
+                    ),
+                ],
+                name=f"{self.name}/{category}",
             )
+            if not ret:
+                LOG.error(msg)
+                return -1
+
+        # delete category from database
+        self._categories.pop(category)
+        self._current_value["categories"] = list(self._categories.keys())
+        self.apply_settings()
 
         return 1
 
+    def get_storage_report(self, cache_file=None, max_workers=disk_usage.MAX_WORKERS):
+        """Return the disk usage of the task attributed to its works.
+
+        Args:
+            cache_file (str, optional): Cache file of the folder listings.
+                Defaults to the cache file in the project database.
+            max_workers (int): Number of folders listed in parallel.
+
+        Returns:
+            dict: The storage report.
+        """
+        works = [
+            work
+            for category in self.categories.values()
+            for work in category.works.values()
+        ]
+        return storage.get_entity_report(
+            self, storage.get_roots(self, self.name), works,
+            cache_file=cache_file, max_workers=max_workers
+        )
+
     def order_categories(self, new_order):
         """Order the categories of the task.
 
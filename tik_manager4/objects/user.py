@@ -8,11 +8,14 @@ from tik_manager4.core import utils
 from tik_manager4.core.settings import Settings
 from tik_manager4.objects.commons import Commons
 from tik_manager4.objects.guard import Guard
-from tik_manager4.ui.dialog import feedback
 
 LOG = filelog.Filelog(logname=__name__, filename="tik_manager4")
 
-FEED = feedback.Feedback()
+
+def _feedback():
+    """Return the feedback dialogs. Qt is imported only when they are needed."""
+    from tik_manager4.ui.dialog import feedback
+    return feedback.Feedback()
 
 
 class User:
@@ -163,6 +166,21 @@ class User:
         """
         self.resume.edit_property("version", value)
 
+    @property
+    def recent_tasks(self):
+        """Ids of the recently interacted tasks. Latest is the last."""
+        return self.resume.get_property("recent_tasks", [])
+
+    def add_recent_task(self, task_id):
+        """Add the task to the recent tasks.
+
+        Args:
+            task_id (int): The task id.
+        """
+        recent_list = [uid for uid in self.recent_tasks if uid != task_id]
+        recent_list.append(task_id)
+        self.resume.edit_property("recent_tasks", recent_list[-10:])
+
     @property
     def expanded_subprojects(self):
         """The expansion states of subprojects."""
@@ -296,25 +314,25 @@ class User:
         if not self.common_directory or not Path(self.common_directory).is_dir():
             # if it is not overridden while creating the object ask it from the user
             if not self.common_directory:
-                FEED.pop_info(
+                _feedback().pop_info(
                     title="Set Commons Directory",
                     text="Commons Directory is not defined. "
                     "Press Continue to select Commons Directory",
                     button_label="Continue",
                 )
-                self.common_directory = FEED.browse_directory()
+                self.common_directory = _feedback().browse_directory()
             assert (
                 self.common_directory
             ), "Commons Directory must be defined to continue"
             if not Path(self.common_directory).is_dir():
-                answer = FEED.pop_question(
+                answer = _feedback().pop_question(
                     title="Commons Directory does not exist",
                     text=f"Defined Commons Directory does not exist. \n{self.common_directory}"
                     f"Do you want to define a new Commons Directory?",
                     buttons=["yes", "cancel"],
                 )
                 if answer == "yes":
-                    self.common_directory = FEED.browse_directory()
+                    self.common_directory = _feedback().browse_directory()
                 else:
                     raise Exception("Commons Directory does not exist. Exiting...")
         self.settings.edit_property("commonFolder", self.common_directory)
@@ -327,11 +345,12 @@ class User:
         self.settings.add_property("image_viewer", "", force=False)
         self.settings.add_property("sequence_viewer", "", force=False)
         self.settings.add_property("video_player", "", force=False)
+        self.settings.add_property("warm_start_cache", False, force=False)
         self.settings.apply_settings()
 
         self.commons = Commons(self.common_directory)
         if not self.commons.is_valid:
-            answer = FEED.pop_question(
+            answer = _feedback().pop_question(
                 title="Commons Directory is not valid",
                 text="Commons Directory doesn't contain all of the necessary "
                 "files and it is write protected.\n"
@@ -339,7 +358,7 @@ class User:
                 buttons=["yes", "cancel"],
             )
             if answer == "yes":
-                self.common_directory = FEED.browse_directory()
+                self.common_directory = _feedback().browse_directory()
                 self.commons = Commons(self.common_directory)
                 self.settings.edit_property("commonFolder", self.common_directory)
                 self.settings.apply_settings()
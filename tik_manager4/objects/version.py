@@ -2,11 +2,16 @@
 
 from pathlib import Path
 
+from tik_manager4.core import archive
+from tik_manager4.core import delta
+from tik_manager4.core import filelog
 from tik_manager4.core import utils
 from tik_manager4.core.constants import ObjectType
 from tik_manager4.core.settings import Settings
 from tik_manager4.mixins.localize import LocalizeMixin
 
+LOG = filelog.Filelog(logname=__name__, filename="tik_manager4")
+
 
 class PublishVersion(Settings, LocalizeMixin):
     """PublishVersion object class.
@@ -17,6 +22,7 @@ class PublishVersion(Settings, LocalizeMixin):
     When read from the file, these properties are initialized from the file.
     """
     object_type = ObjectType.PUBLISH_VERSION
+    merge_on_write = True
 
     def __init__(self, absolute_path, name=None, path=None):
         """Initialize the publish version object.
@@ -41,6 +47,8 @@ class PublishVersion(Settings, LocalizeMixin):
         self._work_version = None
         self._notes:str = ""
         self._previews: dict = {}
+        self._preview_proxies: dict = {}
+        self._preview_sprites: dict = {}
         self._task_name = None
         self._task_id = None
         self._thumbnail: str = ""
@@ -69,6 +77,8 @@ class PublishVersion(Settings, LocalizeMixin):
         self._name = self.get_property("name", self._name)
         self._notes = self.get_property("notes", self._notes)
         self._previews = self.get_property("previews", self._previews)
+        self._preview_proxies = self.get_property("preview_proxies", self._preview_proxies)
+        self._preview_sprites = self.get_property("preview_sprites", self._preview_sprites)
         self._publish_id = self.get_property("publish_id", self._publish_id)
         self._relative_path = self.get_property("path", self._relative_path)
         self._task_id = self.get_property("task_id", self._task_id)
@@ -79,6 +89,17 @@ class PublishVersion(Settings, LocalizeMixin):
         self._localized = self.get_property("localized", self._localized)
         self._localized_path = self.get_property("localized_path", self._localized_path)
 
+    def apply_settings(self, force=False):
+        """Write the changes merged into the latest publish version file.
+
+        The properties are updated with the data registered by the others
+        in the meantime, like the previews of the background conversions.
+        """
+        if not super().apply_settings(force=force):
+            return False
+        self.init_properties()
+        return True
+
     @property
     def creator(self):
         """The creator of the publish version."""
@@ -174,6 +195,16 @@ class PublishVersion(Settings, LocalizeMixin):
         """The previews of the publish version."""
         return self._previews
 
+    @property
+    def preview_proxies(self):
+        """The low bitrate proxies of the previews."""
+        return self._preview_proxies
+
+    @property
+    def preview_sprites(self):
+        """The sprite sheet data of the previews."""
+        return self._preview_sprites
+
     @property
     def user(self):
         """The user of the publish version. Alias for creator."""
@@ -262,31 +293,39 @@ class PublishVersion(Settings, LocalizeMixin):
                 return element.get("bundled", False)
         return None
 
-    def move_to_purgatory(self):
-        """Move the publish version to the purgatory folder."""
+    def get_purgatory_items(self):
+        """Return the (source, target) paths for sending it to the purgatory.
+
+        Returns:
+            list: Elements, thumbnail and the database file of the version.
+        """
+        items = []
         for element in self.elements:
             relative_path = element["path"]
-            source_abs_path = self.get_resolved_path(relative_path)
-            target_abs_path = self.get_resolved_purgatory_path(relative_path)
-            utils.move(source_abs_path, target_abs_path)
+            items.append((
+                self.get_resolved_path(relative_path, origin=True),
+                self.get_resolved_purgatory_path(relative_path),
+            ))
 
-        # move the thumbnail to purgatory
         thumbnail_relative_path = self.get("thumbnail", None)
         if thumbnail_relative_path:
-            thumbnail_abs_path = self.get_abs_database_path(
-                thumbnail_relative_path
-            )
-            thumbnail_dest_abs_path = self.get_purgatory_database_path(
-                thumbnail_relative_path
-            )
-            utils.move(thumbnail_abs_path, thumbnail_dest_abs_path)
-
-        # move the database file to purgatory
+            items.append((
+                self.get_abs_database_path(thumbnail_relative_path),
+                self.get_purgatory_database_path(thumbnail_relative_path),
+            ))
+
         _file_name = Path(self.settings_file).name
-        dest_abs_file_path = self.get_purgatory_database_path(
-            self.name, _file_name
+        items.append((
+            self.settings_file,
+            self.get_purgatory_database_path(self.name, _file_name),
+        ))
+        return items
+
+    def move_to_purgatory(self):
+        """Move the publish version to the purgatory folder."""
+        return self.send_to_purgatory(
+            self.get_purgatory_items(), name=Path(self.settings_file).stem
         )
-        utils.move(self.settings_file, dest_abs_file_path)
 
 
 class WorkVersion(LocalizeMixin):
@@ -303,6 +342,11 @@ class WorkVersion(LocalizeMixin):
         self._file_format: str = ""
         self._notes: str = ""
         self._previews: dict = {}
+        self._preview_proxies: dict = {}
+        self._preview_sprites: dict = {}
+        self._content_hashes: list = []
+        self._archived: bool = False
+        self._archive_path: str = ""
         self._scene_path: str = ""
         self._thumbnail: str = ""
         self._user: str = ""
@@ -336,6 +380,31 @@ class WorkVersion(LocalizeMixin):
         """The previews of the work version."""
         return self._previews
 
+    @property
+    def preview_proxies(self):
+        """The low bitrate proxies of the previews."""
+        return self._preview_proxies
+
+    @property
+    def preview_sprites(self):
+        """The sprite sheet data of the previews."""
+        return self._preview_sprites
+
+    @property
+    def content_hashes(self):
+        """Content store hashes of the work version files."""
+        return self._content_hashes
+
+    @property
+    def archived(self):
+        """True if the version file is moved to the cold storage."""
+        return self._archived
+
+    @property
+    def archive_path(self):
+        """The absolute path of the archive in the cold storage."""
+        return self._archive_path
+
     @property
     def path(self):
         """The relative path of the work version."""
@@ -380,12 +449,17 @@ class WorkVersion(LocalizeMixin):
     def to_dict(self):
         """Convert the WorkVersion object to a dictionary."""
         return {
+            "archived": self._archived,
+            "archive_path": self._archive_path,
+            "content_hashes": self._content_hashes,
             "dcc_version": self._dcc_version,
             "file_format": self._file_format,
             "localized": self._localized,
             "localized_path": self._localized_path,
             "notes": self._notes,
             "previews": self._previews,
+            "preview_proxies": self._preview_proxies,
+            "preview_sprites": self._preview_sprites,
             "scene_path": self._scene_path,
             "thumbnail": self._thumbnail,
             "user": self._user,
@@ -393,18 +467,139 @@ class WorkVersion(LocalizeMixin):
             "workstation": self._workstation,
         }
 
+    @property
+    def delta_compressed(self):
+        """True if the scene file is stored as a delta against its successor."""
+        return not self.localized and delta.is_delta(self.get_abs_project_path())
+
+    def make_available(self, progress_callback=None):
+        """Bring back the scene file as a full file for loading it.
+
+        Archived versions are restored from the cold storage and delta
+        compressed ones are expanded. If the version is restored, its record
+        needs to be saved by the work afterwards.
+
+        Args:
+            progress_callback (function, optional): Called with the restored
+                and total bytes.
+
+        Returns:
+            tuple: (bool, message)
+        """
+        if self.archived:
+            ret, msg = self.restore(progress_callback=progress_callback)
+            if not ret:
+                return ret, msg
+        if self.delta_compressed and not self.expand():
+            return False, f"Cannot expand {self.get_abs_project_path()}"
+        return True, "Version is available."
+
+    def expand(self):
+        """Restore the delta compressed scene file as a full file.
+
+        Returns:
+            bool: True if the scene file is a full file now.
+        """
+        abs_path = self.get_abs_project_path()
+        try:
+            delta.expand_file(abs_path)
+        except FileNotFoundError:
+            # expanded by someone else in the meantime
+            pass
+        except (OSError, ValueError) as exc:
+            LOG.error(f"Cannot expand {abs_path}: {exc}")
+        return Path(abs_path).exists()
+
+    def archive(self, archive_root, progress_callback=None):
+        """Move the version file into a compressed archive in the cold storage.
+
+        The version record needs to be saved by the work afterwards.
+
+        Args:
+            archive_root (str): The root folder of the cold storage.
+            progress_callback (function, optional): Called with the processed
+                and total bytes.
+
+        Returns:
+            tuple: (bool, message)
+        """
+        if self.archived:
+            return True, "Version is already archived."
+        if self.localized:
+            return False, "Localized versions cannot be archived."
+        abs_path = self.get_abs_project_path()
+        if not Path(abs_path).exists():
+            return False, f"Version file does not exist: {abs_path}"
+        project_name = Path(self.guard.project_root).name
+        archive_path = archive.get_archive_path(archive_root, project_name, self.path)
+        try:
+            archive.create_archive(abs_path, archive_path, progress_callback)
+        except (OSError, EOFError) as exc:
+            msg = f"Cannot archive {abs_path}: {exc}"
+            LOG.error(msg)
+            return False, msg
+        ret, msg = utils.delete(abs_path)
+        if not ret:
+            utils.delete(archive_path)
+            return False, msg
+        self._archived = True
+        self._archive_path = archive_path
+        # the file is not in the content store anymore
+        self._content_hashes = []
+        return True, "Version archived."
+
+    def restore(self, progress_callback=None):
+        """Bring the version file back from the cold storage.
+
+        The version record needs to be saved by the work afterwards.
+
+        Args:
+            progress_callback (function, optional): Called with the extracted
+                and total bytes.
+
+        Returns:
+            tuple: (bool, message)
+        """
+        if not self.archived:
+            return True, "Version is not archived."
+        abs_path = Path(self.get_abs_project_path())
+        if not abs_path.exists():
+            try:
+                archive.extract_archive(
+                    self._archive_path, abs_path.parent, progress_callback
+                )
+            except (OSError, EOFError) as exc:
+                msg = f"Cannot restore {abs_path}: {exc}"
+                LOG.error(msg)
+                return False, msg
+        utils.delete(self._archive_path)
+        self._archived = False
+        self._archive_path = ""
+        return True, "Version restored."
+
+    def get_purgatory_items(self):
+        """Return the (source, target) paths for sending it to the purgatory.
+
+        Returns:
+            list: The scene file and the thumbnail of the version.
+        """
+        scene_path = self.get_resolved_path(origin=True)
+        purgatory_path = self.get_resolved_purgatory_path()
+        return [
+            (scene_path, purgatory_path),
+            # the scene file may be stored as a delta
+            (delta.get_delta_path(scene_path), delta.get_delta_path(purgatory_path)),
+            (
+                self.get_abs_database_path(self.thumbnail),
+                self.get_purgatory_database_path(self.thumbnail),
+            ),
+        ]
+
     def move_to_purgatory(self):
         """Move the work version to the purgatory folder."""
-        source_abs_path = self.get_resolved_path()
-        target_abs_path = self.get_resolved_purgatory_path()
-        utils.move(source_abs_path, target_abs_path)
-
-        # move the thumbnail
-        thumbnail_abs_path = self.get_abs_database_path(self.thumbnail)
-        thumbnail_dest_path = self.get_purgatory_database_path(
-            self.thumbnail
+        return self.send_to_purgatory(
+            self.get_purgatory_items(), name=Path(self.scene_path).stem
         )
-        utils.move(thumbnail_abs_path, thumbnail_dest_path)
 
     def __str__(self):
         """Return the type of the class and the current data."""
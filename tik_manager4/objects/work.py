@@ -4,13 +4,17 @@
 
 import socket
 import shutil
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
-from tik_manager4.core import utils
+from tik_manager4.core import delta
+from tik_manager4.core import disk_usage
 from tik_manager4.core.constants import ObjectType
 from tik_manager4.dcc.standalone.main import Dcc as StandaloneDcc
 from tik_manager4.core.settings import Settings
 from tik_manager4.core import filelog
+from tik_manager4.objects import storage
 from tik_manager4.objects.publish import Publish
 from tik_manager4.objects.version import WorkVersion
 from tik_manager4.mixins.localize import LocalizeMixin
@@ -23,6 +27,7 @@ class Work(Settings, LocalizeMixin):
 
     _standalone_handler = StandaloneDcc()
     object_type = ObjectType.WORK
+    merge_on_write = True
 
     def __init__(self, absolute_path, name=None, path=None, parent_task=None):
         """Initialize the Work object.
@@ -156,6 +161,18 @@ class Work(Settings, LocalizeMixin):
             parent_task=self._parent_task,
         )
 
+    def adopt(self, work):
+        """Take the data of another object of the same work file.
+
+        Used to apply a work read in a worker thread without reading the
+        file again.
+
+        Args:
+            work (Work): The newly read work object.
+        """
+        self.__dict__.update(work.__dict__)
+        self.publish.work_object = self
+
     def omit(self):
         """Omit the work."""
         self._state = "omitted"
@@ -221,6 +238,7 @@ class Work(Settings, LocalizeMixin):
 
         # add it to the versions
         extension = Path(output_path).suffix or "Folder"
+        content_hashes = self._store_content(output_path)
         self._standalone_handler.text_to_image(extension, thumbnail_path, *(self._thumbnail_resolution))
         version_dict = {
             "version_number": version_number,
@@ -232,6 +250,7 @@ class Work(Settings, LocalizeMixin):
             "previews": {},
             "file_format": file_format,
             "dcc_version": "NA",
+            "content_hashes": content_hashes,
         }
         version_obj = WorkVersion(self.path, version_dict)
         self._versions.append(version_obj)
@@ -239,10 +258,25 @@ class Work(Settings, LocalizeMixin):
         return version_obj
 
     def apply_settings(self, force=False):
-        """Override the apply settings to add version serialization before."""
+        """Override the apply settings to add version serialization before.
+
+        The changes are merged into the latest work file, so the data
+        registered by the others in the meantime, like the previews of the
+        background conversions, is kept and applied to the versions.
+        """
         self.edit_property("versions",
                            [version.to_dict() for version in self._versions])
-        super(Work, self).apply_settings(force=force)
+        if not super(Work, self).apply_settings(force=force):
+            return False
+        versions = {version.version: version for version in self._versions}
+        for record in self.get_property("versions", []):
+            version = versions.get(record.get("version_number"))
+            if version:
+                version.from_dict(record)
+            else:
+                self._versions.append(WorkVersion(self._relative_path, record))
+        self._versions.sort(key=lambda version: version.version)
+        return True
 
     def new_version(self, file_format=None, notes="", ignore_checks=True):
         """Create a new version of the work.
@@ -318,12 +352,28 @@ class Work(Settings, LocalizeMixin):
         if is_localized:
             version_dict["localized"] = is_localized
             version_dict["localized_path"] = output_path
+        else:
+            version_dict["content_hashes"] = self._store_content(returned_output_path)
         version_obj = WorkVersion(self.path, version_dict)
         self._versions.append(version_obj)
         self.apply_settings()
         self._dcc_handler.post_save()
         return version_obj
 
+    def _store_content(self, file_or_folder):
+        """Deduplicate the files with the content store if it is enabled.
+
+        Args:
+            file_or_folder (str): The saved file or folder.
+
+        Returns:
+            list: Content hashes of the files. Empty if the store is disabled.
+        """
+        content_store = self.guard.get_content_store()
+        if not content_store:
+            return []
+        return content_store.ingest(file_or_folder)
+
     def construct_names(
         self, file_format, version_number=None, thumbnail_extension=".jpg"
     ):
@@ -346,34 +396,58 @@ class Work(Settings, LocalizeMixin):
         )
         return version_number, version_name, thumbnail_name
 
-    def load_version(self, version_number, force=False, **kwargs):
+    def _resolve_version_path(self, version_obj, progress_callback=None):
+        """Return the path of the version, restoring it from the cold storage.
+
+        Args:
+            version_obj (WorkVersion): The version object.
+            progress_callback (function, optional): Called with the restored
+                and total bytes.
+
+        Returns:
+            str: The absolute path of the version file.
+        """
+        archived = version_obj.archived
+        ret, msg = version_obj.make_available(progress_callback=progress_callback)
+        if not ret:
+            LOG.error(msg)
+        if archived and not version_obj.archived:
+            self._update_version_records([version_obj], ["archived", "archive_path"])
+        return version_obj.get_resolved_path()
+
+    def load_version(self, version_number, force=False, progress_callback=None, **kwargs):
         """Load the given version of the work.
 
         Args:
             version_number (int): Version number.
             force (bool, optional): If True, force open the file.
+            progress_callback (function, optional): Called with the restored
+                and total bytes if the version is in the cold storage.
             **kwargs: Additional arguments to pass to the dcc handler.
         """
         version_obj = self.get_version(version_number)
         if version_obj:
-            abs_path = version_obj.get_resolved_path()
+            abs_path = self._resolve_version_path(version_obj, progress_callback)
             self._dcc_handler.open(abs_path, force=force)
         return
 
-    def import_version(self, version_number, element_type=None, ingestor=None):
+    def import_version(self, version_number, element_type=None, ingestor=None,
+                       progress_callback=None):
         """Import the given version of the work to the scene.
 
         Args:
             version_number (int): Version number.
             element_type (str, optional): Element type of the version.
             ingestor (str, optional): Ingestor to use.
+            progress_callback (function, optional): Called with the restored
+                and total bytes if the version is in the cold storage.
         """
         # work files does not have element types. This is for publish files.
         _element_type = element_type or "source"
         ingestor = ingestor or "source"
         version_obj = self.get_version(version_number)
         if version_obj:
-            abs_path = version_obj.get_resolved_path()
+            abs_path = self._resolve_version_path(version_obj, progress_callback)
             _ingest_obj = self._dcc_handler.ingests[ingestor]()
             # feed the metadata from the parent subproject
             _ingest_obj.metadata = self.get_metadata(self.parent_task)
@@ -382,20 +456,23 @@ class Work(Settings, LocalizeMixin):
             _ingest_obj.ingest_path = abs_path
             _ingest_obj.bring_in()
 
-    def reference_version(self, version_number, element_type=None, ingestor=None):
+    def reference_version(self, version_number, element_type=None, ingestor=None,
+                          progress_callback=None):
         """Reference the given version of the work to the scene.
 
         Args:
             version_number (int): Version number.
             element_type (str, optional): Element type of the version.
             ingestor (str, optional): Ingestor to use.
+            progress_callback (function, optional): Called with the restored
+                and total bytes if the version is in the cold storage.
         """
         # work files does not have element types. This is for publish files.
         _element_type = element_type or "source"
         ingestor = ingestor or "source"
         version_obj = self.get_version(version_number)
         if version_obj:
-            abs_path = version_obj.get_resolved_path()
+            abs_path = self._resolve_version_path(version_obj, progress_callback)
             _ingest_obj = self._dcc_handler.ingests[ingestor]()
             _ingest_obj.metadata = self.get_metadata(self.parent_task)
             _ingest_obj.namespace = self.name
@@ -454,12 +531,18 @@ class Work(Settings, LocalizeMixin):
         if self.publish.versions:
             self.publish.destroy()
 
-        for version in self.versions:
-            version.move_to_purgatory()
+        # oldest first, delta compressed versions need their successors.
+        items = []
+        for version in sorted(self.versions, key=lambda version: version.version):
+            items.extend(version.get_purgatory_items())
 
-        # finally move the database file
+        # finally the database file
         db_destination = Path(self.get_resolved_purgatory_path(), self.settings_file.name)
-        utils.move(self.settings_file.as_posix(), db_destination.as_posix())
+        items.append((self.settings_file.as_posix(), db_destination.as_posix()))
+        ret, msg = self.send_to_purgatory(items)
+        if not ret:
+            LOG.error(msg)
+            return -1, msg
         return 1, "success"
 
     def check_owner_permissions(self, version_number):
@@ -506,6 +589,7 @@ class Work(Settings, LocalizeMixin):
             return -1, msg
         version_obj = self.get_version(version_number)
         if version_obj:
+            self._expand_dependents(version_obj)
             version_obj.move_to_purgatory()
 
             # remove the version from the versions list
@@ -513,6 +597,208 @@ class Work(Settings, LocalizeMixin):
             self.apply_settings()
         return 1, msg
 
+    def get_storage_report(self, cache_file=None, max_workers=disk_usage.MAX_WORKERS):
+        """Return the disk usage of the work versions and publishes.
+
+        Args:
+            cache_file (str, optional): Cache file of the folder listings.
+                Defaults to the cache file in the project database.
+            max_workers (int): Number of folders listed in parallel.
+
+        Returns:
+            dict: The storage report.
+        """
+        roots = [
+            self.get_abs_project_path(self.name),
+            self.publish.get_publish_project_folder(),
+            self.publish.get_publish_data_folder(),
+        ]
+        localized_root = storage.get_localized_root(self.guard, self.path, self.name)
+        if localized_root:
+            roots.append(localized_root)
+        return storage.get_entity_report(
+            self, roots, [self], cache_file=cache_file, max_workers=max_workers
+        )
+
+    def _expand_dependents(self, version_obj):
+        """Expand the versions stored as deltas against the given version.
+
+        Args:
+            version_obj (WorkVersion): The version which will be removed.
+        """
+        base_name = Path(version_obj.scene_path).name
+        for version in self._versions:
+            if version is version_obj or version.localized:
+                continue
+            if delta.get_base_name(version.get_abs_project_path()) == base_name:
+                version.expand()
+
+    def compact_versions(self, keep_full=None, extensions=None,
+                         keyframe_interval=None):
+        """Store the older versions as deltas against their successors.
+
+        Only text based scene files are compressed. The latest versions,
+        localized versions and the versions in folder formats are skipped.
+        A full file is kept every few versions to keep the chains short.
+
+        Args:
+            keep_full (int, optional): Number of latest versions kept as
+                full files. Defaults to the project setting.
+            extensions (list, optional): Compressed file extensions.
+                Defaults to the project setting.
+            keyframe_interval (int, optional): Maximum number of versions
+                read through a chain of deltas. Defaults to the project
+                setting.
+
+        Returns:
+            int: Saved bytes.
+        """
+        project_settings = self.guard.project_settings
+        if keep_full is None:
+            keep_full = project_settings.get("delta_keep_full_versions", 3)
+        extensions = extensions or project_settings.get(
+            "delta_extensions", delta.DEFAULT_EXTENSIONS
+        )
+        if keyframe_interval is None:
+            keyframe_interval = project_settings.get(
+                "delta_keyframe_interval", delta.KEYFRAME_INTERVAL
+            )
+        # start from the versions written by the others in the meantime
+        self.reload()
+        versions = sorted(self._versions, key=lambda version: version.version)
+        candidates = versions[:-keep_full] if keep_full else versions
+
+        saved = 0
+        compacted = []
+        # newest first, so the chain lengths of the bases are final
+        for version, successor in reversed(list(zip(candidates, versions[1:]))):
+            if version.localized or successor.localized:
+                continue
+            if Path(version.scene_path).suffix not in extensions:
+                continue
+            abs_path = Path(version.get_abs_project_path())
+            base_path = Path(successor.get_abs_project_path())
+            if not abs_path.is_file() or abs_path.parent != base_path.parent:
+                continue
+            if not base_path.is_file() and not delta.is_delta(base_path):
+                continue
+            try:
+                if delta.get_chain_length(base_path) + 1 >= keyframe_interval:
+                    # keep this one as a full file
+                    continue
+                saved_bytes = delta.compress_file(abs_path, base_path)
+            except (OSError, ValueError) as exc:
+                LOG.warning(f"Cannot compress {abs_path}: {exc}")
+                continue
+            if saved_bytes is None:
+                continue
+            # the file is not in the content store anymore
+            version._content_hashes = []  # pylint: disable=protected-access
+            compacted.append(version)
+            saved += saved_bytes
+        if compacted:
+            self._update_version_records(compacted, ["content_hashes"])
+        return saved
+
+    def _update_version_records(self, versions, keys):
+        """Write the given keys of the version records to the work file.
+
+        The latest work file is updated under its lock, so the versions and
+        the changes written by the others in the meantime are kept.
+
+        Args:
+            versions (list): The changed WorkVersion objects.
+            keys (list): The changed keys of the records.
+        """
+        records = {version.version: version.to_dict() for version in versions}
+
+        def _merge(data):
+            for record in data.get("versions", []):
+                changed = records.get(record.get("version_number"))
+                if changed:
+                    record.update({key: changed[key] for key in keys})
+
+        self.update_file(_merge)
+        self.reload()
+
+    def archive_versions(self, keep=None, older_than_days=None, archive_root=None,
+                         progress_callback=None, max_workers=4):
+        """Move the old versions into compressed archives in the cold storage.
+
+        The latest versions are kept. All versions of omitted works are
+        archived if the archive_omitted project setting is enabled.
+
+        Args:
+            keep (int, optional): Number of latest versions to keep.
+                Defaults to the project setting.
+            older_than_days (float, optional): Only archive the versions
+                older than this. 0 means any age. Defaults to the project
+                setting.
+            archive_root (str, optional): The cold storage root folder.
+                Defaults to the project setting.
+            progress_callback (function, optional): Called with the processed
+                and total bytes of each version. It is called from the worker
+                threads.
+            max_workers (int): Number of versions archived in parallel.
+
+        Returns:
+            list: Archived version numbers.
+        """
+        project_settings = self.guard.project_settings
+        archive_root = archive_root or project_settings.get("archive_root")
+        if not archive_root:
+            LOG.warning("Archive root is not defined for the project.")
+            return []
+        if keep is None:
+            keep = project_settings.get("archive_keep_versions", 5)
+        if older_than_days is None:
+            older_than_days = project_settings.get("archive_older_than_days", 30)
+        # start from the versions written by the others in the meantime
+        self.reload()
+        if self._state == "omitted" and project_settings.get("archive_omitted", True):
+            keep = 0
+            older_than_days = 0
+
+        versions = sorted(self._versions, key=lambda version: version.version)
+        cutoff = time.time() - older_than_days * 86400
+        candidates = []
+        for version in versions[:-keep] if keep else versions:
+            if version.archived or version.localized:
+                continue
+            abs_path = Path(version.get_abs_project_path())
+            if version.delta_compressed:
+                abs_path = delta.get_delta_path(abs_path)
+            if not abs_path.exists():
+                continue
+            if older_than_days and abs_path.stat().st_mtime > cutoff:
+                continue
+            candidates.append(version)
+        if not candidates:
+            return []
+
+        # deltas are expanded first, their bases may be archived in parallel
+        for version in candidates:
+            self._expand_dependents(version)
+            if version.delta_compressed:
+                version.expand()
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            results = list(executor.map(
+                lambda version: version.archive(archive_root, progress_callback),
+                candidates
+            ))
+        archived = []
+        for version, (ret, msg) in zip(candidates, results):
+            if ret:
+                archived.append(version)
+            else:
+                LOG.warning(msg)
+        if archived:
+            self._update_version_records(
+                archived, ["archived", "archive_path", "content_hashes"]
+            )
+        return [version.version for version in archived]
+
     def __generate_thumbnail_paths(self, version_obj, override_extension=None):
         """Return the thumbnail paths of the given version.
 
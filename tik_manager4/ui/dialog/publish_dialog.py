@@ -494,7 +494,7 @@ class PublishSceneDialog(QtWidgets.QDialog):
     def extract_all(self, callback_handler=None):
         """Extract all the extractors."""
         # single extractors are not saving the scene. Make sure the scene saved first
-        self.project.publisher._dcc_handler.save_scene()
+        self.project.publisher.save_scene()
         for extractor_widget in self._extractor_widgets:
             if not extractor_widget.extract.enabled:
                 continue
@@ -179,6 +179,12 @@ class SettingsDialog(QtWidgets.QDialog):
                 "type": "fileBrowser",
                 "value": self.main_object.user.settings.get_property("video_player"),
             },
+            "warm_start_cache": {
+                "display_name": "Warm Start Cache",
+                "tooltip": "If enabled, the database files of the last opened projects are cached in the user directory for faster startups.",
+                "type": "boolean",
+                "value": self.main_object.user.settings.get_property("warm_start_cache", False),
+            },
         }
 
         user_settings_item.content = self.__create_generic_settings_layout(
@@ -219,7 +225,43 @@ class SettingsDialog(QtWidgets.QDialog):
                 "type": "boolean",
                 "tooltip": "If enabled, publish files will be stored in the cache folder and won't be accessible for other users until its synced.",
                 "value": self.main_object.user.localization.get_property("cache_publishes", False),
-            }
+            },
+            "read_through": {
+                "display_name": "Read Published Files From Cache",
+                "type": "boolean",
+                "tooltip": "If enabled, published elements are read from the verified local copies when they exist.",
+                "value": self.main_object.user.localization.get_property("read_through", False),
+            },
+            "prefetch": {
+                "display_name": "Prefetch Recent Publishes",
+                "type": "boolean",
+                "tooltip": "If enabled, publishes of the recently visited tasks are copied to the local cache in the background.",
+                "value": self.main_object.user.localization.get_property("prefetch", False),
+            },
+            "cache_quota_gb": {
+                "display_name": "Cache Quota (GB)",
+                "type": "spinnerFloat",
+                "tooltip": "Maximum size of the local copies of the published files. Least recently used copies are removed first.",
+                "value": self.main_object.user.localization.get_property("cache_quota_gb", 50.0),
+                "minimum": 0.1,
+                "maximum": 99999.9,
+            },
+            "sync_workers": {
+                "display_name": "Sync Workers",
+                "type": "spinnerInt",
+                "tooltip": "Number of files copied in parallel while syncing to the origin.",
+                "value": self.main_object.user.localization.get_property("sync_workers", 4),
+                "minimum": 1,
+                "maximum": 32,
+            },
+            "sync_bandwidth_mb": {
+                "display_name": "Sync Bandwidth Limit (MB/s)",
+                "type": "spinnerFloat",
+                "tooltip": "Maximum transfer rate to each file server while syncing. 0 means unlimited.",
+                "value": self.main_object.user.localization.get_property("sync_bandwidth_mb", 0.0),
+                "minimum": 0.0,
+                "maximum": 99999.9,
+            },
         }
 
         # fill the content
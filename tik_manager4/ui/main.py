@@ -22,12 +22,14 @@ main.launch(dcc="Maya")
 """
 
 import logging
+from pathlib import Path
 
 import webbrowser
 import tik_manager4
 import tik_manager4._version as version
 from tik_manager4.core import utils
 from tik_manager4.ui import pick
+from tik_manager4.ui import thumbnails
 from tik_manager4.ui.Qt import QtWidgets, QtCore, QtGui
 from tik_manager4.ui.dialog.feedback import Feedback
 from tik_manager4.ui.dialog.preview_dialog import PreviewDialog
@@ -49,11 +51,16 @@ from tik_manager4.ui.mcv.task_mcv import TikTaskLayout
 from tik_manager4.ui.mcv.user_mcv import TikUserLayout
 from tik_manager4.ui.mcv.version_mcv import TikVersionLayout
 from tik_manager4.ui.widgets.common import TikButton, VerticalSeparator
+from tik_manager4.ui.widgets.search import GlobalSearchBox
+from tik_manager4.ui.watcher import DatabaseWatcher
 from tik_manager4.ui.dialog.update_dialog import UpdateDialog
 from tik_manager4.ui.widgets.pop import WaitDialog
 from tik_manager4 import management
 
 LOG = logging.getLogger(__name__)
+
+# maximum seconds to wait for the background scans to restore a selection
+SCAN_WAIT_TIMEOUT = 10
 WINDOW_NAME = f"Tik Manager {version.__version__}"
 
 
@@ -115,6 +122,11 @@ class MainUI(QtWidgets.QMainWindow):
         project_user_layout.addWidget(line)
 
         project_user_layout.addLayout(self.user_layout)
+        project_user_layout.addWidget(VerticalSeparator())
+
+        self.search_box = GlobalSearchBox(self.tik.project, parent=self)
+        self.search_box.result_selected.connect(self.on_search_result)
+        project_user_layout.addWidget(self.search_box)
 
         self.main_layout = QtWidgets.QVBoxLayout()
         self.splitter = QtWidgets.QSplitter(
@@ -165,6 +177,9 @@ class MainUI(QtWidgets.QMainWindow):
         self.categories_mcv = None
         self.versions_mcv = None
 
+        # updates the displayed items changed by the others
+        self.watcher = DatabaseWatcher(parent=self)
+
         # buttons
         self.ingest_version_btn = None
 
@@ -181,6 +196,9 @@ class MainUI(QtWidgets.QMainWindow):
 
         self.resume_last_state()
         self.management_lock()
+        # warm the local cache with the publishes of the recent tasks
+        self.tik.prefetch_recent_publishes()
+        self.search_box.prepare()
 
         self.status_bar.showMessage("Status | Ready")
 
@@ -193,6 +211,8 @@ class MainUI(QtWidgets.QMainWindow):
         if subproject_id:  # pylint: disable=too-many-nested-blocks
             state = self.subprojects_mcv.sub_view.select_by_id(subproject_id)
             if state:
+                # the last task is not selected if the scan takes too long
+                self.subprojects_mcv.sub_view.wait_for_tasks(timeout=SCAN_WAIT_TIMEOUT)
                 # if its successfully set, then select the last selected task
                 task_id = self.tik.user.last_task
                 if task_id:
@@ -201,6 +221,7 @@ class MainUI(QtWidgets.QMainWindow):
                         # if its successfully set, then select the last category
                         category_index = self.tik.user.last_category or 0
                         self.categories_mcv.set_category_by_index(category_index)
+                        self.categories_mcv.wait_for_works(timeout=SCAN_WAIT_TIMEOUT)
                         work_id = self.tik.user.last_work
                         if work_id:
                             state = self.categories_mcv.work_tree_view.select_by_id(
@@ -220,6 +241,7 @@ class MainUI(QtWidgets.QMainWindow):
         else:
             # if there are no subprojects, then select the first one
             self.subprojects_mcv.sub_view.select_first_item()
+            self.subprojects_mcv.sub_view.wait_for_tasks(timeout=SCAN_WAIT_TIMEOUT)
             LOG.info("No subproject found, selecting the first one.")
 
             # if there is no task, then select the first one
@@ -292,14 +314,26 @@ class MainUI(QtWidgets.QMainWindow):
                 "QTabBar::tab { font-size: 10px; spacing: 5px; }"
             )
 
-        self.versions_mcv = TikVersionLayout(self.tik.project, parent=self)
+        self.versions_mcv = TikVersionLayout(
+            self.tik.project,
+            parent=self,
+            thumbnail_cache_folder=Path(
+                self.tik.user.user_directory, thumbnails.CACHE_FOLDER_NAME
+            ),
+        )
         self.versions_mcv.status_updated.connect(self.status_bar.showMessage)
+        self.subprojects_mcv.sub_view.scan_failed.connect(self.status_bar.showMessage)
+        self.categories_mcv.scan_failed.connect(self.status_bar.showMessage)
         self.version_layout.addLayout(self.versions_mcv)
 
         self.project_mcv.project_set.connect(self.on_set_project)
-        self.subprojects_mcv.sub_view.item_selected.connect(
-            self.tasks_mcv.task_view.set_tasks
+        self.subprojects_mcv.sub_view.task_scan_started.connect(
+            self.tasks_mcv.task_view.clear_tasks
+        )
+        self.subprojects_mcv.sub_view.tasks_added.connect(
+            self.tasks_mcv.task_view.add_tasks
         )
+        self.subprojects_mcv.sub_view.busy_changed.connect(self.tasks_mcv.set_busy)
         self.subprojects_mcv.sub_view.add_item.connect(
             self.tasks_mcv.task_view.add_tasks
         )
@@ -336,6 +370,19 @@ class MainUI(QtWidgets.QMainWindow):
             self.on_work_from_template
         )
 
+        # watch the database folders of the displayed items
+        self.subprojects_mcv.sub_view.task_scan_started.connect(self._watch_tasks)
+        self.subprojects_mcv.sub_view.tasks_updated.connect(
+            self.tasks_mcv.task_view.update_tasks
+        )
+        self.tasks_mcv.task_view.item_selected.connect(self._watch_works)
+        self.categories_mcv.category_tab_widget.currentChanged.connect(
+            self._watch_works
+        )
+        self.categories_mcv.mode_changed.connect(self._watch_works)
+        self.categories_mcv.work_tree_view.item_selected.connect(self._watch_versions)
+        self.watcher.changed.connect(self.on_database_changed)
+
     def set_last_state(self):
         """Set the last selections for the user"""
         # get the currently selected subproject
@@ -347,6 +394,7 @@ class MainUI(QtWidgets.QMainWindow):
             if _task_item:
                 # self.tik.user.last_task = _task_item.task.reference_id
                 self.tik.user.last_task = _task_item.task.id
+                self.tik.user.add_recent_task(_task_item.task.id)
                 # Do we care?
                 _category_index = self.categories_mcv.get_category_index()
                 # we can always safely write the category index
@@ -911,11 +959,77 @@ class MainUI(QtWidgets.QMainWindow):
         """Refresh the versions' ui."""
         self.versions_mcv.refresh()
 
+    def _watch_tasks(self):
+        """Watch the folders of the selected subprojects for task changes."""
+        self.watcher.watch(
+            "tasks",
+            [
+                sub.get_abs_database_path()
+                for sub in self.subprojects_mcv.sub_view.get_selected_subprojects()
+            ],
+        )
+
+    def _watch_works(self, *_args):
+        """Watch the folders of the active category for work changes."""
+        self.watcher.watch("works", self.categories_mcv.get_watch_paths())
+
+    def _watch_versions(self, base):
+        """Watch the database file or folder of the selected work or publish."""
+        self.watcher.watch(
+            "versions", self.versions_mcv.get_watch_paths() if base else []
+        )
+
+    def on_database_changed(self, scope):
+        """Update the items of the changed database folders.
+
+        Args:
+            scope (str): The changed scope of the watcher.
+        """
+        if scope == "tasks":
+            self.subprojects_mcv.sub_view.update_tasks()
+        elif scope == "works":
+            self.categories_mcv.update_works()
+            # new dcc folders need to be watched too
+            self._watch_works()
+        elif scope == "versions":
+            self.versions_mcv.update_versions()
+
     def on_set_project(self, message=""):
         """Show a status message."""
+        self.watcher.clear()
         self.management_lock()
         self.status_bar.showMessage(message, 3000)
         self.refresh_subprojects()
+        self.search_box.prepare()
+
+    def on_search_result(self, result):
+        """Select the subproject, task, category and work of the search result.
+
+        Args:
+            result (dict): The search result from the project catalog.
+        """
+        if not self.subprojects_mcv.sub_view.select_by_id(result["subproject_id"]):
+            self.status_bar.showMessage(f"{result['name']} cannot be found.", 3000)
+            return
+        if not result["task_id"]:
+            return
+        if not self.subprojects_mcv.sub_view.wait_for_tasks(timeout=SCAN_WAIT_TIMEOUT):
+            self.status_bar.showMessage("Tasks are still loading, try again.", 3000)
+            return
+        if not self.tasks_mcv.task_view.select_by_id(result["task_id"]):
+            self.status_bar.showMessage(f"{result['name']} cannot be found.", 3000)
+            return
+        _task_item = self.tasks_mcv.task_view.get_selected_item()
+        categories = list(_task_item.task.categories.keys())
+        if result["category"] not in categories:
+            return
+        self.categories_mcv.set_category_by_index(categories.index(result["category"]))
+        if not result["work_id"]:
+            return
+        if not self.categories_mcv.wait_for_works(timeout=SCAN_WAIT_TIMEOUT):
+            self.status_bar.showMessage("Works are still loading, try again.", 3000)
+            return
+        self.categories_mcv.work_tree_view.select_by_id(result["work_id"])
 
     def management_lock(self):
         """Lock certain UI elements if the project is getting driven by a
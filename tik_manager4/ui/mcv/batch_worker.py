@@ -0,0 +1,162 @@
+"""Workers delivering the results of slow scans to the UI thread in batches."""
+
+import atexit
+import queue
+import threading
+import time
+
+from tik_manager4.ui.Qt import QtCore
+from tik_manager4.core import filelog
+
+LOG = filelog.Filelog(logname=__name__, filename="tik_manager4")
+
+# number of results delivered to the UI at once
+BATCH_SIZE = 100
+# maximum seconds to hold the results before delivering them
+BATCH_INTERVAL = 0.1
+
+# started workers are kept alive until their finished signal is handled,
+# even if the widget which started them is deleted
+_RUNNING = set()
+
+# thread pools by their names. They are never deleted with the widgets, as
+# their destructors wait for the workers while holding the interpreter lock
+_POOLS = {}
+
+
+def thread_pool(name, max_threads):
+    """Return the shared thread pool with the given name.
+
+    Args:
+        name (str): Name of the pool.
+        max_threads (int): Maximum number of threads if the pool is created.
+
+    Returns:
+        QtCore.QThreadPool: The thread pool.
+    """
+    pool = _POOLS.get(name)
+    if pool is None:
+        pool = _POOLS[name] = QtCore.QThreadPool()
+        pool.setMaxThreadCount(max_threads)
+    return pool
+
+
+@atexit.register
+def _shutdown():
+    """Stop the running workers before the pools are deleted."""
+    for worker in list(_RUNNING):
+        worker.cancel()
+    for pool in _POOLS.values():
+        pool.clear()
+        pool.waitForDone()
+
+
+class BatchWorkerSignals(QtCore.QObject):
+    """Signals of the batch worker."""
+    batch_ready = QtCore.Signal()
+    finished = QtCore.Signal()
+
+
+class BatchWorker(QtCore.QRunnable):
+    """Iterate over the results of a scan in a worker thread.
+
+    The results are put into a queue in batches and the batch_ready signal
+    notifies the UI thread to take them. Subclasses implement iterate().
+
+    Receivers should connect their own methods to the signals and find the
+    worker with sender(), so the connections die with the receivers. If the
+    scan fails, the exception is kept in the error attribute.
+    """
+
+    batch_size = BATCH_SIZE
+    batch_interval = BATCH_INTERVAL
+
+    def __init__(self):
+        """Initialize the worker."""
+        super(BatchWorker, self).__init__()
+        self.setAutoDelete(False)
+        self.signals = BatchWorkerSignals()
+        self.batches = queue.Queue()
+        self.done = threading.Event()
+        self.cancelled = False
+        self.error = None
+        self._release_connected = False
+
+    def start(self, pool, priority=0):
+        """Start the worker in the thread pool.
+
+        Args:
+            pool (QtCore.QThreadPool): The thread pool.
+            priority (int): The priority in the pool queue.
+        """
+        _RUNNING.add(self)
+        if not self._release_connected:
+            # connected last to be released after the receivers are called
+            self.signals.finished.connect(self._release)
+            self._release_connected = True
+        pool.start(self, priority)
+
+    def take(self, pool):
+        """Remove the worker from the pool queue if it is not started yet.
+
+        Args:
+            pool (QtCore.QThreadPool): The thread pool.
+
+        Returns:
+            bool: True if the worker is removed from the queue.
+        """
+        if pool.tryTake(self):
+            _RUNNING.discard(self)
+            return True
+        return False
+
+    def _release(self):
+        """Let the finished worker to be deleted."""
+        _RUNNING.discard(self)
+
+    def iterate(self):
+        """Yield the results. Runs in the worker thread."""
+        raise NotImplementedError
+
+    def cancel(self):
+        """Stop the worker at the next result."""
+        self.cancelled = True
+
+    def take_batches(self):
+        """Return the delivered batches which are not taken yet."""
+        batches = []
+        while True:
+            try:
+                batches.append(self.batches.get_nowait())
+            except queue.Empty:
+                return batches
+
+    def _flush(self, batch):
+        """Deliver the batch to the UI thread."""
+        if batch and not self.cancelled:
+            self.batches.put(batch)
+            self.signals.batch_ready.emit()
+
+    def run(self):
+        """Collect the results."""
+        batch = []
+        last_flush = time.monotonic()
+        try:
+            for result in self.iterate():
+                if self.cancelled:
+                    return
+                batch.append(result)
+                if (
+                    len(batch) >= self.batch_size
+                    or time.monotonic() - last_flush > self.batch_interval
+                ):
+                    self._flush(batch)
+                    batch = []
+                    last_flush = time.monotonic()
+            self._flush(batch)
+        except Exception as exc:  # pylint: disable=broad-except
+            self.error = exc
+            LOG.error(f"{type(self).__name__} failed: {exc}")
+        finally:
+            self.done.set()
+            self.signals.finished.emit()
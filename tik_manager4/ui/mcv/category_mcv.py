@@ -2,6 +2,7 @@
 # pylint: disable=super-with-arguments
 
 from datetime import datetime
+from pathlib import Path
 
 from tik_manager4.core.constants import ObjectType
 from tik_manager4.ui.Qt import QtWidgets, QtCore, QtGui
@@ -9,9 +10,14 @@ from tik_manager4.ui.dialog.feedback import Feedback
 from tik_manager4.ui.dialog.work_dialog import NewVersionDialog
 from tik_manager4.ui.widgets.common import HorizontalSeparator, TikIconButton
 from tik_manager4.ui.mcv.filter import FilterModel, FilterWidget
+from tik_manager4.ui.mcv.batch_worker import BatchWorker, thread_pool
 
 from tik_manager4.ui import pick
 
+# thread pool priorities of the work scans
+ACTIVE_PRIORITY = 1
+PREFETCH_PRIORITY = 0
+
 
 class TikWorkItem(QtGui.QStandardItem):
     """Custom QStandardItem for the work items in the category view."""
@@ -207,14 +213,10 @@ class TikCategoryModel(QtGui.QStandardItemModel):
                 in the model.
         """
         _item = TikPublishItem(publish)
-        pid = TikCategoryColumnItem(str(publish.publish_id))
-        path = TikCategoryColumnItem(publish.path)
-        creator = TikCategoryColumnItem("NA")
-        dcc = TikCategoryColumnItem(publish.dcc)
-        date = TikCategoryColumnItem("NA")
-        version_count = TikCategoryColumnItem(str(publish.version_count))
-
-        self.appendRow([_item, pid, path, creator, dcc, date, version_count])
+        self.appendRow(
+            [_item]
+            + [TikCategoryColumnItem(text) for text in self.publish_columns(publish)]
+        )
 
         return _item
 
@@ -228,19 +230,74 @@ class TikCategoryModel(QtGui.QStandardItemModel):
                 in the model.
         """
         _item = TikWorkItem(work)
-        pid = TikCategoryColumnItem(str(work.id))
-        path = TikCategoryColumnItem(work.path)
-        creator = TikCategoryColumnItem(work.creator)
-        dcc = TikCategoryColumnItem(work.dcc)
-        date = TikCategoryColumnItem(
-            datetime.fromtimestamp(work.date_modified).strftime("%Y/%m/%d %H:%M:%S")
+        self.appendRow(
+            [_item]
+            + [TikCategoryColumnItem(text) for text in self.work_columns(work)]
         )
-        version_count = TikCategoryColumnItem(str(work.version_count))
-
-        self.appendRow([_item, pid, path, creator, dcc, date, version_count])
 
         return _item
 
+    @staticmethod
+    def publish_columns(publish):
+        """Return the texts of the publish after the name column."""
+        return [
+            str(publish.publish_id),
+            publish.path,
+            "NA",
+            publish.dcc,
+            "NA",
+            str(publish.version_count),
+        ]
+
+    @staticmethod
+    def work_columns(work):
+        """Return the texts of the work after the name column."""
+        return [
+            str(work.id),
+            work.path,
+            work.creator,
+            work.dcc,
+            datetime.fromtimestamp(work.date_modified).strftime("%Y/%m/%d %H:%M:%S"),
+            str(work.version_count),
+        ]
+
+    def update_items(self, tik_objects, publishes=False):
+        """Update the rows to the current works or publishes.
+
+        Rows of the removed objects are removed, the others are refreshed
+        in place and the new objects are appended.
+
+        Args:
+            tik_objects (list): Current work or publish objects.
+            publishes (bool, optional): If True, the objects are publishes.
+        """
+        # the id column identifies the rows
+        objects_by_id = {
+            str(obj.publish_id if publishes else obj.id): obj for obj in tik_objects
+        }
+        for row in reversed(range(self.rowCount())):
+            item = self.item(row)
+            tik_obj = objects_by_id.pop(self.item(row, 1).text(), None)
+            if tik_obj is None:
+                self.removeRow(row)
+                continue
+            item.tik_obj = tik_obj
+            item.refresh()
+            texts = (
+                self.publish_columns(tik_obj)
+                if publishes
+                else self.work_columns(tik_obj)
+            )
+            for column, text in enumerate(texts, 1):
+                column_item = self.item(row, column)
+                if column_item.text() != text:
+                    column_item.setText(text)
+        for tik_obj in objects_by_id.values():
+            if publishes:
+                self.append_publish(tik_obj)
+            else:
+                self.append_work(tik_obj)
+
 
 class TikCategoryView(QtWidgets.QTreeView):
     """Custom QTreeView for the category view."""
@@ -745,9 +802,38 @@ class TikCategoryView(QtWidgets.QTreeView):
         return
 
 
+class WorkScan(BatchWorker):
+    """Read the works of a category in a worker thread.
+
+    The category is not changed by the worker, the read works are
+    committed in the UI thread.
+    """
+
+    batch_size = 20
+
+    def __init__(self, category):
+        """Initialize the scan.
+
+        Args:
+            category (tik_manager4.objects.category.Category): The category
+                to scan.
+        """
+        super(WorkScan, self).__init__()
+        self.category = category
+        # the works committed in the UI thread so far
+        self.results = []
+        self.committed = False
+
+    def iterate(self):
+        """Yield the read works of the category."""
+        return self.category.iter_works()
+
+
 class TikCategoryLayout(QtWidgets.QVBoxLayout):
     """Custom QVBoxLayout for the category layout."""
     mode_changed = QtCore.Signal(int)
+    # emitted with the error message if the works cannot be loaded
+    scan_failed = QtCore.Signal(str)
 
     def __init__(self, *args, **kwargs):
         """Initialize the layout."""
@@ -819,6 +905,11 @@ class TikCategoryLayout(QtWidgets.QVBoxLayout):
 
         self.pre_tab = None
 
+        # works of the active tab are loaded first, others are prefetched
+        self._work_pool = thread_pool("works", 2)
+        self._work_scans = {}
+        self._work_update = None
+
         self.refresh_btn.clicked.connect(self.refresh)
 
     def get_active_category(self):
@@ -853,6 +944,7 @@ class TikCategoryLayout(QtWidgets.QVBoxLayout):
         if not task:
             self.clear()
             return
+        self.cancel_scans()
         self.task = task
         self.populate_categories(self.task.categories)
 
@@ -860,7 +952,10 @@ class TikCategoryLayout(QtWidgets.QVBoxLayout):
         idx = self.get_category_index()
         self.category_tab_widget.setCurrentIndex(idx)
         self.on_category_change(idx)
-        self.work_tree_view.expandAll()
+        # warm up the other categories for the tab switches
+        for key in self.task.categories:
+            if key not in self._work_scans:
+                self._start_scan(key, PREFETCH_PRIORITY)
 
     def populate_categories(self, categories):
         """Populate the layout with categories.
@@ -870,8 +965,7 @@ class TikCategoryLayout(QtWidgets.QVBoxLayout):
         # clear the layout
         self.category_tab_widget.blockSignals(True)
         self.category_tab_widget.clear()
-        for key, category in categories.items():
-            category.scan_works()
+        for key in categories:
             self.pre_tab = QtWidgets.QWidget()
             self.pre_tab.setObjectName(key)
             self.category_tab_widget.addTab(self.pre_tab, key)
@@ -900,16 +994,174 @@ class TikCategoryLayout(QtWidgets.QVBoxLayout):
         self._last_category = self.category_tab_widget.tabText(index)
         if not self._last_category:
             return
-        works = self.task.categories[self._last_category].works
-        if self.mode == 0 and self._last_category:
-            self.work_tree_view.model.set_works(works.values())
+        self.cancel_work_update()
+        self.work_tree_view.model.clear()
+        scan = self._work_scans.get(self._last_category)
+        if scan and not scan.done.is_set():
+            # a prefetch is still in flight, move it to the front if it is waiting
+            if scan.take(self._work_pool):
+                scan.start(self._work_pool, ACTIVE_PRIORITY)
+            self._append_works(scan.results)
         else:
-            _publishes = [
-                work_obj.publish
-                for work_obj in works.values()
-                if work_obj.publish.versions
-            ]
-            self.work_tree_view.model.set_publishes(_publishes)
+            # the works of a prefetched category are only checked for changes
+            self._start_scan(self._last_category, ACTIVE_PRIORITY)
+
+    def _start_scan(self, key, priority):
+        """Start loading the works of the category in the background.
+
+        Args:
+            key (str): The category name.
+            priority (int): The thread pool priority.
+        """
+        scan = WorkScan(self.task.categories[key])
+        scan.signals.batch_ready.connect(self._on_work_batch)
+        scan.signals.finished.connect(self._on_work_scan_finished)
+        self._work_scans[key] = scan
+        scan.start(self._work_pool, priority)
+
+    def _find_scan(self, signals):
+        """Return the category name and the scan of the given signals."""
+        for key, scan in self._work_scans.items():
+            if scan.signals is signals:
+                return key, scan
+        return None, None
+
+    def _on_work_batch(self):
+        """Take the works loaded by the sender scan."""
+        key, scan = self._find_scan(self.sender())
+        if scan:
+            self._deliver_works(key, scan)
+
+    def _on_work_scan_finished(self):
+        """Take the remaining works of the sender scan."""
+        key, scan = self._find_scan(self.sender())
+        if scan:
+            self._finish_works(key, scan)
+
+    def _deliver_works(self, key, scan):
+        """Commit the read works and show them if the category is active."""
+        for batch in scan.take_batches():
+            works = scan.category.commit_works(batch)
+            scan.results.extend(works)
+            if key == self._last_category:
+                self._append_works(works)
+
+    def _finish_works(self, key, scan):
+        """Commit the remaining works and remove the deleted ones."""
+        self._deliver_works(key, scan)
+        if scan.committed:
+            return
+        scan.committed = True
+        if scan.error:
+            self.scan_failed.emit(f"Works cannot be loaded: {scan.error}")
+            return
+        scan.category.commit_works(scan.results, prune=True)
+        if key == self._last_category:
+            self.work_tree_view.expandAll()
+
+    def _append_works(self, works):
+        """Append the works or their publishes to the model by the mode."""
+        if not works:
+            return
+        model = self.work_tree_view.model
+        for work_obj in works:
+            if self.mode == 0:
+                model.append_work(work_obj)
+            elif work_obj.publish.versions:
+                model.append_publish(work_obj.publish)
+        self.work_tree_view.resizeColumnToContents(0)
+
+    def get_watch_paths(self):
+        """Return the database folders holding the works of the active category.
+
+        The task folder is included to notice the creation of the
+        category folder.
+        """
+        category = self.get_active_category()
+        if not category:
+            return []
+        category_path = Path(category.get_abs_database_path())
+        paths = [category_path.parent, category_path]
+        if category_path.is_dir():
+            # works are kept in the dcc folders of the category
+            paths.extend(path for path in category_path.iterdir() if path.is_dir())
+        return paths
+
+    def update_works(self):
+        """Rescan the active category in the background.
+
+        The changed rows are updated once the scan is finished.
+        """
+        category = self.get_active_category()
+        if not category:
+            return
+        scan = self._work_scans.get(self._last_category)
+        if scan and not scan.done.is_set():
+            # the scan may have missed the change, start it over
+            scan.cancel()
+            scan.take(self._work_pool)
+            self._work_scans.pop(self._last_category)
+            self.on_category_change(self.category_tab_widget.currentIndex())
+            return
+        self.cancel_work_update()
+        scan = WorkScan(category)
+        scan.signals.finished.connect(self._on_work_update_finished)
+        self._work_update = scan
+        scan.start(self._work_pool, ACTIVE_PRIORITY)
+
+    def cancel_work_update(self):
+        """Cancel the running rescan of the active category."""
+        if self._work_update:
+            self._work_update.cancel()
+            self._work_update.take(self._work_pool)
+            self._work_update = None
+
+    def _on_work_update_finished(self):
+        """Commit the rescanned works and update the changed rows."""
+        scan = self._work_update
+        if not scan or self.sender() is not scan.signals:
+            return
+        self._work_update = None
+        if scan.error:
+            self.scan_failed.emit(f"Works cannot be updated: {scan.error}")
+            return
+        works = [work for batch in scan.take_batches() for work in batch]
+        works = scan.category.commit_works(works, prune=True)
+        if self.mode == 0:
+            self.work_tree_view.model.update_items(works)
+        else:
+            self.work_tree_view.model.update_items(
+                [work.publish for work in works if work.publish.versions],
+                publishes=True,
+            )
+
+    def cancel_scans(self):
+        """Cancel the work scans of the current task."""
+        self.cancel_work_update()
+        for scan in self._work_scans.values():
+            scan.cancel()
+            scan.take(self._work_pool)
+        self._work_scans = {}
+
+    def wait_for_works(self, timeout=None):
+        """Block until the works of the active category are loaded.
+
+        Args:
+            timeout (float, optional): Maximum seconds to wait.
+
+        Returns:
+            bool: True if the works are loaded.
+        """
+        scan = self._work_scans.get(self._last_category)
+        if not scan:
+            return True
+        if scan.take(self._work_pool):
+            # do not wait behind the prefetches
+            scan.start(self._work_pool, ACTIVE_PRIORITY)
+        if not scan.done.wait(timeout):
+            return False
+        self._finish_works(self._last_category, scan)
+        return True
 
     def refresh(self):
         """Refresh the current category."""
@@ -918,6 +1170,7 @@ class TikCategoryLayout(QtWidgets.QVBoxLayout):
 
     def clear(self):
         """Refresh the layout."""
+        self.cancel_scans()
         self.category_tab_widget.blockSignals(True)
         self.category_tab_widget.clear()
         self.work_tree_view.model.clear()
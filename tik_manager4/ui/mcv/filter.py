@@ -3,17 +3,81 @@ Based on the original code from
 https://github.com/minimalefforttech
 """
 
+from array import array
+from collections import Counter
 from difflib import SequenceMatcher
+from itertools import repeat
+from operator import add, mul, truediv
 
 from tik_manager4.ui.widgets.common import TikIconButton
 
 from tik_manager4.ui.Qt import QtWidgets, QtCore, QtGui
 
+# wait for the user to stop typing before filtering
+DEBOUNCE_MS = 150
+
+
+class FuzzyIndex:
+    """Character count index of the row texts.
+
+    The quick_ratio of difflib only depends on the character counts of the
+    two strings, so it can be computed for all texts at once from the count
+    columns of the characters in the query.
+    """
+
+    def __init__(self, texts):
+        """Build the index.
+
+        Args:
+            texts (iterable): The lower case row texts. Duplicates are
+                indexed once.
+        """
+        self.texts = list(dict.fromkeys(texts))
+        self._lengths = array("L", map(len, self.texts))
+        self._counts = {}
+        size = len(self.texts)
+        for row, text in enumerate(self.texts):
+            for char, count in Counter(text).items():
+                column = self._counts.get(char)
+                if column is None:
+                    column = self._counts[char] = array("L", [0]) * size
+                column[row] = count
+
+    def __len__(self):
+        return len(self.texts)
+
+    def score(self, query):
+        """Return the quick_ratio of the query against all the texts.
+
+        Args:
+            query (str): The lower case query.
+
+        Returns:
+            dict: Ratios by the texts.
+        """
+        size = len(self.texts)
+        if not query or not size:
+            return dict.fromkeys(self.texts, 0.0)
+        matches = repeat(0, size)
+        for char, count in Counter(query).items():
+            column = self._counts.get(char)
+            if column is not None:
+                matches = map(add, matches, map(min, column, repeat(count)))
+        ratios = map(
+            truediv,
+            map(mul, matches, repeat(2.0)),
+            map(add, self._lengths, repeat(len(query))),
+        )
+        return dict(zip(self.texts, ratios))
+
+
 class FilterModel(QtCore.QSortFilterProxyModel):
     """A simple filter model based on sequencematcher quick_ratio.
     ratio is 0-1 value for a match.
-    Note: This is not performant, it is an example, ideally you would look into precaching or difflib.get_close_matches() for many items
-    https://docs.python.org/3/library/difflib.html
+
+    The row texts are indexed once per population of the source model and
+    all rows are scored once per filter change. Filtering and sorting read
+    the cached scores. Filter changes are debounced.
     """
 
     def __init__(self, ratio: float = 0.6, parent=None):
@@ -21,22 +85,121 @@ class FilterModel(QtCore.QSortFilterProxyModel):
         self._filter_text = ""
         self._ratio = ratio
         self._show_all = False
+        self._index = None
+        self._row_texts = None
+        self._scores = {}
+        self._row_scores = {}
+        self._scored_text = None
+        self._timer = QtCore.QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(DEBOUNCE_MS)
+        self._timer.timeout.connect(self.apply_filter)
         self.sort(0, QtCore.Qt.AscendingOrder)
 
+    def setSourceModel(self, source_model):
+        """Set the source model and track its changes for the index."""
+        previous_model = self.sourceModel()
+        if previous_model:
+            for signal in self._source_signals(previous_model):
+                try:
+                    signal.disconnect(self._on_source_changed)
+                except (RuntimeError, TypeError):
+                    pass
+        super().setSourceModel(source_model)
+        self._on_source_changed()
+        if source_model:
+            for signal in self._source_signals(source_model):
+                signal.connect(self._on_source_changed)
+
+    @staticmethod
+    def _source_signals(source_model):
+        """Return the signals changing the texts of the source model."""
+        return (
+            source_model.modelReset,
+            source_model.layoutChanged,
+            source_model.rowsInserted,
+            source_model.rowsRemoved,
+            source_model.dataChanged,
+        )
+
+    def _on_source_changed(self, *_args):
+        """Rebuild the index on the next filter change.
+
+        Until then, the rows are looked up by their texts.
+        """
+        self._index = None
+        self._row_texts = None
+        self._row_scores = {}
+
+    @staticmethod
+    def _get_key(index):
+        """Return the lookup key of the source index."""
+        return index.row(), index.internalId()
+
+    def _collect_texts(self):
+        """Return the lower case texts of the first column by the row keys."""
+        model = self.sourceModel()
+        texts = {}
+        parents = [QtCore.QModelIndex()]
+        while parents:
+            parent = parents.pop()
+            for row in range(model.rowCount(parent)):
+                index = model.index(row, 0, parent)
+                texts[self._get_key(index)] = (index.data() or "").lower()
+                if model.hasChildren(index):
+                    parents.append(index)
+        return texts
+
+    def get_score(self, text: str) -> float:
+        """Return the cached ratio of the lower case text.
+
+        Texts added to the source model after the last scoring are scored
+        on demand.
+        """
+        score = self._scores.get(text)
+        if score is None:
+            score = (
+                SequenceMatcher(None, self._filter_text, text).quick_ratio()
+                if text and self._filter_text
+                else 0.0
+            )
+            self._scores[text] = score
+        return score
+
+    @QtCore.Slot()
+    def apply_filter(self):
+        """Score the rows for the current filter text and filter the model."""
+        self._timer.stop()
+        if self._filter_text != self._scored_text or (
+            self._filter_text and self._index is None
+        ):
+            self._scores = {}
+            self._row_scores = {}
+            if self._filter_text and self.sourceModel():
+                if self._index is None:
+                    self._row_texts = self._collect_texts()
+                    self._index = FuzzyIndex(self._row_texts.values())
+                self._scores = self._index.score(self._filter_text)
+                self._row_scores = {
+                    key: self._scores[text] for key, text in self._row_texts.items()
+                }
+            self._scored_text = self._filter_text
+        self.invalidate()
+
     @QtCore.Slot(str)
     def set_filter_text(self, text: str):
         self._filter_text = str(text).lower()
-        self.invalidate()
+        self._timer.start()
 
     @QtCore.Slot(float)
     def set_ratio(self, ratio: float):
         self._ratio = float(ratio)
-        self.invalidate()
+        self._timer.start()
 
     @QtCore.Slot(bool)
     def set_show_all(self, show_all: bool):
         self._show_all = bool(show_all)
-        self.invalidate()
+        self._timer.start()
 
     def filterAcceptsColumn(
         self, source_column: int, source_parent: QtCore.QModelIndex
@@ -51,33 +214,26 @@ class FilterModel(QtCore.QSortFilterProxyModel):
             return True
 
         # Case-insensitive
-        text = (
-            self.sourceModel().index(source_row, 0, source_parent).data() or ""
-        ).lower()
+        index = self.sourceModel().index(source_row, 0, source_parent)
+        text = self._row_texts.get(self._get_key(index)) if self._row_texts else None
+        if text is None:
+            text = (index.data() or "").lower()
         if not text:
             return False
         if self._filter_text in text:
             return True
-        # First parameter is optional filtering of "junk" text like spaces, default is usually fine.
-        # ratio is more accurate but doesn't provide much in this context, real_quick_ratio is not accurate enough.
-        ratio = SequenceMatcher(None, self._filter_text, text).quick_ratio()
-        # ratio = get_close_matches(self._filter_text, [text], 1, self._ratio)
-        return ratio >= self._ratio
+        return self.get_score(text) >= self._ratio
 
     def lessThan(self, left: QtCore.QModelIndex, right: QtCore.QModelIndex) -> bool:
         if not self._filter_text or self._show_all:
             return left.row() < right.row()
 
-        left_ratio = (
-            SequenceMatcher(None, self._filter_text, left.data().lower()).quick_ratio()
-            if left.data()
-            else 0.0
-        )
-        right_ratio = (
-            SequenceMatcher(None, self._filter_text, right.data().lower()).quick_ratio()
-            if right.data()
-            else 0.0
-        )
+        left_ratio = self._row_scores.get(self._get_key(left))
+        if left_ratio is None:
+            left_ratio = self.get_score((left.data() or "").lower())
+        right_ratio = self._row_scores.get(self._get_key(right))
+        if right_ratio is None:
+            right_ratio = self.get_score((right.data() or "").lower())
         # Sort text ascending so ratio is flipped
         return left_ratio > right_ratio
 
@@ -88,7 +244,7 @@ class FilterModel(QtCore.QSortFilterProxyModel):
         # Get and normalize text for comparison
         filter_text = self._filter_text or ""
         index_text = (super().data(index, QtCore.Qt.DisplayRole) or "").lower()
-        ratio = SequenceMatcher(None, filter_text, index_text).quick_ratio()
+        ratio = self.get_score(index_text)
 
         # if ratio < self._ratio:
         if ratio < self._ratio and filter_text:
@@ -157,7 +313,7 @@ class FilterWidget(QtWidgets.QWidget):
 
         self.ratio_slider = QtWidgets.QSlider(QtCore.Qt.Horizontal)
         self.ratio_slider.setRange(1, 100)
-        self.ratio_slider.setSingleStep(0.1)
+        self.ratio_slider.setSingleStep(1)
         self.ratio_slider.setValue(60)
         self.ratio_slider.setToolTip("Ratio")
         self.adv_lay.addWidget(self.ratio_slider)
@@ -169,6 +325,7 @@ class FilterWidget(QtWidgets.QWidget):
 
         # SIGNALS
         self.filter_le.textChanged.connect(self._filter_model.set_filter_text)
+        self.filter_le.returnPressed.connect(self._filter_model.apply_filter)
         self.show_all_cb.toggled.connect(self._filter_model.set_show_all)
         self.ratio_slider.valueChanged.connect(self.on_set_ratio)
         self.adv_button.clicked.connect(self.toggle_advanced)
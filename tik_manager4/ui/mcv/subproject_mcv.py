@@ -3,176 +3,351 @@ import tik_manager4.ui.dialog.subproject_dialog
 import tik_manager4.ui.dialog.task_dialog
 from tik_manager4.ui.widgets.common import HorizontalSeparator, TikIconButton
 from tik_manager4.ui.mcv.filter import FilterModel, FilterWidget
+from tik_manager4.ui.mcv.batch_worker import BatchWorker, thread_pool
 from tik_manager4.ui.dialog.feedback import Feedback
 import tik_manager4
 from tik_manager4.ui import pick
 
 
-class TikSubItem(QtGui.QStandardItem):
-    def __init__(self, sub_obj):
-        super(TikSubItem, self).__init__()
+class TikSubItem:
+    """Node of the subproject tree.
 
+    The child nodes are created when the model fetches them.
+    """
+
+    def __init__(self, sub_obj, parent=None, row=0):
         self.subproject = sub_obj
+        self._parent = parent
+        self._row = row
+        self.children = []
+        self.fetched = False
 
-        # test
-        icon_name = self.subproject.metadata.get_value("mode", fallback_value="global")
-        icon = pick.icon("{}.png".format(icon_name))
-        self.setIcon(icon)
-        #
-        fnt = QtGui.QFont("Open Sans", 12)
-        fnt.setBold(False)
-        self.setEditable(False)
-        self.setForeground(QtGui.QColor(255, 255, 255))
-        self.setFont(fnt)
-        self.setText(sub_obj.name)
-
-
-class TikColumnItem(QtGui.QStandardItem):
-    def __init__(self, name, overridden=False):
-        super(TikColumnItem, self).__init__()
-
-        self.setEditable(False)
-        self.setText(name)
-        self.set_overridden(overridden)
-
-    def set_value(self, value):
-        self.setText(str(value))
-
-    def set_overridden(self, value):
-        if value:
-            self.tag_overridden()
-        else:
-            self.tag_normal()
+    def parent(self):
+        """Return the parent node or None for the top level nodes."""
+        return self._parent
+
+    def row(self):
+        """Return the row of the node under its parent."""
+        return self._row
 
-    def tag_overridden(self):
-        fnt = QtGui.QFont("Open Sans", 10)
-        fnt.setBold(False)
-        # make it yellow
-        self.setForeground(QtGui.QColor(255, 255, 0))
-        self.setFont(fnt)
+    def renumber(self, start=0):
+        """Update the rows of the child nodes after the start row."""
+        for row in range(start, len(self.children)):
+            self.children[row]._row = row
 
-    def tag_normal(self):
-        fnt = QtGui.QFont("Open Sans", 10)
-        fnt.setBold(False)
-        self.setFont(fnt)
+    def can_fetch_more(self):
+        """Return True if the child nodes are not created yet."""
+        return not self.fetched and bool(self.subproject.subs)
 
 
-class TikSubModel(QtGui.QStandardItemModel):
+class TikSubModel(QtCore.QAbstractItemModel):
+    """Lazy model of the subproject tree.
+
+    The rows under a subproject are created when the view expands it and the
+    column values are read from the subproject objects on demand.
+    """
+
     def __init__(self, structure_object):
         super(TikSubModel, self).__init__()
-        self.columns = ["name", "id", "path"] + list(
-            structure_object.metadata_definitions.properties.keys()
-        )
-        self.setHorizontalHeaderLabels(self.columns)
-
+        self.columns = []
         self.project = None
         self.root_item = None
+        # invisible node holding the project root row
+        self._top = TikSubItem(None)
+        self._top.fetched = True
+        self._icons = {}
+        self._name_font = QtGui.QFont("Open Sans", 12)
+        self._column_font = QtGui.QFont("Open Sans", 10)
         self.set_data(structure_object)
 
     def set_data(self, structure_object):
         self.project = structure_object
+        self.columns = self._get_columns()
+
+    def _get_columns(self):
+        """Return the column names from the metadata definitions."""
+        return ["name", "id", "path"] + list(
+            self.project.metadata_definitions.properties.keys()
+        )
 
     def populate(self):
-        self.setRowCount(0)
-        visited = []
-        queue = []
-
-        # start with the initial dictionary with self subproject
-        all_data = {
-            "id": self.project.id,
-            "name": self.project.name,
-            "path": self.project.path,
-            "tasks": self.project.tasks,
-            "subs": [],  # this will be filled with the while loop
-        }
-
-        # add the initial dictionary and self into the queue
-        # Each queue item is a list.
-        # first element is the dictionary point and second is the subproject object
-        parent_row = self
-        self.root_item = TikSubItem(self.project)
-        # make the self.root_item invisible
-        self.root_item.setForeground(QtGui.QColor(0, 0, 0, 0))
-        self.root_item.setText("Project Root")
-        parent_row.appendRow(self.root_item)
-        queue.append([all_data, self.project, self.root_item])
+        """Reset the model to the project root row."""
+        self.beginResetModel()
+        self.columns = self._get_columns()
+        self.root_item = TikSubItem(self.project, parent=None)
+        self._top.children = [self.root_item]
+        self.endResetModel()
 
+    def refresh(self):
+        """Update the created rows from the project without resetting the model.
+
+        Rows of the removed subprojects are removed, new subprojects are
+        appended to their fetched parents and the values of the rest are
+        updated in place. The model is reset only if the project or the
+        metadata definitions are changed.
+        """
+        if (
+            self.root_item is None
+            or self.root_item.subproject.id != self.project.id
+            or self.columns != self._get_columns()
+        ):
+            self.populate()
+            return
+        self._sync(self.root_item, self.project)
+
+    def _sync(self, item, sub_obj):
+        """Update the item and its fetched children from the subproject."""
+        item.subproject = sub_obj
+        index = self.indexFromItem(item)
+        self.dataChanged.emit(
+            index, index.sibling(index.row(), len(self.columns) - 1)
+        )
+        if not item.fetched:
+            return
+        subs = {sub.id: sub for sub in sub_obj.subs.values()}
+        for row in reversed(range(len(item.children))):
+            if item.children[row].subproject.id not in subs:
+                self.beginRemoveRows(index, row, row)
+                del item.children[row]
+                item.renumber(row)
+                self.endRemoveRows()
+        existing = set()
+        for child in item.children:
+            existing.add(child.subproject.id)
+            self._sync(child, subs[child.subproject.id])
+        for uid, sub in subs.items():
+            if uid not in existing:
+                self.append_sub(sub, item)
+
+    def fetch_all(self):
+        """Create all the rows of the tree."""
+        queue = [self.root_item] if self.root_item else []
         while queue:
-            current = queue.pop(0)
-            parent = current[0]
-            sub = current[1]
-            parent_row = current[2]
-
-            for neighbour in list(sub.subs.values()):
-                if neighbour not in visited:
-                    sub_data = {
-                        "id": neighbour.id,
-                        "name": neighbour.name,
-                        "path": neighbour.path,
-                        "tasks": neighbour.tasks,
-                        "subs": [],  # this will be filled with the while loop
-                    }
-                    parent["subs"].append(sub_data)
-                    _item = self.append_sub(neighbour, parent_row)
-
-                    # add tasks
-                    visited.append(neighbour)
-                    queue.append([sub_data, neighbour, _item])
-
-        return all_data
+            item = queue.pop()
+            if item.can_fetch_more():
+                self.fetchMore(self.indexFromItem(item))
+            queue.extend(item.children)
 
     def append_sub(self, sub_obj, parent):
-        _sub_item = TikSubItem(sub_obj)
-        # generate the column texts
-        # name, id and path are mandatory, start with them
-        _row = [_sub_item, TikColumnItem(str(sub_obj.id)), TikColumnItem(sub_obj.path)]
-        for column in self.columns[3:]:  # skip the first 3 columns which are mandatory
-            # get the override status
-            _column_value = sub_obj.metadata.get_value(column, "")
-            _overridden = sub_obj.metadata.is_overridden(column)
-            _column_item = TikColumnItem(str(_column_value), _overridden)
-            _row.append(_column_item)
-
-        parent.appendRow(_row)
+        """Append a row for the subproject under the parent item.
+
+        Args:
+            sub_obj (Subproject): The new subproject.
+            parent (TikSubItem): The parent item.
+
+        Returns:
+            TikSubItem: The created item or None if the parent rows are not
+                fetched yet. They will be created with the new subproject.
+        """
+        if not parent.fetched:
+            # let the view know that the parent has children now
+            parent_index = self.indexFromItem(parent)
+            self.dataChanged.emit(parent_index, parent_index)
+            return None
+        _row = len(parent.children)
+        self.beginInsertRows(self.indexFromItem(parent), _row, _row)
+        _sub_item = TikSubItem(sub_obj, parent=parent, row=_row)
+        parent.children.append(_sub_item)
+        self.endInsertRows()
         return _sub_item
 
+    def remove_item(self, item):
+        """Remove the row of the item."""
+        _parent = item.parent() or self._top
+        _row = item.row()
+        self.beginRemoveRows(self.indexFromItem(_parent), _row, _row)
+        del _parent.children[_row]
+        _parent.renumber(_row)
+        self.endRemoveRows()
+
     def update_item(self, item, sub_obj):
         """Update the item with the new subproject object"""
         item.subproject = sub_obj
-        item.setText(sub_obj.name)
+        index = self.indexFromItem(item)
+        self.dataChanged.emit(
+            index, index.sibling(index.row(), len(self.columns) - 1)
+        )
 
-        # get the parent item
-        _parent = item.parent()
+    def find_item_by_id_column(self, unique_id):
+        """Find the item of the subproject, fetching the rows on its path."""
+        if self.root_item is None:
+            return None
+        sub = self.project.find_sub_by_id(unique_id)
+        if sub == -1:
+            return None
+        lineage = []
+        while sub is not None and sub.id != self.project.id:
+            lineage.insert(0, sub.id)
+            sub = sub.parent
+        item = self.root_item
+        for uid in lineage:
+            if item.can_fetch_more():
+                self.fetchMore(self.indexFromItem(item))
+            item = next(
+                (child for child in item.children if child.subproject.id == uid), None
+            )
+            if item is None:
+                return None
+        return item
 
-        # get the row of the item
-        _row = item.row()
+    def iter_items(self):
+        """Yield the created items of the tree."""
+        queue = [self.root_item] if self.root_item else []
+        while queue:
+            item = queue.pop(0)
+            yield item
+            queue.extend(item.children)
+
+    def itemFromIndex(self, index):
+        """Return the item of the index or None for an invalid index."""
+        if not index.isValid():
+            return None
+        return index.internalPointer()
+
+    def indexFromItem(self, item):
+        """Return the first column index of the item."""
+        if item is None or item is self._top:
+            return QtCore.QModelIndex()
+        return self.createIndex(item.row(), 0, item)
+
+    def _get_item(self, index):
+        """Return the item of the index or the invisible top node."""
+        return index.internalPointer() if index.isValid() else self._top
+
+    def index(self, row, column, parent=QtCore.QModelIndex()):
+        if not self.hasIndex(row, column, parent):
+            return QtCore.QModelIndex()
+        return self.createIndex(row, column, self._get_item(parent).children[row])
+
+    def parent(self, index=QtCore.QModelIndex()):
+        if not index.isValid():
+            return QtCore.QModelIndex()
+        _parent = index.internalPointer().parent()
+        if _parent is None:
+            return QtCore.QModelIndex()
+        return self.createIndex(_parent.row(), 0, _parent)
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        if parent.column() > 0:
+            return 0
+        return len(self._get_item(parent).children)
+
+    def columnCount(self, parent=QtCore.QModelIndex()):
+        return len(self.columns)
+
+    def hasChildren(self, parent=QtCore.QModelIndex()):
+        if parent.column() > 0:
+            return False
+        item = self._get_item(parent)
+        return bool(item.children) or item.can_fetch_more()
+
+    def canFetchMore(self, parent):
+        if not parent.isValid():
+            return False
+        return parent.internalPointer().can_fetch_more()
+
+    def fetchMore(self, parent):
+        if not parent.isValid():
+            return
+        item = parent.internalPointer()
+        if not item.can_fetch_more():
+            return
+        subs = list(item.subproject.subs.values())
+        self.beginInsertRows(parent, 0, len(subs) - 1)
+        item.children = [
+            TikSubItem(sub, parent=item, row=row) for row, sub in enumerate(subs)
+        ]
+        item.fetched = True
+        self.endInsertRows()
+
+    def headerData(self, section, orientation, role=QtCore.Qt.DisplayRole):
+        if (
+            orientation == QtCore.Qt.Horizontal
+            and role == QtCore.Qt.DisplayRole
+            and section < len(self.columns)
+        ):
+            return self.columns[section]
+        return None
 
-        for index, column in enumerate(self.columns):
-            if _parent:
-                _column_item = _parent.child(_row, index)
-            else:
-                _column_item = self.item(_row, index)
-            if isinstance(_column_item, TikColumnItem):
-                _column_value = sub_obj.metadata.get_value(column, "")
-                _overridden = sub_obj.metadata.is_overridden(column)
-                _column_item.set_overridden(_overridden)
-                _column_item.set_value(str(_column_value))
+    def flags(self, index):
+        if not index.isValid():
+            return QtCore.Qt.NoItemFlags
+        return QtCore.Qt.ItemIsEnabled | QtCore.Qt.ItemIsSelectable
+
+    def data(self, index, role=QtCore.Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        item = index.internalPointer()
+        sub_obj = item.subproject
+        column = index.column()
+        if role == QtCore.Qt.DisplayRole:
+            if column == 0:
+                return "Project Root" if item is self.root_item else sub_obj.name
+            if column == 1:
+                return str(sub_obj.id)
+            if column == 2:
+                return sub_obj.path
+            return str(sub_obj.metadata.get_value(self.columns[column], ""))
+        if role == QtCore.Qt.DecorationRole and column == 0:
+            return self._get_icon(
+                sub_obj.metadata.get_value("mode", fallback_value="global")
+            )
+        if role == QtCore.Qt.ForegroundRole:
+            if column == 0:
+                # make the root item invisible
+                alpha = 0 if item is self.root_item else 255
+                return QtGui.QColor(255, 255, 255, alpha)
+            if column > 2 and sub_obj.metadata.is_overridden(self.columns[column]):
+                return QtGui.QColor(255, 255, 0)
+            return None
+        if role == QtCore.Qt.FontRole:
+            return self._name_font if column == 0 else self._column_font
+        return None
 
-    def find_item_by_id_column(self, unique_id):
-        """Search entire tree and find the matching item."""
+    def _get_icon(self, icon_name):
+        """Return the cached icon of the subproject mode."""
+        icon = self._icons.get(icon_name)
+        if icon is None:
+            icon = self._icons[icon_name] = pick.icon("{}.png".format(icon_name))
+        return icon
 
-        # get EVERY item in this model
-        _all_items = self.findItems(
-            "*", QtCore.Qt.MatchWildcard | QtCore.Qt.MatchRecursive
-        )
-        for x in _all_items:
-            if isinstance(x, TikSubItem):
-                if x.subproject.id == unique_id:
-                    return x
+
+class TaskScan(BatchWorker):
+    """Read the tasks of the subprojects in a worker thread.
+
+    The subprojects are not changed by the worker. Each result is a
+    subproject with its read tasks, which are committed in the UI thread.
+    """
+
+    def __init__(self, sub_projects, recursive=False):
+        """Initialize the scan.
+
+        Args:
+            sub_projects (list): Subproject objects to scan.
+            recursive (bool): Scan the tasks of the child subprojects too.
+        """
+        super(TaskScan, self).__init__()
+        self.sub_projects = sub_projects
+        self.recursive = recursive
+
+    def iterate(self):
+        """Yield the subprojects and their read tasks."""
+        for sub in TikSubView.iter_subprojects(
+            self.sub_projects, recursive=self.recursive
+        ):
+            yield sub, sub.read_tasks()
 
 
 class TikSubView(QtWidgets.QTreeView):
-    item_selected = QtCore.Signal(object)
+    # emitted when the tasks of a new selection are started to be collected
+    task_scan_started = QtCore.Signal()
+    # emitted with the lists of collected tasks
+    tasks_added = QtCore.Signal(object)
+    # emitted with the current tasks of the rescanned subprojects
+    tasks_updated = QtCore.Signal(object, object)
+    busy_changed = QtCore.Signal(bool)
+    # emitted with the error message if the tasks cannot be collected
+    scan_failed = QtCore.Signal(str)
     add_item = QtCore.Signal(object)
 
     def __init__(self, project_obj=None, right_click_enabled=True):
@@ -184,6 +359,10 @@ class TikSubView(QtWidgets.QTreeView):
 
         self.model = None
         self.proxy_model = None
+        # scans run one at a time not to scan the same subproject in parallel
+        self._task_pool = thread_pool("tasks", 1)
+        self._task_scan = None
+        self._task_update = None
         if project_obj:
             self.set_project(project_obj)
 
@@ -198,6 +377,8 @@ class TikSubView(QtWidgets.QTreeView):
         self.header().customContextMenuRequested.connect(self.header_right_click_menu)
 
         self.setItemsExpandable(True)
+        # create the child rows even if the view is not laid out yet
+        self.expanded.connect(self.fetch_children)
 
         # show the root
         self.setRootIsDecorated(False)
@@ -232,6 +413,12 @@ class TikSubView(QtWidgets.QTreeView):
         else:
             super().mouseReleaseEvent(event)
 
+    def fetch_children(self, index):
+        """Create the child rows of the given view index."""
+        source_index = self.proxy_model.mapToSource(index)
+        if self.model.canFetchMore(source_index):
+            self.model.fetchMore(source_index)
+
     def expand_first_item(self):
         """Try to expand the first item in the tree"""
         index = self.proxy_model.mapFromSource(self.model.index(0, 0))
@@ -242,26 +429,9 @@ class TikSubView(QtWidgets.QTreeView):
         index = self.proxy_model.mapFromSource(self.model.index(0, 0))
         self.setCurrentIndex(index)
 
-    def find_items_in_tree(self, root_item, text):
-        matched_items = []
-
-        # Search for items in the root item
-        matched_items += root_item.findItems(text, QtCore.Qt.MatchExactly, column=1)
-
-        # Recursively search for items in each child item
-        for child_item in root_item.childItems():
-            matched_items += self.find_items_in_tree(child_item, text)
-
-        return matched_items
-
     def get_items_count(self):
-        """Return the number of items in the tree under selected one"""
-
-        # count all items
-        _all_items = self.model.findItems(
-            "*", QtCore.Qt.MatchWildcard | QtCore.Qt.MatchRecursive
-        )
-        return len(_all_items)
+        """Return the number of created items in the tree."""
+        return len(list(self.model.iter_items()))
 
     def select_by_id(self, unique_id):
         """Look at the id column and select
@@ -269,9 +439,7 @@ class TikSubView(QtWidgets.QTreeView):
 
         match_item = self.model.find_item_by_id_column(unique_id)
         if match_item:
-            idx = match_item.index()
-            idx = idx.sibling(idx.row(), 0)
-            index = self.proxy_model.mapFromSource(idx)
+            index = self.proxy_model.mapFromSource(self.model.indexFromItem(match_item))
             self.setCurrentIndex(index)
             return True
 
@@ -304,50 +472,37 @@ class TikSubView(QtWidgets.QTreeView):
         # refresh the view
         self.get_tasks()
 
-    def _save_expanded_state(self, index, expanded_state):
-        """Stores the subproject ids of the expanded items"""
-        view_index = self.proxy_model.mapFromSource(index)
-        if self.isExpanded(view_index):
-            # get the item from index
-            _item = self.model.itemFromIndex(index)
-            expanded_state.append(_item.subproject.id)
-
-        for row in range(self.model.rowCount(index)):
-            child_index = self.model.index(row, 0, index)
-            self._save_expanded_state(child_index, expanded_state)
-
-    def _restore_expanded_state(self, index, expanded_state):
-        """Restores the expanded state of the items by matching the subproject ids"""
-        view_index = self.proxy_model.mapFromSource(index)
-        _item = self.model.itemFromIndex(index)
-        if _item:
-            if _item.subproject.id in expanded_state:
-                self.expand(view_index)
-
-        for row in range(self.model.rowCount(index)):
-            child_index = self.model.index(row, 0, index)
-            self._restore_expanded_state(child_index, expanded_state)
-
     def get_expanded_state(self):
         """Returns the subproject ids of the expanded items"""
-        expanded_state = []
-        self._save_expanded_state(QtCore.QModelIndex(), expanded_state)
-        return expanded_state
+        # only the created items can be expanded
+        return [
+            _item.subproject.id
+            for _item in self.model.iter_items()
+            if _item.children
+            and self.isExpanded(
+                self.proxy_model.mapFromSource(self.model.indexFromItem(_item))
+            )
+        ]
 
     def set_expanded_state(self, expanded_state):
         """Sets the expanded state of the items by matching the subproject ids"""
-        self._restore_expanded_state(QtCore.QModelIndex(), expanded_state)
+        for unique_id in set(expanded_state or []):
+            _item = self.model.find_item_by_id_column(unique_id)
+            if _item:
+                self.expand(
+                    self.proxy_model.mapFromSource(self.model.indexFromItem(_item))
+                )
 
     def refresh(self):
-        """Re-populates the model keeping the expanded state"""
-        # store the expanded items
-        expanded_state = self.get_expanded_state()
-        self.model.populate()
-        self.set_expanded_state(expanded_state)
+        """Update the model from the project keeping the expanded state"""
+        # the items of the unchanged branches are kept with their state
+        self.model.refresh()
         self.clearSelection()
         self.select_first_item()
 
     def expandAll(self):
+        # the view can only expand the created rows
+        self.model.fetch_all()
         super(TikSubView, self).expandAll()
         self.resizeColumnToContents(0)
         self.resizeColumnToContents(1)
@@ -356,44 +511,157 @@ class TikSubView(QtWidgets.QTreeView):
         self.resizeColumnToContents(4)
 
     @staticmethod
-    def collect_tasks(sub_items, recursive=True):
+    def iter_subprojects(sub_items, recursive=True):
+        """Yield the given subprojects and optionally their children."""
         if not isinstance(sub_items, list):
             sub_items = [sub_items]
         for sub_item in sub_items:
             if not isinstance(sub_item, tik_manager4.objects.subproject.Subproject):
                 # just to prevent crashes if something goes wrong
                 return
-            for key, value in sub_item.scan_tasks().items():
-                yield value
+            yield sub_item
 
             if recursive:
                 queue = list(sub_item.subs.values())
                 while queue:
                     sub = queue.pop(0)
-                    for key, value in sub.scan_tasks().items():
-                        yield value
+                    yield sub
                     queue.extend(list(sub.subs.values()))
 
-    def get_tasks(self, idx=None):
-        """Returns the tasks of the selected subproject"""
+    @staticmethod
+    def collect_tasks(sub_items, recursive=True):
+        for sub in TikSubView.iter_subprojects(sub_items, recursive=recursive):
+            for value in sub.scan_tasks().values():
+                yield value
 
-        selected_indexes = self.selectedIndexes()
+    def get_tasks(self, idx=None):
+        """Collect the tasks of the selected subprojects in the background.
 
-        if not selected_indexes:
+        The previous scan is cancelled. The tasks are delivered with the
+        tasks_added signal in batches.
+        """
+        sub_project_objects = self.get_selected_subprojects()
+        if not sub_project_objects:
             return
+        self.cancel_task_scan()
+        self.cancel_task_update()
+        scan = TaskScan(sub_project_objects, recursive=self._recursive_task_scan)
+        scan.signals.batch_ready.connect(self._on_task_batch)
+        scan.signals.finished.connect(self._on_task_scan_finished)
+        self._task_scan = scan
+        self.task_scan_started.emit()
+        self.busy_changed.emit(True)
+        scan.start(self._task_pool)
+
+    def get_selected_subprojects(self):
+        """Return the subproject objects of the selected rows."""
         sub_project_objects = []
-        for idx in selected_indexes:
+        for idx in self.selectedIndexes():
             # Make sure the idx is pointing to the first column
             first_idx = idx.sibling(idx.row(), 0)
             # The id needs to be mapped from proxy to source
             index = self.proxy_model.mapToSource(first_idx)
             _item = self.model.itemFromIndex(index) or self.model.root_item
-            if _item:
+            # every column of the selected rows is in the selection
+            if _item and _item.subproject not in sub_project_objects:
                 sub_project_objects.append(_item.subproject)
-        _tasks = self.collect_tasks(
-            sub_project_objects, recursive=self._recursive_task_scan
-        )
-        self.item_selected.emit(_tasks)
+        return sub_project_objects
+
+    def update_tasks(self):
+        """Rescan the tasks of the selected subprojects in the background.
+
+        Only the selected subprojects are scanned and their current tasks
+        are emitted with the tasks_updated signal. While the tasks are
+        being collected, the collection is started over instead.
+        """
+        if self._task_scan:
+            self.get_tasks()
+            return
+        sub_project_objects = self.get_selected_subprojects()
+        if not sub_project_objects:
+            return
+        self.cancel_task_update()
+        scan = TaskScan(sub_project_objects)
+        scan.signals.finished.connect(self._on_task_update_finished)
+        self._task_update = scan
+        scan.start(self._task_pool)
+
+    def cancel_task_update(self):
+        """Cancel the running rescan of the selected subprojects."""
+        if self._task_update:
+            self._task_update.cancel()
+            self._task_update.take(self._task_pool)
+            self._task_update = None
+
+    def _on_task_update_finished(self):
+        """Commit the rescanned tasks and emit them."""
+        scan = self._task_update
+        if not scan or self.sender() is not scan.signals:
+            return
+        self._task_update = None
+        if scan.error:
+            self.scan_failed.emit(f"Tasks cannot be updated: {scan.error}")
+            return
+        tasks = []
+        for batch in scan.take_batches():
+            for sub, read_tasks in batch:
+                tasks.extend(sub.commit_tasks(read_tasks).values())
+        self.tasks_updated.emit(tasks, scan.sub_projects)
+
+    def cancel_task_scan(self):
+        """Cancel the running task scan."""
+        if self._task_scan:
+            self._task_scan.cancel()
+            self._task_scan = None
+            self.busy_changed.emit(False)
+
+    def wait_for_tasks(self, timeout=None):
+        """Block until the running task scan delivers all the tasks.
+
+        Args:
+            timeout (float, optional): Maximum seconds to wait.
+
+        Returns:
+            bool: True if there is no scan left running.
+        """
+        scan = self._task_scan
+        if not scan:
+            return True
+        if not scan.done.wait(timeout):
+            return False
+        self._finish_task_scan()
+        return True
+
+    def _is_current_scan(self):
+        """Return True if the signal is sent by the current task scan."""
+        return bool(self._task_scan) and self.sender() is self._task_scan.signals
+
+    def _on_task_batch(self):
+        """Deliver the collected tasks of the current scan."""
+        if self._is_current_scan():
+            self._deliver_tasks()
+
+    def _on_task_scan_finished(self):
+        """Deliver the remaining tasks and end the current scan."""
+        if self._is_current_scan():
+            self._finish_task_scan()
+
+    def _deliver_tasks(self):
+        """Commit the read tasks of the current scan and emit them."""
+        for batch in self._task_scan.take_batches():
+            tasks = []
+            for sub, read_tasks in batch:
+                tasks.extend(sub.commit_tasks(read_tasks).values())
+            self.tasks_added.emit(tasks)
+
+    def _finish_task_scan(self):
+        """Deliver the remaining tasks and end the current scan."""
+        scan = self._task_scan
+        self._deliver_tasks()
+        self._task_scan = None
+        self.busy_changed.emit(False)
+        if scan.error:
+            self.scan_failed.emit(f"Tasks cannot be collected: {scan.error}")
 
     def hide_columns(self, columns):
         """If the given column exists in the model, hides it"""
@@ -564,24 +832,12 @@ class TikSubView(QtWidgets.QTreeView):
         )
         state = _dialog.exec_()
         if state:
-            # TODO: is this overcomplicated?
             _new_sub = _dialog.get_created_subproject()
-            # Find the parent item _new_sub id
-            _items = self.model.findItems(
-                str(_new_sub.parent.id), QtCore.Qt.MatchRecursive, 1
+            # The parent of the item may be changed on new subproject UI
+            _item = (
+                self.model.find_item_by_id_column(_new_sub.parent.id)
+                or self.model.root_item
             )
-            if _items:
-                _item_at_id_column = _items[0]
-                # find the index of the item
-                _index = self.model.indexFromItem(_item_at_id_column)
-                # make sure the index is pointing to the first column
-                first_column_index = _index.sibling(_index.row(), 0)
-                # get the item from index
-                _item = self.model.itemFromIndex(first_column_index)
-                # The reason we are doing this is that we may change
-                # the parent of the item on new subproject UI
-            else:
-                _item = self.model.root_item
             self.model.append_sub(_new_sub, _item)
 
     def edit_sub_project(self, item):
@@ -645,9 +901,7 @@ class TikSubView(QtWidgets.QTreeView):
                     return
             state = self.model.project.delete_sub_project(uid=item.subproject.id)
             if state != -1:
-                _parent = item.parent()
-                _index = _parent.index() if _parent else QtCore.QModelIndex()
-                self.model.removeRow(item.row(), _index)
+                self.model.remove_item(item)
 
                 # after removing the row, find the current selected one
                 # and emit the clicked signal
@@ -663,15 +917,12 @@ class ProxyModel(FilterModel):
     def __init__(self, parent=None):
         super(ProxyModel, self).__init__(parent=parent)
 
-    def filterAcceptsRow(self, source_row, source_parent):
-        model = self.sourceModel()
-        index = model.index(source_row, 0, QtCore.QModelIndex())
-
-        item = model.itemFromIndex(index)
-        if isinstance(item, TikSubItem):
-            pass
-
-        return super(ProxyModel, self).filterAcceptsRow(source_row, source_parent)
+    @QtCore.Slot()
+    def apply_filter(self):
+        """Create all the rows before filtering to match the deep subprojects."""
+        if self._filter_text and self.sourceModel():
+            self.sourceModel().fetch_all()
+        super(ProxyModel, self).apply_filter()
 
 
 class TikSubProjectLayout(QtWidgets.QVBoxLayout):
@@ -1,3 +1,6 @@
+from array import array
+from bisect import bisect_right
+
 from tik_manager4.ui.Qt import QtWidgets, QtCore, QtGui
 from tik_manager4.core import filelog
 from tik_manager4.ui.dialog.feedback import Feedback
@@ -10,110 +13,347 @@ from tik_manager4.ui import pick
 LOG = filelog.Filelog(logname=__name__, filename="tik_manager4")
 
 
-class TikTaskItem(QtGui.QStandardItem):
-    """Item class for the task view"""
-    color_dict = {
-        "asset": (0, 187, 184),
-        "shot": (0, 115, 255),
-        "global": (255, 141, 28),
-        "other": (255, 255, 255),
-    }
+class TikTaskItem:
+    """Handle of a task row in the task model."""
 
-    def __init__(self, task_obj):
+    def __init__(self, model, task_obj):
         """
-        Initialize the item with the given task object.
+        Initialize the handle with the given task object.
         Args:
+            model (TikTaskModel): The model holding the task.
             task_obj (tik_manager4.objects.task.Task): Task object
         """
-        super(TikTaskItem, self).__init__()
-
-        # # test
-        _icon = pick.icon(f"{task_obj.type}.png")
-        self.setIcon(_icon)
-
+        self.model = model
         self.task = task_obj
-        #
-        self.fnt = QtGui.QFont("Open Sans", 12)
-        self.fnt.setBold(True)
-        self.setEditable(False)
-
-        self._state = None
 
-        # _color = self.color_dict.get(task_obj.type, (255, 255, 255))
-        # self.setForeground(QtGui.QColor(*_color))
+    def row(self):
+        """Return the current row of the task in the model."""
+        return self.model.row_of_id(self.task.id)
 
-        # self.setFont(fnt)
-        self.setText(task_obj.name)
-
-        self.refresh()
+    def index(self, column=0):
+        """Return the model index of the task."""
+        row = self.row()
+        if row is None:
+            return QtCore.QModelIndex()
+        return self.model.index(row, column)
 
     def refresh(self):
         """Refresh the item"""
-        self.set_state(self.task.state)
-
-    def set_state(self, state):
-        """Set the state of the item.
-
-        Args:
-            state (str): State of the task
-        """
-        self._state = state
-        _color = self.color_dict.get(self.task.type, (255, 255, 255))
-        self.fnt.setStrikeOut(state == "omitted")
-        self.setFont(self.fnt)
-        self.setForeground(QtGui.QColor(*_color))
+        self.model.refresh_task(self.task)
 
 
-class TikTaskColumnItem(QtGui.QStandardItem):
-    def __init__(self, text):
-        super(TikTaskColumnItem, self).__init__(text)
-        self.setEditable(False)
+class TikTaskModel(QtCore.QAbstractTableModel):
+    """Table model keeping the task fields in columns.
 
-
-class TikTaskModel(QtGui.QStandardItemModel):
+    The rows are kept ordered by the precomputed sort keys of the task names
+    and the cell values are rendered on demand.
+    """
     columns = ["name", "id", "path"]
     filter_key = "super"
+    color_dict = {
+        "asset": (0, 187, 184),
+        "shot": (0, 115, 255),
+        "global": (255, 141, 28),
+        "other": (255, 255, 255),
+    }
 
     def __init__(self):
         """Initialize the model"""
         super(TikTaskModel, self).__init__()
-
-        self.setHorizontalHeaderLabels(self.columns)
-
         self._tasks = []
+        self._names = []
+        self._ids = []
+        self._paths = []
+        self._keys = []
+        self._types = array("B")
+        self._omitted = array("B")
+        # type names by their codes in the type column
+        self._type_names = []
+        self._type_codes = {}
+        # rows of the ids, valid below the stale row
+        self._rows = {}
+        self._stale_row = 0
+
+        self._icons = {}
+        self._brushes = {}
+        self.task_font = QtGui.QFont("Open Sans", 12)
+        self.task_font.setBold(True)
+        omitted_font = QtGui.QFont(self.task_font)
+        omitted_font.setStrikeOut(True)
+        self._fonts = {False: self.task_font, True: omitted_font}
+
+    @staticmethod
+    def sort_key(task_obj):
+        """Return the sort key of the task."""
+        return task_obj.name.casefold(), task_obj.name
+
+    def _type_code(self, task_type):
+        """Return the code of the task type in the type column."""
+        code = self._type_codes.get(task_type)
+        if code is None:
+            code = self._type_codes[task_type] = len(self._type_names)
+            self._type_names.append(task_type)
+        return code
+
+    def _new_tasks(self, tasks):
+        """Return the tasks which are not in the model, sorted by their keys."""
+        new_tasks = {}
+        for task in tasks:
+            if task.id not in self._rows and task.id not in new_tasks:
+                new_tasks[task.id] = task
+        return sorted(new_tasks.values(), key=self.sort_key)
+
+    def _insert(self, row, tasks):
+        """Insert the columns of the sorted tasks at the row."""
+        self.beginInsertRows(QtCore.QModelIndex(), row, row + len(tasks) - 1)
+        self._tasks[row:row] = tasks
+        self._names[row:row] = [task.name for task in tasks]
+        self._ids[row:row] = [task.id for task in tasks]
+        self._paths[row:row] = [task.path for task in tasks]
+        self._keys[row:row] = [self.sort_key(task) for task in tasks]
+        self._types[row:row] = array(
+            "B", [self._type_code(task.type) for task in tasks]
+        )
+        self._omitted[row:row] = array(
+            "B", [task.state == "omitted" for task in tasks]
+        )
+        if row < len(self._tasks) - len(tasks):
+            self._stale_row = min(self._stale_row, row)
+        for offset, task in enumerate(tasks):
+            self._rows[task.id] = row + offset
+        self.endInsertRows()
 
     def clear(self):
         """Clear the model"""
-        self.setRowCount(0)
+        self.beginResetModel()
+        for column in (self._tasks, self._names, self._ids, self._paths, self._keys):
+            column.clear()
+        self._types = array("B")
+        self._omitted = array("B")
+        self._rows = {}
+        self._stale_row = 0
+        self.endResetModel()
+
+    def set_tasks(self, tasks):
+        """Replace the tasks of the model.
+
+        Args:
+            tasks (iterable): Task objects. Duplicate ids are skipped.
+        """
+        self.clear()
+        self.add_tasks(tasks)
+
+    def add_tasks(self, tasks):
+        """Insert the tasks at their sorted rows.
+
+        Args:
+            tasks (iterable): Task objects. Tasks already in the model are
+                skipped.
+
+        Returns:
+            list: The added task objects.
+        """
+        new_tasks = self._new_tasks(tasks)
+        # group the tasks falling between the same existing rows
+        groups = []
+        for task in new_tasks:
+            row = bisect_right(self._keys, self.sort_key(task))
+            if groups and groups[-1][0] == row:
+                groups[-1][1].append(task)
+            else:
+                groups.append((row, [task]))
+        # insert from the bottom so the rows above stay valid
+        for row, group in reversed(groups):
+            self._insert(row, group)
+        return new_tasks
 
     def append_task(self, task_obj):
-        """Append a task to the model"""
-        _task_item = TikTaskItem(task_obj)
-        pid = TikTaskColumnItem(str(task_obj.id))
-        path = TikTaskColumnItem(task_obj.path)
-
-        self.appendRow(
-            [
-                _task_item,
-                pid,
-                path,
-            ]
-        )
-        return _task_item
+        """Add a task to the model and return its item."""
+        self.add_tasks([task_obj])
+        return self.find_item_by_id_column(task_obj.id)
+
+    def remove_task(self, task_obj):
+        """Remove the task from the model.
+
+        Returns:
+            bool: True if the task is found and removed.
+        """
+        row = self.row_of_id(task_obj.id)
+        if row is None:
+            return False
+        self.beginRemoveRows(QtCore.QModelIndex(), row, row)
+        for column in (
+            self._tasks, self._names, self._ids, self._paths, self._keys,
+            self._types, self._omitted,
+        ):
+            del column[row]
+        del self._rows[task_obj.id]
+        self._stale_row = min(self._stale_row, row)
+        self.endRemoveRows()
+        return True
+
+    def refresh_task(self, task_obj):
+        """Update the state and the type of the task row."""
+        row = self.row_of_id(task_obj.id)
+        if row is None:
+            return
+        self._tasks[row] = task_obj
+        self._omitted[row] = task_obj.state == "omitted"
+        self._types[row] = self._type_code(task_obj.type)
+        index = self.index(row, 0)
+        self.dataChanged.emit(index, index)
+
+    def update_tasks(self, tasks, parent_subs):
+        """Update the rows of the subprojects to their current tasks.
+
+        Rows of the deleted tasks are removed, the changed ones are refreshed
+        and the new tasks are inserted. Rows of the other subprojects are
+        left untouched.
+
+        Args:
+            tasks (iterable): Current tasks of the subprojects.
+            parent_subs (iterable): Subproject objects whose tasks are given.
+        """
+        tasks = list(tasks)
+        task_ids = {task.id for task in tasks}
+        sub_ids = {sub.id for sub in parent_subs}
+        for task in [
+            task for task in self._tasks
+            if task.parent_sub.id in sub_ids and task.id not in task_ids
+        ]:
+            self.remove_task(task)
+        for task in tasks:
+            row = self.row_of_id(task.id)
+            if row is not None and (
+                self._omitted[row] != (task.state == "omitted")
+                or self._type_names[self._types[row]] != task.type
+            ):
+                self.refresh_task(task)
+        self.add_tasks(tasks)
+
+    def row_of_id(self, unique_id):
+        """Return the row of the task with the given id or None."""
+        if unique_id not in self._rows:
+            return None
+        if self._stale_row < len(self._ids):
+            for row in range(self._stale_row, len(self._ids)):
+                self._rows[self._ids[row]] = row
+        self._stale_row = len(self._ids)
+        return self._rows[unique_id]
+
+    def get_task(self, row):
+        """Return the task object at the row."""
+        return self._tasks[row]
+
+    def item(self, row):
+        """Return the item of the task at the row."""
+        if 0 <= row < len(self._tasks):
+            return TikTaskItem(self, self._tasks[row])
+        return None
+
+    def itemFromIndex(self, index):
+        """Return the item of the task at the index."""
+        if not index.isValid():
+            return None
+        return self.item(index.row())
 
     def find_item_by_id_column(self, unique_id):
-        """Search entire tree and find the matching item."""
-        # get EVERY item in this model
-        _all_items = self.findItems(
-            "*", QtCore.Qt.MatchWildcard | QtCore.Qt.MatchRecursive
+        """Return the item of the task with the given id or None."""
+        row = self.row_of_id(unique_id)
+        if row is None:
+            return None
+        return TikTaskItem(self, self._tasks[row])
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        """Return the number of tasks."""
+        if parent.isValid():
+            return 0
+        return len(self._tasks)
+
+    def columnCount(self, parent=QtCore.QModelIndex()):
+        """Return the number of columns."""
+        if parent.isValid():
+            return 0
+        return len(self.columns)
+
+    def hasChildren(self, parent=QtCore.QModelIndex()):
+        """Only the root has rows."""
+        return not parent.isValid() and bool(self._tasks)
+
+    def headerData(self, section, orientation, role=QtCore.Qt.DisplayRole):
+        """Return the column names."""
+        if (
+            orientation == QtCore.Qt.Horizontal
+            and role == QtCore.Qt.DisplayRole
+            and 0 <= section < len(self.columns)
+        ):
+            return self.columns[section]
+        return None
+
+    def flags(self, index):
+        """The tasks are not editable and have no children."""
+        if not index.isValid():
+            return QtCore.Qt.NoItemFlags
+        return (
+            QtCore.Qt.ItemIsEnabled
+            | QtCore.Qt.ItemIsSelectable
+            | QtCore.Qt.ItemNeverHasChildren
         )
-        for x in _all_items:
-            if isinstance(x, TikTaskItem):
-                if x.task.id == unique_id:
-                    return x
 
+    def data(self, index, role=QtCore.Qt.DisplayRole):
+        """Render the value of the cell."""
+        if not index.isValid():
+            return None
+        row, column = index.row(), index.column()
+        if role == QtCore.Qt.DisplayRole:
+            if column == 0:
+                return self._names[row]
+            if column == 1:
+                return str(self._ids[row])
+            return self._paths[row]
+        if column != 0:
+            return None
+        if role == QtCore.Qt.DecorationRole:
+            task_type = self._type_names[self._types[row]]
+            _icon = self._icons.get(task_type)
+            if _icon is None:
+                _icon = self._icons[task_type] = pick.icon(f"{task_type}.png")
+            return _icon
+        if role == QtCore.Qt.ForegroundRole:
+            task_type = self._type_names[self._types[row]]
+            brush = self._brushes.get(task_type)
+            if brush is None:
+                _color = self.color_dict.get(task_type, (255, 255, 255))
+                brush = self._brushes[task_type] = QtGui.QBrush(QtGui.QColor(*_color))
+            return brush
+        if role == QtCore.Qt.FontRole:
+            return self._fonts[bool(self._omitted[row])]
+        return None
+
+
+class TikTaskProxyModel(FilterModel):
+    """Filter model keeping the order of the task model while not filtering.
 
-class TikTaskView(QtWidgets.QTreeView):
+    The task model is already sorted by name, so the rows are only sorted
+    by their scores while a filter is applied.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.sort(-1)
+
+    @QtCore.Slot()
+    def apply_filter(self):
+        """Score the rows and sort them only if the filter is applied."""
+        sort_by_score = bool(self._filter_text) and not self._show_all
+        if not sort_by_score:
+            self.sort(-1)
+        super().apply_filter()
+        if sort_by_score and self.sortColumn() != 0:
+            self.sort(0, QtCore.Qt.AscendingOrder)
+
+
+class TikTaskView(QtWidgets.QTableView):
     item_selected = QtCore.Signal(object)
     refresh_requested = QtCore.Signal()
 
@@ -121,19 +361,26 @@ class TikTaskView(QtWidgets.QTreeView):
         """Initialize the view"""
         super(TikTaskView, self).__init__()
         self._feedback = Feedback(parent=self)
-        self.setUniformRowHeights(True)
         self.setSelectionBehavior(QtWidgets.QAbstractItemView.SelectRows)
-
-        # do not show branches
-        self.setRootIsDecorated(False)
+        self.setSelectionMode(QtWidgets.QAbstractItemView.SingleSelection)
+
+        # a flat list of rows with the same height. Unlike a tree view, the
+        # table does not lay out all the rows whenever tasks are added.
+        self.setShowGrid(False)
+        self.setWordWrap(False)
+        self.verticalHeader().hide()
+        self.verticalHeader().setSectionResizeMode(QtWidgets.QHeaderView.Fixed)
+        self.header().setStretchLastSection(True)
+        self.header().setHighlightSections(False)
+        # size the columns by the visible rows only
+        self.header().setResizeContentsPrecision(0)
 
         self.model = TikTaskModel()
-        self.proxy_model = FilterModel(parent=self)
+        self.verticalHeader().setDefaultSectionSize(
+            QtGui.QFontMetrics(self.model.task_font).height() + 6
+        )
+        self.proxy_model = TikTaskProxyModel(parent=self)
         self.proxy_model.setSourceModel(self.model)
-        self.proxy_model.setRecursiveFilteringEnabled(True)
-        self.setSortingEnabled(True)
-        # sort it alphabetically
-        self.sortByColumn(0, QtCore.Qt.AscendingOrder)
 
         self.setModel(self.proxy_model)
 
@@ -148,7 +395,11 @@ class TikTaskView(QtWidgets.QTreeView):
         self.header().setContextMenuPolicy(QtCore.Qt.CustomContextMenu)
         self.header().customContextMenuRequested.connect(self.header_right_click_menu)
 
-        self.expandAll()
+        self.resizeColumnToContents(0)
+
+    def header(self):
+        """Return the header of the columns."""
+        return self.horizontalHeader()
 
     def currentChanged(self, *args, **kwargs):
         super(TikTaskView, self).currentChanged(*args, **kwargs)
@@ -167,11 +418,6 @@ class TikTaskView(QtWidgets.QTreeView):
         else:
             self.item_selected.emit(None)
 
-    def expandAll(self):
-        """Expand all the items in the view"""
-        super(TikTaskView, self).expandAll()
-        self.resizeColumnToContents(0)
-
     def hide_columns(self, columns):
         """If the given column exists in the model, hides it"""
         if not isinstance(columns, list):
@@ -242,14 +488,8 @@ class TikTaskView(QtWidgets.QTreeView):
 
     def set_tasks(self, tasks_gen):
         """Set the data for the model"""
-        self.model.clear()
-        for task in tasks_gen:
-            # if the task is already in model, skip it
-            if self.model.find_item_by_id_column(task.id):
-                continue
-
-            self.model.append_task(task)
-        self.expandAll()
+        self.model.set_tasks(tasks_gen)
+        self.resizeColumnToContents(0)
 
     def get_selected_item(self):
         """Return the selected item"""
@@ -262,10 +502,18 @@ class TikTaskView(QtWidgets.QTreeView):
         _item = self.model.itemFromIndex(index)
         return _item
 
+    def clear_tasks(self):
+        """Remove all the tasks from the view."""
+        self.model.clear()
+
     def add_tasks(self, tasks):
-        """Add a task to the model"""
-        _ = [self.model.append_task(x) for x in tasks]
-        self.expandAll()
+        """Add the tasks to the model"""
+        self.model.add_tasks(tasks)
+        self.resizeColumnToContents(0)
+
+    def update_tasks(self, tasks, parent_subs):
+        """Update the rows of the subprojects to their current tasks."""
+        self.model.update_tasks(tasks, parent_subs)
 
     def header_right_click_menu(self, position):
         menu = QtWidgets.QMenu(self)
@@ -377,11 +625,7 @@ class TikTaskView(QtWidgets.QTreeView):
 
             state = item.task.parent_sub.delete_task(item.task.name)
             if state:
-                # find the item in the model and remove it
-                for i in range(self.model.rowCount()):
-                    if self.model.item(i).task == item.task:
-                        self.model.removeRow(i)
-                        break
+                self.model.remove_task(item.task)
             else:
                 msg = LOG.last_message()
                 self._feedback.pop_info(
@@ -415,6 +659,14 @@ class TikTaskLayout(QtWidgets.QVBoxLayout):
         # self.addWidget(self.label)
         self.addWidget(HorizontalSeparator(color=(0, 255, 255)))
 
+        # busy indicator while the tasks are collected
+        self.busy_bar = QtWidgets.QProgressBar()
+        self.busy_bar.setRange(0, 0)
+        self.busy_bar.setTextVisible(False)
+        self.busy_bar.setMaximumHeight(4)
+        self.busy_bar.setVisible(False)
+        self.addWidget(self.busy_bar)
+
         self.task_view = TikTaskView()
         self.addWidget(self.task_view)
 
@@ -430,6 +682,10 @@ class TikTaskLayout(QtWidgets.QVBoxLayout):
     def refresh(self):
         self.task_view.refresh()
 
+    def set_busy(self, state):
+        """Show or hide the busy indicator."""
+        self.busy_bar.setVisible(state)
+
     def get_active_task(self):
         """Get the selected item and return the task object."""
         selected_item = self.task_view.get_selected_item()
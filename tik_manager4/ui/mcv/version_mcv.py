@@ -8,6 +8,7 @@ from tik_manager4.ui.dialog.feedback import Feedback
 from tik_manager4.ui.widgets.common import TikButton, HorizontalSeparator, TikIconButton
 from tik_manager4.ui.widgets.info import ImageWidget, NotesEditor
 from tik_manager4.ui.dialog.bunde_ingest_dialog import BundleIngestDialog
+from tik_manager4.ui.thumbnails import MOVIE_SUFFIXES, ThumbnailService
 from tik_manager4.core import filelog
 
 LOG = filelog.Filelog(logname=__name__, filename="tik_manager4")
@@ -123,6 +124,12 @@ class TikVersionLayout(QtWidgets.QVBoxLayout):
         self.parent = kwargs.get("parent")
         self.feedback = Feedback(parent=self.parent)
 
+        self.thumbnails = ThumbnailService(
+            cache_folder=kwargs.get("thumbnail_cache_folder"), parent=self
+        )
+        self.thumbnails.thumbnail_ready.connect(self._on_thumbnail_ready)
+        self._thumbnail_path = None
+
         self.ingest_mapping = {}  # mapping of ingestor nice name to ingestor name
         self.element_mapping = ({})  # mapping of element type nice name to element type name
 
@@ -538,6 +545,8 @@ class TikVersionLayout(QtWidgets.QVBoxLayout):
             self.info.notes_editor.setEnabled(False)
             self.info.thumbnail.clear()
             self.info.thumbnail.setEnabled(False)
+            self._thumbnail_path = None
+            self.thumbnails.cancel()
             self.toggle_sync_state(False)
             return
         self.version.combo.setEnabled(True)
@@ -630,14 +639,54 @@ class TikVersionLayout(QtWidgets.QVBoxLayout):
             owner = _version.user
         self.version.owner_lbl.setText(f"Owner: {owner}")
         # self.info.notes_editor.clear()
-        self.info.thumbnail.clear()
         self.info.notes_editor.set_version(_version)
         # self.info.notes_editor.setPlainText(_version.notes)
-        _thumbnail_path = self.base.get_abs_database_path(_version.thumbnail)
-        self.info.thumbnail.set_media(_thumbnail_path)
+        self.show_thumbnail(_index)
         self.element.element_combo.blockSignals(False)
         self.element.ingest_with_combo.blockSignals(False)
 
+    def get_thumbnail_path(self, version):
+        """Return the absolute thumbnail path of the version or None."""
+        if not version or not version.thumbnail:
+            return None
+        return self.base.get_abs_database_path(version.thumbnail)
+
+    def show_thumbnail(self, index):
+        """Show the thumbnail of the version and prefetch its neighbours.
+
+        The thumbnails which are not in memory are loaded in the background.
+
+        Args:
+            index (int): Index of the version in the version dropdown.
+        """
+        paths = [
+            self.get_thumbnail_path(self.version.combo.get_item(neighbour))
+            for neighbour in (index, index - 1, index + 1, index - 2, index + 2)
+        ]
+        self._thumbnail_path = paths[0]
+        if not self._thumbnail_path:
+            self.info.thumbnail.set_pixmap(None)
+        elif Path(self._thumbnail_path).suffix.lower() in MOVIE_SUFFIXES:
+            self.info.thumbnail.set_media(self._thumbnail_path)
+        else:
+            pixmap = self.thumbnails.get(self._thumbnail_path)
+            if pixmap is not None:
+                self.info.thumbnail.set_pixmap(pixmap)
+            else:
+                self.info.thumbnail.clear()
+        self.thumbnails.request(
+            [
+                path
+                for path in paths
+                if path and Path(path).suffix.lower() not in MOVIE_SUFFIXES
+            ]
+        )
+
+    def _on_thumbnail_ready(self, path, pixmap):
+        """Show the loaded thumbnail if its version is still selected."""
+        if path == self._thumbnail_path:
+            self.info.thumbnail.set_pixmap(pixmap)
+
     def __is_element_bundled(self, element_type):
         """Check if the element type is bundled."""
         if not self.base or not element_type:
@@ -773,6 +822,31 @@ class TikVersionLayout(QtWidgets.QVBoxLayout):
             self.info.notes_editor.clear()
             self.info.thumbnail.clear()
 
+    def get_watch_paths(self):
+        """Return the database paths holding the versions of the base."""
+        if not self.base:
+            return []
+        if self.base.object_type == ObjectType.WORK:
+            return [self.base.settings_file]
+        return [self.base.get_publish_data_folder()]
+
+    def update_versions(self):
+        """Reload the versions of the base and keep the selected version."""
+        if not self.base:
+            return
+        selected_version = self.get_selected_version_number()
+        self.base.reload()
+        # the thumbnails may be replaced
+        for version in self.base.versions:
+            self.thumbnails.discard(self.get_thumbnail_path(version))
+        self.populate_versions(self.base.versions)
+        if selected_version is None:
+            return
+        for index in range(self.version.combo.count()):
+            if self.version.combo.get_item(index).version == selected_version:
+                self.version.combo.setCurrentIndex(index)
+                break
+
     def on_replace_thumbnail(self, mode="view"):
         """Replace the thumbnail with the current view or external file."""
         if not self.base:
@@ -799,7 +873,10 @@ class TikVersionLayout(QtWidgets.QVBoxLayout):
                 "Image files (*.jpg *.png *.gif *.webp)",
             )[0]
 
+        version = self.version.combo.get_current_item()
+        self.thumbnails.discard(self.get_thumbnail_path(version))
         self.base.replace_thumbnail(version_number, new_thumbnail_path=file_path)
+        self.thumbnails.discard(self.get_thumbnail_path(version))
         self.refresh()
 
     def thumbnail_right_click_menu(self, position):
@@ -0,0 +1,216 @@
+"""Load the version thumbnails in the background.
+
+The thumbnails are decoded and scaled in a worker thread. The scaled copies
+are kept in a local disk cache keyed by the modification times of the
+sources, so they are read from the network only once. The recently shown
+ones are kept in memory.
+"""
+
+import hashlib
+import os
+from collections import OrderedDict
+from pathlib import Path
+
+from tik_manager4.ui.Qt import QtCore, QtGui
+from tik_manager4.ui.mcv.batch_worker import BatchWorker, thread_pool
+from tik_manager4.core import filelog
+
+LOG = filelog.Filelog(logname=__name__, filename="tik_manager4")
+
+CACHE_FOLDER_NAME = "thumbnail_cache"
+# twice the minimum size of the thumbnail widget for high dpi screens
+THUMBNAIL_SIZE = QtCore.QSize(442, 248)
+# number of pixmaps kept in memory
+MEMORY_CACHE_SIZE = 64
+# animated thumbnails are played by the widget
+MOVIE_SUFFIXES = (".gif", ".webp")
+
+
+def cache_file(cache_folder, source, mtime_ns):
+    """Return the disk cache file of the source.
+
+    Args:
+        cache_folder (str): The cache folder.
+        source (str): Path of the source image.
+        mtime_ns (int): Modification time of the source.
+
+    Returns:
+        Path: The scaled copy of the source.
+    """
+    digest = hashlib.sha1(os.path.normcase(source).encode("utf-8")).hexdigest()
+    # spread into sub folders to keep the folder listings short
+    return Path(cache_folder, digest[:2], f"{digest}_{mtime_ns}.png")
+
+
+def load_thumbnail(source, cache_folder=None, size=THUMBNAIL_SIZE):
+    """Read the scaled thumbnail of the source image.
+
+    The disk cache is used if the cache folder is given. The stale copies of
+    the source are removed when a new one is saved.
+
+    Args:
+        source (str): Path of the source image.
+        cache_folder (str, optional): The disk cache folder.
+        size (QtCore.QSize): The thumbnail is scaled to fit in this size.
+
+    Returns:
+        QtGui.QImage: The thumbnail. Null if the source cannot be read.
+    """
+    try:
+        mtime_ns = os.stat(source).st_mtime_ns
+    except OSError:
+        return QtGui.QImage()
+    cached = cache_file(cache_folder, source, mtime_ns) if cache_folder else None
+    if cached and cached.exists():
+        image = QtGui.QImage(str(cached))
+        if not image.isNull():
+            return image
+
+    reader = QtGui.QImageReader(source)
+    source_size = reader.size()
+    if source_size.isValid() and (
+        source_size.width() > size.width() or source_size.height() > size.height()
+    ):
+        # jpeg files are decoded at the reduced size directly
+        reader.setScaledSize(source_size.scaled(size, QtCore.Qt.KeepAspectRatio))
+    image = reader.read()
+    if image.isNull():
+        return image
+    if image.width() > size.width() or image.height() > size.height():
+        image = image.scaled(
+            size, QtCore.Qt.KeepAspectRatio, QtCore.Qt.SmoothTransformation
+        )
+
+    if cached:
+        try:
+            cached.parent.mkdir(parents=True, exist_ok=True)
+            digest = cached.name.split("_")[0]
+            for stale in cached.parent.glob(f"{digest}_*.png"):
+                stale.unlink()
+            temp_file = cached.with_suffix(".tmp.png")
+            if image.save(str(temp_file)):
+                os.replace(temp_file, cached)
+        except OSError as exc:
+            LOG.warning(f"Thumbnail cannot be cached: {exc}")
+    return image
+
+
+class ThumbnailLoader(BatchWorker):
+    """Load the thumbnails of the given paths in order."""
+
+    # every thumbnail is shown as soon as it is loaded
+    batch_size = 1
+
+    def __init__(self, paths, cache_folder=None):
+        """Initialize the loader.
+
+        Args:
+            paths (list): Paths of the source images.
+            cache_folder (str, optional): The disk cache folder.
+        """
+        super(ThumbnailLoader, self).__init__()
+        self.paths = paths
+        self.cache_folder = cache_folder
+
+    def iterate(self):
+        """Yield the paths and their thumbnails."""
+        for path in self.paths:
+            yield path, load_thumbnail(path, self.cache_folder)
+
+
+class ThumbnailService(QtCore.QObject):
+    """Provide the thumbnails from memory or load them in the background.
+
+    Only the latest request is loaded. The paths of the earlier requests
+    which are not loaded yet are dropped.
+    """
+
+    # emitted with the path and the pixmap, which is None for missing images
+    thumbnail_ready = QtCore.Signal(str, object)
+
+    def __init__(self, cache_folder=None, memory_size=MEMORY_CACHE_SIZE, parent=None):
+        """Initialize the service.
+
+        Args:
+            cache_folder (str, optional): The disk cache folder. If not given,
+                the thumbnails are cached only in memory.
+            memory_size (int): Number of pixmaps kept in memory.
+            parent (QtCore.QObject, optional): The parent object.
+        """
+        super().__init__(parent)
+        self.cache_folder = str(cache_folder) if cache_folder else None
+        self.memory_size = memory_size
+        self._pixmaps = OrderedDict()
+        # the current loader and the running ones by their signals
+        self._loader = None
+        self._loaders = {}
+        self._pool = thread_pool("thumbnails", 2)
+
+    def get(self, path):
+        """Return the pixmap of the path if it is in memory."""
+        pixmap = self._pixmaps.get(path)
+        if pixmap is not None:
+            self._pixmaps.move_to_end(path)
+        return pixmap
+
+    def request(self, paths):
+        """Load the thumbnails of the paths which are not in memory.
+
+        Args:
+            paths (list): Paths in the order of loading. The first one is
+                usually shown and the others are prefetched.
+        """
+        self.cancel()
+        paths = [path for path in dict.fromkeys(paths) if path not in self._pixmaps]
+        if not paths:
+            return
+        loader = ThumbnailLoader(paths, self.cache_folder)
+        loader.signals.batch_ready.connect(self._on_batch)
+        loader.signals.finished.connect(self._on_finished)
+        self._loaders[loader.signals] = loader
+        self._loader = loader
+        loader.start(self._pool)
+
+    def cancel(self):
+        """Stop loading the requested thumbnails."""
+        loader, self._loader = self._loader, None
+        if loader and loader.take(self._pool):
+            self._loaders.pop(loader.signals, None)
+        elif loader:
+            # the thumbnails loaded so far are still kept
+            loader.cancel()
+
+    def discard(self, path):
+        """Forget the pixmap of the path, after the image is replaced."""
+        self._pixmaps.pop(path, None)
+
+    def clear(self):
+        """Forget all the pixmaps."""
+        self._pixmaps.clear()
+
+    def _on_batch(self):
+        """Keep the loaded thumbnails and notify the receivers."""
+        loader = self._loaders.get(self.sender())
+        if loader:
+            self._deliver(loader)
+
+    def _on_finished(self):
+        """Deliver the remaining thumbnails of the finished loader."""
+        loader = self._loaders.pop(self.sender(), None)
+        if loader:
+            self._deliver(loader)
+        if loader is self._loader:
+            self._loader = None
+
+    def _deliver(self, loader):
+        """Emit the thumbnails taken from the loader."""
+        for batch in loader.take_batches():
+            for path, image in batch:
+                pixmap = None
+                if not image.isNull():
+                    pixmap = QtGui.QPixmap.fromImage(image)
+                    self._pixmaps[path] = pixmap
+                    self._pixmaps.move_to_end(path)
+                    while len(self._pixmaps) > self.memory_size:
+                        self._pixmaps.popitem(last=False)
+                self.thumbnail_ready.emit(path, pixmap)
@@ -0,0 +1,243 @@
+"""Watch the database folders shown in the UI for changes made elsewhere."""
+
+import os
+
+from tik_manager4.ui.Qt import QtCore
+from tik_manager4.ui.mcv.batch_worker import BatchWorker, thread_pool
+
+# wait for the events to settle before reporting the changes
+DEBOUNCE_MS = 300
+# network mounts do not notify the file system watcher, so the watched
+# paths are also compared with their snapshots periodically
+POLL_INTERVAL_MS = 5000
+
+
+def snapshot(path):
+    """Return the state of a watched path.
+
+    Args:
+        path (str): Path of a folder or a file.
+
+    Returns:
+        The modification times of the folder entries, the modification time
+        of the file or None if the path does not exist.
+    """
+    try:
+        if os.path.isdir(path):
+            with os.scandir(path) as entries:
+                return frozenset(
+                    (entry.name, entry.stat().st_mtime_ns) for entry in entries
+                )
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+def nearest_folder(path):
+    """Return the nearest existing folder above the path or None."""
+    parent = os.path.dirname(path)
+    while not os.path.isdir(parent):
+        path, parent = parent, os.path.dirname(parent)
+        if parent == path:
+            return None
+    return parent
+
+
+class SnapshotScan(BatchWorker):
+    """Take the snapshots of the paths in a worker thread."""
+
+    def __init__(self, paths):
+        """Initialize the scan.
+
+        Args:
+            paths (list): Folder or file paths.
+        """
+        super(SnapshotScan, self).__init__()
+        self.paths = paths
+
+    def iterate(self):
+        """Yield the paths and their snapshots."""
+        for path in self.paths:
+            yield path, snapshot(path)
+
+
+class DatabaseWatcher(QtCore.QObject):
+    """Report the changes of the watched database folders and files.
+
+    The paths are watched in named scopes. The events are coalesced and
+    once they settle, each scope with a changed path is reported once.
+    The snapshots of the paths filter out the events which do not change
+    anything, like the ones of the watcher's own polling. Paths which do not
+    exist yet are checked on the events of their nearest existing folders.
+    The snapshots are compared in a worker thread, not to block the UI on
+    slow file servers.
+    """
+
+    changed = QtCore.Signal(str)
+
+    def __init__(
+        self, debounce=DEBOUNCE_MS, poll_interval=POLL_INTERVAL_MS, parent=None
+    ):
+        """Initialize the watcher.
+
+        Args:
+            debounce (int): Milliseconds to wait for the events to settle.
+            poll_interval (int): Milliseconds between the comparisons of all
+                the watched paths. 0 disables polling.
+            parent (QtCore.QObject, optional): The parent object.
+        """
+        super().__init__(parent)
+        self._scopes = {}
+        self._snapshots = {}
+        self._pending = set()
+        # missing paths by the existing folders watched for them
+        self._anchors = {}
+        self._pool = thread_pool("watcher", 1)
+        self._scan = None
+
+        self._watcher = QtCore.QFileSystemWatcher(self)
+        self._watcher.directoryChanged.connect(self._on_path_changed)
+        self._watcher.fileChanged.connect(self._on_path_changed)
+
+        self._timer = QtCore.QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(debounce)
+        self._timer.timeout.connect(self.flush)
+
+        self._poll_timer = QtCore.QTimer(self)
+        self._poll_timer.setInterval(poll_interval)
+        self._poll_timer.timeout.connect(self.poll)
+        if poll_interval:
+            self._poll_timer.start()
+
+    def paths(self, scope):
+        """Return the watched paths of the scope."""
+        return list(self._scopes.get(scope, []))
+
+    def watch(self, scope, paths):
+        """Replace the watched paths of the scope.
+
+        Paths which do not exist yet are reported once they are created.
+
+        Args:
+            scope (str): Name of the scope reported with the changes.
+            paths (list): Folder or file paths.
+        """
+        new_paths = list(dict.fromkeys(str(path) for path in paths if path))
+        self._scopes[scope] = new_paths
+        watched = {path for paths in self._scopes.values() for path in paths}
+
+        for path in list(self._snapshots):
+            if path not in watched:
+                del self._snapshots[path]
+                self._pending.discard(path)
+        for path in new_paths:
+            if path not in self._snapshots:
+                self._snapshots[path] = snapshot(path)
+        self._sync_watcher()
+
+    def _sync_watcher(self):
+        """Watch the existing paths and the nearest folders of the missing ones."""
+        self._anchors = {}
+        wanted = set()
+        for path, state in self._snapshots.items():
+            if state is not None:
+                wanted.add(path)
+                continue
+            folder = nearest_folder(path)
+            if folder:
+                wanted.add(folder)
+                self._anchors.setdefault(folder, set()).add(path)
+        # replaced files drop out of the watcher, they are added again
+        current = set(self._watcher.files() + self._watcher.directories())
+        if current - wanted:
+            self._watcher.removePaths(list(current - wanted))
+        if wanted - current:
+            self._watcher.addPaths(list(wanted - current))
+
+    def unwatch(self, scope):
+        """Stop watching the paths of the scope."""
+        self.watch(scope, [])
+        self._scopes.pop(scope, None)
+
+    def clear(self):
+        """Stop watching all the paths."""
+        for scope in list(self._scopes):
+            self.unwatch(scope)
+
+    def _on_path_changed(self, path):
+        """Collect the changed path and wait for more events."""
+        self._pending.add(path)
+        # files modified in place do not notify their folders
+        self._pending.add(os.path.dirname(path))
+        self._pending.update(self._anchors.get(path, ()))
+        self._timer.start()
+
+    @QtCore.Slot()
+    def poll(self):
+        """Compare all the watched paths with their snapshots."""
+        self._pending.update(self._snapshots)
+        self.flush()
+
+    @QtCore.Slot()
+    def flush(self):
+        """Start comparing the pending paths with their snapshots.
+
+        If a comparison is running, the paths are compared after it.
+        """
+        self._timer.stop()
+        if self._scan:
+            return
+        pending, self._pending = self._pending, set()
+        paths = [path for path in pending if path in self._snapshots]
+        if not paths:
+            return
+        scan = SnapshotScan(paths)
+        scan.signals.finished.connect(self._on_scan_finished)
+        self._scan = scan
+        scan.start(self._pool)
+
+    def wait(self, timeout=None):
+        """Block until the running comparison reports the changes.
+
+        Args:
+            timeout (float, optional): Maximum seconds to wait.
+
+        Returns:
+            bool: True if there is no comparison left running.
+        """
+        scan = self._scan
+        if not scan:
+            return True
+        if not scan.done.wait(timeout):
+            return False
+        self._finish_scan()
+        return True
+
+    def _on_scan_finished(self):
+        """Report the changes found by the current comparison."""
+        if self._scan and self.sender() is self._scan.signals:
+            self._finish_scan()
+
+    def _finish_scan(self):
+        """Report the scopes of the compared paths which are changed."""
+        scan, self._scan = self._scan, None
+        changed_paths = set()
+        for batch in scan.take_batches():
+            for path, state in batch:
+                # the path may be unwatched during the comparison
+                if path not in self._snapshots or state == self._snapshots[path]:
+                    continue
+                self._snapshots[path] = state
+                changed_paths.add(path)
+        if self._pending:
+            self._timer.start()
+        if changed_paths:
+            self._sync_watcher()
+        changed_scopes = [
+            scope
+            for scope, paths in self._scopes.items()
+            if changed_paths.intersection(paths)
+        ]
+        for scope in changed_scopes:
+            self.changed.emit(scope)
@@ -25,9 +25,7 @@ class ImageWidget(QtWidgets.QLabel):
     def set_media(self, media_path):
         """Set the media to the widget."""
         if not Path(media_path).exists():
-            self.q_media = pick.pixmap("empty_thumbnail.png")
-            self.setPixmap(self.q_media)
-            self.is_movie = False
+            self.set_pixmap(None)
             return
         if Path(media_path).suffix.lower() in [".gif", ".webp"]:
             self.q_media = QtGui.QMovie(media_path)
@@ -42,6 +40,14 @@ class ImageWidget(QtWidgets.QLabel):
             self.setPixmap(self.q_media)
             self.is_movie = False
 
+    def set_pixmap(self, pixmap):
+        """Set the loaded pixmap or the empty thumbnail if it is None."""
+        if pixmap is None:
+            pixmap = pick.pixmap("empty_thumbnail.png")
+        self.q_media = pixmap
+        self.setPixmap(self.q_media)
+        self.is_movie = False
+
     # start playing the movie if the mouse is over the widget
     def enterEvent(self, _):
         if self.is_movie:
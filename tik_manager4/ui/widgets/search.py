@@ -0,0 +1,78 @@
+"""Global search box over the project catalog."""
+
+from tik_manager4.ui.Qt import QtWidgets, QtCore, QtGui
+
+KIND_LABELS = {
+    "subproject": "Subproject",
+    "task": "Task",
+    "work": "Work",
+    "publish": "Publish",
+}
+
+
+class GlobalSearchBox(QtWidgets.QLineEdit):
+    """Line edit showing the project search results in a popup."""
+
+    result_selected = QtCore.Signal(dict)
+
+    def __init__(self, project, limit=30, parent=None):
+        """Initialize the search box.
+
+        Args:
+            project (Project): The project object to search.
+            limit (int): Maximum number of results to show.
+            parent (QWidget, optional): The parent widget.
+        """
+        super().__init__(parent)
+        self.project = project
+        self.limit = limit
+        self.setPlaceholderText("Search project...")
+        self.setClearButtonEnabled(True)
+        self.setToolTip(
+            "Search subprojects, tasks, works and publishes by their names, "
+            "notes, creators and metadata values."
+        )
+        self.setMinimumWidth(200)
+
+        self.model = QtGui.QStandardItemModel(self)
+        self.completer = QtWidgets.QCompleter(self.model, self)
+        self.completer.setCompletionMode(
+            QtWidgets.QCompleter.UnfilteredPopupCompletion
+        )
+        self.completer.setWidget(self)
+        self.completer.activated[QtCore.QModelIndex].connect(self._on_activated)
+
+        # wait for the user to stop typing
+        self._timer = QtCore.QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(200)
+        self._timer.timeout.connect(self.search)
+        self.textEdited.connect(self._timer.start)
+
+    def prepare(self):
+        """Bring the search index up to date in the background."""
+        return self.project.reconcile_catalog(background=True)
+
+    def search(self):
+        """Search the project and show the results."""
+        self.model.clear()
+        query = self.text().strip()
+        if not query:
+            self.completer.popup().hide()
+            return
+        for result in self.project.search(query, limit=self.limit):
+            label = KIND_LABELS.get(result["kind"], result["kind"])
+            item = QtGui.QStandardItem(f"{result['name']}  ({label})")
+            item.setToolTip(result["path"] or "")
+            item.setData(result, QtCore.Qt.UserRole)
+            self.model.appendRow(item)
+        if self.model.rowCount():
+            self.completer.complete()
+        else:
+            self.completer.popup().hide()
+
+    def _on_activated(self, index):
+        """Emit the result of the activated row."""
+        result = index.data(QtCore.Qt.UserRole)
+        if result:
+            self.result_selected.emit(result)